@@ -14,6 +14,7 @@ router.register(r'scanned-texts', ScannedTextViewSet, basename="scanned-texts")
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/', include('scanned_text.urls')),
     path('auth/', include('rest_framework.urls', namespace='rest_framework')),
 ]
 if settings.DEBUG:
@@ -0,0 +1,81 @@
+"""Profils de base de données (DB_PROFILE) et réglages des connexions SQLite.
+
+- `sqlite` (défaut) : journal WAL (les lectures ne bloquent plus l'écriture en
+  cours), synchronous=NORMAL (pas de fsync à chaque commit en WAL), mmap et
+  busy_timeout, transactions IMMEDIATE (le verrou d'écriture est pris dès le
+  BEGIN: un écrivain concurrent attend busy_timeout au lieu d'échouer avec
+  « database is locked »), et connexions persistantes (CONN_MAX_AGE).
+- `postgresql` : pool de connexions psycopg 3 (`psycopg[pool]`) ou connexions
+  persistantes, avec vérification de la connexion avant réutilisation.
+"""
+
+from decouple import config
+
+PROFILES = ("sqlite", "postgresql")
+
+
+def sqlite_pragmas() -> dict:
+    """PRAGMA appliqués à chaque nouvelle connexion SQLite."""
+    return {
+        "journal_mode": config("SQLITE_JOURNAL_MODE", default="WAL"),
+        "synchronous": config("SQLITE_SYNCHRONOUS", default="NORMAL"),
+        "busy_timeout": config("SQLITE_BUSY_TIMEOUT_MS", default=5000, cast=int),
+        "mmap_size": config("SQLITE_MMAP_SIZE", default=256 * 2 ** 20, cast=int),
+    }
+
+
+def databases(base_dir) -> dict:
+    """Valeur de DATABASES pour le profil DB_PROFILE."""
+    profile = config("DB_PROFILE", default="sqlite")
+    if profile not in PROFILES:
+        raise ValueError(f"DB_PROFILE inconnu: {profile} (attendu: {', '.join(PROFILES)})")
+    conn_max_age = config("DB_CONN_MAX_AGE", default=60, cast=int)
+
+    if profile == "postgresql":
+        options = {}
+        if config("POSTGRES_POOL", default=True, cast=bool):
+            options["pool"] = {
+                "min_size": config("POSTGRES_POOL_MIN_SIZE", default=2, cast=int),
+                "max_size": config("POSTGRES_POOL_MAX_SIZE", default=10, cast=int),
+                "timeout": config("POSTGRES_POOL_TIMEOUT", default=10.0, cast=float),
+            }
+            # Le pool remplace les connexions persistantes (incompatibles).
+            conn_max_age = 0
+        return {
+            "default": {
+                "ENGINE": "django.db.backends.postgresql",
+                "NAME": config("POSTGRES_DB", default="syntaiz"),
+                "USER": config("POSTGRES_USER", default="syntaiz"),
+                "PASSWORD": config("POSTGRES_PASSWORD", default=""),
+                "HOST": config("POSTGRES_HOST", default="localhost"),
+                "PORT": config("POSTGRES_PORT", default="5432"),
+                "CONN_MAX_AGE": conn_max_age,
+                "CONN_HEALTH_CHECKS": True,
+                "OPTIONS": options,
+            }
+        }
+
+    options = {
+        # Délai d'attente du verrou côté module sqlite3, aligné sur busy_timeout.
+        "timeout": config("SQLITE_BUSY_TIMEOUT_MS", default=5000, cast=int) / 1000,
+    }
+    transaction_mode = config("SQLITE_TRANSACTION_MODE", default="IMMEDIATE")
+    if transaction_mode:
+        options["transaction_mode"] = transaction_mode
+    return {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": config("SQLITE_PATH", default=str(base_dir / "db.sqlite3")),
+            "CONN_MAX_AGE": conn_max_age,
+            "OPTIONS": options,
+        }
+    }
+
+
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Récepteur de `connection_created`: applique `sqlite_pragmas()` aux connexions SQLite."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name} = {value}")
@@ -2,6 +2,8 @@ import os
 from pathlib import Path
 from decouple import config
 
+from APP.db import databases
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -31,9 +33,13 @@ INSTALLED_APPS = [
 INSTALLED_APPS += [
     'rest_framework',
     'rest_framework.authtoken',
-    'drf_spectacular',
 ]
 
+# Documentation OpenAPI (/api/schema/, Swagger, Redoc); False en production accélère le démarrage des workers
+API_DOCS_ENABLED = config('API_DOCS_ENABLED', default=True, cast=bool)
+if API_DOCS_ENABLED:
+    INSTALLED_APPS += ['drf_spectacular']
+
 
 INSTALLED_APPS += [
     'account',
@@ -41,6 +47,7 @@ INSTALLED_APPS += [
 ]
 
 MIDDLEWARE = [
+    'scanned_text.middleware.metrics_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,6 +55,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'scanned_text.middleware.llm_request_budget_middleware',
+    'scanned_text.middleware.token_usage_middleware',
 ]
 
 ROOT_URLCONF = 'APP.urls'
@@ -75,18 +84,11 @@ WSGI_APPLICATION = 'APP.wsgi.application'
 
 AUTH_USER_MODEL = "account.User"
 
-os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "true"
-
-
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Profil DB_PROFILE: `sqlite` (WAL, connexions persistantes) ou `postgresql` (pool), voir APP/db.py
+DATABASES = databases(BASE_DIR)
 
 ALLOWED_HOSTS = [
     '127.0.0.1',
@@ -164,16 +166,23 @@ SPECTACULAR_SETTINGS = {
 REST_FRAMEWORK = {
     # "EXCEPTION_HANDLER": "exceptions_hog.exception_handler",
     #'EXCEPTION_HANDLER': 'account.core.exception_handler.custom_exception_handler',
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'EXCEPTION_HANDLER': 'scanned_text.exception_handler.metrics_exception_handler',
+    'DEFAULT_SCHEMA_CLASS': (
+        'drf_spectacular.openapi.AutoSchema' if API_DOCS_ENABLED else 'rest_framework.schemas.openapi.AutoSchema'
+    ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'scanned_text.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_RENDERER_CLASSES': [
+        'scanned_text.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'scanned_text.parsers.FastJSONParser',
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
@@ -182,8 +191,78 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_CLASSES": [
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle",
+        "scanned_text.throttling.TokenCostThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "10/second", "user": "30/second"}
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": config('THROTTLE_RATE_ANON', default="10/second"),
+        "user": config('THROTTLE_RATE_USER', default="30/second"),
+        # Budget de tokens LLM par utilisateur (scanned_text.throttling.TokenCostThrottle)
+        "llm_tokens": config('THROTTLE_RATE_LLM_TOKENS', default="200000/day"),
+    }
 }
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Encodage/décodage JSON de l'API avec orjson s'il est installé (scanned_text.renderers.FastJSONRenderer)
+FAST_JSON_ENABLED = config('FAST_JSON_ENABLED', default=True, cast=bool)
+
+# Cache de l'authentification par jeton (scanned_text.helpers.auth_cache)
+AUTH_TOKEN_CACHE_TTL = config('AUTH_TOKEN_CACHE_TTL', default=60, cast=int)  # 0: désactivé
+AUTH_TOKEN_CACHE_SIZE = config('AUTH_TOKEN_CACHE_SIZE', default=10000, cast=int)  # jetons gardés en mémoire de processus
+AUTH_TOKEN_CACHE_ALIAS = config('AUTH_TOKEN_CACHE_ALIAS', default='')  # alias de CACHES (partagé); vide: mémoire de processus
+
+# Cache des résultats IA (scanned_text.helpers.ai_cache)
+AI_CACHE_ENABLED = config('AI_CACHE_ENABLED', default=True, cast=bool)
+AI_CACHE_LRU_SIZE = config('AI_CACHE_LRU_SIZE', default=512, cast=int)
+
+# Compression des textes scannés et résultats IA sous SQLite (scanned_text.helpers.compression)
+TEXT_COMPRESSION = config('TEXT_COMPRESSION', default='auto')  # auto (zstd si installé, sinon zlib), zlib, zstd, none
+TEXT_COMPRESSION_LEVEL = config('TEXT_COMPRESSION_LEVEL', default=0, cast=int)  # 0: niveau par défaut du codec
+TEXT_COMPRESSION_MIN_BYTES = config('TEXT_COMPRESSION_MIN_BYTES', default=256, cast=int)
+TEXT_COMPRESSION_DICTIONARY = config('TEXT_COMPRESSION_DICTIONARY', default=True, cast=bool)
+
+# Création asynchrone des textes scannés (202 + manage.py process_scanned_jobs)
+SCANNED_TEXT_ASYNC_INGESTION = config('SCANNED_TEXT_ASYNC_INGESTION', default=False, cast=bool)
+SCANNED_TEXT_JOB_MAX_ATTEMPTS = config('SCANNED_TEXT_JOB_MAX_ATTEMPTS', default=3, cast=int)
+SCANNED_TEXT_JOB_LEASE_SECONDS = config('SCANNED_TEXT_JOB_LEASE_SECONDS', default=300, cast=int)
+
+# Création en masse (POST /api/v1/scanned-texts/bulk/)
+SCANNED_TEXT_BULK_MAX_ITEMS = config('SCANNED_TEXT_BULK_MAX_ITEMS', default=50, cast=int)
+SCANNED_TEXT_BULK_CONCURRENCY = config('SCANNED_TEXT_BULK_CONCURRENCY', default=4, cast=int)
+
+# Réutilisation des quasi-doublons à l'ingestion (scanned_text.helpers.near_duplicates)
+SCANNED_TEXT_DEDUP_ENABLED = config('SCANNED_TEXT_DEDUP_ENABLED', default=True, cast=bool)
+SCANNED_TEXT_DEDUP_THRESHOLD = config('SCANNED_TEXT_DEDUP_THRESHOLD', default=0.6, cast=float)
+SCANNED_TEXT_DEDUP_MIN_WORDS = config('SCANNED_TEXT_DEDUP_MIN_WORDS', default=30, cast=int)
+
+# Coalescence des appels LLM identiques simultanés (scanned_text.helpers.single_flight)
+SINGLE_FLIGHT_TIMEOUT = config('SINGLE_FLIGHT_TIMEOUT', default=120.0, cast=float)
+SINGLE_FLIGHT_CROSS_PROCESS = config('SINGLE_FLIGHT_CROSS_PROCESS', default=True, cast=bool)
+SINGLE_FLIGHT_LOCK_DIR = config('SINGLE_FLIGHT_LOCK_DIR', default=None)
+
+# Classifieur local du detected_type (manage.py train_type_classifier)
+TYPE_CLASSIFIER_ENABLED = config('TYPE_CLASSIFIER_ENABLED', default=True, cast=bool)
+TYPE_CLASSIFIER_PATH = config('TYPE_CLASSIFIER_PATH', default=str(BASE_DIR / 'type_classifier.json'))
+TYPE_CLASSIFIER_MIN_CONFIDENCE = config('TYPE_CLASSIFIER_MIN_CONFIDENCE', default=0.9, cast=float)
+
+# Résilience des appels LLM (scanned_text.helpers.resilience)
+LLM_REQUEST_BUDGET_SECONDS = config('LLM_REQUEST_BUDGET_SECONDS', default=25.0, cast=float)
+LLM_RETRY_ATTEMPTS = config('LLM_RETRY_ATTEMPTS', default=3, cast=int)
+LLM_RETRY_BASE_DELAY = config('LLM_RETRY_BASE_DELAY', default=0.5, cast=float)
+LLM_RETRY_MAX_DELAY = config('LLM_RETRY_MAX_DELAY', default=4.0, cast=float)
+LLM_BREAKER_FAILURES = config('LLM_BREAKER_FAILURES', default=5, cast=int)
+LLM_BREAKER_RESET_SECONDS = config('LLM_BREAKER_RESET_SECONDS', default=30.0, cast=float)
+# Délestage par processus: au-delà de LLM_MAX_IN_FLIGHT appels en cours, ou
+# pendant LLM_SHED_SECONDS quand le p95 des appels des LLM_LATENCY_WINDOW_SECONDS
+# dernières secondes dépasse LLM_LATENCY_SLO_SECONDS, les fallbacks locaux sont
+# servis sans appeler le LLM (0 désactive le critère).
+LLM_MAX_IN_FLIGHT = config('LLM_MAX_IN_FLIGHT', default=32, cast=int)
+LLM_LATENCY_SLO_SECONDS = config('LLM_LATENCY_SLO_SECONDS', default=15.0, cast=float)
+LLM_LATENCY_WINDOW_SECONDS = config('LLM_LATENCY_WINDOW_SECONDS', default=60.0, cast=float)
+LLM_SHED_SECONDS = config('LLM_SHED_SECONDS', default=30.0, cast=float)
+
+# Métriques Prometheus (GET /metrics, scanned_text.helpers.metrics)
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_DIR = config('METRICS_DIR', default=None)  # partagé par les workers d'une machine
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=1.0, cast=float)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # sans jeton, /metrics n'est servi qu'en DEBUG
@@ -14,29 +14,37 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from scanned_text.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(custom_settings={
-            'TITLE': 'SYNTAIZ API',
-            'DESCRIPTION': "API web de SYNTAIZ",
-            'CONTACT': {
-                'name': 'Cauliflow',
-                'url': 'https://cauliflow.com',
-                'email': 'contact@cauliflow.com'
-            },
-            'LICENSE': {
-                'name': "License"
-            },
-            'VERSION': '0.0.1'
-        },), name='schema'),
-    path('', SpectacularSwaggerView.as_view(
-             template_name="swagger-ui.html", url_name="schema"
-        ), name='schema-swagger-ui'),
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='schema-redoc'),
     path('api/v1/', include(('APP.api_urls', 'api'), namespace="baseApi")),
+    path('metrics', metrics_view, name='metrics'),
 ]
+
+if settings.API_DOCS_ENABLED:
+    from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+
+    urlpatterns += [
+        path('api/schema/', SpectacularAPIView.as_view(custom_settings={
+                'TITLE': 'SYNTAIZ API',
+                'DESCRIPTION': "API web de SYNTAIZ",
+                'CONTACT': {
+                    'name': 'Cauliflow',
+                    'url': 'https://cauliflow.com',
+                    'email': 'contact@cauliflow.com'
+                },
+                'LICENSE': {
+                    'name': "License"
+                },
+                'VERSION': '0.0.1'
+            },), name='schema'),
+        path('', SpectacularSwaggerView.as_view(
+                 template_name="swagger-ui.html", url_name="schema"
+            ), name='schema-swagger-ui'),
+        path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='schema-redoc'),
+    ]
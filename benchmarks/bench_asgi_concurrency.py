@@ -0,0 +1,158 @@
+"""Concurrence des vues synchrones (DRF) et asynchrones sous uvicorn.
+
+Lance un faux serveur OpenAI (latence fixe), une base SQLite temporaire et un
+seul worker uvicorn, puis envoie N requêtes simultanées à
+`/api/v1/scanned-texts/{id}/text-explanation/` (vue DRF) et à
+`/api/v1/async/scanned-texts/{id}/text-explanation/` (AsyncOpenAI).
+
+Sous ASGI, Django exécute chaque vue synchrone dans son propre thread: le
+rapport inclut donc le pic de threads du worker, qui croît avec la
+concurrence pour les vues DRF et reste constant pour les vues asynchrones.
+
+    python -m benchmarks.bench_asgi_concurrency --concurrency 50 --llm-latency 0.2
+
+Nécessite `uvicorn`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.fake_openai import FakeOpenAIServer
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SETUP_SCRIPT = """
+from account.models import User
+from rest_framework.authtoken.models import Token
+from scanned_text.models import ScannedText
+user = User.objects.create(username="bench", name="Bench", age=12, classe="6e")
+token = Token.objects.create(user=user)
+st = ScannedText.objects.create(user=user, original_text="Texte", processed_text="La photosynthèse.", detected_type="cours")
+print(token.key, st.id)
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _manage(env: dict, *args: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "manage.py", *args], cwd=BASE_DIR, env=env, check=True, capture_output=True, text=True
+    )
+    return result.stdout
+
+
+def _thread_count(pid: int) -> int | None:
+    """Nombre de threads du worker uvicorn (Linux uniquement)."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+async def _sample_threads(pid: int, peak: list) -> None:
+    while True:
+        count = _thread_count(pid)
+        if count is not None:
+            peak[0] = max(peak[0], count)
+        await asyncio.sleep(0.05)
+
+
+async def _fire(url: str, token: str, concurrency: int, pid: int) -> dict:
+    headers = {"Authorization": f"Token {token}"}
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=300) as client:
+        async def one():
+            start = time.perf_counter()
+            response = await client.get(url)
+            return response.status_code, time.perf_counter() - start
+
+        peak = [0]
+        sampler = asyncio.create_task(_sample_threads(pid, peak))
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+        sampler.cancel()
+
+    latencies = sorted(latency for _, latency in results)
+    return {
+        "ok": sum(1 for status, _ in results if status == 200),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(concurrency / wall, 2),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "worker_peak_threads": peak[0] or None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, FakeOpenAIServer(
+        latency=args.llm_latency, content="Une explication simple."
+    ) as llm:
+        port = _free_port()
+        env = {
+            **os.environ,
+            "SECRET_KEY": "bench",
+            "ENV": "testing",
+            "DEBUG": "False",
+            "SQLITE_PATH": os.path.join(tmp, "bench.sqlite3"),
+            "OPENAI_API_KEY": "sk-bench",
+            "OPENAI_BASE_URL": llm.base_url,
+            "OPENAI_POOL_MAX_CONNECTIONS": str(args.concurrency),
+            "AI_CACHE_ENABLED": "False",
+            "THROTTLE_RATE_USER": "100000/second",
+        }
+        _manage(env, "migrate", "-v0")
+        token, scanned_id = _manage(env, "shell", "-v0", "-c", SETUP_SCRIPT).split()
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "APP.asgi:application", "--port", str(port), "--log-level", "warning"],
+            cwd=BASE_DIR,
+            env=env,
+        )
+        try:
+            base = f"http://127.0.0.1:{port}/api/v1"
+            for _ in range(100):
+                try:
+                    httpx.get(f"{base}/scanned-texts/{scanned_id}/", timeout=1)
+                    break
+                except httpx.HTTPError:
+                    time.sleep(0.1)
+
+            report = {"concurrency": args.concurrency, "llm_latency_s": args.llm_latency}
+            for name, path in (
+                ("sync_drf", f"{base}/scanned-texts/{scanned_id}/text-explanation/"),
+                ("async", f"{base}/async/scanned-texts/{scanned_id}/text-explanation/"),
+            ):
+                report[name] = asyncio.run(_fire(path, token, args.concurrency, server.pid))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
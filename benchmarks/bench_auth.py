@@ -0,0 +1,106 @@
+"""Requêtes SQL et latence par requête API avec le cache d'authentification.
+
+Crée dans une base SQLite temporaire un utilisateur, son jeton et un texte,
+puis appelle chaque endpoint `--requests` fois par le client de test DRF
+(authentification `Authorization: Token ...`), pour chaque configuration :
+
+    off      AUTH_TOKEN_CACHE_TTL=0 (TokenAuthentication: Token JOIN User à chaque requête)
+    local    cache en mémoire du processus
+    shared   cache Django `default` (LocMemCache ici; Redis/memcached en production)
+
+Le rapport donne, par endpoint, le nombre de requêtes SQL par requête API
+(hors première requête, qui remplit le cache) et la latence médiane.
+
+    python -m benchmarks.bench_auth --requests 500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+ENDPOINTS = {
+    "detail": "/api/v1/scanned-texts/{id}/",
+    "list": "/api/v1/scanned-texts/",
+    "words": "/api/v1/scanned-texts/{id}/words-explanation/",
+    "quiz": "/api/v1/scanned-texts/{id}/quiz-from-text/",
+    "async_detail": "/api/v1/async/scanned-texts/{id}/",
+}
+CONFIGS = {"off": {"AUTH_TOKEN_CACHE_TTL": 0}, "local": {}, "shared": {"AUTH_TOKEN_CACHE_ALIAS": "default"}}
+
+
+def _setup(path: str) -> None:
+    os.environ.update({
+        "DJANGO_SETTINGS_MODULE": "APP.settings",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench"),
+        "ENV": "testing",
+        "SQLITE_PATH": path,
+        "METRICS_ENABLED": "False",
+        "THROTTLE_RATE_ANON": "100000/second",
+        "THROTTLE_RATE_USER": "100000/second",
+        "THROTTLE_RATE_LLM_TOKENS": "1000000000/day",
+    })
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="requêtes par endpoint et configuration")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup(os.path.join(tmp, "bench.sqlite3"))
+        from django.core.cache import caches
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext, override_settings
+        from rest_framework.authtoken.models import Token
+        from rest_framework.test import APIClient
+
+        from account.models import User
+        from scanned_text.helpers import auth_cache
+        from scanned_text.models import ScannedText
+
+        user = User.objects.create(username="bench", name="Bench", age=12, classe="CM2")
+        token = Token.objects.create(user=user)
+        text = ScannedText.objects.create(
+            user=user, original_text="Les plantes utilisent la lumière.",
+            processed_text="Les plantes vertes utilisent l'énergie lumineuse pour fabriquer leur glucose.",
+            detected_type="cours",
+        )
+        client = APIClient(SERVER_NAME="localhost")
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        report = {"requests": args.requests, "endpoints": {}}
+        for name, pattern in ENDPOINTS.items():
+            url = pattern.format(id=text.id)
+            results = report["endpoints"][name] = {}
+            for config, overrides in CONFIGS.items():
+                auth_cache.clear()
+                caches["default"].clear()
+                with override_settings(**overrides):
+                    assert client.get(url).status_code == 200
+                    samples = []
+                    with CaptureQueriesContext(connection) as queries:
+                        for _ in range(args.requests):
+                            start = time.perf_counter()
+                            client.get(url)
+                            samples.append(time.perf_counter() - start)
+                results[config] = {
+                    "queries_per_request": round(len(queries) / args.requests, 2),
+                    "p50_ms": round(statistics.median(samples) * 1000, 3),
+                }
+            results["queries_saved"] = round(
+                results["off"]["queries_per_request"] - results["local"]["queries_per_request"], 2
+            )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
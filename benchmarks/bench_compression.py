@@ -0,0 +1,180 @@
+"""Compression des textes scannés: place disque, octets lus et coût CPU.
+
+Remplit une base SQLite temporaire de `--pages` textes (page OCR brute et copie
+nettoyée, mots tirés du lexique `scanned_text/helpers/data/fr_frequency.txt`
+selon leur rang), stockés en clair, puis les réécrit avec chaque codec
+disponible comme le ferait `manage.py compress_texts` :
+
+    plain       textes en clair (TEXT_COMPRESSION=none)
+    zlib        zlib niveau 6
+    zlib+dict   zlib avec un dictionnaire entraîné (train_compression_dictionary)
+    zstd, zstd+dict   si le paquet `zstandard` est installé
+
+Pour chaque étape, après VACUUM : taille du fichier, octets stockés dans les
+colonnes texte (ce qu'un parcours lit sur disque), temps d'un parcours complet
+des deux colonnes par l'ORM, d'une lecture par clé, et coût unitaire de la
+compression et de la décompression.
+
+Le texte synthétique (mots indépendants) se compresse moins bien qu'un vrai
+texte: les taux mesurés sont un minorant.
+
+    python -m benchmarks.bench_compression --pages 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+LEXICON = Path(__file__).resolve().parent.parent / "scanned_text" / "helpers" / "data" / "fr_frequency.txt"
+
+
+def _setup(path: str) -> None:
+    os.environ.update({
+        "DJANGO_SETTINGS_MODULE": "APP.settings",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench"),
+        "ENV": "testing",
+        "SQLITE_PATH": path,
+        "METRICS_ENABLED": "False",
+        "TEXT_COMPRESSION": "none",
+    })
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def _vocabulary():
+    words = [line.split()[0] for line in LEXICON.read_text(encoding="utf-8").splitlines() if not line.startswith("#")]
+    return words, [1 / (rank + 1) for rank in range(len(words))]
+
+
+def _page(rng, words, weights) -> str:
+    sentences = []
+    for _ in range(rng.randint(15, 30)):
+        sentence = " ".join(rng.choices(words, weights=weights, k=rng.randint(8, 20)))
+        sentences.append(sentence.capitalize() + rng.choice(".....?!:"))
+    return "\n".join(" ".join(sentences[i:i + 4]) for i in range(0, len(sentences), 4))
+
+
+def _us(samples) -> float:
+    return round(statistics.median(samples) * 1e6, 1)
+
+
+def _measure(path, connection, sample_ids, stored_values, label) -> dict:
+    from scanned_text.helpers import compression, search
+    from scanned_text.management.commands.compress_texts import stored_bytes
+    from scanned_text.models import ScannedText
+
+    with connection.cursor() as cursor:
+        cursor.execute("VACUUM")
+    # VACUUM renumérote les rowid: l'index FTS5 doit suivre.
+    search.rebuild(connection)
+    with connection.cursor() as cursor:
+        cursor.execute("VACUUM")
+
+    start = time.perf_counter()
+    chars = sum(
+        len(original) + len(processed or "")
+        for original, processed in ScannedText.objects.values_list("original_text", "processed_text").iterator(2000)
+    )
+    scan_s = time.perf_counter() - start
+
+    get_samples = []
+    for pk in sample_ids:
+        start = time.perf_counter()
+        ScannedText.objects.only("original_text", "processed_text").get(pk=pk)
+        get_samples.append(time.perf_counter() - start)
+
+    texts = [compression.decompress(value) for value in stored_values]
+    compress_samples, decompress_samples = [], []
+    for text in texts:
+        start = time.perf_counter()
+        value = compression.compress(text)
+        compress_samples.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        compression.decompress(value)
+        decompress_samples.append(time.perf_counter() - start)
+
+    stored = stored_bytes(connection, ScannedText, ["original_text", "processed_text"])
+    return {
+        "stage": label,
+        "db_mb": round(os.path.getsize(path) / 2 ** 20, 1),
+        "stored_mb": round(stored / 2 ** 20, 1),
+        "scan_ms": round(scan_s * 1000),
+        "scan_chars": chars,
+        "get_us_p50": _us(get_samples),
+        "compress_us_p50": _us(compress_samples),
+        "decompress_us_p50": _us(decompress_samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20000)
+    parser.add_argument("--samples", type=int, default=500, help="lectures par clé et valeurs chronométrées")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words, weights = _vocabulary()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+        _setup(path)
+        from django.conf import settings
+        from django.core.management import call_command
+        from django.db import connection, transaction
+
+        from account.models import User
+        from scanned_text.helpers import compression
+        from scanned_text.management.commands.compress_texts import COLUMNS
+        from scanned_text.models import ScannedText
+
+        user = User.objects.create(username="bench", name="Bench", age=12)
+        for offset in range(0, args.pages, 1000):
+            batch = []
+            for _ in range(min(1000, args.pages - offset)):
+                page = _page(rng, words, weights)
+                batch.append(ScannedText(
+                    user=user, original_text=page, processed_text=" ".join(page.split()), detected_type="texte"
+                ))
+            with transaction.atomic():
+                ScannedText.objects.bulk_create(batch)
+        sample_ids = rng.sample(list(ScannedText.objects.values_list("id", flat=True)), args.samples)
+        stored_values = list(ScannedText.objects.filter(id__in=sample_ids).values_list("original_text", flat=True))
+
+        stages = [("plain", None, False), ("zlib", "zlib", False), ("zlib+dict", "zlib", True)]
+        if compression.zstandard is not None:
+            stages += [("zstd", "zstd", False), ("zstd+dict", "zstd", True)]
+        report = {"pages": args.pages, "stages": []}
+        for label, codec, with_dictionary in stages:
+            if codec is not None:
+                settings.TEXT_COMPRESSION = codec
+                settings.TEXT_COMPRESSION_DICTIONARY = with_dictionary
+                if with_dictionary:
+                    call_command("train_compression_dictionary", stdout=open(os.devnull, "w"))
+                compression.reset()
+                start = time.perf_counter()
+                for model, fields in COLUMNS:
+                    compression.recompress(connection, model, fields)
+                recompress_s = time.perf_counter() - start
+            result = _measure(path, connection, sample_ids, stored_values, label)
+            if codec is not None:
+                result["recompress_s"] = round(recompress_s, 1)
+            report["stages"].append(result)
+
+    plain = report["stages"][0]
+    for stage in report["stages"][1:]:
+        stage["stored_ratio"] = round(plain["stored_mb"] / stage["stored_mb"], 2)
+        stage["db_ratio"] = round(plain["db_mb"] / stage["db_mb"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Écritures concurrentes en base: profil par défaut de Django vs profil DB_PROFILE.
+
+Plusieurs processus (workers) de plusieurs threads enchaînent chacun des
+« requêtes » de création: lecture de l'utilisateur puis insertion d'un
+ScannedText dans une transaction, entourées de `close_old_connections()`
+comme le fait Django en début et fin de requête (CONN_MAX_AGE).
+
+Profil `sqlite` (base temporaire) :
+    legacy  journal DELETE, synchronous FULL, transactions DEFERRED, sans connexion persistante
+    tuned   réglages de APP/db.py (WAL, NORMAL, mmap, IMMEDIATE, CONN_MAX_AGE)
+
+Profil `postgresql` (base POSTGRES_* existante, `psycopg[pool]` requis) :
+    no_pool   une connexion par requête
+    pool      pool psycopg de APP/db.py
+
+    python -m benchmarks.bench_db_writes --processes 4 --threads 4 --writes 200
+    POSTGRES_HOST=localhost python -m benchmarks.bench_db_writes --profile postgresql
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_asgi_concurrency import _manage
+
+SCENARIOS = {
+    "sqlite": {
+        "legacy": {
+            "SQLITE_JOURNAL_MODE": "DELETE",
+            "SQLITE_SYNCHRONOUS": "FULL",
+            "SQLITE_MMAP_SIZE": "0",
+            "SQLITE_TRANSACTION_MODE": "",
+            "DB_CONN_MAX_AGE": "0",
+        },
+        "tuned": {},
+    },
+    "postgresql": {
+        "no_pool": {"POSTGRES_POOL": "False", "DB_CONN_MAX_AGE": "0"},
+        "pool": {},
+    },
+}
+
+SETUP_SCRIPT = """
+from account.models import User
+user, _ = User.objects.get_or_create(username="bench-writer", defaults={"name": "Bench", "age": 12})
+print(user.pk)
+"""
+
+
+def _writer(env: dict, user_pk: str, threads: int, writes: int, results) -> None:
+    os.environ.update(env)
+    import django
+
+    django.setup()
+    from django.db import OperationalError, close_old_connections, transaction
+
+    from account.models import User
+    from scanned_text.models import ScannedText
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def run():
+        local_latencies, local_errors = [], 0
+        for _ in range(writes):
+            start = time.perf_counter()
+            close_old_connections()
+            try:
+                user = User.objects.get(pk=user_pk)
+                with transaction.atomic():
+                    ScannedText.objects.create(
+                        user=user, original_text="Texte brut", processed_text="Texte traité", detected_type="cours"
+                    )
+            except OperationalError:
+                local_errors += 1
+            finally:
+                close_old_connections()
+            local_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_latencies)
+            errors.append(local_errors)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put((latencies, sum(errors)))
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+def _run_scenario(env: dict, user_pk: str, args) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=_writer, args=(env, user_pk, args.threads, args.writes, results))
+        for _ in range(args.processes)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    # Lire avant join(): un processus ne se termine pas tant que sa file n'est pas vidée.
+    collected = [results.get() for _ in processes]
+    wall = time.perf_counter() - start
+    for process in processes:
+        process.join()
+
+    latencies = sorted(latency for batch, _ in collected for latency in batch)
+    errors = sum(count for _, count in collected)
+    return {
+        "writes": len(latencies),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_wps": round((len(latencies) - errors) / wall, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=tuple(SCENARIOS), default="sqlite")
+    parser.add_argument("--processes", type=int, default=4, help="workers (processus)")
+    parser.add_argument("--threads", type=int, default=4, help="threads par worker")
+    parser.add_argument("--writes", type=int, default=200, help="écritures par thread")
+    args = parser.parse_args()
+
+    report = {"profile": args.profile, "processes": args.processes, "threads": args.threads, "scenarios": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, overrides in SCENARIOS[args.profile].items():
+            env = {
+                **os.environ,
+                "DJANGO_SETTINGS_MODULE": "APP.settings",
+                "SECRET_KEY": os.environ.get("SECRET_KEY", "bench"),
+                "ENV": "testing",
+                "DB_PROFILE": args.profile,
+                "METRICS_ENABLED": "False",
+                **overrides,
+            }
+            if args.profile == "sqlite":
+                # Une base neuve par scénario: le mode WAL est mémorisé dans le fichier.
+                env["SQLITE_PATH"] = os.path.join(tmp, f"{name}.sqlite3")
+            _manage(env, "migrate", "-v0")
+            user_pk = _manage(env, "shell", "-v0", "-c", SETUP_SCRIPT).split()[-1]
+            report["scenarios"][name] = _run_scenario(env, user_pk, args)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Encodage et décodage JSON des listes de ScannedTextSerializer.
+
+Crée dans une base SQLite temporaire `max(--rows)` textes d'environ
+`--chars` caractères (mots tirés du lexique `fr_frequency.txt`, avec accents
+et guillemets français), sérialise des pages de `--rows` textes au format de
+`GET /api/v1/scanned-texts/` puis mesure, pour chaque taille de page :
+
+    render    JSONRenderer de DRF (json standard) contre FastJSONRenderer (orjson)
+    parse     JSONParser de DRF contre FastJSONParser, sur le corps produit
+              (au-delà de ORJSON_MAX_BODY, les deux passent par json)
+    serialize ScannedTextSerializer(many=True).data, pour situer le gain
+              dans le coût total d'une réponse
+
+et vérifie que les deux renderers produisent les mêmes octets. `post` mesure
+le décodage du corps d'un `POST /api/v1/scanned-texts/` (une page).
+
+    python -m benchmarks.bench_json --rows 50,200
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+LEXICON = Path(__file__).resolve().parent.parent / "scanned_text" / "helpers" / "data" / "fr_frequency.txt"
+
+
+def _setup(path: str) -> None:
+    os.environ.update({
+        "DJANGO_SETTINGS_MODULE": "APP.settings",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench"),
+        "ENV": "testing",
+        "SQLITE_PATH": path,
+        "METRICS_ENABLED": "False",
+    })
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def _text(rng, words, chars: int) -> str:
+    parts, size = [], 0
+    while size < chars:
+        sentence = " ".join(rng.choices(words, k=rng.randint(8, 20))).capitalize()
+        sentence = rng.choice(["{}.", "« {} »", "{} ?", "{} :"]).format(sentence)
+        parts.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(parts)
+
+
+def _us(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1e6, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="50,200", help="tailles de page, séparées par des virgules")
+    parser.add_argument("--chars", type=int, default=2000, help="taille approximative de chaque texte")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.rows.split(",")]
+
+    rng = random.Random(args.seed)
+    words = [line.split()[0] for line in LEXICON.read_text(encoding="utf-8").splitlines() if not line.startswith("#")]
+    words = words[:5000]
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup(os.path.join(tmp, "bench.sqlite3"))
+        from rest_framework.parsers import JSONParser
+        from rest_framework.renderers import JSONRenderer
+
+        from account.models import User
+        from scanned_text import renderers
+        from scanned_text.models import ScannedText
+        from scanned_text.parsers import FastJSONParser
+        from scanned_text.renderers import FastJSONRenderer
+        from scanned_text.serializers import ScannedTextSerializer
+
+        if renderers.orjson is None:
+            raise SystemExit("orjson n'est pas installé: pip install orjson")
+        user = User.objects.create(username="bench", name="Bench", age=12, classe="CM2")
+        ScannedText.objects.bulk_create(
+            ScannedText(
+                user=user,
+                original_text=_text(rng, words, args.chars),
+                processed_text=_text(rng, words, args.chars),
+                detected_type="texte",
+            )
+            for _ in range(max(sizes))
+        )
+        report = {"orjson": renderers.orjson.__version__, "chars": args.chars, "pages": []}
+        for size in sizes:
+            texts = list(ScannedText.objects.select_related("user").order_by("-createdAt", "-id")[:size])
+            data = {"next": None, "previous": None, "results": ScannedTextSerializer(texts, many=True).data}
+            standard, fast = JSONRenderer(), FastJSONRenderer()
+            body = standard.render(data)
+            assert fast.render(data) == body, "sortie différente de celle de DRF"
+            assert FastJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(io.BytesIO(body))
+
+            page = {
+                "rows": size,
+                "body_kb": round(len(body) / 1024, 1),
+                "serialize_us": _us(lambda: ScannedTextSerializer(texts, many=True).data, max(args.repeat // 10, 5)),
+                "render_json_us": _us(lambda: standard.render(data), args.repeat),
+                "render_orjson_us": _us(lambda: fast.render(data), args.repeat),
+                "parse_json_us": _us(lambda: JSONParser().parse(io.BytesIO(body)), args.repeat),
+                "parse_orjson_us": _us(lambda: FastJSONParser().parse(io.BytesIO(body)), args.repeat),
+            }
+            page["render_speedup"] = round(page["render_json_us"] / page["render_orjson_us"], 1)
+            page["parse_speedup"] = round(page["parse_json_us"] / page["parse_orjson_us"], 1)
+            report["pages"].append(page)
+        post = json.dumps({"original_text": _text(rng, words, args.chars)}, ensure_ascii=False).encode()
+        report["post"] = {
+            "body_kb": round(len(post) / 1024, 1),
+            "parse_json_us": _us(lambda: JSONParser().parse(io.BytesIO(post)), args.repeat * 10),
+            "parse_orjson_us": _us(lambda: FastJSONParser().parse(io.BytesIO(post)), args.repeat * 10),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
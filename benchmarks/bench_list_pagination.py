@@ -0,0 +1,135 @@
+"""Latence de `GET /api/v1/scanned-texts/` quand la table grandit.
+
+Remplit une base SQLite temporaire par paliers (`--sizes`), les textes étant
+répartis entre `--users` utilisateurs, et mesure à chaque palier :
+
+    first     première page (KeysetPagination, index user/createdAt/id)
+    deep      page située au milieu de l'historique de l'utilisateur (curseur)
+    legacy    ancienne liste non paginée (tous les textes, sans select_related),
+              mesurée seulement jusqu'à `--legacy-max` lignes
+
+Les requêtes passent par le client de test DRF (authentification par jeton,
+filtrage, sérialisation), dans le processus courant.
+
+    python -m benchmarks.bench_list_pagination --sizes 10000,100000,300000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+
+def _setup(path: str) -> None:
+    os.environ.update({
+        "DJANGO_SETTINGS_MODULE": "APP.settings",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench"),
+        "ENV": "testing",
+        "SQLITE_PATH": path,
+        "METRICS_ENABLED": "False",
+        "THROTTLE_RATE_ANON": "100000/second",
+        "THROTTLE_RATE_USER": "100000/second",
+    })
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def _fill(users, start: int, stop: int, origin) -> None:
+    from scanned_text.models import ScannedText
+
+    batch = []
+    for i in range(start, stop):
+        batch.append(ScannedText(
+            user=users[i % len(users)],
+            original_text=f"Texte {i}",
+            processed_text=f"Texte traité {i}",
+            detected_type="cours" if i % 3 else "exercice",
+            createdAt=origin + timedelta(seconds=i),
+        ))
+        if len(batch) == 5000:
+            ScannedText.objects.bulk_create(batch)
+            batch = []
+    ScannedText.objects.bulk_create(batch)
+
+
+def _timed(call, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = call()
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,300000", help="paliers de lignes, séparés par des virgules")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--legacy-max", type=int, default=20000)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup(os.path.join(tmp, "bench.sqlite3"))
+        from django.utils import timezone
+        from rest_framework.authtoken.models import Token
+        from rest_framework.test import APIClient
+
+        from account.models import User
+        from scanned_text.models import ScannedText
+        from scanned_text.pagination import encode_position
+        from scanned_text.serializers import ScannedTextSerializer
+
+        users = User.objects.bulk_create(
+            User(username=f"bench-{i}", name="Bench", age=12) for i in range(args.users)
+        )
+        token = Token.objects.create(user=users[0])
+        client = APIClient(SERVER_NAME="localhost")
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        url = "/api/v1/scanned-texts/"
+        origin = timezone.now() - timedelta(days=365)
+
+        def legacy():
+            # Comportement d'avant: toute la table, une requête User par ligne.
+            from rest_framework.response import Response
+
+            rows = ScannedText.objects.all().order_by("-createdAt")
+            return Response(ScannedTextSerializer(rows, many=True).data)
+
+        report = {"users": args.users, "page_size": args.page_size, "sizes": {}}
+        filled = 0
+        for size in sizes:
+            _fill(users, filled, size, origin)
+            filled = size
+            own = ScannedText.objects.filter(user=users[0])
+            middle = own.count() // 2
+            pivot = own.order_by("-createdAt", "-id")[middle]
+            deep_url = f"{url}?cursor={encode_position(pivot.createdAt, pivot.id)}"
+
+            row = {
+                "first": _timed(lambda: client.get(url, {"page_size": args.page_size}), args.repeat),
+                "deep": _timed(lambda: client.get(deep_url, {"page_size": args.page_size}), args.repeat),
+            }
+            if size <= args.legacy_max:
+                row["legacy"] = _timed(legacy, max(1, args.repeat // 10))
+            report["sizes"][size] = row
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
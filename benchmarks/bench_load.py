@@ -0,0 +1,434 @@
+"""Benchmark de charge de bout en bout de l'API (uvicorn + faux serveur OpenAI).
+
+Lance un faux serveur OpenAI (latence tirée d'une distribution, taux
+d'erreurs et tokens configurables), une base SQLite temporaire peuplée
+d'utilisateurs avec leur jeton, et l'application sous uvicorn. Des
+utilisateurs virtuels (boucle fermée: une requête à la fois chacun)
+enchaînent pendant `--duration` secondes un mélange pondéré de requêtes :
+
+    create  POST /scanned-texts/                (traitement OCR par le LLM)
+    list    GET  /scanned-texts/
+    words   GET  /scanned-texts/{id}/words-explanation/
+    text    GET  /scanned-texts/{id}/text-explanation/
+    steps   GET  /scanned-texts/{id}/exercise-steps/
+    quiz    GET  /scanned-texts/{id}/quiz-from-text/
+
+Le rapport JSON (débit, p50/p95/p99 par endpoint, saturation des workers:
+CPU et threads, appels vus par le faux LLM) porte le commit courant; avec
+`--baseline`, il inclut l'écart relatif à un rapport précédent.
+
+    python -m benchmarks.bench_load --concurrency 32 --duration 30 --workers 2 \\
+        --llm-latency 0.8 --llm-distribution lognormal --llm-error-rate 0.02 --output bench.json
+    python -m benchmarks.bench_load --output bench-new.json --baseline bench.json
+
+Nécessite `uvicorn`. La mesure CPU/threads des workers lit /proc (Linux).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.bench_asgi_concurrency import BASE_DIR, _free_port, _manage
+from benchmarks.fake_openai import DISTRIBUTIONS, FakeOpenAIServer, pedagogic_content
+
+ENDPOINTS = ("create", "list", "words", "text", "steps", "quiz")
+DERIVED_PATHS = {
+    "words": "words-explanation",
+    "text": "text-explanation",
+    "steps": "exercise-steps",
+    "quiz": "quiz-from-text",
+}
+
+SAMPLE_TEXT = (
+    "La photosynthèse est le processus biochimique par lequel les végétaux chlorophylliens "
+    "convertissent l'énergie lumineuse en énergie chimique. Exercice : explique le rôle de la "
+    "chlorophylle et calcule la quantité de dioxyde de carbone absorbée en une journée."
+)
+
+SETUP_SCRIPT = """
+import json
+from account.models import User
+from rest_framework.authtoken.models import Token
+from scanned_text.models import ScannedText
+users = []
+for i in range({users}):
+    user = User.objects.create(username=f"bench{{i}}", name="Bench", age=12, classe="6e")
+    token = Token.objects.create(user=user)
+    texts = [
+        str(ScannedText.objects.create(
+            user=user, original_text={text!r}, processed_text={text!r}, detected_type="exercice"
+        ).id)
+        for _ in range({texts})
+    ]
+    users.append({{"token": token.key, "texts": texts}})
+print(json.dumps(users))
+"""
+
+
+def _parse_mix(value: str) -> dict:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Endpoint inconnu: {name} (attendu: {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    # Rang le plus proche, comme les autres benchmarks du dossier.
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+def _process_tree(pid: int) -> list[int]:
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            with open(f"/proc/{current}/task/{current}/children") as children:
+                pending.extend(int(child) for child in children.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def _is_helper_process(pid: int) -> bool:
+    # multiprocessing lance un resource_tracker à côté des workers uvicorn.
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as cmdline:
+            return b"resource_tracker" in cmdline.read()
+    except OSError:
+        return True
+
+
+def _proc_sample(pid: int) -> tuple[float, int, int] | None:
+    """(secondes CPU, threads, RSS en octets) du processus, ou None hors Linux."""
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as status:
+            threads = next(int(line.split()[1]) for line in status if line.startswith("Threads:"))
+    except (OSError, StopIteration):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    cpu = (int(fields[11]) + int(fields[12])) / ticks
+    rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+    return cpu, threads, rss
+
+
+class SaturationSampler:
+    """Échantillonne CPU, threads et mémoire des workers uvicorn pendant la charge."""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.cpu_start: dict[int, float] = {}
+        self.cpu_last: dict[int, float] = {}
+        self.peak_threads: dict[int, int] = defaultdict(int)
+        self.peak_rss: dict[int, int] = defaultdict(int)
+
+    def sample(self) -> None:
+        for pid in _process_tree(self.pid):
+            if _is_helper_process(pid):
+                continue
+            values = _proc_sample(pid)
+            if values is None:
+                continue
+            cpu, threads, rss = values
+            self.cpu_start.setdefault(pid, cpu)
+            self.cpu_last[pid] = cpu
+            self.peak_threads[pid] = max(self.peak_threads[pid], threads)
+            self.peak_rss[pid] = max(self.peak_rss[pid], rss)
+
+    async def run(self) -> None:
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def report(self, wall: float, workers: int) -> dict:
+        if not self.cpu_last:
+            return {"available": False}
+        # Le processus maître d'uvicorn (avec --workers) ne traite pas de requêtes.
+        worker_pids = [pid for pid in self.cpu_last if pid != self.pid] or [self.pid]
+        per_worker = {
+            str(pid): {
+                "cpu_utilization": round((self.cpu_last[pid] - self.cpu_start[pid]) / wall, 3),
+                "peak_threads": self.peak_threads[pid],
+                "peak_rss_mb": round(self.peak_rss[pid] / 2 ** 20, 1),
+            }
+            for pid in worker_pids
+        }
+        cpu = sum(self.cpu_last[pid] - self.cpu_start[pid] for pid in worker_pids)
+        return {
+            "available": True,
+            "cpu_seconds": round(cpu, 3),
+            # 1.0 = chaque worker a occupé un cœur à plein temps (boucle d'événements saturée).
+            "cpu_saturation": round(cpu / wall / max(1, workers), 3),
+            "peak_threads": max(w["peak_threads"] for w in per_worker.values()),
+            "workers": per_worker,
+        }
+
+
+class LoadRunner:
+    def __init__(self, base: str, users: list[dict], mix: dict, api: str, seed: int):
+        self.base = base
+        self.users = users
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.prefix = "/async" if api == "async" else ""
+        self.random = random.Random(seed)
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+        self.in_flight = 0
+        self.in_flight_samples: list[int] = []
+
+    def _request(self, client: httpx.AsyncClient, user: dict, name: str):
+        headers = {"Authorization": f"Token {user['token']}"}
+        if name == "create":
+            return client.post(
+                f"{self.base}{self.prefix}/scanned-texts/", json={"original_text": SAMPLE_TEXT}, headers=headers
+            )
+        if name == "list":
+            # Pas de liste côté API async: toujours la vue DRF.
+            return client.get(f"{self.base}/scanned-texts/", headers=headers)
+        text_id = self.random.choice(user["texts"])
+        return client.get(f"{self.base}{self.prefix}/scanned-texts/{text_id}/{DERIVED_PATHS[name]}/", headers=headers)
+
+    async def _virtual_user(self, client: httpx.AsyncClient, user: dict, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            name = self.random.choices(self.names, self.weights)[0]
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                response = await self._request(client, user, name)
+                status = str(response.status_code)
+            except httpx.HTTPError as exc:
+                status = type(exc).__name__
+            finally:
+                self.in_flight -= 1
+            self.latencies[name].append(time.perf_counter() - start)
+            self.statuses[name][status] += 1
+
+    async def _sample_in_flight(self) -> None:
+        while True:
+            self.in_flight_samples.append(self.in_flight)
+            await asyncio.sleep(0.1)
+
+    async def run(self, concurrency: int, duration: float, sampler: SaturationSampler) -> float:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+            deadline = time.perf_counter() + duration
+            background = [asyncio.create_task(sampler.run()), asyncio.create_task(self._sample_in_flight())]
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(self._virtual_user(client, self.users[i % len(self.users)], deadline) for i in range(concurrency))
+            )
+            wall = time.perf_counter() - start
+            for task in background:
+                task.cancel()
+            sampler.sample()
+        return wall
+
+    def report(self, wall: float) -> dict:
+        endpoints = {}
+        for name in self.names:
+            ordered = sorted(self.latencies[name])
+            if not ordered:
+                continue
+            statuses = self.statuses[name]
+            ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+            endpoints[name] = {
+                "requests": len(ordered),
+                "ok": ok,
+                "error_rate": round(1 - ok / len(ordered), 4),
+                "statuses": dict(sorted(statuses.items())),
+                "throughput_rps": round(len(ordered) / wall, 2),
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+                "p50_ms": round(_percentile(ordered, 0.50) * 1000, 1),
+                "p95_ms": round(_percentile(ordered, 0.95) * 1000, 1),
+                "p99_ms": round(_percentile(ordered, 0.99) * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1),
+            }
+        everything = sorted(latency for values in self.latencies.values() for latency in values)
+        ok = sum(endpoint["ok"] for endpoint in endpoints.values())
+        total = {
+            "requests": len(everything),
+            "ok": ok,
+            "throughput_rps": round(len(everything) / wall, 2),
+            "ok_throughput_rps": round(ok / wall, 2),
+            "p50_ms": round(_percentile(everything, 0.50) * 1000, 1) if everything else None,
+            "p95_ms": round(_percentile(everything, 0.95) * 1000, 1) if everything else None,
+            "p99_ms": round(_percentile(everything, 0.99) * 1000, 1) if everything else None,
+            "mean_in_flight": round(sum(self.in_flight_samples) / max(1, len(self.in_flight_samples)), 1),
+        }
+        return {"total": total, "endpoints": endpoints}
+
+
+def _compare(report: dict, baseline: dict) -> dict:
+    """Écart relatif (en %) du débit et des percentiles par rapport à `baseline`."""
+
+    def delta(new, old):
+        if new is None or not old:
+            return None
+        return round((new - old) / old * 100, 1)
+
+    sections = {"total": (report["total"], baseline.get("total", {}))}
+    for name, stats in report["endpoints"].items():
+        sections[name] = (stats, baseline.get("endpoints", {}).get(name, {}))
+    return {
+        "baseline_commit": baseline.get("meta", {}).get("commit"),
+        **{
+            name: {
+                f"{key}_delta_pct": delta(new.get(key), old.get(key))
+                for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+            }
+            for name, (new, old) in sections.items()
+        },
+    }
+
+
+def _wait_ready(base: str, token: str) -> None:
+    for _ in range(200):
+        try:
+            httpx.get(f"{base}/scanned-texts/", headers={"Authorization": f"Token {token}"}, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError("Le serveur uvicorn n'a pas démarré.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32, help="utilisateurs virtuels simultanés")
+    parser.add_argument("--duration", type=float, default=20.0, help="durée de la charge (s)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="durée de l'échauffement, non mesuré (s)")
+    parser.add_argument("--workers", type=int, default=1, help="workers uvicorn")
+    parser.add_argument("--api", choices=("sync", "async"), default="sync", help="vues DRF ou vues async")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("create=1,list=3,words=1,text=1,steps=1,quiz=1"))
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--texts-per-user", type=int, default=5)
+    parser.add_argument("--ai-cache", action="store_true", help="active le cache IA (désactivé par défaut)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="latence moyenne du faux LLM (s)")
+    parser.add_argument("--llm-distribution", choices=DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--llm-spread", type=float, default=0.5, help="± (uniform) ou sigma (lognormal)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-prompt-tokens", type=int, default=None, help="fixe les tokens d'entrée déclarés")
+    parser.add_argument("--llm-completion-tokens", type=int, default=None, help="fixe les tokens de sortie déclarés")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="fichier JSON du rapport (stdout sinon)")
+    parser.add_argument("--baseline", default=None, help="rapport précédent à comparer")
+    args = parser.parse_args()
+
+    llm = FakeOpenAIServer(
+        latency=args.llm_latency,
+        distribution=args.llm_distribution,
+        spread=args.llm_spread,
+        error_rate=args.llm_error_rate,
+        prompt_tokens=args.llm_prompt_tokens,
+        completion_tokens=args.llm_completion_tokens,
+        content=pedagogic_content,
+        seed=args.seed,
+    )
+    with tempfile.TemporaryDirectory() as tmp, llm:
+        port = _free_port()
+        env = {
+            **os.environ,
+            "SECRET_KEY": "bench",
+            # `production` fait passer la création par le LLM (voir helpers.processing).
+            "ENV": "production",
+            "DEBUG": "False",
+            "SQLITE_PATH": os.path.join(tmp, "bench.sqlite3"),
+            "METRICS_DIR": os.path.join(tmp, "metrics"),
+            "TYPE_CLASSIFIER_PATH": os.path.join(tmp, "type_classifier.json"),
+            "OPENAI_API_KEY": "sk-bench",
+            "OPENAI_BASE_URL": llm.base_url,
+            "OPENAI_POOL_MAX_CONNECTIONS": str(args.concurrency),
+            "AI_CACHE_ENABLED": str(args.ai_cache),
+            "THROTTLE_RATE_ANON": "100000/second",
+            "THROTTLE_RATE_USER": "100000/second",
+            "THROTTLE_RATE_LLM_TOKENS": "1000000000/day",
+        }
+        _manage(env, "migrate", "-v0")
+        users = json.loads(
+            _manage(
+                env, "shell", "-v0", "-c",
+                SETUP_SCRIPT.format(users=args.users, texts=args.texts_per_user, text=SAMPLE_TEXT),
+            )
+        )
+
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "APP.asgi:application",
+                "--port", str(port), "--workers", str(args.workers), "--log-level", "warning",
+            ],
+            cwd=BASE_DIR,
+            env=env,
+        )
+        try:
+            base = f"http://127.0.0.1:{port}/api/v1"
+            _wait_ready(base, users[0]["token"])
+            if args.warmup:
+                warmup = LoadRunner(base, users, args.mix, args.api, args.seed)
+                asyncio.run(warmup.run(args.concurrency, args.warmup, SaturationSampler(server.pid)))
+            llm_before = llm.stats()
+
+            runner = LoadRunner(base, users, args.mix, args.api, args.seed)
+            sampler = SaturationSampler(server.pid)
+            wall = asyncio.run(runner.run(args.concurrency, args.duration, sampler))
+            llm_after = llm.stats()
+        finally:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "config": {
+                key: value for key, value in vars(args).items() if key not in ("output", "baseline")
+            },
+            "wall_s": round(wall, 3),
+        },
+        **runner.report(wall),
+        "saturation": sampler.report(wall, args.workers),
+        "llm": {
+            key: llm_after[key] - llm_before[key] for key in ("requests", "errors", "tokens_in", "tokens_out")
+        } | {"peak_in_flight": llm_after["peak_in_flight"]},
+    }
+    if args.baseline:
+        with open(args.baseline) as fh:
+            report["comparison"] = _compare(report, json.load(fh))
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
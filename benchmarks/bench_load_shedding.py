@@ -0,0 +1,126 @@
+"""Latence de l'endpoint quiz quand le fournisseur LLM ralentit, avec et sans délestage.
+
+Lance un faux serveur OpenAI de latence `--llm-latency`, crée dans une base
+SQLite temporaire `--requests` textes distincts (pas de cache IA ni de
+coalescence entre requêtes), puis `--concurrency` threads appellent
+`GET /api/v1/scanned-texts/{id}/quiz-from-text/` une fois par texte, pour
+chaque configuration :
+
+    off    LLM_MAX_IN_FLIGHT=0, LLM_LATENCY_SLO_SECONDS=0: chaque requête attend le LLM
+    on     LLM_MAX_IN_FLIGHT=--max-in-flight, LLM_LATENCY_SLO_SECONDS=--slo
+
+Le rapport donne les p50/p95/max et la part de réponses `X-Degraded`.
+
+    python -m benchmarks.bench_load_shedding --requests 200 --concurrency 32 --llm-latency 2.0
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_openai import FakeOpenAIServer, pedagogic_content
+
+TEXT = (
+    "La photosynthèse permet aux plantes de fabriquer leur nourriture grâce à la lumière. "
+    "Les feuilles contiennent de la chlorophylle, un pigment vert. "
+    "Les racines absorbent l'eau et les sels minéraux du sol. Texte {}."
+)
+
+
+def _setup(path: str, base_url: str) -> None:
+    os.environ.update({
+        "DJANGO_SETTINGS_MODULE": "APP.settings",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench"),
+        "ENV": "testing",
+        "SQLITE_PATH": path,
+        "METRICS_ENABLED": "False",
+        "OPENAI_API_KEY": "sk-bench",
+        "OPENAI_BASE_URL": base_url,
+        "THROTTLE_RATE_ANON": "100000/second",
+        "THROTTLE_RATE_USER": "100000/second",
+        "THROTTLE_RATE_LLM_TOKENS": "1000000000/day",
+    })
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def _percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requêtes (et textes) par configuration")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="latence du faux LLM (s)")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--slo", type=float, default=1.0, help="LLM_LATENCY_SLO_SECONDS de la configuration on")
+    args = parser.parse_args()
+
+    configs = {
+        "off": {"LLM_MAX_IN_FLIGHT": 0, "LLM_LATENCY_SLO_SECONDS": 0},
+        "on": {"LLM_MAX_IN_FLIGHT": args.max_in_flight, "LLM_LATENCY_SLO_SECONDS": args.slo},
+    }
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeOpenAIServer(latency=args.llm_latency, content=pedagogic_content) as server:
+        _setup(os.path.join(tmp, "bench.sqlite3"), server.base_url)
+        from django.db import connection
+        from django.test.utils import override_settings
+        from rest_framework.authtoken.models import Token
+        from rest_framework.test import APIClient
+
+        from account.models import User
+        from scanned_text.helpers import resilience
+        from scanned_text.models import ScannedText
+
+        user = User.objects.create(username="bench", name="Bench", age=12, classe="6e")
+        token = Token.objects.create(user=user)
+        report = {"llm_latency": args.llm_latency, "concurrency": args.concurrency, "configs": {}}
+        for name, overrides in configs.items():
+            ids = [
+                ScannedText.objects.create(
+                    user=user, original_text="Texte", processed_text=TEXT.format(f"{name}-{i}"),
+                ).id
+                for i in range(args.requests)
+            ]
+
+            def fetch(text_id):
+                client = APIClient(SERVER_NAME="localhost")
+                client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+                start = time.perf_counter()
+                response = client.get(f"/api/v1/scanned-texts/{text_id}/quiz-from-text/")
+                elapsed = time.perf_counter() - start
+                connection.close()
+                return elapsed, response.status_code, response.has_header("X-Degraded")
+
+            with override_settings(**overrides):
+                resilience.reset_shedder()
+                resilience.reset_breaker()
+                start = time.perf_counter()
+                with ThreadPoolExecutor(args.concurrency) as pool:
+                    results = list(pool.map(fetch, ids))
+                wall = time.perf_counter() - start
+            samples = [elapsed for elapsed, _, _ in results]
+            report["configs"][name] = {
+                "wall_s": round(wall, 2),
+                "p50_ms": round(statistics.median(samples) * 1000, 1),
+                "p95_ms": round(_percentile(samples, 0.95) * 1000, 1),
+                "max_ms": round(max(samples) * 1000, 1),
+                "errors": sum(status != 200 for _, status, _ in results),
+                "degraded_share": round(sum(degraded for _, _, degraded in results) / len(results), 3),
+            }
+        resilience.reset_shedder()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Quasi-doublons à l'ingestion: rappel, faux positifs et coût de la recherche.
+
+Indexe `--pages` pages synthétiques (mots tirés du lexique de fréquence
+`scanned_text/helpers/data/fr_frequency.txt` selon leur rang) dans une base
+SQLite temporaire, puis cherche :
+
+- des copies bruitées de pages indexées (bruit d'OCR de 0,5 % à 5 % des
+  caractères: substitutions, suppressions, insertions) -> rappel;
+- des pages nouvelles -> taux de faux positifs.
+
+Le rapport donne aussi le coût de la signature MinHash et de la recherche
+(`near_duplicates.find`), à comparer à un appel LLM de traitement OCR.
+
+    python -m benchmarks.bench_near_duplicates --pages 20000 --queries 200
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+LEXICON = Path(__file__).resolve().parent.parent / "scanned_text" / "helpers" / "data" / "fr_frequency.txt"
+NOISE_RATES = (0.005, 0.01, 0.02, 0.05)
+
+
+def _setup(path: str) -> None:
+    os.environ.update({
+        "DJANGO_SETTINGS_MODULE": "APP.settings",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench"),
+        "ENV": "testing",
+        "SQLITE_PATH": path,
+        "METRICS_ENABLED": "False",
+    })
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def _vocabulary():
+    words = [line.split()[0] for line in LEXICON.read_text(encoding="utf-8").splitlines() if not line.startswith("#")]
+    return words, [1 / (rank + 1) for rank in range(len(words))]
+
+
+def _page(rng, words, weights, length=150) -> str:
+    return " ".join(rng.choices(words, weights=weights, k=length))
+
+
+def _noise(text: str, rate: float, rng) -> str:
+    out = []
+    for char in text:
+        draw = rng.random()
+        if draw < rate / 3:
+            continue
+        if draw < 2 * rate / 3:
+            out.append(rng.choice("abcdefghijklmnopqrstuvwxyz"))
+        elif draw < rate:
+            out.extend((char, rng.choice("il1.,")))
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def _ms(samples) -> dict:
+    return {"p50_ms": round(statistics.median(samples) * 1000, 2), "max_ms": round(max(samples) * 1000, 2)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20000, help="pages indexées")
+    parser.add_argument("--queries", type=int, default=200, help="recherches par taux de bruit")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words, weights = _vocabulary()
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup(os.path.join(tmp, "bench.sqlite3"))
+        from django.conf import settings
+        from django.db import transaction
+
+        from account.models import User
+        from scanned_text.helpers import near_duplicates
+        from scanned_text.models import ScannedText
+
+        user = User.objects.create(username="bench", name="Bench", age=12)
+        pages = [_page(rng, words, weights) for _ in range(args.pages)]
+        start = time.perf_counter()
+        for offset in range(0, len(pages), 1000):
+            batch = [
+                ScannedText(user=user, original_text=text, processed_text=text, detected_type="texte")
+                for text in pages[offset:offset + 1000]
+            ]
+            for text in batch:
+                near_duplicates.fingerprint(text)
+            with transaction.atomic():
+                near_duplicates.index(ScannedText.objects.bulk_create(batch))
+        index_s = time.perf_counter() - start
+
+        def lookup(text):
+            near_duplicates._signature.cache_clear()
+            start = time.perf_counter()
+            found = near_duplicates.find(text)
+            return found, time.perf_counter() - start
+
+        report = {
+            "pages": args.pages,
+            "threshold": settings.SCANNED_TEXT_DEDUP_THRESHOLD,
+            "index_ms_per_page": round(index_s / args.pages * 1000, 2),
+            "recall": {},
+        }
+        signature_samples, lookup_samples = [], []
+        for rate in NOISE_RATES:
+            hits = 0
+            for _ in range(args.queries):
+                index = rng.randrange(args.pages)
+                noisy = _noise(pages[index], rate, rng)
+                start = time.perf_counter()
+                near_duplicates._signature.cache_clear()
+                near_duplicates.signature(noisy)
+                signature_samples.append(time.perf_counter() - start)
+                found, elapsed = lookup(noisy)
+                lookup_samples.append(elapsed)
+                hits += found is not None and found.processed_text == pages[index]
+            report["recall"][f"{rate:.1%}"] = round(hits / args.queries, 3)
+
+        false_positives = sum(lookup(_page(rng, words, weights))[0] is not None for _ in range(args.queries))
+        report["false_positive_rate"] = round(false_positives / args.queries, 3)
+        report["signature"] = _ms(signature_samples)
+        report["find"] = _ms(lookup_samples)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
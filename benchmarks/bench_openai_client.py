@@ -0,0 +1,104 @@
+"""Compare un client OpenAI créé à chaque appel avec le client partagé du processus.
+
+Lance un faux serveur OpenAI local puis exécute la même requête
+`chat.completions.create` N fois avec `initOpenAI()` (ancien comportement des
+helpers) et N fois avec `get_openai_client()` (pool keep-alive réutilisé).
+
+    python -m benchmarks.bench_openai_client --requests 200 --tls
+
+`--tls` génère un certificat auto-signé (via `openssl`) pour inclure le coût
+du handshake TLS, comme en production face à api.openai.com.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+from benchmarks.fake_openai import FakeOpenAIServer
+
+
+def _self_signed_cert(directory: str) -> tuple[str, str]:
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", keyfile, "-out", certfile, "-days", "1",
+            "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return certfile, keyfile
+
+
+def _call(client) -> None:
+    client.chat.completions.create(
+        model="fake-model",
+        messages=[{"role": "user", "content": "Bonjour"}],
+        max_completion_tokens=10,
+    )
+
+
+def _measure(get_client, n: int) -> list[float]:
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        _call(get_client())
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _summary(timings: list[float]) -> dict:
+    ordered = sorted(timings)
+    return {
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="latence simulée du serveur (s)")
+    parser.add_argument("--tls", action="store_true", help="servir en HTTPS (certificat auto-signé)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        certfile = keyfile = None
+        if args.tls:
+            certfile, keyfile = _self_signed_cert(tmp)
+            os.environ["SSL_CERT_FILE"] = certfile
+
+        with FakeOpenAIServer(latency=args.latency, certfile=certfile, keyfile=keyfile) as server:
+            os.environ["OPENAI_API_KEY"] = "sk-bench"
+            os.environ["OPENAI_BASE_URL"] = server.base_url
+
+            from scanned_text.helpers import ai_utils
+
+            ai_utils.reset_openai_client()
+            # Échauffement (imports paresseux, premier handshake du pool).
+            _measure(ai_utils.get_openai_client, 5)
+
+            per_call = _summary(_measure(ai_utils.initOpenAI, args.requests))
+            pooled = _summary(_measure(ai_utils.get_openai_client, args.requests))
+
+    print(json.dumps(
+        {
+            "requests": args.requests,
+            "scheme": "https" if args.tls else "http",
+            "per_call_client": per_call,
+            "pooled_client": pooled,
+            "saved_per_request_ms": round(per_call["mean_ms"] - pooled["mean_ms"], 3),
+        },
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Recherche plein texte (`GET /api/v1/scanned-texts/search/`) sur une grande table.
+
+Remplit une base SQLite temporaire de `--rows` textes (1M par défaut) tirés d'un
+vocabulaire à distribution de Zipf, dont `--own-rows` appartiennent à
+l'utilisateur qui cherche, puis mesure pour quelques requêtes (mot rare, mot
+courant, deux mots) :
+
+    fts       première page de 50 résultats classés (helpers.search, FTS5 + bm25)
+    like      première page de 50 résultats sans index plein texte: `icontains`
+              sur chaque mot dans les textes de l'utilisateur, les plus récents
+              d'abord (pas de classement)
+    api       l'action `search` de bout en bout (authentification, sérialisation)
+
+    python -m benchmarks.bench_search --rows 1000000 --own-rows 20000
+
+Compter quelques minutes pour le remplissage à 1M lignes (indexation FTS5 comprise).
+Sous PostgreSQL (`DB_PROFILE=postgresql`, base POSTGRES_* existante et vide),
+le même script mesure l'index GIN.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+WORDS = (
+    "le la les de des un une et est en dans pour que qui sur par avec plus cette son ses au aux "
+    "nombre fraction triangle angle cercle équation fonction courbe vecteur somme produit division "
+    "photosynthèse cellule énergie plante racine feuille oxygène eau volcan séisme planète étoile "
+    "révolution empire roi guerre traité république citoyen siècle carte frontière population climat "
+    "verbe sujet adjectif accord phrase poème roman auteur personnage récit conte fable morale rime "
+    "atome molécule masse volume densité vitesse force circuit tension courant aimant lumière son"
+).split()
+QUERIES = {
+    "rare": "magnétisme",  # ajouté à ~0,1 % des textes
+    "common": "triangle",
+    "two_words": "photosynthèse feuille",
+}
+
+
+def _setup(path: str) -> None:
+    os.environ.update({
+        "DJANGO_SETTINGS_MODULE": "APP.settings",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "bench"),
+        "ENV": "testing",
+        "SQLITE_PATH": path,
+        "METRICS_ENABLED": "False",
+        "THROTTLE_RATE_ANON": "100000/second",
+        "THROTTLE_RATE_USER": "100000/second",
+        # `like` lit les colonnes en clair (icontains ne voit pas dans les valeurs compressées).
+        "TEXT_COMPRESSION": "none",
+    })
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def _text(rng: random.Random, weights) -> str:
+    words = rng.choices(WORDS, weights=weights, k=rng.randint(20, 60))
+    if rng.random() < 0.001:
+        words.append("magnétisme")
+    return " ".join(words).capitalize() + "."
+
+
+def _fill(owner, others, rows: int, own_rows: int, seed: int) -> float:
+    from django.db import transaction
+    from django.utils import timezone
+
+    from scanned_text.helpers import search
+    from scanned_text.models import ScannedText
+
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    rng.shuffle(weights)
+    origin = timezone.now() - timedelta(days=365)
+    own_every = max(1, rows // max(1, own_rows))
+    start = time.perf_counter()
+    for offset in range(0, rows, 10000):
+        batch = []
+        for i in range(offset, min(rows, offset + 10000)):
+            user = owner if i % own_every == 0 else others[i % len(others)]
+            text = _text(rng, weights)
+            batch.append(ScannedText(
+                user=user, original_text=text, processed_text=text, detected_type="texte",
+                createdAt=origin + timedelta(seconds=i),
+            ))
+        with transaction.atomic():
+            ScannedText.objects.bulk_create(batch)
+    # Indexation des lignes notées par les triggers (sinon faite par la première recherche mesurée).
+    search.sync()
+    return time.perf_counter() - start
+
+
+def _timed(call, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        samples.append(time.perf_counter() - start)
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+        "hits": result,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--own-rows", type=int, default=20_000, help="textes de l'utilisateur qui cherche")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup(os.path.join(tmp, "bench.sqlite3"))
+        from django.db import connection
+        from django.db.models import Q
+        from rest_framework.authtoken.models import Token
+        from rest_framework.test import APIClient
+
+        from account.models import User
+        from scanned_text.helpers import search
+        from scanned_text.models import ScannedText
+
+        users = User.objects.bulk_create(
+            User(username=f"bench-{i}", name="Bench", age=12) for i in range(args.users)
+        )
+        owner, others = users[0], users[1:]
+        fill_s = _fill(owner, others, args.rows, args.own_rows, args.seed)
+        token = Token.objects.create(user=owner)
+        client = APIClient(SERVER_NAME="localhost")
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        def fts(query):
+            return len(search.SearchResults(owner, query)[0:50])
+
+        def like(query):
+            queryset = ScannedText.objects.filter(user=owner).order_by("-createdAt", "-id")
+            for term in query.split():
+                queryset = queryset.filter(Q(original_text__icontains=term) | Q(processed_text__icontains=term))
+            return len(queryset.select_related("user")[0:50])
+
+        def api(query):
+            response = client.get("/api/v1/scanned-texts/search/", {"q": query})
+            assert response.status_code == 200, response.status_code
+            return len(response.data["results"])
+
+        report = {
+            "vendor": connection.vendor,
+            "rows": args.rows,
+            "own_rows": ScannedText.objects.filter(user=owner).count(),
+            "fill_s": round(fill_s, 1),
+            "queries": {},
+        }
+        if connection.vendor == "sqlite":
+            report["db_mb"] = round(os.path.getsize(os.environ["SQLITE_PATH"]) / 2 ** 20, 1)
+        for name, query in QUERIES.items():
+            report["queries"][name] = {
+                "q": query,
+                "fts": _timed(lambda: fts(query), args.repeat),
+                "like": _timed(lambda: like(query), args.repeat),
+                "api": _timed(lambda: api(query), args.repeat),
+            }
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
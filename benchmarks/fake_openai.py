@@ -0,0 +1,349 @@
+"""Serveur HTTP local qui imite l'endpoint `/v1/chat/completions` d'OpenAI.
+
+Utilisé par les benchmarks pour mesurer le coût du code applicatif sans
+dépendre du réseau ni consommer de tokens. Sont configurables: le contenu
+renvoyé, la latence simulée (fixe ou tirée d'une distribution), le taux
+d'erreurs HTTP et les tokens déclarés dans `usage`.
+
+    with FakeOpenAIServer(latency=0.05) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+
+Peut aussi tourner seul, devant une application lancée à part :
+
+    python -m benchmarks.fake_openai --port 8001 --latency 0.8 --distribution lognormal --error-rate 0.02
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import ssl
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONTENT = json.dumps(
+    {"processed_text": "Texte nettoyé par le faux serveur.", "detected_type": "cours"}
+)
+
+DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+_WORD_KEY_RE = re.compile(r'^- "(\d+)": (.+)$', re.MULTILINE)
+
+
+def pedagogic_content(body: dict) -> str:
+    """Réponse plausible pour chacun des prompts de `scanned_text.helpers.ai`.
+
+    Reconnaît le helper à son prompt système, pour que chaque endpoint reçoive
+    un contenu qu'il sait parser (et ne bascule pas sur son fallback).
+    """
+    messages = body.get("messages") or [{}]
+    system = messages[0].get("content", "")
+    user = messages[-1].get("content", "")
+    if "quiz" in system:
+        return json.dumps([
+            {
+                "question": "Quel est le sujet principal du texte ?",
+                "options": ["La photosynthèse", "Le sport", "L'école"],
+                "answer": "La photosynthèse",
+                "explanation": "Le texte décrit la photosynthèse.",
+            }
+        ], ensure_ascii=False)
+    if "étape par étape" in system:
+        return json.dumps({"0": "Lire l'énoncé", "1": "Identifier les données", "2": "Appliquer la méthode"},
+                          ensure_ascii=False)
+    if "simplification de texte" in system:
+        return json.dumps({key: f"Définition simple de « {word} »." for key, word in _WORD_KEY_RE.findall(user)},
+                          ensure_ascii=False)
+    if "pédagogue" in system:
+        return "La photosynthèse permet aux plantes de fabriquer leur nourriture grâce à la lumière du soleil."
+    return DEFAULT_CONTENT
+
+
+def _estimate_tokens(text: str) -> int:
+    # Même ordre de grandeur que scanned_text.helpers.ai_utils.estimate_tokens.
+    return max(1, len(text) // 4)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 pour autoriser le keep-alive côté client.
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A002 - signature imposée
+        pass
+
+    def do_POST(self):
+        server: "FakeOpenAIServer" = self.server.fake  # type: ignore[attr-defined]
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        server.record_request(body)
+        try:
+            delay = server.sample_latency()
+            if delay:
+                time.sleep(delay)
+
+            if server.should_fail():
+                self._error(server)
+                return
+            content = server.content(body) if callable(server.content) else server.content
+            if body.get("stream"):
+                self._stream(server, body, content)
+                return
+            self._complete(server, body, content)
+        finally:
+            server.record_done()
+
+    def _complete(self, server: "FakeOpenAIServer", body: dict, content: str) -> None:
+        prompt_tokens, completion_tokens = server.usage(body, content)
+        payload = json.dumps(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, server: "FakeOpenAIServer") -> None:
+        payload = json.dumps(
+            {"error": {"message": "Erreur simulée par le faux serveur.", "type": "server_error", "code": None}}
+        ).encode()
+        self.send_response(server.error_status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, server: "FakeOpenAIServer", body: dict, content: str) -> None:
+        """Réponse `stream=True`: un chunk SSE par mot, puis `[DONE]`."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        for word in content.split(" "):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            if server.stream_chunk_delay:
+                time.sleep(server.stream_chunk_delay)
+        if (body.get("stream_options") or {}).get("include_usage"):
+            prompt_tokens, completion_tokens = server.usage(body, content)
+            usage = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+            self.wfile.write(f"data: {json.dumps(usage)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # File d'attente listen() large: des centaines de connexions simultanées.
+    request_queue_size = 1024
+
+
+class FakeOpenAIServer:
+    """Faux serveur OpenAI lancé dans un thread (HTTP, ou HTTPS si certfile/keyfile).
+
+    - `latency` est la latence moyenne; `distribution` vaut "fixed", "uniform"
+      (latence ± `spread`), "exponential" ou "lognormal" (écart-type `spread`
+      du logarithme).
+    - `error_rate` est la part de réponses en erreur `error_status` (500 par défaut).
+    - `prompt_tokens` / `completion_tokens` à None: estimés depuis la taille
+      des messages et du contenu renvoyé.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        content=DEFAULT_CONTENT,
+        prompt_tokens: int | None = 100,
+        completion_tokens: int | None = 50,
+        stream_chunk_delay: float = 0.0,
+        certfile: str | None = None,
+        keyfile: str | None = None,
+        distribution: str = "fixed",
+        spread: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        seed: int | None = None,
+    ):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Distribution inconnue: {distribution} (attendu: {', '.join(DISTRIBUTIONS)})")
+        self.latency = latency
+        self.distribution = distribution
+        self.spread = spread
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.content = content
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.stream_chunk_delay = stream_chunk_delay
+        self.request_count = 0
+        self.error_count = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self._random = random.Random(seed)
+        self._count_lock = threading.Lock()
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.fake = self  # type: ignore[attr-defined]
+        self.scheme = "http"
+        if certfile:
+            ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ctx.load_cert_chain(certfile, keyfile)
+            self._httpd.socket = ctx.wrap_socket(self._httpd.socket, server_side=True)
+            self.scheme = "https"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"{self.scheme}://{host}:{port}/v1"
+
+    def record_request(self, body: dict) -> None:
+        with self._count_lock:
+            self.request_count += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def record_done(self) -> None:
+        with self._count_lock:
+            self.in_flight -= 1
+
+    def sample_latency(self) -> float:
+        if not self.latency:
+            return 0.0
+        with self._count_lock:
+            if self.distribution == "uniform":
+                return max(0.0, self._random.uniform(self.latency - self.spread, self.latency + self.spread))
+            if self.distribution == "exponential":
+                return self._random.expovariate(1 / self.latency)
+            if self.distribution == "lognormal":
+                # Moyenne `latency` quel que soit sigma.
+                sigma = self.spread
+                return self._random.lognormvariate(math.log(self.latency) - sigma ** 2 / 2, sigma)
+        return self.latency
+
+    def should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._count_lock:
+            failed = self._random.random() < self.error_rate
+            self.error_count += failed
+        return failed
+
+    def usage(self, body: dict, content: str) -> tuple[int, int]:
+        prompt_tokens = self.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = sum(_estimate_tokens(m.get("content", "")) for m in body.get("messages", []))
+        completion_tokens = self.completion_tokens
+        if completion_tokens is None:
+            completion_tokens = _estimate_tokens(content)
+        with self._count_lock:
+            self.tokens_in += prompt_tokens
+            self.tokens_out += completion_tokens
+        return prompt_tokens, completion_tokens
+
+    def stats(self) -> dict:
+        with self._count_lock:
+            return {
+                "requests": self.request_count,
+                "errors": self.error_count,
+                "peak_in_flight": self.peak_in_flight,
+                "tokens_in": self.tokens_in,
+                "tokens_out": self.tokens_out,
+            }
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread.is_alive():
+            self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Faux serveur OpenAI pour les benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.5, help="latence moyenne (s)")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--spread", type=float, default=0.5, help="± (uniform) ou sigma (lognormal)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        distribution=args.distribution,
+        spread=args.spread,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+        content=pedagogic_content,
+        prompt_tokens=None,
+        completion_tokens=None,
+    )
+    with server:
+        print(f"OPENAI_BASE_URL={server.base_url}", flush=True)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    print(json.dumps(server.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,134 @@
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status, exceptions
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from drf_spectacular.utils import extend_schema, OpenApiExample
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter
 
-from .models import ScannedText
+from .models import ProcessingJob, ScannedText
+from .pagination import KeysetPagination, SearchPagination
+from .renderers import EventStreamRenderer, FastJSONRenderer, format_sse
+from .throttling import EXPECTED_TOKEN_COSTS
 from .serializers import (
+    ProcessingJobSerializer,
     QuizQuestionSerializer,
     ScannedTextSerializer,
     DifficultWordsResponseSerializer,
     TextExplanationSerializer,
-    ExerciseStepsResponseSerializer
+    ExerciseStepsResponseSerializer,
+    ScannedTextBulkCreateSerializer,
+    ScannedTextBulkResultSerializer,
+    StudyPackSerializer,
 )
+from .helpers import ai_cache, conditional, job_queue, near_duplicates, processing, resilience, token_usage
+from .helpers import search as text_search
 from .helpers.ai import (
     generate_exercise_steps,
+    generate_study_pack,
     generate_text_explanation, 
     get_difficult_words_with_meanings,
-    generate_quiz_from_text, 
-    process_ocr_text_with_openai)
-from decouple import config
+    generate_quiz_from_text,
+)
+
+logger = logging.getLogger(__name__)
+
 
 class ScannedTextViewSet(viewsets.ModelViewSet):
-    queryset = ScannedText.objects.all().order_by('-createdAt')
+    queryset = ScannedText.objects.select_related('user').order_by('-createdAt', '-id')
     serializer_class = ScannedTextSerializer
     http_method_names = ['post', 'get']
-    pagination_class = None  # Désactive la pagination pour cette vue.
+    pagination_class = KeysetPagination
+    filterset_fields = ['detected_type']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # La liste ne montre que les textes de l'utilisateur connecté.
+            if not self.request.user.is_authenticated:
+                return queryset.none()
+            queryset = queryset.filter(user=self.request.user)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        etag = conditional.list_etag(request, request.accepted_renderer.format)
+        response = conditional.not_modified(request, etag, "list")
+        return response or conditional.tag(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = conditional.text_etag(instance, request.accepted_renderer.format)
+        response = conditional.not_modified(request, etag, "retrieve")
+        return response or conditional.tag(Response(self.get_serializer(instance).data), etag)
+
+    def _artifact_etag(self, obj, artifacts, *extra):
+        """ETag et clés de cache d'une action IA (voir helpers.conditional)."""
+        return conditional.artifact_etag(obj, artifacts, self.request.accepted_renderer.format, *extra)
+
+    @staticmethod
+    def _tag_artifact(response, etag, keys):
+        """N'expose l'ETag que si le résultat servi est en cache (pas un repli dégradé)."""
+        if etag is not None and ai_cache.contains(keys):
+            conditional.tag(response, etag)
+        return response
+
+    def expected_token_cost(self, request):
+        """Coût estimé en tokens LLM de la requête (TokenCostThrottle)."""
+        cost = EXPECTED_TOKEN_COSTS.get(self.action, 0)
+        if self.action == "bulk_create":
+            items = request.data.get("items") if isinstance(request.data, dict) else None
+            cost *= len(items) if isinstance(items, list) else 1
+        return cost
+
+    def _cached_ai_result(self, kind, helper, prompt_version, scannedText, should_cache=None):
+        """Appelle un helper IA à travers le cache (ai_cache) avec le profil de l'élève."""
+        age = scannedText.user.age
+        classe = scannedText.user.classe
+        return ai_cache.get_or_compute(
+            kind,
+            prompt_version,
+            scannedText.processed_text,
+            age,
+            classe,
+            lambda: helper(processed_text=scannedText.processed_text, age=age, classe=classe),
+            should_cache=should_cache,
+        )
 
 
     @extend_schema(
         operation_id="createScannedText",
         summary="Créer un texte scanné",
-        description="Crée un enregistrement à partir d'un texte brut et applique un traitement (mock ou OpenAI).",
-        responses={201: ScannedTextSerializer},
+        description=(
+            "Crée un enregistrement à partir d'un texte brut et applique un traitement (mock ou OpenAI). "
+            "En mode asynchrone (SCANNED_TEXT_ASYNC_INGESTION ou en-tête `Prefer: respond-async`), "
+            "retourne 202 avec le job de traitement à suivre."
+        ),
+        responses={201: ScannedTextSerializer, 202: ProcessingJobSerializer},
     )
     def create(self, request, *args, **kwargs):
         original_text = request.data.get("original_text", "")
         if not original_text.strip():
             return Response({"error": "Le champ original_text est requis."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Traitement IA simulé
-        if config('ENV') == 'production':
-            print("Utilisation d'OpenAI pour le traitement du texte.")
-            
-            ai_result = process_ocr_text_with_openai.process_ocr_text_with_openai(original_text)
-            processed = ai_result.get("processed_text")
-            detected_type = ai_result.get("detected_type") or ai_utils.mock_detect_type(processed)
+        if job_queue.async_ingestion_requested(request):
+            # Mode asynchrone: le texte brut est enregistré, le traitement IA est
+            # délégué au worker (manage.py process_scanned_jobs).
+            with transaction.atomic():
+                scanned = ScannedText.objects.create(user=request.user, original_text=original_text)
+                job = job_queue.enqueue(scanned)
+            data = ProcessingJobSerializer(job, context=self.get_serializer_context()).data
+            return Response(data, status=status.HTTP_202_ACCEPTED, headers={"Location": data["status_url"]})
 
-            if not processed:
-                raise exceptions.APIException("Erreur lors du traitement du texte avec OpenAI.")
-        else:
-            from .helpers import ai_utils
-            processed = ai_utils.mock_process_text(original_text)
-            detected_type = ai_utils.mock_detect_type(processed)
-        
+        try:
+            processed, detected_type = processing.process_original_text(original_text)
+        except processing.ProcessingUnavailable:
+            raise  # 503 + Retry-After (metrics_exception_handler)
+        except processing.ProcessingError as e:
+            raise exceptions.APIException(str(e))
 
         scanned = ScannedText.objects.create(
             user=request.user,
@@ -63,6 +140,142 @@ class ScannedTextViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(scanned)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @extend_schema(
+        operation_id="bulkCreateScannedTexts",
+        summary="Créer plusieurs textes scannés en une requête",
+        description=(
+            "Traite plusieurs pages (ex. une fiche complète) avec au plus SCANNED_TEXT_BULK_CONCURRENCY "
+            "appels IA simultanés, puis les insère en une seule requête SQL. Retourne un résultat par "
+            "élément (201 si tout a réussi, 207 sinon). En mode asynchrone, les textes sont enregistrés "
+            "et mis en file d'attente (202)."
+        ),
+        request=ScannedTextBulkCreateSerializer,
+        responses={
+            201: ScannedTextBulkResultSerializer(many=True),
+            202: ProcessingJobSerializer(many=True),
+            207: ScannedTextBulkResultSerializer(many=True),
+        },
+    )
+    @action(methods=["post"], detail=False, url_path="bulk", pagination_class=None, filter_backends=[])
+    def bulk_create(self, request, *args, **kwargs):
+        in_ser = ScannedTextBulkCreateSerializer(data=request.data)
+        in_ser.is_valid(raise_exception=True)
+        items = in_ser.validated_data["items"]
+        max_items = getattr(settings, "SCANNED_TEXT_BULK_MAX_ITEMS", 50)
+        if len(items) > max_items:
+            return Response({"error": f"Au plus {max_items} éléments par requête."}, status=status.HTTP_400_BAD_REQUEST)
+
+        texts = [item.get("original_text") for item in items]
+        results = [None] * len(texts)
+        valid = []
+        for index, text in enumerate(texts):
+            if not isinstance(text, str) or not text.strip():
+                results[index] = {"index": index, "status": 400, "error": "Le champ original_text est requis."}
+            else:
+                valid.append(index)
+
+        if job_queue.async_ingestion_requested(request):
+            pending = [ScannedText(user=request.user, original_text=texts[i]) for i in valid]
+            for scanned in pending:
+                near_duplicates.fingerprint(scanned)
+            with transaction.atomic():
+                scanned = ScannedText.objects.bulk_create(pending)
+                near_duplicates.index(scanned)
+                conditional.bump_collection(request.user.pk)
+                jobs = ProcessingJob.objects.bulk_create([ProcessingJob(scanned_text=st) for st in scanned])
+            data = ProcessingJobSerializer(jobs, many=True, context=self.get_serializer_context()).data
+            return Response(data, status=status.HTTP_202_ACCEPTED)
+
+        def process(index):
+            try:
+                return index, processing.process_original_text(texts[index], reuse_duplicates=False), None
+            except processing.ProcessingUnavailable as e:
+                return index, None, (status.HTTP_503_SERVICE_UNAVAILABLE, str(e))
+            except processing.ProcessingError as e:
+                return index, None, (status.HTTP_500_INTERNAL_SERVER_ERROR, str(e))
+            except Exception:
+                logger.exception("Échec du traitement de l'élément %s d'un envoi groupé", index)
+                return index, None, (status.HTTP_500_INTERNAL_SERVER_ERROR, "Erreur lors du traitement du texte.")
+
+        # Quasi-doublons cherchés ici, avant les threads: seuls les appels IA se chevauchent.
+        reused = {}
+        for index in valid:
+            outcome = processing.reuse_near_duplicate(texts[index])
+            if outcome is not None:
+                reused[index] = outcome
+
+        # Les appels IA se chevauchent, dans la limite configurée.
+        concurrency = max(1, getattr(settings, "SCANNED_TEXT_BULK_CONCURRENCY", 4))
+        to_create = []
+        # Une copie du contexte par élément: les tokens consommés dans les
+        # threads sont comptés pour la requête (token_usage).
+        jobs = [(contextvars.copy_context(), index) for index in valid if index not in reused]
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(jobs) or 1)) as pool:
+            outcomes = [(index, outcome, None) for index, outcome in reused.items()]
+            outcomes += pool.map(lambda job: job[0].run(process, job[1]), jobs)
+            for index, outcome, error in sorted(outcomes, key=lambda item: item[0]):
+                if error is not None:
+                    results[index] = {"index": index, "status": error[0], "error": error[1]}
+                    continue
+                processed, detected_type = outcome
+                scanned = ScannedText(
+                    user=request.user,
+                    original_text=texts[index],
+                    processed_text=processed,
+                    detected_type=detected_type,
+                )
+                near_duplicates.fingerprint(scanned)
+                to_create.append((index, scanned))
+
+        with transaction.atomic():
+            created = ScannedText.objects.bulk_create([scanned for _, scanned in to_create])
+            near_duplicates.index(created)
+            if created:
+                conditional.bump_collection(request.user.pk)
+        serialized = self.get_serializer(created, many=True).data
+        for (index, _), data in zip(to_create, serialized):
+            results[index] = {"index": index, "status": 201, "data": data}
+
+        all_ok = all(result["status"] == 201 for result in results)
+        return Response(results, status=status.HTTP_201_CREATED if all_ok else status.HTTP_207_MULTI_STATUS)
+
+    @extend_schema(
+        operation_id="searchScannedTexts",
+        summary="Rechercher dans ses textes scannés",
+        description=(
+            "Recherche plein texte dans les textes de l'utilisateur connecté (texte original et traité), "
+            "résultats classés par pertinence et paginés par numéro de page (`?page=2`). "
+            "Tous les mots de `q` doivent être présents; accents et majuscules sont ignorés."
+        ),
+        parameters=[OpenApiParameter("q", str, required=True, description="Mots recherchés.")],
+        responses={200: ScannedTextSerializer(many=True)},
+    )
+    @action(methods=["get"], detail=False, url_path="search", pagination_class=SearchPagination, filter_backends=[])
+    def search(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "")
+        if not text_search.has_terms(query):
+            return Response({"error": "Le paramètre q est requis."}, status=status.HTTP_400_BAD_REQUEST)
+        results = text_search.SearchResults(request.user, query) if request.user.is_authenticated else []
+        page = self.paginate_queryset(results)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @extend_schema(
+        operation_id="getProcessingStatus",
+        summary="Suivre le traitement d'un texte scanné",
+        description=(
+            "Retourne l'état du dernier job de traitement d'un texte créé en mode asynchrone "
+            "(pending, running, done, failed) et sa progression."
+        ),
+        responses={200: ProcessingJobSerializer},
+    )
+    @action(methods=["get"], detail=True, url_path="processing-status")
+    def processing_status(self, request, *args, **kwargs):
+        obj = self.get_object()  # type: ScannedText
+        job = obj.processing_jobs.order_by("-createdAt").first()
+        if job is None:
+            return Response({"detail": "Aucun traitement asynchrone pour ce texte."}, status=404)
+        return Response(ProcessingJobSerializer(job, context=self.get_serializer_context()).data)
+
     @extend_schema(
         operation_id="getWordsExplanation",
         summary="Identifier les mots difficiles",
@@ -79,14 +292,20 @@ class ScannedTextViewSet(viewsets.ModelViewSet):
         obj = self.get_object()  # type: ScannedText
         if not obj.processed_text:
             return Response({"detail": "Le texte scanné n'a pas de processed_text."}, status=400)
-        
-        scannedText = ScannedText.objects.get(id=obj.id)
+
+        etag, keys = self._artifact_etag(
+            obj, [("words-explanation", get_difficult_words_with_meanings.PROMPT_VERSION)]
+        )
+        not_modified = conditional.not_modified(request, etag, "words_explanation", keys)
+        if not_modified is not None:
+            return not_modified
 
         try:
-            raw_result = get_difficult_words_with_meanings.get_difficult_words_with_meanings(
-                processed_text=scannedText.processed_text,
-                age=scannedText.user.age,
-                classe=scannedText.user.classe,
+            raw_result = self._cached_ai_result(
+                "words-explanation",
+                get_difficult_words_with_meanings.get_difficult_words_with_meanings,
+                get_difficult_words_with_meanings.PROMPT_VERSION,
+                obj,
             )
         except Exception as e:  # pragma: no cover
             return Response({"detail": f"Erreur IA: {e}"}, status=500)
@@ -106,7 +325,7 @@ class ScannedTextViewSet(viewsets.ModelViewSet):
         response_payload = {"words": {str(k): v for k, v in words_mapping.items()}}
         out_ser = DifficultWordsResponseSerializer(data=response_payload)
         out_ser.is_valid(raise_exception=True)
-        return Response(out_ser.data)
+        return self._tag_artifact(Response(out_ser.data), etag, keys)
     
     @extend_schema(
         operation_id="getTextExplanation",
@@ -132,14 +351,18 @@ class ScannedTextViewSet(viewsets.ModelViewSet):
 
         if not obj.processed_text:
             return Response({"detail": "Le texte scanné n'a pas de processed_text."}, status=400)
-        
-        scannedText = ScannedText.objects.get(id=obj.id)
+
+        etag, keys = self._artifact_etag(obj, [("text-explanation", generate_text_explanation.PROMPT_VERSION)])
+        not_modified = conditional.not_modified(request, etag, "text_explanation", keys)
+        if not_modified is not None:
+            return not_modified
 
         try:
-            raw_result = generate_text_explanation.generate_text_explanation(
-                processed_text=scannedText.processed_text,
-                age=scannedText.user.age,
-                classe=scannedText.user.classe,
+            raw_result = self._cached_ai_result(
+                "text-explanation",
+                generate_text_explanation.generate_text_explanation,
+                generate_text_explanation.PROMPT_VERSION,
+                obj,
             )
         except Exception as e:  # pragma: no cover
             return Response({"detail": f"Erreur IA: {e}"}, status=500)
@@ -148,7 +371,65 @@ class ScannedTextViewSet(viewsets.ModelViewSet):
 
         out_ser = TextExplanationSerializer(data=response_payload)
         out_ser.is_valid(raise_exception=True)
-        return Response(out_ser.data)
+        return self._tag_artifact(Response(out_ser.data), etag, keys)
+
+    @extend_schema(
+        operation_id="streamTextExplanation",
+        summary="Obtenir une explication du texte en streaming (SSE)",
+        description=(
+            "Variante Server-Sent Events de text-explanation: chaque fragment généré est envoyé "
+            "dès sa réception (`data: {\"delta\": \"...\"}`), puis un événement `done` "
+            "contient l'explication complète (`\"degraded\": true` si c'est l'explication de secours)."
+        ),
+        responses={(200, "text/event-stream"): str},
+    )
+    @action(
+        methods=["get"],
+        detail=True,
+        url_path="text-explanation-stream",
+        renderer_classes=[EventStreamRenderer, FastJSONRenderer],
+    )
+    def text_explanation_stream(self, request, *args, **kwargs):
+        obj = self.get_object()  # type: ScannedText
+
+        if not obj.processed_text:
+            return Response({"detail": "Le texte scanné n'a pas de processed_text."}, status=400)
+
+        processed_text = obj.processed_text
+        age = obj.user.age
+        classe = obj.user.classe
+        cache_args = ("text-explanation", generate_text_explanation.PROMPT_VERSION, processed_text, age, classe)
+        cached = ai_cache.lookup(*cache_args)
+
+        def events():
+            if cached is not None:
+                explanation = cached.get("explanation", "")
+                yield format_sse({"delta": explanation})
+                yield format_sse({"explanation": explanation}, event="done")
+                return
+
+            parts = []
+            # Le flux est produit après la sortie des middlewares: budget de
+            # temps et tokens sont gérés ici.
+            with resilience.request_budget(), resilience.track() as outcome, token_usage.meter() as usage:
+                for delta in generate_text_explanation.stream_text_explanation(processed_text, age, classe):
+                    parts.append(delta)
+                    yield format_sse({"delta": delta})
+            token_usage.settle(request.user, usage)
+            explanation = "".join(parts).strip()
+            if explanation and not outcome.degraded:
+                # Flux terminé sans erreur: réutilisable ensuite par l'endpoint JSON text-explanation.
+                ai_cache.store(*cache_args, {"explanation": explanation, "tokens_used": 0})
+            done = {"explanation": explanation}
+            if outcome.degraded:
+                # Les en-têtes sont déjà partis: pas de X-Degraded pour un flux.
+                done["degraded"] = True
+            yield format_sse(done, event="done")
+
+        response = StreamingHttpResponse(events(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # désactive le buffering nginx
+        return response
 
     @extend_schema(
         operation_id="getExerciseSteps",
@@ -163,26 +444,30 @@ class ScannedTextViewSet(viewsets.ModelViewSet):
     def exercise_steps(self, request, *args, **kwargs):
         obj = self.get_object()  # type: ScannedText
 
-        scannedText = ScannedText.objects.get(id=obj.id)
-
-        if not scannedText.processed_text:
+        if not obj.processed_text:
             return Response({"detail": "Le texte scanné n'a pas de processed_text."}, status=400)
         
-        if scannedText.detected_type != "exercice":
+        if obj.detected_type != "exercice":
             return Response({"detail": "Le texte scanné n'est pas de type 'exercice'."}, status=400)
 
+        etag, keys = self._artifact_etag(obj, [("exercise-steps", generate_exercise_steps.PROMPT_VERSION)])
+        not_modified = conditional.not_modified(request, etag, "exercise_steps", keys)
+        if not_modified is not None:
+            return not_modified
+
         try:
-            raw_result = generate_exercise_steps.generate_exercise_steps(
-                processed_text=scannedText.processed_text,
-                age=scannedText.user.age,
-                classe=scannedText.user.classe,
+            raw_result = self._cached_ai_result(
+                "exercise-steps",
+                generate_exercise_steps.generate_exercise_steps,
+                generate_exercise_steps.PROMPT_VERSION,
+                obj,
             )
         except Exception as e:  # pragma: no cover
             return Response({"detail": f"Erreur IA: {e}"}, status=500)
 
         out_ser = ExerciseStepsResponseSerializer(data={"steps": raw_result.get("steps", {})})
         out_ser.is_valid(raise_exception=True)
-        return Response(out_ser.data)
+        return self._tag_artifact(Response(out_ser.data), etag, keys)
     
 
     @extend_schema(
@@ -190,28 +475,141 @@ class ScannedTextViewSet(viewsets.ModelViewSet):
         summary="Générer un quiz à partir du texte",
         description=(
             "Génère un quiz à choix multiple basé sur le texte scanné existant, adapté à l'âge et la classe de l'utilisateur. "
-            "Nécessite OpenAI."
+            "Sans OpenAI, ou en mode dégradé (en-tête `X-Degraded`), renvoie un quiz à trous construit localement."
         ),
         responses={200: QuizQuestionSerializer(many=True)},
     )
-    @action(methods=["get"], detail=True, url_path="quiz-from-text")
+    @action(methods=["get"], detail=True, url_path="quiz-from-text", pagination_class=None, filter_backends=[])
     def quiz_from_text(self, request, *args, **kwargs):
         obj = self.get_object()  # type: ScannedText
 
-        scannedText = ScannedText.objects.get(id=obj.id)
-
-        if not scannedText.processed_text:
+        if not obj.processed_text:
             return Response({"detail": "Le texte scanné n'a pas de processed_text."}, status=400)
 
+        etag, keys = self._artifact_etag(obj, [("quiz-from-text", generate_quiz_from_text.PROMPT_VERSION)])
+        not_modified = conditional.not_modified(request, etag, "quiz_from_text", keys)
+        if not_modified is not None:
+            return not_modified
+
         try:
-            raw_result = generate_quiz_from_text.generate_quiz_from_text(
-                processed_text=scannedText.processed_text,
-                age=scannedText.user.age,
-                classe=scannedText.user.classe,
+            raw_result = self._cached_ai_result(
+                "quiz-from-text",
+                generate_quiz_from_text.generate_quiz_from_text,
+                generate_quiz_from_text.PROMPT_VERSION,
+                obj,
+                should_cache=lambda r: isinstance(r.get("questions"), list),
             )
         except Exception as e:  # pragma: no cover
             return Response({"detail": f"Erreur IA: {e}"}, status=500)
 
         out_ser = QuizQuestionSerializer(data=raw_result.get("questions", []), many=True)
         out_ser.is_valid(raise_exception=True)
-        return Response(out_ser.data)
\ No newline at end of file
+        return self._tag_artifact(Response(out_ser.data), etag, keys)
+
+    # Partie du study-pack -> (type d'artefact en cache, module du helper dédié, clé utile du résultat)
+    STUDY_PACK_PARTS = {
+        "words": ("words-explanation", get_difficult_words_with_meanings, None),
+        "explanation": ("text-explanation", generate_text_explanation, "explanation"),
+        "steps": ("exercise-steps", generate_exercise_steps, "steps"),
+        "quiz": ("quiz-from-text", generate_quiz_from_text, "questions"),
+    }
+
+    @extend_schema(
+        operation_id="getStudyPack",
+        summary="Obtenir tous les supports d'étude en un appel",
+        description=(
+            "Retourne en une requête les mots difficiles, l'explication, les étapes (exercices uniquement) "
+            "et le quiz d'un texte scanné. Les parties absentes du cache sont générées par un seul appel "
+            "OpenAI, puis mises en cache pour les endpoints individuels."
+        ),
+        parameters=[
+            OpenApiParameter(
+                "parts",
+                str,
+                description="Parties souhaitées, séparées par des virgules (words,explanation,steps,quiz).",
+            )
+        ],
+        responses={200: StudyPackSerializer},
+    )
+    @action(methods=["get"], detail=True, url_path="study-pack")
+    def study_pack(self, request, *args, **kwargs):
+        obj = self.get_object()  # type: ScannedText
+
+        if not obj.processed_text:
+            return Response({"detail": "Le texte scanné n'a pas de processed_text."}, status=400)
+
+        requested = request.query_params.get("parts")
+        if requested:
+            parts = [part.strip() for part in requested.split(",") if part.strip()]
+            unknown = set(parts) - set(self.STUDY_PACK_PARTS)
+            if unknown:
+                return Response({"detail": f"Parties inconnues: {', '.join(sorted(unknown))}."}, status=400)
+            if "steps" in parts and obj.detected_type != "exercice":
+                return Response({"detail": "Le texte scanné n'est pas de type 'exercice'."}, status=400)
+        else:
+            parts = [part for part in self.STUDY_PACK_PARTS if part != "steps" or obj.detected_type == "exercice"]
+
+        etag, keys = self._artifact_etag(
+            obj,
+            [(self.STUDY_PACK_PARTS[part][0], self.STUDY_PACK_PARTS[part][1].PROMPT_VERSION) for part in parts],
+            parts,
+        )
+        not_modified = conditional.not_modified(request, etag, "study_pack", keys)
+        if not_modified is not None:
+            return not_modified
+
+        processed_text = obj.processed_text
+        age = obj.user.age
+        classe = obj.user.classe
+
+        results = {}
+        missing = []
+        for part in parts:
+            kind, module, _ = self.STUDY_PACK_PARTS[part]
+            cached = ai_cache.lookup(kind, module.PROMPT_VERSION, processed_text, age, classe)
+            if cached is not None:
+                results[part] = cached
+            else:
+                missing.append(part)
+
+        if missing:
+            # LLM indisponible (disjoncteur ouvert, délai dépassé...): l'exception remonte
+            # et donne une 503 avec Retry-After, sans relancer un appel par partie.
+            try:
+                generated = generate_study_pack.generate_study_pack(processed_text, age, classe, missing)
+            except (ValueError, TypeError, KeyError, AttributeError):
+                # Réponse groupée inexploitable: chaque partie passe par son helper dédié.
+                generated = {}
+            for part in missing:
+                kind, module, _ = self.STUDY_PACK_PARTS[part]
+                if part in generated:
+                    ai_cache.store(kind, module.PROMPT_VERSION, processed_text, age, classe, generated[part])
+                    results[part] = generated[part]
+                    continue
+                # Partie absente ou invalide dans la réponse groupée: helper dédié
+                # (qui porte le nom de son module).
+                helper = getattr(module, module.__name__.rsplit(".", 1)[-1])
+                try:
+                    results[part] = self._cached_ai_result(
+                        kind,
+                        helper,
+                        module.PROMPT_VERSION,
+                        obj,
+                        should_cache=(lambda r: isinstance(r.get("questions"), list)) if part == "quiz" else None,
+                    )
+                except Exception as e:  # pragma: no cover
+                    return Response({"detail": f"Erreur IA: {e}"}, status=500)
+
+        payload = {}
+        for part in parts:
+            _, _, field = self.STUDY_PACK_PARTS[part]
+            value = results[part]
+            if field is None:
+                payload[part] = {str(k): v for k, v in (value if isinstance(value, dict) else {}).items()}
+            else:
+                payload[part] = value.get(field, [] if part == "quiz" else ({} if part == "steps" else ""))
+
+        out_ser = StudyPackSerializer(data=payload)
+        out_ser.is_valid(raise_exception=True)
+        return self._tag_artifact(Response(out_ser.data), etag, keys)
+
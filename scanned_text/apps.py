@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class ScannedTextConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scanned_text'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+
+        from APP.db import configure_sqlite_connection
+        from scanned_text import signals  # noqa: F401
+        from scanned_text.helpers import metrics, search
+
+        connection_created.connect(configure_sqlite_connection, dispatch_uid="sqlite_pragmas")
+        connection_created.connect(metrics.install_db_wrapper, dispatch_uid="scanned_text_db_metrics")
+        post_migrate.connect(search.install_after_migrate, sender=self, dispatch_uid="scanned_text_search_index")
@@ -0,0 +1,269 @@
+"""Vues asynchrones (ASGI) équivalentes aux actions de ScannedTextViewSet.
+
+Les vues DRF sont synchrones: sous ASGI, chaque requête bloquée sur un appel
+LLM occupe un thread. Ces vues Django `async def` utilisent AsyncOpenAI et
+l'ORM asynchrone, ce qui permet à un seul worker uvicorn de garder des
+centaines d'appels LLM en vol. Elles sont servies sous `/api/v1/async/` et
+réutilisent les serializers, le cache IA et la file de jobs existants.
+
+Authentification, permissions, throttling et résolution de l'objet passent
+par le cycle DRF de ScannedTextViewSet (`_drf_initial`, dans un thread): les
+deux jeux de vues appliquent les mêmes règles.
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.utils.encoders import JSONEncoder
+
+from .helpers import ai_cache, conditional, job_queue, metrics, processing, resilience
+from .helpers.ai import (
+    generate_exercise_steps,
+    generate_quiz_from_text,
+    generate_text_explanation,
+    get_difficult_words_with_meanings,
+)
+from .models import ProcessingJob, ScannedText
+from .serializers import (
+    DifficultWordsResponseSerializer,
+    ExerciseStepsResponseSerializer,
+    ProcessingJobSerializer,
+    QuizQuestionSerializer,
+    ScannedTextSerializer,
+    TextExplanationSerializer,
+)
+
+
+def _json(data, status=200, headers=None) -> JsonResponse:
+    # Même encodage que le JSONRenderer de DRF (UUID, dates, unicode).
+    with metrics.RENDER_SECONDS.time(format="json"):
+        return JsonResponse(
+            data,
+            status=status,
+            headers=headers,
+            safe=False,
+            encoder=JSONEncoder,
+            json_dumps_params={"ensure_ascii": False, "separators": (",", ":"), "allow_nan": False},
+        )
+
+
+def _drf_initial(request, action: str, pk=None):
+    """Cycle DRF de ScannedTextViewSet pour `action`: authentification, permissions,
+    throttling et, si `pk` est donné, résolution de l'objet (queryset et
+    permissions d'objet de la vue). Retourne (objet, réponse d'erreur rendue)."""
+    from .api import ScannedTextViewSet
+
+    kwargs = {"pk": pk} if pk is not None else {}
+    view = ScannedTextViewSet(
+        action_map={request.method.lower(): action}, detail=pk is not None, basename="scanned-texts"
+    )
+    view.setup(request, **kwargs)
+    view.format_kwarg = None
+    view.headers = view.default_response_headers
+    drf_request = view.initialize_request(request, **kwargs)
+    view.request = drf_request
+    try:
+        view.initial(drf_request, **kwargs)
+        instance = view.get_object() if pk is not None else None
+    except Exception as exc:
+        response = view.finalize_response(drf_request, view.handle_exception(exc), **kwargs)
+        return None, response.render()
+    request.user = drf_request.user
+    return instance, None
+
+
+async def _prepare(request, methods: tuple[str, ...], action: str, pk=None):
+    """Méthode HTTP, puis les contrôles de la vue DRF (`_drf_initial`)."""
+    if request.method not in methods:
+        return None, _json({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    return await sync_to_async(_drf_initial)(request, action, pk)
+
+
+def _validated(serializer_class, data, many=False):
+    serializer = serializer_class(data=data, many=many)
+    if not serializer.is_valid():
+        return None, _json(serializer.errors, status=400)
+    return serializer.data, None
+
+
+@csrf_exempt
+async def scanned_text_create(request):
+    _, error = await _prepare(request, ("POST",), "create")
+    if error is not None:
+        return error
+
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return _json({"detail": "JSON parse error."}, status=400)
+    original_text = payload.get("original_text", "") if isinstance(payload, dict) else ""
+    if not isinstance(original_text, str) or not original_text.strip():
+        return _json({"error": "Le champ original_text est requis."}, status=400)
+
+    if job_queue.async_ingestion_requested(request):
+        scanned = await ScannedText.objects.acreate(user=request.user, original_text=original_text)
+        job = await ProcessingJob.objects.acreate(scanned_text=scanned)
+        data = ProcessingJobSerializer(job, context={"request": request}).data
+        return _json(data, status=202, headers={"Location": data["status_url"]})
+
+    try:
+        processed, detected_type = await processing.aprocess_original_text(original_text)
+    except processing.ProcessingUnavailable as e:
+        return _json({"detail": str(e)}, status=503, headers={"Retry-After": str(resilience.retry_after())})
+    except processing.ProcessingError as e:
+        return _json({"detail": str(e)}, status=500)
+
+    scanned = await ScannedText.objects.acreate(
+        user=request.user,
+        original_text=original_text,
+        processed_text=processed,
+        detected_type=detected_type,
+    )
+    return _json(ScannedTextSerializer(scanned).data, status=201)
+
+
+async def scanned_text_detail(request, pk):
+    scanned, error = await _prepare(request, ("GET",), "retrieve", pk)
+    if error is not None:
+        return error
+    etag = conditional.text_etag(scanned, "async")
+    not_modified = await conditional.anot_modified(request, etag, "retrieve")
+    return not_modified or conditional.tag(_json(ScannedTextSerializer(scanned).data), etag)
+
+
+async def _cached_ai_result(kind, helper, prompt_version, scanned, should_cache=None):
+    """Équivalent asynchrone de ScannedTextViewSet._cached_ai_result."""
+    age = scanned.user.age
+    classe = scanned.user.classe
+    return await ai_cache.aget_or_compute(
+        kind,
+        prompt_version,
+        scanned.processed_text,
+        age,
+        classe,
+        lambda: helper(processed_text=scanned.processed_text, age=age, classe=classe),
+        should_cache=should_cache,
+    )
+
+
+async def _load_for_ai(request, pk, action):
+    """Retourne (scanned, erreur) pour les actions IA de détail."""
+    scanned, error = await _prepare(request, ("GET",), action, pk)
+    if error is not None:
+        return None, error
+    if not scanned.processed_text:
+        return None, _json({"detail": "Le texte scanné n'a pas de processed_text."}, status=400)
+    return scanned, None
+
+
+async def _check_artifact(request, scanned, kind, prompt_version, view):
+    """Retourne (etag, clés de cache, réponse 304 ou None) pour une action IA."""
+    etag, keys = conditional.artifact_etag(scanned, [(kind, prompt_version)], "async")
+    return etag, keys, await conditional.anot_modified(request, etag, view, keys)
+
+
+async def _tag_artifact(response, etag, keys):
+    """Équivalent asynchrone de ScannedTextViewSet._tag_artifact."""
+    if etag is not None and response.status_code == 200 and await ai_cache.acontains(keys):
+        conditional.tag(response, etag)
+    return response
+
+
+async def words_explanation(request, pk):
+    scanned, error = await _load_for_ai(request, pk, "words_explanation")
+    if error is not None:
+        return error
+    etag, keys, not_modified = await _check_artifact(
+        request, scanned, "words-explanation", get_difficult_words_with_meanings.PROMPT_VERSION, "words_explanation"
+    )
+    if not_modified is not None:
+        return not_modified
+    try:
+        raw_result = await _cached_ai_result(
+            "words-explanation",
+            get_difficult_words_with_meanings.aget_difficult_words_with_meanings,
+            get_difficult_words_with_meanings.PROMPT_VERSION,
+            scanned,
+        )
+    except Exception as e:  # pragma: no cover
+        return _json({"detail": f"Erreur IA: {e}"}, status=500)
+
+    words_mapping = raw_result if isinstance(raw_result, dict) else {}
+    data, error = _validated(
+        DifficultWordsResponseSerializer, {"words": {str(k): v for k, v in words_mapping.items()}}
+    )
+    return await _tag_artifact(error or _json(data), etag, keys)
+
+
+async def text_explanation(request, pk):
+    scanned, error = await _load_for_ai(request, pk, "text_explanation")
+    if error is not None:
+        return error
+    etag, keys, not_modified = await _check_artifact(
+        request, scanned, "text-explanation", generate_text_explanation.PROMPT_VERSION, "text_explanation"
+    )
+    if not_modified is not None:
+        return not_modified
+    try:
+        raw_result = await _cached_ai_result(
+            "text-explanation",
+            generate_text_explanation.agenerate_text_explanation,
+            generate_text_explanation.PROMPT_VERSION,
+            scanned,
+        )
+    except Exception as e:  # pragma: no cover
+        return _json({"detail": f"Erreur IA: {e}"}, status=500)
+
+    data, error = _validated(TextExplanationSerializer, {"explanation": raw_result.get("explanation", "")})
+    return await _tag_artifact(error or _json(data), etag, keys)
+
+
+async def exercise_steps(request, pk):
+    scanned, error = await _load_for_ai(request, pk, "exercise_steps")
+    if error is not None:
+        return error
+    if scanned.detected_type != "exercice":
+        return _json({"detail": "Le texte scanné n'est pas de type 'exercice'."}, status=400)
+    etag, keys, not_modified = await _check_artifact(
+        request, scanned, "exercise-steps", generate_exercise_steps.PROMPT_VERSION, "exercise_steps"
+    )
+    if not_modified is not None:
+        return not_modified
+    try:
+        raw_result = await _cached_ai_result(
+            "exercise-steps",
+            generate_exercise_steps.agenerate_exercise_steps,
+            generate_exercise_steps.PROMPT_VERSION,
+            scanned,
+        )
+    except Exception as e:  # pragma: no cover
+        return _json({"detail": f"Erreur IA: {e}"}, status=500)
+
+    data, error = _validated(ExerciseStepsResponseSerializer, {"steps": raw_result.get("steps", {})})
+    return await _tag_artifact(error or _json(data), etag, keys)
+
+
+async def quiz_from_text(request, pk):
+    scanned, error = await _load_for_ai(request, pk, "quiz_from_text")
+    if error is not None:
+        return error
+    etag, keys, not_modified = await _check_artifact(
+        request, scanned, "quiz-from-text", generate_quiz_from_text.PROMPT_VERSION, "quiz_from_text"
+    )
+    if not_modified is not None:
+        return not_modified
+    try:
+        raw_result = await _cached_ai_result(
+            "quiz-from-text",
+            generate_quiz_from_text.agenerate_quiz_from_text,
+            generate_quiz_from_text.PROMPT_VERSION,
+            scanned,
+            should_cache=lambda r: isinstance(r.get("questions"), list),
+        )
+    except Exception as e:  # pragma: no cover
+        return _json({"detail": f"Erreur IA: {e}"}, status=500)
+
+    data, error = _validated(QuizQuestionSerializer, raw_result.get("questions", []), many=True)
+    return await _tag_artifact(error or _json(data), etag, keys)
@@ -0,0 +1,19 @@
+from rest_framework.authentication import TokenAuthentication
+
+from scanned_text.helpers import auth_cache
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication de DRF sans requête SQL quand le jeton est en cache (helpers.auth_cache).
+
+    Seuls les jetons valides d'utilisateurs actifs sont mis en cache : les
+    erreurs (jeton inconnu, utilisateur inactif) restent celles de DRF.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = auth_cache.get(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        auth_cache.store(token)
+        return user, token
@@ -0,0 +1,32 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+from rest_framework.views import exception_handler
+
+from scanned_text.helpers import metrics, resilience
+from scanned_text.helpers.processing import ProcessingUnavailable
+
+
+class ServiceUnavailable(APIException):
+    """503 avec en-tête Retry-After (`wait`), comme Throttled pour les 429."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Service IA momentanément indisponible, réessayez plus tard."
+    default_code = "service_unavailable"
+
+    def __init__(self, detail=None, code=None, wait=None):
+        super().__init__(detail, code)
+        self.wait = resilience.retry_after() if wait is None else wait
+
+
+def metrics_exception_handler(exc, context):
+    """Gestionnaire DRF par défaut, qui compte en plus les requêtes rejetées par throttling.
+
+    Un fournisseur LLM indisponible ou délesté donne une 503 avec Retry-After
+    (et non une 500).
+    """
+    if isinstance(exc, Throttled):
+        view = context.get("view")
+        metrics.THROTTLED_REQUESTS.inc(view=getattr(view, "action", None) or type(view).__name__)
+    if isinstance(exc, (resilience.LLMUnavailable, ProcessingUnavailable)):
+        exc = ServiceUnavailable()
+    return exception_handler(exc, context)
@@ -0,0 +1,52 @@
+"""Champs de modèle à stockage compressé (voir scanned_text.helpers.compression)."""
+
+from django.db import models
+
+from scanned_text.helpers import compression
+
+
+class CompressedTextField(models.TextField):
+    """TextField compressé (zlib ou zstd) dans une colonne BLOB sous SQLite.
+
+    Sous PostgreSQL la colonne reste `text` (déjà compressée par TOAST). Les
+    recherches par sous-chaîne (`icontains`...) ne fonctionnent pas sur les
+    valeurs compressées.
+    """
+
+    def db_type(self, connection):
+        if compression.stores_compressed(connection):
+            return "blob"
+        return super().db_type(connection)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if isinstance(value, str) and compression.stores_compressed(connection):
+            return compression.compress(value)
+        return value
+
+    def from_db_value(self, value, expression, connection):
+        return compression.decompress(value)
+
+
+class CompressedJSONField(models.JSONField):
+    """JSONField dont le JSON sérialisé est compressé sous SQLite (jsonb ailleurs)."""
+
+    def db_type(self, connection):
+        if compression.stores_compressed(connection):
+            return "blob"
+        return super().db_type(connection)
+
+    def db_check(self, connection):
+        # La contrainte JSON_VALID de SQLite rejetterait les valeurs compressées.
+        if compression.stores_compressed(connection):
+            return None
+        return super().db_check(connection)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if isinstance(value, str) and compression.stores_compressed(connection):
+            return compression.compress(value)
+        return value
+
+    def from_db_value(self, value, expression, connection):
+        return super().from_db_value(compression.decompress(value), expression, connection)
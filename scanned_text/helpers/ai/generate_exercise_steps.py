@@ -1,40 +1,30 @@
 
+import logging
 
-import json
-from scanned_text.helpers.ai_utils import _OPENAI_MODEL, initOpenAI
+from scanned_text.helpers import metrics, resilience
+from scanned_text.helpers.ai_utils import _OPENAI_MODEL, extract_json, get_async_openai_client, get_openai_client
 
+# À incrémenter à chaque modification du prompt: invalide le cache IA (ai_cache).
+PROMPT_VERSION = 1
 
-def generate_exercise_steps(processed_text: str, age: int, classe: str) -> dict:
-    """
-    Utilise GPT pour générer les étapes de résolution de l'exercice fourni dans `processed_text`.
+logger = logging.getLogger(__name__)
 
-    Retour :
-        {
-            "steps": {
-                0: "Lire attentivement l'énoncé",
-                1: "Identifier les données connues",
-                ...
-            },
-        }
-    """
-    _openai_client = initOpenAI()
-    _OPENAI_ENABLED = _openai_client is not None
 
-    def _fallback_steps(text: str) -> dict:
-        sentences = [s.strip() for s in text.split(".") if s.strip()]
-        base_steps = [
-            "Lire attentivement l'énoncé",
-            "Identifier les données connues et la question",
-            "Choisir la méthode adaptée",
-            "On ne doit pas donner la réponse juste les étapes",
-        ]
-        steps = {str(i): step for i, step in enumerate(base_steps[: max(3, min(5, len(base_steps)))])}
-        return {"steps": steps}
+@metrics.counted(metrics.AI_FALLBACKS, helper="exercise_steps")
+def _fallback_steps(text: str) -> dict:
+    sentences = [s.strip() for s in text.split(".") if s.strip()]
+    base_steps = [
+        "Lire attentivement l'énoncé",
+        "Identifier les données connues et la question",
+        "Choisir la méthode adaptée",
+        "On ne doit pas donner la réponse juste les étapes",
+    ]
+    steps = {str(i): step for i, step in enumerate(base_steps[: max(3, min(5, len(base_steps)))])}
+    return {"steps": steps}
 
-    if not _OPENAI_ENABLED or not _openai_client:
-        return _fallback_steps(processed_text)
 
-    response = _openai_client.chat.completions.create(
+def _request_kwargs(processed_text: str, age: int, classe: str) -> dict:
+    return dict(
         model=_OPENAI_MODEL,
         max_completion_tokens=800,
         messages=[
@@ -67,43 +57,72 @@ def generate_exercise_steps(processed_text: str, age: int, classe: str) -> dict:
         ],
     )
 
+
+@metrics.timed(metrics.LLM_PARSE_SECONDS, helper="exercise_steps")
+def _parse_response(response) -> dict:
     # Extraire le contenu indépendamment du type de réponse (objets vs dict-like)
     content = None
     try:
         content = response.choices[0].message.content
-        print("OpenAI response content:", content)
+        logger.debug("Réponse OpenAI (étapes): %s", content)
     except Exception:
         try:
             content = response.choices[0].message.content
         except Exception:
             content = ""
 
-    # Tentative de parsing direct
-    def _try_parse_json(txt: str):
-        try:
-            return json.loads(txt)
-        except Exception:
-            return None
-
-    steps_json = _try_parse_json(content)
-    if steps_json is None:
-        # Essayer d'extraire un éventuel bloc JSON dans des backticks
-        if "```" in content:
-            parts = content.split("```")
-            # chercher un bloc qui ressemble à du JSON
-            for i in range(len(parts)):
-                candidate = parts[i].strip()
-                if candidate.startswith("{") and candidate.endswith("}"):
-                    parsed = _try_parse_json(candidate)
-                    if parsed is not None:
-                        steps_json = parsed
-                        break
-
-    if steps_json is None:
-        # Fallback texte -> liste d'étapes
-        lines = [line.strip("- •\t ") for line in content.split("\n") if line.strip()]
+    steps_json = extract_json(content)
+    if isinstance(steps_json, list):
+        steps_json = dict(enumerate(steps_json))
+    if not isinstance(steps_json, dict):
+        # Réponse non JSON: servie ligne à ligne, mais pas mise en cache.
+        resilience.mark_degraded()
+        lines = [line.strip("- •\t ") for line in (content or "").split("\n") if line.strip()]
         steps_json = {i: line for i, line in enumerate(lines) if line}
 
     # S'assurer que les clés sont bien des chaînes
     normalized = {str(k): v for k, v in steps_json.items()}
     return {"steps": normalized}
+
+
+def generate_exercise_steps(processed_text: str, age: int, classe: str) -> dict:
+    """
+    Utilise GPT pour générer les étapes de résolution de l'exercice fourni dans `processed_text`.
+
+    Retour :
+        {
+            "steps": {
+                0: "Lire attentivement l'énoncé",
+                1: "Identifier les données connues",
+                ...
+            },
+        }
+    """
+    _openai_client = get_openai_client()
+    _OPENAI_ENABLED = _openai_client is not None
+
+    if not _OPENAI_ENABLED or not _openai_client:
+        return _fallback_steps(processed_text)
+
+    try:
+        response = resilience.create_completion(
+            _openai_client, helper="exercise_steps", **_request_kwargs(processed_text, age, classe)
+        )
+    except resilience.LLMUnavailable:
+        return _fallback_steps(processed_text)
+    return _parse_response(response)
+
+
+async def agenerate_exercise_steps(processed_text: str, age: int, classe: str) -> dict:
+    """Version asynchrone (AsyncOpenAI) de `generate_exercise_steps`."""
+    _openai_client = get_async_openai_client()
+    if _openai_client is None:
+        return _fallback_steps(processed_text)
+
+    try:
+        response = await resilience.acreate_completion(
+            _openai_client, helper="exercise_steps", **_request_kwargs(processed_text, age, classe)
+        )
+    except resilience.LLMUnavailable:
+        return _fallback_steps(processed_text)
+    return _parse_response(response)
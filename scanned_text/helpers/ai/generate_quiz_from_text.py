@@ -1,30 +1,72 @@
 
-from scanned_text.helpers.ai_utils import _OPENAI_MODEL, initOpenAI
+import random
+import re
 
+from scanned_text.helpers import lexicon, metrics, resilience
+from scanned_text.helpers.ai_utils import _OPENAI_MODEL, extract_json, get_async_openai_client, get_openai_client
 
-def generate_quiz_from_text(processed_text: str, age: int, classe: str) -> dict:
-    """
-    Utilise GPT pour générer une liste de questions à choix multiple à partir du texte scanné,
-    adaptée à l'âge et au niveau scolaire de l'utilisateur.
-    
-    Structure des éléments retournés :
-    [
-        {
-            "question": "Quel est le sujet principal du texte ?",
-            "options": ["La pollution", "Le sport", "L'école", "La santé"],
-            "answer": "La pollution",
-            "explanation": "Le texte parle principalement de la pollution et de ses effets."
-        },
-        ...
-    ]
+# À incrémenter à chaque modification du prompt: invalide le cache IA (ai_cache).
+PROMPT_VERSION = 1
+
+_SENTENCE_RE = re.compile(r"[^.!?…]+[.!?…]*")
+_BLANK = "_____"
+# Les ~300 formes les plus fréquentes (mots grammaticaux, verbes courants) ne
+# font pas de bons trous.
+_MIN_KEYWORD_RANK = 300
+_MAX_FALLBACK_QUESTIONS = 5
+
+
+@metrics.counted(metrics.AI_FALLBACKS, helper="quiz")
+def _fallback_quiz(text: str) -> dict:
+    """Quiz calculé localement: phrases à trous (« cloze ») sur les mots les plus rares du texte.
+
+    Pour chaque phrase, le mot le plus rare (lexique de fréquence) est masqué;
+    les autres options sont les mots masqués des autres phrases, complétés par
+    d'autres mots rares du texte. Le tirage dépend seulement du texte: le même
+    texte donne toujours le même quiz.
     """
-    _openai_client = initOpenAI()
-    _OPENAI_ENABLED = _openai_client is not None
+    rng = random.Random(text)
+    cloze = []  # (rang, position, phrase, index du mot, mot)
+    for position, sentence in enumerate(s.strip() for s in _SENTENCE_RE.findall(text or "")):
+        found = lexicon.keywords(sentence, _MIN_KEYWORD_RANK)
+        if found:
+            idx, word, rank = max(found, key=lambda k: (k[2], -k[0]))
+            cloze.append((rank, position, sentence, idx, word))
 
-    if not _OPENAI_ENABLED or not _openai_client:
-        return {}
+    seen = set()
+    chosen = []
+    for item in sorted(cloze, key=lambda c: (-c[0], c[1])):
+        if item[4].lower() not in seen:
+            seen.add(item[4].lower())
+            chosen.append(item)
+    chosen = sorted(chosen[:_MAX_FALLBACK_QUESTIONS], key=lambda c: c[1])
 
-    response = _openai_client.chat.completions.create(
+    pool = [item[4] for item in chosen]
+    for _, word, _ in sorted(lexicon.keywords(text, _MIN_KEYWORD_RANK), key=lambda k: -k[2]):
+        if word.lower() not in seen:
+            seen.add(word.lower())
+            pool.append(word)
+
+    questions = []
+    for _, _, sentence, idx, word in chosen:
+        others = [w for w in pool if w.lower() != word.lower()]
+        if len(others) < 2:
+            continue
+        options = [word] + rng.sample(others, min(3, len(others)))
+        rng.shuffle(options)
+        words = sentence.split()
+        words[idx] = words[idx].replace(word, _BLANK, 1)
+        questions.append({
+            "question": f"Complète la phrase : « {' '.join(words)} »",
+            "options": options,
+            "answer": word,
+            "explanation": f"Le texte dit : « {sentence} »",
+        })
+    return {"questions": questions} if questions else {}
+
+
+def _request_kwargs(processed_text: str, age: int, classe: str) -> dict:
+    return dict(
         model=_OPENAI_MODEL,  # ou "gpt-5-nano" si activé
         temperature=0.3,
         max_completion_tokens=900,
@@ -60,14 +102,64 @@ def generate_quiz_from_text(processed_text: str, age: int, classe: str) -> dict:
         ]
     )
 
+
+@metrics.timed(metrics.LLM_PARSE_SECONDS, helper="quiz")
+def _parse_response(response) -> dict:
     raw = response.choices[0].message.content
 
-    try:
-        import json
-        quiz_data = json.loads(raw)
-    except Exception:
+    quiz_data = extract_json(raw)
+    if quiz_data is None:
         quiz_data = {"error": "Échec du parsing JSON", "raw": raw}
 
     return {
         "questions": quiz_data
-    }
\ No newline at end of file
+    }
+
+
+def generate_quiz_from_text(processed_text: str, age: int, classe: str) -> dict:
+    """
+    Utilise GPT pour générer une liste de questions à choix multiple à partir du texte scanné,
+    adaptée à l'âge et au niveau scolaire de l'utilisateur.
+    
+    Structure des éléments retournés :
+    [
+        {
+            "question": "Quel est le sujet principal du texte ?",
+            "options": ["La pollution", "Le sport", "L'école", "La santé"],
+            "answer": "La pollution",
+            "explanation": "Le texte parle principalement de la pollution et de ses effets."
+        },
+        ...
+    ]
+
+    Sans client OpenAI, ou si le LLM est indisponible ou délesté, le quiz à
+    trous local (`_fallback_quiz`) est renvoyé.
+    """
+    _openai_client = get_openai_client()
+    _OPENAI_ENABLED = _openai_client is not None
+
+    if not _OPENAI_ENABLED or not _openai_client:
+        return _fallback_quiz(processed_text)
+
+    try:
+        response = resilience.create_completion(
+            _openai_client, helper="quiz", **_request_kwargs(processed_text, age, classe)
+        )
+    except resilience.LLMUnavailable:
+        return _fallback_quiz(processed_text)
+    return _parse_response(response)
+
+
+async def agenerate_quiz_from_text(processed_text: str, age: int, classe: str) -> dict:
+    """Version asynchrone (AsyncOpenAI) de `generate_quiz_from_text`."""
+    _openai_client = get_async_openai_client()
+    if _openai_client is None:
+        return _fallback_quiz(processed_text)
+
+    try:
+        response = await resilience.acreate_completion(
+            _openai_client, helper="quiz", **_request_kwargs(processed_text, age, classe)
+        )
+    except resilience.LLMUnavailable:
+        return _fallback_quiz(processed_text)
+    return _parse_response(response)
@@ -0,0 +1,126 @@
+
+from scanned_text.helpers import metrics, resilience
+from scanned_text.helpers.ai_utils import _OPENAI_MODEL, extract_json, get_openai_client
+
+# Parties disponibles, dans l'ordre de la réponse.
+PARTS = ("words", "explanation", "steps", "quiz")
+
+# Budget de tokens de sortie par partie (mêmes ordres de grandeur que les helpers dédiés).
+_PART_MAX_TOKENS = {"words": 800, "explanation": 600, "steps": 800, "quiz": 900}
+
+_PART_INSTRUCTIONS = {
+    "words": (
+        '"words": objet JSON des mots difficiles; clé = position du mot dans le texte (split par espace, '
+        'en partant de 0, en chaîne "3"), valeur = définition simple adaptée à l\'âge.'
+    ),
+    "explanation": (
+        '"explanation": explication claire et bienveillante du texte en français, 5 à 7 phrases, '
+        "sans liste ni balises."
+    ),
+    "steps": (
+        '"steps": objet JSON des étapes pour résoudre l\'exercice; clé = "0", "1", ..., '
+        "valeur = phrase claire. Ne donne pas la réponse, seulement les étapes."
+    ),
+    "quiz": (
+        '"quiz": liste de questions à choix multiple, chacune de la forme '
+        '{"question": "...", "options": ["A", "B", "C"], "answer": "A", "explanation": "..."}; '
+        "3 à 5 options, la réponse est exactement l'une des options."
+    ),
+}
+
+
+def _valid_mapping(value) -> bool:
+    return isinstance(value, dict) and bool(value) and all(isinstance(v, str) and v.strip() for v in value.values())
+
+
+def _valid_quiz(value) -> bool:
+    if not isinstance(value, list) or not value:
+        return False
+    for item in value:
+        if not isinstance(item, dict):
+            return False
+        options = item.get("options")
+        if not isinstance(options, list) or item.get("answer") not in options:
+            return False
+        if not all(isinstance(item.get(k), str) for k in ("question", "answer", "explanation")):
+            return False
+    return True
+
+
+def generate_study_pack(processed_text: str, age: int, classe: str, parts) -> dict:
+    """
+    Génère en un seul appel GPT plusieurs artefacts pédagogiques pour un texte.
+
+    Le texte n'est envoyé qu'une fois au lieu d'une fois par endpoint. Chaque
+    partie est retournée au format du helper dédié, pour pouvoir être mise en
+    cache sous sa clé et réutilisée par les endpoints individuels :
+        {
+            "words": {"3": "Définition simple"},            # get_difficult_words_with_meanings
+            "explanation": {"explanation": "...", "tokens_used": 0},  # generate_text_explanation
+            "steps": {"steps": {"0": "..."}},                # generate_exercise_steps
+            "quiz": {"questions": [...]},                    # generate_quiz_from_text
+        }
+
+    Les parties absentes ou invalides dans la réponse ne sont pas retournées: à
+    l'appelant de les obtenir via le helper dédié. Sans OpenAI, retourne {}.
+    """
+    parts = [part for part in PARTS if part in set(parts)]
+    _openai_client = get_openai_client()
+    if _openai_client is None or not parts:
+        return {}
+
+    instructions = "\n".join(f"- {_PART_INSTRUCTIONS[part]}" for part in parts)
+    response = resilience.create_completion(
+        _openai_client,
+        helper="study_pack",
+        model=_OPENAI_MODEL,
+        temperature=0.3,
+        max_completion_tokens=sum(_PART_MAX_TOKENS[part] for part in parts),
+        messages=[
+            {
+                "role": "system",
+                "content": (
+                    "Tu es un assistant pédagogique qui prépare des supports d'étude adaptés à l'âge "
+                    "et au niveau scolaire de l'élève. "
+                    "Réponds STRICTEMENT en JSON, sans texte autour, sans bloc de code."
+                ),
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"Texte à analyser :\n{processed_text}\n\n"
+                    f"Contexte élève → Âge: {age} | Classe: {classe}.\n"
+                    f"Retourne UNIQUEMENT un objet JSON avec les clés suivantes : {', '.join(parts)}.\n"
+                    f"{instructions}\n"
+                    "- Pas de commentaires, pas de texte hors JSON."
+                ),
+            },
+        ],
+    )
+
+    try:
+        content = response.choices[0].message.content
+    except Exception:
+        content = ""
+    with metrics.LLM_PARSE_SECONDS.time(helper="study_pack"):
+        parsed = extract_json(content)
+    if not isinstance(parsed, dict):
+        return {}
+
+    usage = getattr(response, "usage", None)
+    tokens_used = getattr(usage, "total_tokens", 0) or 0
+
+    pack = {}
+    words = parsed.get("words")
+    if "words" in parts and _valid_mapping(words):
+        pack["words"] = {str(k): v.strip() for k, v in words.items()}
+    explanation = parsed.get("explanation")
+    if "explanation" in parts and isinstance(explanation, str) and explanation.strip():
+        pack["explanation"] = {"explanation": explanation.strip(), "tokens_used": tokens_used}
+    steps = parsed.get("steps")
+    if "steps" in parts and _valid_mapping(steps):
+        pack["steps"] = {"steps": {str(k): v for k, v in steps.items()}}
+    quiz = parsed.get("quiz")
+    if "quiz" in parts and _valid_quiz(quiz):
+        pack["quiz"] = {"questions": quiz}
+    return pack
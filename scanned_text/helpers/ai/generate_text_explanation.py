@@ -1,6 +1,76 @@
 
+from typing import Iterator
 
-from scanned_text.helpers.ai_utils import _OPENAI_MODEL, initOpenAI
+from scanned_text.helpers import metrics, resilience, token_usage
+from scanned_text.helpers.ai_utils import _OPENAI_MODEL, get_async_openai_client, get_openai_client
+
+# À incrémenter à chaque modification du prompt: invalide le cache IA (ai_cache).
+PROMPT_VERSION = 1
+
+
+@metrics.counted(metrics.AI_FALLBACKS, helper="text_explanation")
+def _fallback_explanation(txt: str) -> str:
+    try:
+        sentences = [s.strip() for s in txt.replace("\r", " ").split(".") if s.strip()]
+        take = max(2, min(5, len(sentences)))
+        snippet = ". ".join(sentences[:take]).strip()
+        if not snippet:
+            snippet = txt.strip()
+    except Exception:
+        snippet = (txt or "").strip()
+    if len(snippet) > 600:
+        snippet = snippet[:600] + "..."
+    return (
+        "Voici une explication concise et accessible basée sur le texte fourni: "
+        + snippet
+    )
+
+
+def _build_messages(processed_text: str, age: int, classe: str) -> list:
+    return [
+        {
+            "role": "system",
+            "content": (
+                "Tu es un excellent pédagogue. Explique le texte de manière claire, simple, et adaptée à l'âge et à la classe. "
+                "Utilise un ton bienveillant, accessible, et évite le jargon. Réponds en français en 5 à 7 phrases maximum. "
+                "N'utilise pas de liste, pas de code, pas de balises."
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Texte à expliquer :\n\n{processed_text}\n\n"
+                f"Contexte élève → Âge: {age} | Classe: {classe}.\n"
+                "Fournis une explication claire et adaptée."
+            ),
+        },
+    ]
+
+
+@metrics.timed(metrics.LLM_PARSE_SECONDS, helper="text_explanation")
+def _parse_response(response, processed_text: str) -> dict:
+    # Content extraction (defensive)
+    try:
+        content = response.choices[0].message.content
+    except Exception:
+        try:
+            content = response.choices[0].message["content"]
+        except Exception:
+            content = ""
+    content = (content or "").strip()
+    if not content:
+        content = _fallback_explanation(processed_text)
+
+    # Token usage extraction (defensive)
+    usage = getattr(response, "usage", None)
+    tokens_used = 0
+    if usage is not None:
+        # usage may be an object with attributes or a dict
+        tokens_used = getattr(usage, "total_tokens", None) or (
+            usage.get("total_tokens") if isinstance(usage, dict) else 0
+        )
+
+    return {"explanation": content, "tokens_used": tokens_used or 0}
 
 
 def generate_text_explanation(processed_text: str, age: int, classe: str) -> dict:
@@ -14,75 +84,87 @@ def generate_text_explanation(processed_text: str, age: int, classe: str) -> dic
         }
     """
 
-    _openai_client = initOpenAI()
+    _openai_client = get_openai_client()
     _OPENAI_ENABLED = _openai_client is not None
 
-    def _fallback_explanation(txt: str) -> str:
-        try:
-            sentences = [s.strip() for s in txt.replace("\r", " ").split(".") if s.strip()]
-            take = max(2, min(5, len(sentences)))
-            snippet = ". ".join(sentences[:take]).strip()
-            if not snippet:
-                snippet = txt.strip()
-        except Exception:
-            snippet = (txt or "").strip()
-        if len(snippet) > 600:
-            snippet = snippet[:600] + "..."
-        return (
-            "Voici une explication concise et accessible basée sur le texte fourni: "
-            + snippet
-        )
-
     if not _OPENAI_ENABLED or not _openai_client:
         return {"explanation": _fallback_explanation(processed_text), "tokens_used": 0}
 
     try:
-        response = _openai_client.chat.completions.create(
+        response = resilience.create_completion(
+            _openai_client,
+            helper="text_explanation",
             model=_OPENAI_MODEL,
             temperature=0.3,
             max_completion_tokens=600,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "Tu es un excellent pédagogue. Explique le texte de manière claire, simple, et adaptée à l'âge et à la classe. "
-                        "Utilise un ton bienveillant, accessible, et évite le jargon. Réponds en français en 5 à 7 phrases maximum. "
-                        "N'utilise pas de liste, pas de code, pas de balises."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f"Texte à expliquer :\n\n{processed_text}\n\n"
-                        f"Contexte élève → Âge: {age} | Classe: {classe}.\n"
-                        "Fournis une explication claire et adaptée."
-                    ),
-                },
-            ],
+            messages=_build_messages(processed_text, age, classe),
         )
-
-        # Content extraction (defensive)
-        try:
-            content = response.choices[0].message.content
-        except Exception:
-            try:
-                content = response.choices[0].message["content"]
-            except Exception:
-                content = ""
-        content = (content or "").strip()
-        if not content:
-            content = _fallback_explanation(processed_text)
-
-        # Token usage extraction (defensive)
-        usage = getattr(response, "usage", None)
-        tokens_used = 0
-        if usage is not None:
-            # usage may be an object with attributes or a dict
-            tokens_used = getattr(usage, "total_tokens", None) or (
-                usage.get("total_tokens") if isinstance(usage, dict) else 0
-            )
-
-        return {"explanation": content, "tokens_used": tokens_used or 0}
+        return _parse_response(response, processed_text)
     except Exception:
         # Any error → safe fallback
+        resilience.mark_degraded()
         return {"explanation": _fallback_explanation(processed_text), "tokens_used": 0}
+
+
+async def agenerate_text_explanation(processed_text: str, age: int, classe: str) -> dict:
+    """Version asynchrone (AsyncOpenAI) de `generate_text_explanation`."""
+    _openai_client = get_async_openai_client()
+    if _openai_client is None:
+        return {"explanation": _fallback_explanation(processed_text), "tokens_used": 0}
+
+    try:
+        response = await resilience.acreate_completion(
+            _openai_client,
+            helper="text_explanation",
+            model=_OPENAI_MODEL,
+            temperature=0.3,
+            max_completion_tokens=600,
+            messages=_build_messages(processed_text, age, classe),
+        )
+        return _parse_response(response, processed_text)
+    except Exception:
+        resilience.mark_degraded()
+        return {"explanation": _fallback_explanation(processed_text), "tokens_used": 0}
+
+
+def stream_text_explanation(processed_text: str, age: int, classe: str) -> Iterator[str]:
+    """
+    Variante streaming de `generate_text_explanation`: produit les fragments de
+    texte au fur et à mesure de la génération (API OpenAI en mode `stream`).
+
+    Sans OpenAI, ou si l'appel échoue avant le premier fragment, produit
+    l'explication de secours en un seul fragment.
+    """
+    _openai_client = get_openai_client()
+    if _openai_client is None:
+        yield _fallback_explanation(processed_text)
+        return
+
+    emitted = False
+    try:
+        stream = resilience.create_completion(
+            _openai_client,
+            helper="text_explanation_stream",
+            model=_OPENAI_MODEL,
+            temperature=0.3,
+            max_completion_tokens=600,
+            messages=_build_messages(processed_text, age, classe),
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        for chunk in resilience.iter_stream(stream, helper="text_explanation_stream"):
+            # Le dernier fragment (sans `choices`) porte la consommation de tokens.
+            token_usage.record(getattr(chunk, "usage", None), "text_explanation_stream")
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                emitted = True
+                yield delta
+    except Exception:
+        # Erreur en cours de flux: on garde ce qui a déjà été envoyé (résultat
+        # dégradé, donc pas mis en cache).
+        resilience.mark_degraded()
+
+    if not emitted:
+        yield _fallback_explanation(processed_text)
@@ -1,58 +1,54 @@
 
 
-import json
-from scanned_text.helpers.ai_utils import _OPENAI_MODEL, initOpenAI
+from scanned_text.helpers import lexicon, metrics
+from scanned_text.helpers import resilience
+from scanned_text.helpers.ai_utils import _OPENAI_MODEL, extract_json, get_async_openai_client, get_openai_client
 
-def get_difficult_words_with_meanings(processed_text: str, age: int, classe: str) -> dict:
-    """Retourne un mapping index->définition simple des mots difficiles.
+# À incrémenter à chaque modification du prompt: invalide le cache IA (ai_cache).
+PROMPT_VERSION = 2
 
-    - Utilise OpenAI si disponible et tente de parser un JSON strict.
-    - En absence d'OpenAI (ou si parsing échoue), renvoie un fallback heuristique.
-    - Toujours retourner un dict avec des clés chaîne ("0", "1", ...).
-    """
-    _openai_client = initOpenAI()
-    _OPENAI_ENABLED = _openai_client is not None
 
-    def _fallback_mapping(text: str) -> dict:
-        words = (text or "").split()
-        difficult_indices = []
-        for idx, w in enumerate(words):
-            token = w.strip(",.;:!?()[]{}\"'«»“”–-_")
-            if len(token) >= 9 and token.isalpha():
-                difficult_indices.append(idx)
-            if len(difficult_indices) >= 5:
-                break
-        mapping = {}
-        for i in difficult_indices:
-            mapping[str(i)] = (
-                f"Mot potentiellement difficile pour {classe} ({age} ans). Explication simple: définition courte et accessible."
-            )
-        return mapping
+def _local_definition(word: str, age: int, classe: str) -> str:
+    return (
+        f"« {word} » : mot peu courant pour {classe} ({age} ans). "
+        "Explication simple: cherche sa définition dans le dictionnaire ou demande à ton enseignant."
+    )
+
+
+@metrics.counted(metrics.AI_FALLBACKS, helper="words")
+def _fallback_mapping(text: str, age: int, classe: str, candidates: list | None = None) -> dict:
+    """Mapping calculé localement: mots choisis par le lexique de fréquence."""
+    if candidates is None:
+        candidates = lexicon.difficult_words(text, age, classe)
+    return {str(i): _local_definition(word, age, classe) for i, word in candidates}
 
-    if not _OPENAI_ENABLED or not _openai_client:
-        return _fallback_mapping(processed_text)
 
-    response = _openai_client.chat.completions.create(
+def _request_kwargs(processed_text: str, age: int, classe: str, candidates: list) -> dict:
+    # Les mots sont choisis localement (lexicon): le modèle ne fait que les définir.
+    words = "\n".join(f'- "{i}": {word}' for i, word in candidates)
+    return dict(
         model=_OPENAI_MODEL,
         temperature=0.2,
-        max_completion_tokens=800,
+        max_completion_tokens=min(800, 80 * len(candidates) + 100),
         messages=[
             {
                 "role": "system",
                 "content": (
                     "Tu es un assistant pédagogique spécialisé dans la simplification de texte. "
-                    "Identifie les mots qui pourraient être compliqués pour un élève selon son âge et sa classe.\n\n"
+                    "Donne une définition simple de chaque mot demandé, selon son sens dans le texte "
+                    "et adaptée à l'âge et à la classe de l'élève.\n\n"
                     "Consignes de sortie:\n"
                     "- Retourne UNIQUEMENT un JSON, sans texte autour ni bloc de code.\n"
-                    "- Les clés DOIVENT être des chaînes (\"0\", \"1\", ...).\n"
+                    "- Les clés sont exactement celles fournies (\"0\", \"1\", ...).\n"
                     "- La valeur est une définition simple et adaptée à l'âge indiqué.\n"
                 ),
             },
             {
                 "role": "user",
                 "content": (
-                    f"Texte à analyser :\n{processed_text}\n\n"
+                    f"Texte :\n{processed_text}\n\n"
                     f"Contexte élève → Âge: {age} | Classe: {classe}.\n"
+                    f"Mots à définir (clé: mot) :\n{words}\n\n"
                     "Retourne un JSON de la forme :\n"
                     "{\n"
                     '  "3": "Définition simple",\n'
@@ -64,6 +60,9 @@ def get_difficult_words_with_meanings(processed_text: str, age: int, classe: str
         ],
     )
 
+
+@metrics.timed(metrics.LLM_PARSE_SECONDS, helper="words")
+def _parse_response(response, processed_text: str, age: int, classe: str, candidates: list) -> dict:
     # Extraction et parsing robustes
     try:
         content = response.choices[0].message.content
@@ -73,153 +72,63 @@ def get_difficult_words_with_meanings(processed_text: str, age: int, classe: str
         except Exception:
             content = ""
 
-    def _try_parse_json(txt: str):
-        try:
-            return json.loads(txt)
-        except Exception:
-            return None
-
-    result = _try_parse_json(content)
-    if result is None and content:
-        if "```" in content:
-            parts = content.split("```")
-            for part in parts:
-                candidate = part.strip()
-                if candidate.lower().startswith("json\n"):
-                    candidate = candidate[5:].strip()
-                if candidate.startswith("{") and candidate.endswith("}"):
-                    parsed = _try_parse_json(candidate)
-                    if parsed is not None:
-                        result = parsed
-                        break
-
-    if result is None and content:
-        start = content.find("{")
-        end = content.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            candidate = content[start : end + 1]
-            result = _try_parse_json(candidate)
-
+    result = extract_json(content)
     if not isinstance(result, dict):
-        return _fallback_mapping(processed_text)
+        # Réponse inexploitable: définitions locales, à ne pas mettre en cache.
+        resilience.mark_degraded()
+        return _fallback_mapping(processed_text, age, classe, candidates)
+
+    # Seuls les mots demandés sont conservés; un oubli du modèle est complété localement.
+    definitions = {str(k): v for k, v in result.items()}
+    mapping = {}
+    for i, word in candidates:
+        definition = definitions.get(str(i))
+        if isinstance(definition, str) and definition.strip():
+            mapping[str(i)] = definition.strip()
+        else:
+            mapping[str(i)] = _local_definition(word, age, classe)
+    return mapping
+
+
+async def aget_difficult_words_with_meanings(processed_text: str, age: int, classe: str) -> dict:
+    """Version asynchrone (AsyncOpenAI) de `get_difficult_words_with_meanings`."""
+    candidates = lexicon.difficult_words(processed_text, age, classe)
+    if not candidates:
+        return {}
+    _openai_client = get_async_openai_client()
+    if _openai_client is None:
+        return _fallback_mapping(processed_text, age, classe, candidates)
+
+    try:
+        response = await resilience.acreate_completion(
+            _openai_client, helper="words", **_request_kwargs(processed_text, age, classe, candidates)
+        )
+    except resilience.LLMUnavailable:
+        return _fallback_mapping(processed_text, age, classe, candidates)
+    return _parse_response(response, processed_text, age, classe, candidates)
 
-    normalized = {str(k): v for k, v in result.items()}
-    return normalized
 
-    """Retourne un mapping index->définition simplifiée des mots difficiles.
+def get_difficult_words_with_meanings(processed_text: str, age: int, classe: str) -> dict:
+    """Retourne un mapping index->définition simple des mots difficiles.
 
-    - Utilise OpenAI si disponible, sinon applique un fallback heuristique.
-    - Tente de parser la réponse en JSON même si elle contient des blocs de code.
-    - Si le JSON est vide ou invalide, applique un fallback heuristique.
+    - Les mots sont choisis localement (lexique de fréquence et seuil de la classe).
+    - Utilise OpenAI si disponible pour les seules définitions, en JSON strict.
+    - En absence d'OpenAI (ou si parsing échoue), renvoie des définitions locales.
+    - Toujours retourner un dict avec des clés chaîne ("0", "1", ...).
     """
-    _openai_client = initOpenAI()
+    candidates = lexicon.difficult_words(processed_text, age, classe)
+    if not candidates:
+        return {}
+    _openai_client = get_openai_client()
     _OPENAI_ENABLED = _openai_client is not None
 
-    def _heuristic_mapping(text: str) -> dict:
-        words = text.replace("\n", " ").split()
-        seen = set()
-        candidates = []
-        for idx, w in enumerate(words):
-            token = "".join(ch for ch in w if ch.isalpha())
-            lw = token.lower()
-            if len(token) >= 9 and lw not in seen:
-                seen.add(lw)
-                candidates.append((idx, token))
-            if len(candidates) >= 4:
-                break
-        if not candidates:
-            # fallback: plus longs mots > 6
-            words_clean = [(i, "".join(ch for ch in w if ch.isalpha())) for i, w in enumerate(words)]
-            words_clean = [(i, w) for i, w in words_clean if len(w) >= 7]
-            words_clean.sort(key=lambda t: len(t[1]), reverse=True)
-            candidates = words_clean[:3]
-        return {
-            str(i): f"Définition simplifiée du mot '{w}' adaptée à {age} ans (classe {classe})."
-            for i, w in candidates
-        }
-
     if not _OPENAI_ENABLED or not _openai_client:
-        # Ne pas renvoyer une map vide: fournir un résultat heuristique minimal
-        return _heuristic_mapping(processed_text)
+        return _fallback_mapping(processed_text, age, classe, candidates)
 
-    response = _openai_client.chat.completions.create(
-        model=_OPENAI_MODEL,
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "Tu es un assistant pédagogique spécialisé dans la simplification de texte. "
-                    "Tu dois identifier les mots qui pourraient être compliqués pour un élève selon son âge et son niveau scolaire.\n\n"
-                    "Consignes strictes de sortie :\n"
-                    "- Réponds UNIQUEMENT en JSON valide, sans bloc de code, sans texte autour.\n"
-                    "- Retourne entre 1 et 8 éléments.\n"
-                    "- Les clés DOIVENT être des chaînes représentant l'index du mot (`\"0\"`, `\"7\"`, ...).\n"
-                    "- Les valeurs DOIVENT être des définitions simples adaptées à {age} ans (classe {classe})."
-                ).format(age=age, classe=classe)
-            },
-            {
-                "role": "user",
-                "content": (
-                    f"Voici le texte à analyser :\n\n{processed_text}\n\n"
-                    "Retourne UNIQUEMENT un JSON de ce type :\n"
-                    "{\n"
-                    '  "3": "Définition simple",\n'
-                    '  "7": "Explication facile"\n'
-                    "}\n"
-                    "Chaque clé correspond à la position du mot dans le texte (split par espace) en partant de 0."
-                )
-            }
-        ],
-        temperature=0.2,
-        max_completion_tokens=800,
-    )
-
-    raw = None
     try:
-        raw = response.choices[0].message.content
-    except Exception:
-        try:
-            raw = response.choices[0].message["content"]
-        except Exception:
-            raw = ""
-
-    def _try_parse_json(txt: str):
-        try:
-            return json.loads(txt)
-        except Exception:
-            return None
-
-    parsed = _try_parse_json(raw)
-    if parsed is None and raw:
-        if "```" in raw:
-            parts = raw.split("```")
-            for part in parts:
-                candidate = part.strip()
-                if candidate.lower().startswith("json\n"):
-                    candidate = candidate[5:].strip()
-                if candidate.startswith("{") and candidate.endswith("}"):
-                    parsed = _try_parse_json(candidate)
-                    if parsed is not None:
-                        break
-
-    if parsed is None and raw:
-        s = raw.find("{")
-        e = raw.rfind("}")
-        if s != -1 and e != -1 and e > s:
-            parsed = _try_parse_json(raw[s : e + 1])
-
-    if not isinstance(parsed, dict) or len(parsed) == 0:
-        # Fallback heuristique si JSON vide/invalide
-        return _heuristic_mapping(processed_text)
-
-    # Normalisation: clés en chaînes, valeurs en chaînes non vides
-    normalized = {}
-    for k, v in parsed.items():
-        sk = str(k)
-        if isinstance(v, str) and v.strip():
-            normalized[sk] = v.strip()
-
-    if not normalized:
-        normalized = _heuristic_mapping(processed_text)
-
-    return normalized
\ No newline at end of file
+        response = resilience.create_completion(
+            _openai_client, helper="words", **_request_kwargs(processed_text, age, classe, candidates)
+        )
+    except resilience.LLMUnavailable:
+        return _fallback_mapping(processed_text, age, classe, candidates)
+    return _parse_response(response, processed_text, age, classe, candidates)
@@ -1,22 +1,138 @@
 
+import asyncio
+import contextvars
+import logging
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
-import json
-from scanned_text.helpers.ai_utils import _OPENAI_MODEL, initOpenAI
+from decouple import config
 
+from scanned_text.helpers import metrics, resilience
+from scanned_text.helpers.ai_utils import _OPENAI_MODEL, estimate_tokens, extract_json, get_async_openai_client, get_openai_client
 
-def process_ocr_text_with_openai(text: str, max_chars: int = 400) -> dict:
-    """Return a concise summary of the input text using OpenAI if configured.
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+")
 
-    Fallback: returns the first N characters when OpenAI is not enabled.
+logger = logging.getLogger(__name__)
+
+
+@metrics.counted(metrics.AI_FALLBACKS, helper="ocr")
+def _fallback(text: str, max_chars: int) -> dict:
+    return {"processed_text": (text[:max_chars] + "...") if len(text) > max_chars else text, "detected_type": None}
+
+
+def _unprocessed(text: str) -> dict:
+    """Texte non traité par le modèle: on le garde en entier plutôt que de le perdre."""
+    resilience.mark_degraded()
+    metrics.AI_FALLBACKS.inc(helper="ocr")
+    return {"processed_text": text, "detected_type": None}
+
+
+def _chunk_max_tokens() -> int:
+    # La sortie nettoyée a à peu près la taille de l'entrée: un fragment doit
+    # tenir dans max_completion_tokens (1000) avec de la marge.
+    return config("OCR_CHUNK_MAX_TOKENS", default=700, cast=int)
+
+
+def _chunk_concurrency() -> int:
+    return max(1, config("OCR_CHUNK_CONCURRENCY", default=4, cast=int))
+
+
+def split_into_chunks(text: str, max_tokens: int) -> list[str]:
+    """Découpe un texte en fragments d'au plus `max_tokens` (estimation locale).
+
+    Coupe de préférence entre paragraphes, puis entre phrases, et en dernier
+    recours entre mots.
     """
-    _openai_client = initOpenAI()
-    _OPENAI_ENABLED = _openai_client is not None
+    pieces = []
+    for paragraph in _PARAGRAPH_RE.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_RE.split(paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                pieces.append(sentence)
+                continue
+            words, current = sentence.split(), []
+            for word in words:
+                if current and estimate_tokens(" ".join(current + [word])) > max_tokens:
+                    pieces.append(" ".join(current))
+                    current = []
+                current.append(word)
+            if current:
+                pieces.append(" ".join(current))
 
-    if not _OPENAI_ENABLED or not _openai_client:
-        print("OpenAI not enabled, using fallback processing.")
-        return {"processed_text": (text[:max_chars] + "...") if len(text) > max_chars else text, "detected_type": None}
+    # Regroupe les morceaux consécutifs tant que le fragment reste sous la limite.
+    chunks, current = [], ""
+    for piece in pieces:
+        candidate = f"{current}\n\n{piece}" if current else piece
+        if current and estimate_tokens(candidate) > max_tokens:
+            chunks.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _reduce_chunks(chunks: list[str], results: list[dict]) -> dict:
+    """Assemble les fragments traités et décide du `detected_type` du document.
+
+    Le type retenu est celui qui couvre le plus de texte (vote pondéré par la
+    longueur des fragments); en cas d'égalité, 'exercice' l'emporte pour que
+    les étapes de résolution restent disponibles.
+    """
+    processed_parts = []
+    votes = Counter()
+    for chunk, result in zip(chunks, results):
+        processed_parts.append(result.get("processed_text") or chunk)
+        if result.get("detected_type"):
+            votes[result["detected_type"]] += len(chunk)
+
+    detected = None
+    if votes:
+        best = max(votes.values())
+        winners = [t for t, weight in votes.items() if weight == best]
+        detected = "exercice" if "exercice" in winners else winners[0]
+    return {"processed_text": "\n\n".join(processed_parts), "detected_type": detected}
 
-    response = _openai_client.chat.completions.create(
+
+def _request_kwargs(text: str, part: tuple[int, int] | None = None, detected_type: str | None = None) -> dict:
+    context = ""
+    if part is not None:
+        context = (
+            f"Ce texte est la partie {part[0]} sur {part[1]} d'un document plus long: "
+            "nettoie uniquement cette partie, sans la résumer ni la compléter.\n\n"
+        )
+    if detected_type:
+        # Type déjà connu (classifieur local): prompt de nettoyage seul, plus court.
+        return dict(
+            model=_OPENAI_MODEL,
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        f"Tu nettoies un texte scanné par OCR (un {detected_type}): corrige les fautes et "
+                        "les retours à la ligne inutiles sans changer le contenu. "
+                        "Réponds STRICTEMENT en JSON, sans texte autour, sans bloc de code."
+                    )
+                },
+                {
+                    "role": "user",
+                    "content": (
+                        f"{context}{text}\n\n"
+                        'Retourne UNIQUEMENT : {"processed_text": "Texte nettoyé..."}'
+                    )
+                }
+            ],
+            max_completion_tokens=1000
+        )
+    return dict(
         model=_OPENAI_MODEL,
         messages=[
             {
@@ -31,7 +147,7 @@ def process_ocr_text_with_openai(text: str, max_chars: int = 400) -> dict:
             {
                 "role": "user",
                 "content": (
-                    f"Voici un texte brut scanné :\n\n{text}\n\n"
+                    f"{context}Voici un texte brut scanné :\n\n{text}\n\n"
                     "Analyse le texte ci-dessus et retourne UNIQUEMENT un JSON strictement de la forme :\n"
                     "{\n"
                     '  "processed_text": "Texte nettoyé et lisible...",\n'
@@ -46,6 +162,9 @@ def process_ocr_text_with_openai(text: str, max_chars: int = 400) -> dict:
         max_completion_tokens=1000
     )
 
+
+@metrics.timed(metrics.LLM_PARSE_SECONDS, helper="ocr")
+def _parse_response(response, text: str) -> dict:
     raw_content = None
     try:
         raw_content = response.choices[0].message.content
@@ -55,51 +174,109 @@ def process_ocr_text_with_openai(text: str, max_chars: int = 400) -> dict:
         except Exception:
             raw_content = ""
 
-    # Helper: try parse JSON directly
-    def _try_parse_json(txt: str):
-        try:
-            return json.loads(txt)
-        except Exception:
-            return None
-
-    # 1) Direct parse
-    parsed = _try_parse_json(raw_content)
-
-    # 2) If failed, try to extract a JSON block from code fences
-    if parsed is None and raw_content:
-        if "```" in raw_content:
-            parts = raw_content.split("```")
-            for part in parts:
-                candidate = part.strip()
-                if candidate.lower().startswith("json\n"):
-                    candidate = candidate[5:].strip()
-                if candidate.startswith("{") and candidate.endswith("}"):
-                    parsed = _try_parse_json(candidate)
-                    if parsed is not None:
-                        break
-
-    # 3) If still failed, try to extract braces region heuristically
-    if parsed is None and raw_content:
-        start = raw_content.find("{")
-        end = raw_content.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            candidate = raw_content[start : end + 1]
-            parsed = _try_parse_json(candidate)
-
-    # 4) Final fallback: return a minimal structure using truncated text
-    if parsed is None or not isinstance(parsed, dict):
-        return {
-            "processed_text": (text[:max_chars] + "...") if len(text) > max_chars else text,
-            "detected_type": None,
-        }
-
-    # Ensure required keys exist and are strings
+    parsed = extract_json(raw_content)
+
+    # Réponse inexploitable: texte d'origine complet, résultat dégradé
+    if not isinstance(parsed, dict):
+        return _unprocessed(text)
     processed = parsed.get("processed_text")
     if not isinstance(processed, str) or not processed:
-        processed = (text[:max_chars] + "...") if len(text) > max_chars else text
+        return _unprocessed(text)
 
     detected = parsed.get("detected_type")
     if detected not in {"cours", "exercice"}:
         detected = None
 
     return {"processed_text": processed, "detected_type": detected}
+
+
+def _process_chunk(client, chunk: str, part: tuple[int, int], detected_type: str | None = None) -> dict:
+    try:
+        response = resilience.create_completion(client, helper="ocr", **_request_kwargs(chunk, part, detected_type))
+        return _parse_response(response, chunk)
+    except Exception:
+        return _unprocessed(chunk)
+
+
+def process_ocr_text_with_openai(text: str, max_chars: int = 400, detected_type: str | None = None) -> dict:
+    """Return a concise summary of the input text using OpenAI if configured.
+
+    Les textes longs (plusieurs pages) sont découpés en fragments traités en
+    parallèle puis réassemblés (map-reduce): la latence dépend du fragment le
+    plus lent plutôt que de la longueur totale, et rien n'est tronqué.
+
+    Si `detected_type` est déjà connu (classifieur local), le modèle ne fait que
+    nettoyer le texte et ce type est conservé.
+
+    Fallback: returns the first N characters when OpenAI is not enabled.
+    """
+    _openai_client = get_openai_client()
+    _OPENAI_ENABLED = _openai_client is not None
+
+    if not _OPENAI_ENABLED or not _openai_client:
+        logger.info("OpenAI non configuré: traitement de secours.")
+        return _fallback(text, max_chars)
+
+    chunks = split_into_chunks(text, _chunk_max_tokens())
+    if len(chunks) <= 1:
+        try:
+            response = resilience.create_completion(
+                _openai_client, helper="ocr", **_request_kwargs(text, detected_type=detected_type)
+            )
+        except resilience.LLMUnavailable:
+            return {**_unprocessed(text), "detected_type": detected_type}
+        result = _parse_response(response, text)
+    else:
+        # Chaque fragment s'exécute dans une copie du contexte courant (budget de
+        # temps de la requête, suivi des résultats dégradés).
+        jobs = [
+            (contextvars.copy_context(), chunk, (i + 1, len(chunks))) for i, chunk in enumerate(chunks)
+        ]
+        with ThreadPoolExecutor(max_workers=min(_chunk_concurrency(), len(chunks))) as pool:
+            results = list(
+                pool.map(lambda job: job[0].run(_process_chunk, _openai_client, job[1], job[2], detected_type), jobs)
+            )
+        result = _reduce_chunks(chunks, results)
+    if detected_type:
+        result["detected_type"] = detected_type
+    return result
+
+
+async def aprocess_ocr_text_with_openai(text: str, max_chars: int = 400, detected_type: str | None = None) -> dict:
+    """Version asynchrone (AsyncOpenAI) de `process_ocr_text_with_openai`."""
+    _openai_client = get_async_openai_client()
+    if _openai_client is None:
+        return _fallback(text, max_chars)
+
+    chunks = split_into_chunks(text, _chunk_max_tokens())
+    if len(chunks) <= 1:
+        try:
+            response = await resilience.acreate_completion(
+                _openai_client, helper="ocr", **_request_kwargs(text, detected_type=detected_type)
+            )
+        except resilience.LLMUnavailable:
+            return {**_unprocessed(text), "detected_type": detected_type}
+        result = _parse_response(response, text)
+        if detected_type:
+            result["detected_type"] = detected_type
+        return result
+
+    semaphore = asyncio.Semaphore(_chunk_concurrency())
+
+    async def process_chunk(chunk: str, part: tuple[int, int]) -> dict:
+        async with semaphore:
+            try:
+                response = await resilience.acreate_completion(
+                    _openai_client, helper="ocr", **_request_kwargs(chunk, part, detected_type)
+                )
+                return _parse_response(response, chunk)
+            except Exception:
+                return _unprocessed(chunk)
+
+    results = await asyncio.gather(
+        *(process_chunk(chunk, (i + 1, len(chunks))) for i, chunk in enumerate(chunks))
+    )
+    result = _reduce_chunks(chunks, list(results))
+    if detected_type:
+        result["detected_type"] = detected_type
+    return result
@@ -0,0 +1,291 @@
+"""Cache à deux niveaux pour les résultats IA dérivés d'un texte scanné.
+
+Niveau 1: LRU en mémoire (par processus). Niveau 2: table `AIArtifact` en base,
+partagée entre workers et persistante entre redémarrages.
+
+La clé est adressée par contenu: hash du `processed_text`, de l'âge, de la
+classe, du modèle et de la version du prompt. Une modification du texte ou un
+changement de `PROMPT_VERSION` dans un helper produit donc une nouvelle clé;
+les anciennes entrées ne sont plus jamais servies et sont purgées par
+`purge_text()` (signal sur ScannedText) ou `manage.py prune_ai_cache`.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from django.conf import settings
+
+from scanned_text.helpers import ai_utils, metrics, resilience, single_flight
+
+
+def text_hash(processed_text: str) -> str:
+    return hashlib.sha256((processed_text or "").encode("utf-8")).hexdigest()
+
+
+def make_key(kind: str, prompt_version: int, processed_text: str, age, classe) -> str:
+    raw = json.dumps(
+        [kind, prompt_version, ai_utils._OPENAI_MODEL, text_hash(processed_text), age, classe],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """LRU thread-safe minimal: clé -> (text_hash, valeur)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, thash: str, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (thash, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard_text(self, thash: str) -> None:
+        with self._lock:
+            for key in [k for k, (h, _) in self._data.items() if h == thash]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_lru = LRUCache(getattr(settings, "AI_CACHE_LRU_SIZE", 512))
+
+
+def is_enabled() -> bool:
+    """Sans client OpenAI configuré, les helpers renvoient des fallbacks locaux
+    peu coûteux: on ne les met pas en cache pour ne pas les servir une fois
+    OpenAI activé."""
+    return getattr(settings, "AI_CACHE_ENABLED", True) and ai_utils.get_openai_client() is not None
+
+
+def lookup(kind: str, prompt_version: int, processed_text: str, age, classe):
+    """Retourne la valeur en cache (LRU puis base) ou None."""
+    from scanned_text.models import AIArtifact
+
+    if not is_enabled():
+        return None
+    key = make_key(kind, prompt_version, processed_text, age, classe)
+    cached = _lru.get(key)
+    if cached is not None:
+        metrics.AI_CACHE_REQUESTS.inc(kind=kind, result="hit_lru")
+        return cached
+
+    artifact = AIArtifact.objects.filter(key=key).only("payload").first()
+    if artifact is None:
+        metrics.AI_CACHE_REQUESTS.inc(kind=kind, result="miss")
+        return None
+    metrics.AI_CACHE_REQUESTS.inc(kind=kind, result="hit_db")
+    _lru.set(key, text_hash(processed_text), artifact.payload)
+    return artifact.payload
+
+
+def store(kind: str, prompt_version: int, processed_text: str, age, classe, value) -> None:
+    """Mémorise `value` dans les deux niveaux de cache."""
+    from scanned_text.models import AIArtifact
+
+    if not is_enabled():
+        return
+    key = make_key(kind, prompt_version, processed_text, age, classe)
+    thash = text_hash(processed_text)
+    AIArtifact.objects.update_or_create(
+        key=key,
+        defaults={
+            "kind": kind,
+            "prompt_version": prompt_version,
+            "text_hash": thash,
+            "payload": value,
+        },
+    )
+    _lru.set(key, thash, value)
+
+
+def contains(keys) -> bool:
+    """Vrai si tous ces résultats sont en cache (LRU ou base), sans les compter comme hits."""
+    from scanned_text.models import AIArtifact
+
+    missing = [key for key in keys if _lru.get(key) is None]
+    return not missing or AIArtifact.objects.filter(key__in=missing).count() == len(missing)
+
+
+def get_or_compute(
+    kind: str,
+    prompt_version: int,
+    processed_text: str,
+    age,
+    classe,
+    compute: Callable[[], Any],
+    should_cache: Callable[[Any], bool] | None = None,
+):
+    """Retourne le résultat en cache ou appelle `compute()` et le mémorise.
+
+    `should_cache(value)` permet d'écarter un résultat invalide (ex. JSON non
+    parsé) qui ne doit pas être resservi. Un fallback servi parce que le LLM
+    était indisponible (voir resilience) n'est jamais mis en cache.
+
+    Les appels identiques simultanés sont coalescés (voir single_flight): un
+    seul appel LLM, dont le résultat est partagé avec les autres appelants.
+    """
+    if ai_utils.get_openai_client() is None:
+        return compute()
+
+    cached = lookup(kind, prompt_version, processed_text, age, classe)
+    if cached is not None:
+        return cached
+
+    def leader():
+        with resilience.track() as outcome:
+            value = compute()
+        if not outcome.degraded and (should_cache is None or should_cache(value)):
+            store(kind, prompt_version, processed_text, age, classe, value)
+        return value, outcome.degraded
+
+    recheck = None
+    if is_enabled():
+        def recheck():
+            cached = lookup(kind, prompt_version, processed_text, age, classe)
+            return None if cached is None else (cached, False)
+
+    key = make_key(kind, prompt_version, processed_text, age, classe)
+    value, degraded = single_flight.do(key, leader, recheck=recheck)
+    if degraded:
+        # Appelants coalescés: le fallback du leader est dégradé pour eux aussi.
+        resilience.mark_degraded()
+    return value
+
+
+async def alookup(kind: str, prompt_version: int, processed_text: str, age, classe):
+    """Version asynchrone de `lookup` (ORM async de Django)."""
+    from scanned_text.models import AIArtifact
+
+    if not is_enabled():
+        return None
+    key = make_key(kind, prompt_version, processed_text, age, classe)
+    cached = _lru.get(key)
+    if cached is not None:
+        metrics.AI_CACHE_REQUESTS.inc(kind=kind, result="hit_lru")
+        return cached
+
+    artifact = await AIArtifact.objects.filter(key=key).only("payload").afirst()
+    if artifact is None:
+        metrics.AI_CACHE_REQUESTS.inc(kind=kind, result="miss")
+        return None
+    metrics.AI_CACHE_REQUESTS.inc(kind=kind, result="hit_db")
+    _lru.set(key, text_hash(processed_text), artifact.payload)
+    return artifact.payload
+
+
+async def astore(kind: str, prompt_version: int, processed_text: str, age, classe, value) -> None:
+    """Version asynchrone de `store`."""
+    from scanned_text.models import AIArtifact
+
+    if not is_enabled():
+        return
+    key = make_key(kind, prompt_version, processed_text, age, classe)
+    thash = text_hash(processed_text)
+    await AIArtifact.objects.aupdate_or_create(
+        key=key,
+        defaults={
+            "kind": kind,
+            "prompt_version": prompt_version,
+            "text_hash": thash,
+            "payload": value,
+        },
+    )
+    _lru.set(key, thash, value)
+
+
+async def aget_or_compute(
+    kind: str,
+    prompt_version: int,
+    processed_text: str,
+    age,
+    classe,
+    compute: Callable[[], Awaitable[Any]],
+    should_cache: Callable[[Any], bool] | None = None,
+):
+    """Version asynchrone de `get_or_compute` (`compute` retourne une coroutine).
+
+    Les appels identiques simultanés sont coalescés par `single_flight.ado`.
+    """
+    if not is_enabled():
+        return await compute()
+
+    cached = await alookup(kind, prompt_version, processed_text, age, classe)
+    if cached is not None:
+        return cached
+
+    async def leader():
+        with resilience.track() as outcome:
+            value = await compute()
+        if not outcome.degraded and (should_cache is None or should_cache(value)):
+            await astore(kind, prompt_version, processed_text, age, classe, value)
+        return value, outcome.degraded
+
+    async def recheck():
+        cached = await alookup(kind, prompt_version, processed_text, age, classe)
+        return None if cached is None else (cached, False)
+
+    key = make_key(kind, prompt_version, processed_text, age, classe)
+    value, degraded = await single_flight.ado(key, leader, recheck=recheck)
+    if degraded:
+        resilience.mark_degraded()
+    return value
+
+
+def purge_text(processed_text: str) -> None:
+    """Supprime toutes les entrées calculées pour ce texte (mémoire locale + base)."""
+    from scanned_text.models import AIArtifact
+
+    thash = text_hash(processed_text)
+    _lru.discard_text(thash)
+    AIArtifact.objects.filter(text_hash=thash).delete()
+
+
+def clear() -> None:
+    """Vide le LRU du processus courant (utile dans les tests)."""
+    _lru.clear()
+
+
+def prompt_versions() -> dict:
+    """Version courante du prompt pour chaque type d'artefact mis en cache."""
+    from scanned_text.helpers.ai import (
+        generate_exercise_steps,
+        generate_quiz_from_text,
+        generate_text_explanation,
+        get_difficult_words_with_meanings,
+    )
+
+    return {
+        "words-explanation": get_difficult_words_with_meanings.PROMPT_VERSION,
+        "text-explanation": generate_text_explanation.PROMPT_VERSION,
+        "exercise-steps": generate_exercise_steps.PROMPT_VERSION,
+        "quiz-from-text": generate_quiz_from_text.PROMPT_VERSION,
+    }
+
+
+async def acontains(keys) -> bool:
+    """Version asynchrone de `contains`."""
+    from scanned_text.models import AIArtifact
+
+    missing = [key for key in keys if _lru.get(key) is None]
+    return not missing or await AIArtifact.objects.filter(key__in=missing).acount() == len(missing)
@@ -5,20 +5,83 @@ adding thin wrappers around the OpenAI API. The OpenAI helpers are only used
 if the required environment variables are present; otherwise a safe fallback
 is returned so the rest of the application does not break in local / test
 environments.
+
+`openai`, `httpx` et `lorem_text` ne sont importés qu'au premier usage (client
+OpenAI, texte de démonstration): le SDK OpenAI représente à lui seul près de
+la moitié du temps de démarrage d'un worker.
 """
 
-from lorem_text import lorem
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+import logging
+import os
 import random
-from typing import Optional
+import threading
+from typing import TYPE_CHECKING, Optional
 from decouple import config, UndefinedValueError
-from openai import OpenAI
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+
+logger = logging.getLogger(__name__)
 
 _OPENAI_MODEL: str = "chatgpt-4o-latest"
 
-def initOpenAI() -> OpenAI | None:
-    """Initialize OpenAI client if configuration is present."""
+# Client OpenAI partagé par processus (voir get_openai_client).
+_client_lock = threading.Lock()
+_shared_client: OpenAI | None = None
+_shared_client_pid: int | None = None
+_async_client: AsyncOpenAI | None = None
+_async_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _http2_available() -> bool:
+    """HTTP/2 n'est activable dans httpx que si le paquet `h2` est installé."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _openai_timeout() -> httpx.Timeout:
+    """Timeouts explicites (secondes) pour les appels OpenAI, configurables via .env."""
+    import httpx
+
+    return httpx.Timeout(
+        config("OPENAI_TIMEOUT", default=30.0, cast=float),
+        connect=config("OPENAI_CONNECT_TIMEOUT", default=5.0, cast=float),
+    )
+
+
+def _openai_limits() -> httpx.Limits:
+    import httpx
+
+    return httpx.Limits(
+        max_connections=config("OPENAI_POOL_MAX_CONNECTIONS", default=20, cast=int),
+        max_keepalive_connections=config("OPENAI_POOL_MAX_KEEPALIVE", default=10, cast=int),
+        keepalive_expiry=config("OPENAI_POOL_KEEPALIVE_EXPIRY", default=60.0, cast=float),
+    )
+
+
+def _openai_http2() -> bool:
+    return config("OPENAI_HTTP2", default=True, cast=bool) and _http2_available()
+
+
+def build_openai_http_client() -> httpx.Client:
+    """Construit le client httpx (pool keep-alive, HTTP/2 si disponible, timeouts)."""
+    import httpx
+
+    return httpx.Client(limits=_openai_limits(), timeout=_openai_timeout(), http2=_openai_http2())
+
+
+def initOpenAI(http_client: httpx.Client | None = None) -> OpenAI | None:
+    """Initialize OpenAI client if configuration is present.
+
+    Construit un nouveau client à chaque appel: préférer `get_openai_client()`
+    dans le code applicatif pour réutiliser le pool de connexions.
+    """
     try:
-        print("Importing scanned_text.serializers for type hints...")
         # Lazily resolve so missing .env during tests does not crash import.
         _OPENAI_API_KEY: Optional[str] = config("OPENAI_API_KEY", default=None)
     except UndefinedValueError:
@@ -27,12 +90,19 @@ def initOpenAI() -> OpenAI | None:
     _OPENAI_ENABLED = bool(_OPENAI_API_KEY)
 
     if _OPENAI_ENABLED:
+        from openai import OpenAI
+
         try:
             _openai_client = OpenAI(
                 api_key=_OPENAI_API_KEY,
+                base_url=config("OPENAI_BASE_URL", default=None),
+                timeout=_openai_timeout(),
+                # Les nouvelles tentatives sont gérées par helpers.resilience.
+                max_retries=0,
+                http_client=http_client or build_openai_http_client(),
             )
         except Exception as e:  # pragma: no cover - defensive
-            print(f"Failed to initialize OpenAI client: {e}")
+            logger.warning("Failed to initialize OpenAI client: %s", e)
             _OPENAI_ENABLED = False
             _openai_client = None
     else:
@@ -41,8 +111,76 @@ def initOpenAI() -> OpenAI | None:
     return _openai_client
 
 
+def get_openai_client() -> OpenAI | None:
+    """Retourne le client OpenAI partagé du processus courant (créé à la demande).
+
+    Le client (et son pool de connexions httpx) est réutilisé par tous les
+    helpers, ce qui évite un nouveau handshake TCP/TLS à chaque requête. Il est
+    recréé après un fork (ex. workers gunicorn en preload) car un pool de
+    sockets ne doit jamais être partagé entre processus.
+    """
+    global _shared_client, _shared_client_pid
+
+    pid = os.getpid()
+    if _shared_client_pid == pid:
+        return _shared_client
+    with _client_lock:
+        if _shared_client_pid != pid:
+            _shared_client = initOpenAI()
+            _shared_client_pid = pid
+    return _shared_client
+
+
+def get_async_openai_client() -> AsyncOpenAI | None:
+    """Équivalent asynchrone de `get_openai_client()` pour les vues ASGI.
+
+    Le pool httpx asynchrone est lié à la boucle d'événements qui l'utilise:
+    un client est donc conservé par boucle (une seule par worker uvicorn).
+    """
+    global _async_client, _async_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_client_loop is loop:
+        return _async_client
+
+    api_key = config("OPENAI_API_KEY", default=None)
+    client = None
+    if api_key:
+        import httpx
+        from openai import AsyncOpenAI
+
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=config("OPENAI_BASE_URL", default=None),
+            timeout=_openai_timeout(),
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                limits=_openai_limits(), timeout=_openai_timeout(), http2=_openai_http2()
+            ),
+        )
+    _async_client, _async_client_loop = client, loop
+    return client
+
+
+def reset_openai_client() -> None:
+    """Oublie les clients partagés (après un fork ou un changement de configuration)."""
+    global _shared_client, _shared_client_pid, _async_client, _async_client_loop
+
+    _shared_client = None
+    _shared_client_pid = None
+    _async_client = None
+    _async_client_loop = None
+
+
+if hasattr(os, "register_at_fork"):
+    # Le processus enfant ne doit pas réutiliser les sockets du parent.
+    os.register_at_fork(after_in_child=reset_openai_client)
+
+
 def mock_process_text(text: str) -> str:
     """Generate a pseudo processed text with injected educational keywords."""
+    from lorem_text import lorem
+
     keywords = ["exercice", "résumé", "chapitre", "leçon"]
     paragraph = lorem.paragraph()
     words = paragraph.split()
@@ -64,3 +202,42 @@ def mock_detect_type(text: str) -> str:
         return "cours"
     return "inconnu"
 
+
+
+def extract_json(content: str | None):
+    """Parse une réponse LLM censée être du JSON (tolère blocs ``` et texte autour).
+
+    Retourne l'objet parsé ou None.
+    """
+    if not content:
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        pass
+    if "```" in content:
+        for part in content.split("```"):
+            candidate = part.strip()
+            if candidate.lower().startswith("json\n"):
+                candidate = candidate[5:].strip()
+            try:
+                return json.loads(candidate)
+            except ValueError:
+                continue
+    # Texte autour: du premier `{` au dernier `}`, à défaut du premier `[` au dernier `]`.
+    candidates = []
+    for opening, closing in (("{", "}"), ("[", "]")):
+        start, end = content.find(opening), content.rfind(closing)
+        if start != -1 and end > start:
+            candidates.append((start, end))
+    for start, end in candidates:
+        try:
+            return json.loads(content[start : end + 1])
+        except ValueError:
+            continue
+    return None
+
+
+def estimate_tokens(text: str | None) -> int:
+    """Estimation locale du nombre de tokens (sans tokenizer): ~4 caractères par token."""
+    return (len(text or "") + 3) // 4
@@ -0,0 +1,151 @@
+"""Cache jeton -> utilisateur de l'authentification par jeton.
+
+`TokenAuthentication` lit `Token` joint à `User` à chaque requête API. Le
+couple (utilisateur, jeton) est gardé AUTH_TOKEN_CACHE_TTL secondes :
+
+- en mémoire du processus si AUTH_TOKEN_CACHE_ALIAS est vide (au plus
+  AUTH_TOKEN_CACHE_SIZE jetons, les plus anciens sont évincés);
+- sinon dans le cache Django de cet alias (LocMemCache, fichiers, Redis,
+  memcached...), partagé par les workers si le backend l'est.
+
+Les signaux post_save/post_delete sur Token et User (scanned_text.signals)
+invalident l'entrée, tout de suite et au commit de la transaction. En
+mémoire de processus, les autres workers ne voient pas cette invalidation :
+un jeton supprimé ou un utilisateur désactivé y reste accepté au plus
+AUTH_TOKEN_CACHE_TTL secondes. Le TTL couvre aussi les écritures sans signal
+(`QuerySet.update`).
+
+Les entrées sont picklées : chaque requête reçoit ses propres instances.
+"""
+
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from scanned_text.helpers import metrics
+
+PREFIX = "auth-token:"
+USER_PREFIX = "auth-token-user:"
+
+
+class TTLCache:
+    """Dictionnaire borné thread-safe dont les entrées expirent."""
+
+    def __init__(self):
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return None
+            return entry[1]
+
+    def set(self, key, value, timeout: float, maxsize: int) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_local = TTLCache()
+
+
+def ttl() -> int:
+    return getattr(settings, "AUTH_TOKEN_CACHE_TTL", 60)
+
+
+def _shared():
+    alias = getattr(settings, "AUTH_TOKEN_CACHE_ALIAS", "")
+    return caches[alias] if alias else None
+
+
+def cache_key(token_key: str) -> str:
+    # Le jeton lui-même n'apparaît pas dans les clés du cache partagé.
+    return PREFIX + hashlib.sha256(token_key.encode("utf-8")).hexdigest()
+
+
+def _entries(token) -> dict:
+    """Entrée du jeton, et index utilisateur -> clé pour invalider depuis un User."""
+    key = cache_key(token.key)
+    return {key: pickle.dumps((token.user, token)), USER_PREFIX + str(token.user_id): key}
+
+
+def _store_local(entries: dict) -> None:
+    maxsize = getattr(settings, "AUTH_TOKEN_CACHE_SIZE", 10000)
+    for key, value in entries.items():
+        _local.set(key, value, ttl(), maxsize)
+
+
+def get(token_key: str):
+    """(user, token) en cache pour `token_key`, ou None."""
+    if ttl() <= 0:
+        return None
+    cache = _shared()
+    value = (_local if cache is None else cache).get(cache_key(token_key))
+    metrics.AUTH_CACHE_REQUESTS.inc(result="miss" if value is None else "hit")
+    return None if value is None else pickle.loads(value)
+
+
+def store(token) -> None:
+    """Met en cache `token` et son utilisateur (déjà chargé: select_related)."""
+    if ttl() <= 0:
+        return
+    cache = _shared()
+    if cache is None:
+        _store_local(_entries(token))
+    else:
+        cache.set_many(_entries(token), ttl())
+
+
+def _delete(keys) -> None:
+    cache = _shared()
+    if cache is None:
+        for key in keys:
+            _local.delete(key)
+    else:
+        cache.delete_many(keys)
+
+
+def _invalidate_user(user_id) -> None:
+    user_key = USER_PREFIX + str(user_id)
+    cache = _shared()
+    key = (_local if cache is None else cache).get(user_key)
+    _delete([user_key] if key is None else [key, user_key])
+
+
+def invalidate_token(token_key: str) -> None:
+    """Oublie `token_key` maintenant et au commit (une requête concurrente a pu relire l'ancien état)."""
+    keys = [cache_key(token_key)]
+    _delete(keys)
+    transaction.on_commit(lambda: _delete(keys))
+
+
+def invalidate_user(user_id) -> None:
+    """Oublie le jeton en cache de l'utilisateur `user_id`, maintenant et au commit."""
+    _invalidate_user(user_id)
+    transaction.on_commit(lambda: _invalidate_user(user_id))
+
+
+def clear() -> None:
+    """Vide le cache en mémoire de processus (tests)."""
+    _local.clear()
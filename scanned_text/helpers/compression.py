@@ -0,0 +1,266 @@
+"""Compression transparente des grands champs texte (voir scanned_text.fields).
+
+Sous SQLite, `original_text`, `processed_text` et `AIArtifact.payload` sont
+stockés compressés dans une colonne BLOB. Sous PostgreSQL ils restent en clair:
+TOAST y compresse déjà les grandes valeurs (pglz/lz4) et l'index de recherche
+`to_tsvector` doit lire le texte.
+
+Format d'une valeur compressée : un octet d'en-tête, puis la charge utile.
+
+- bits 0-3 : codec (1 = zlib, 2 = zstd);
+- bit 7 : compressée avec un dictionnaire partagé (CompressionDictionary),
+  dont l'identifiant suit sur 4 octets (big endian).
+
+Les valeurs courtes (`TEXT_COMPRESSION_MIN_BYTES`) ou incompressibles sont
+stockées en clair (type TEXT), comme les lignes écrites avant la compression:
+la lecture accepte les deux. Les comparaisons exactes sur ces petites valeurs
+(`processed_text=""`) restent donc possibles.
+
+zstd (paquet `zstandard`) est utilisé s'il est installé, zlib sinon. Un
+dictionnaire entraîné sur le corpus (`manage.py train_compression_dictionary`)
+améliore nettement le taux sur des textes de quelques Ko; les anciens
+dictionnaires sont conservés pour relire les valeurs qui les utilisent.
+"""
+
+import re
+import threading
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    zstandard = None
+
+ZLIB = 1
+ZSTD = 2
+CODECS = {"zlib": ZLIB, "zstd": ZSTD}
+WITH_DICTIONARY = 0x80
+DEFAULT_LEVELS = {ZLIB: 6, ZSTD: 3}
+# Fenêtre de zlib: un dictionnaire plus long est inutile.
+ZLIB_DICTIONARY_SIZE = 32 * 1024
+
+_lock = threading.Lock()
+_dictionaries: dict[int, tuple[int, bytes]] = {}
+_current: dict[int, int | None] = {}
+_WORDS = re.compile(r"\S+")
+
+
+def stores_compressed(connection) -> bool:
+    """Les champs compressés sont des BLOB sous SQLite, du texte ailleurs."""
+    return connection.vendor == "sqlite"
+
+
+def codec() -> int | None:
+    """Codec des nouvelles écritures (TEXT_COMPRESSION), ou None si désactivée."""
+    name = getattr(settings, "TEXT_COMPRESSION", "auto")
+    if name == "none":
+        return None
+    if name == "auto":
+        return ZSTD if zstandard is not None else ZLIB
+    if name not in CODECS:
+        raise ImproperlyConfigured(f"TEXT_COMPRESSION inconnu: {name} (attendu: auto, zlib, zstd, none)")
+    if name == "zstd" and zstandard is None:
+        raise ImproperlyConfigured("TEXT_COMPRESSION=zstd nécessite le paquet `zstandard`.")
+    return CODECS[name]
+
+
+def codec_name(value: int) -> str:
+    return next(name for name, number in CODECS.items() if number == value)
+
+
+def _level(algorithm: int) -> int:
+    return getattr(settings, "TEXT_COMPRESSION_LEVEL", 0) or DEFAULT_LEVELS[algorithm]
+
+
+def _load_dictionaries() -> None:
+    from scanned_text.models import CompressionDictionary
+
+    rows = CompressionDictionary.objects.order_by("id").values_list("id", "algorithm", "data")
+    with _lock:
+        for pk, algorithm, data in rows:
+            _dictionaries[pk] = (CODECS[algorithm], bytes(data))
+        for algorithm in CODECS.values():
+            _current[algorithm] = max(
+                (pk for pk, (owner, _) in _dictionaries.items() if owner == algorithm), default=None
+            )
+
+
+def current_dictionary(algorithm: int) -> tuple[int, bytes] | None:
+    """Dernier dictionnaire entraîné pour `algorithm`, si TEXT_COMPRESSION_DICTIONARY."""
+    if not getattr(settings, "TEXT_COMPRESSION_DICTIONARY", True):
+        return None
+    if algorithm not in _current:
+        _load_dictionaries()
+    pk = _current.get(algorithm)
+    return None if pk is None else (pk, _dictionaries[pk][1])
+
+
+def dictionary(pk: int) -> bytes:
+    """Dictionnaire `pk` (gardé en mémoire: un dictionnaire n'est jamais modifié)."""
+    if pk not in _dictionaries:
+        _load_dictionaries()
+    return _dictionaries[pk][1]
+
+
+def reset() -> None:
+    """Oublie les dictionnaires en mémoire (après un entraînement, dans les tests)."""
+    with _lock:
+        _dictionaries.clear()
+        _current.clear()
+
+
+# Charger un dictionnaire dans zlib coûte plus cher que compresser une page:
+# un (dé)compresseur déjà amorcé est copié pour chaque valeur.
+@lru_cache(maxsize=8)
+def _zlib_compressor(zdict: bytes, level: int):
+    return zlib.compressobj(level, zdict=zdict)
+
+
+@lru_cache(maxsize=8)
+def _zlib_decompressor(zdict: bytes):
+    return zlib.decompressobj(zdict=zdict)
+
+
+def _compress(algorithm: int, data: bytes, zdict: bytes | None) -> bytes:
+    level = _level(algorithm)
+    if algorithm == ZSTD:
+        zstd_dict = zstandard.ZstdCompressionDict(zdict) if zdict else None
+        return zstandard.ZstdCompressor(level=level, dict_data=zstd_dict).compress(data)
+    if zdict:
+        compressor = _zlib_compressor(zdict, level).copy()
+        return compressor.compress(data) + compressor.flush()
+    return zlib.compress(data, level)
+
+
+def _decompress(algorithm: int, payload: bytes, zdict: bytes | None) -> bytes:
+    if algorithm == ZSTD:
+        if zstandard is None:
+            raise ImproperlyConfigured("Valeur compressée avec zstd: le paquet `zstandard` est requis pour la lire.")
+        zstd_dict = zstandard.ZstdCompressionDict(zdict) if zdict else None
+        return zstandard.ZstdDecompressor(dict_data=zstd_dict).decompress(payload)
+    if zdict:
+        decompressor = _zlib_decompressor(zdict).copy()
+        return decompressor.decompress(payload) + decompressor.flush()
+    return zlib.decompress(payload)
+
+
+def compress(text: str) -> str | bytes:
+    """Valeur à stocker pour `text`: bytes compressés, ou `text` tel quel s'il ne gagne rien."""
+    algorithm = codec()
+    data = text.encode("utf-8")
+    if algorithm is None or len(data) < getattr(settings, "TEXT_COMPRESSION_MIN_BYTES", 256):
+        return text
+    current = current_dictionary(algorithm)
+    if current is None:
+        header = bytes([algorithm])
+        payload = _compress(algorithm, data, None)
+    else:
+        pk, zdict = current
+        header = bytes([algorithm | WITH_DICTIONARY]) + pk.to_bytes(4, "big")
+        payload = _compress(algorithm, data, zdict)
+    if len(header) + len(payload) >= len(data):
+        return text
+    return header + payload
+
+
+def decompress(value):
+    """Texte d'une valeur stockée (bytes compressés, ou texte en clair)."""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not value:
+        return ""
+    header = value[0]
+    algorithm = header & 0x0F
+    if header & WITH_DICTIONARY:
+        zdict = dictionary(int.from_bytes(value[1:5], "big"))
+        payload = value[5:]
+    else:
+        zdict = None
+        payload = value[1:]
+    return _decompress(algorithm, payload, zdict).decode("utf-8")
+
+
+def train_dictionary(samples: list[str], algorithm: int, size: int = 64 * 1024) -> bytes:
+    """Dictionnaire partagé entraîné sur des textes du corpus.
+
+    zstd a son propre entraîneur. Pour zlib, le dictionnaire est une suite de
+    mots et groupes de mots fréquents (au plus 32 Ko), les plus rentables en
+    dernier: zlib code moins cher les correspondances proches.
+    """
+    if algorithm == ZSTD:
+        return zstandard.train_dictionary(size, [text.encode("utf-8") for text in samples]).as_bytes()
+    gains = Counter()
+    for text in samples:
+        words = _WORDS.findall(text)
+        for n in (1, 2, 3):
+            for start in range(len(words) - n + 1):
+                gains[" ".join(words[start:start + n])] += 1
+    budget = min(size, ZLIB_DICTIONARY_SIZE)
+    chosen, used = [], 0
+    # Gain estimé: octets évités (longueur x occurrences), sans les groupes vus une seule fois.
+    ranked = sorted(
+        ((count * len(phrase.encode("utf-8")), phrase) for phrase, count in gains.items() if count > 1),
+        reverse=True,
+    )
+    for _, phrase in ranked:
+        encoded = (phrase + " ").encode("utf-8")
+        if used + len(encoded) > budget:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+    return b"".join(reversed(chosen))
+
+
+def recompress(connection, model, fields, batch_size: int = 500, plain: bool = False) -> tuple[int, int]:
+    """Réécrit par lots les colonnes `fields` au format courant. Retourne (lues, réécrites).
+
+    Chaque lot est une transaction: la conversion d'une grande table peut être
+    interrompue puis relancée. `plain` remet les valeurs en clair (retour
+    arrière de la migration). Sans effet hors SQLite.
+    """
+    if not stores_compressed(connection):
+        return 0, 0
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    pk = quote(model._meta.pk.column)
+    columns = [quote(model._meta.get_field(name).column) for name in fields]
+    select = f"SELECT {pk}, {', '.join(columns)} FROM {table} WHERE {pk} > %s ORDER BY {pk} LIMIT %s"
+    first = select.replace(f"WHERE {pk} > %s ", "")
+    update = f"UPDATE {table} SET {', '.join(f'{column} = %s' for column in columns)} WHERE {pk} = %s"
+    read = written = 0
+    last = None
+    while True:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            if last is None:
+                cursor.execute(first, [batch_size])
+            else:
+                cursor.execute(select, [last, batch_size])
+            rows = cursor.fetchall()
+            changes = []
+            for row in rows:
+                stored = row[1:]
+                values = [decompress(value) for value in stored]
+                if not plain:
+                    values = [None if value is None else compress(value) for value in values]
+                if any(_differs(old, new) for old, new in zip(stored, values)):
+                    changes.append([*values, row[0]])
+            if changes:
+                cursor.executemany(update, changes)
+        if not rows:
+            return read, written
+        read += len(rows)
+        written += len(changes)
+        last = rows[-1][0]
+
+
+def _differs(old, new) -> bool:
+    if isinstance(old, memoryview):
+        old = bytes(old)
+    return type(old) is not type(new) or old != new
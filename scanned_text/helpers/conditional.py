@@ -0,0 +1,123 @@
+"""Requêtes conditionnelles: ETag fort et `If-None-Match` -> 304 Not Modified.
+
+Les clients mobiles relisent sans cesse les mêmes textes et artefacts. L'ETag
+est calculé sans sérialiser la réponse ni appeler le LLM :
+
+- détail : id et `updatedAt` du texte, `updatedAt` de l'élève (sérialisé dans
+  la réponse);
+- artefacts IA : clés du cache IA (type, version du prompt, modèle, texte,
+  âge, classe) et `updatedAt` du texte. Le 304 n'est servi que si les
+  artefacts sont en cache (sinon la réponse n'est pas reproductible), et la
+  réponse 200 ne porte d'ETag que si son résultat a été mis en cache (pas
+  pour un repli dégradé, ni quand le cache IA est désactivé);
+- liste : version de la collection de l'élève (TextCollectionVersion,
+  incrémentée à chaque écriture de l'un de ses textes), `updatedAt` de
+  l'élève et paramètres de la requête (curseur, filtres).
+
+Le format de rendu fait partie de l'ETag : deux représentations différentes
+(JSON, API navigable) n'ont jamais le même ETag fort.
+"""
+
+import hashlib
+import json
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from scanned_text.helpers import ai_cache, metrics
+
+# À incrémenter quand la forme des réponses change (serializers).
+ETAG_VERSION = 1
+
+
+def make_etag(*parts) -> str:
+    raw = json.dumps([ETAG_VERSION, *parts], default=str, ensure_ascii=False)
+    return '"%s"' % hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def is_fresh(request, etag: str | None) -> bool:
+    """Vrai si `If-None-Match` contient `etag` (comparaison faible, RFC 9110)."""
+    header = request.headers.get("If-None-Match")
+    if not header or etag is None:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in {tag.removeprefix("W/") for tag in parse_etags(header)}
+
+
+def tag(response, etag: str | None):
+    """Ajoute l'ETag à la réponse; `private, no-cache`: revalidation à chaque lecture."""
+    if etag is not None:
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def not_modified(request, etag: str | None, view: str, keys=()):
+    """Réponse 304 si le client a déjà cette version, sinon None.
+
+    `keys` : artefacts IA dont dépend la réponse, qui doivent être en cache.
+    """
+    if not is_fresh(request, etag) or (keys and not ai_cache.contains(keys)):
+        return None
+    metrics.NOT_MODIFIED_RESPONSES.inc(view=view)
+    return tag(HttpResponseNotModified(), etag)
+
+
+async def anot_modified(request, etag: str | None, view: str, keys=()):
+    """Version asynchrone de `not_modified`."""
+    if not is_fresh(request, etag) or (keys and not await ai_cache.acontains(keys)):
+        return None
+    metrics.NOT_MODIFIED_RESPONSES.inc(view=view)
+    return tag(HttpResponseNotModified(), etag)
+
+
+def text_etag(scanned, variant: str) -> str:
+    return make_etag("text", scanned.pk, scanned.updatedAt, scanned.user.updatedAt, variant)
+
+
+def artifact_etag(scanned, artifacts, variant: str, *extra) -> tuple[str | None, list[str]]:
+    """ETag d'une réponse construite à partir d'artefacts IA, et leurs clés de cache.
+
+    `artifacts` : couples (type, version du prompt). Pas d'ETag sans cache IA.
+    """
+    if not ai_cache.is_enabled():
+        return None, []
+    age, classe = scanned.user.age, scanned.user.classe
+    keys = [
+        ai_cache.make_key(kind, prompt_version, scanned.processed_text, age, classe)
+        for kind, prompt_version in artifacts
+    ]
+    return make_etag("artifact", keys, scanned.updatedAt, variant, *extra), keys
+
+
+def collection_version(user_id) -> int:
+    from scanned_text.models import TextCollectionVersion
+
+    version = TextCollectionVersion.objects.filter(user_id=user_id).values_list("version", flat=True).first()
+    return version or 0
+
+
+def list_etag(request, variant: str) -> str | None:
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    params = sorted(request.query_params.lists())
+    return make_etag("list", user.pk, collection_version(user.pk), user.updatedAt, params, variant)
+
+
+def bump_collection(user_id) -> None:
+    """Invalide l'ETag de la liste des textes de l'utilisateur."""
+    from scanned_text.models import TextCollectionVersion
+
+    queryset = TextCollectionVersion.objects.filter(user_id=user_id)
+    if queryset.update(version=F("version") + 1):
+        return
+    try:
+        with transaction.atomic():
+            TextCollectionVersion.objects.create(user_id=user_id, version=1)
+    except IntegrityError:
+        # Ligne créée entre-temps par une requête concurrente.
+        queryset.update(version=F("version") + 1)
@@ -0,0 +1,110 @@
+"""File de jobs en base de données pour le traitement différé des textes scannés.
+
+Pas de Redis ni de Celery: les jobs sont des lignes `ProcessingJob`. Un worker
+réserve un job par un UPDATE conditionnel (compare-and-set), ce qui fonctionne
+sur SQLite comme sur PostgreSQL et permet plusieurs workers concurrents. Un job
+réservé porte un bail (`locked_until`); s'il expire (worker tué), le job est
+repris par un autre worker.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from scanned_text.helpers import processing, token_usage
+from scanned_text.models import ProcessingJob
+
+
+def async_ingestion_requested(request) -> bool:
+    """Mode asynchrone si activé globalement ou demandé via `Prefer: respond-async`."""
+    if getattr(settings, "SCANNED_TEXT_ASYNC_INGESTION", False):
+        return True
+    return "respond-async" in request.headers.get("Prefer", "")
+
+
+def enqueue(scanned_text) -> ProcessingJob:
+    return ProcessingJob.objects.create(scanned_text=scanned_text)
+
+
+def _claimable(now):
+    return Q(status=ProcessingJob.PENDING, available_at__lte=now) | Q(
+        status=ProcessingJob.RUNNING, locked_until__lt=now
+    )
+
+
+def claim_next(worker_id: str) -> ProcessingJob | None:
+    """Réserve le prochain job disponible pour `worker_id`, ou None si la file est vide."""
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, "SCANNED_TEXT_JOB_LEASE_SECONDS", 300))
+    candidates = list(
+        ProcessingJob.objects.filter(_claimable(now)).order_by("available_at").values_list("pk", flat=True)[:10]
+    )
+    for pk in candidates:
+        claimed = ProcessingJob.objects.filter(_claimable(now), pk=pk).update(
+            status=ProcessingJob.RUNNING,
+            progress=10,
+            attempts=F("attempts") + 1,
+            locked_by=worker_id,
+            locked_until=now + lease,
+            updatedAt=now,
+        )
+        if claimed:
+            return ProcessingJob.objects.select_related("scanned_text__user").get(pk=pk)
+    return None
+
+
+def run_job(job: ProcessingJob) -> ProcessingJob:
+    """Exécute un job réservé et enregistre son résultat (ou planifie un nouvel essai)."""
+    max_attempts = getattr(settings, "SCANNED_TEXT_JOB_MAX_ATTEMPTS", 3)
+    scanned = job.scanned_text
+    error = None
+    with token_usage.meter() as usage:
+        try:
+            processed, detected_type = processing.process_original_text(scanned.original_text)
+        except Exception as e:
+            error = str(e)
+    if usage.calls:
+        # Les tokens consommés sont comptés même si le traitement a échoué.
+        token_usage.settle(scanned.user, usage)
+
+    if error is not None:
+        job.error = error
+        job.locked_until = None
+        if job.attempts >= max_attempts:
+            job.status = ProcessingJob.FAILED
+            job.finishedAt = timezone.now()
+        else:
+            job.status = ProcessingJob.PENDING
+            job.progress = 0
+            job.available_at = timezone.now() + timedelta(seconds=2 ** job.attempts)
+        job.save()
+        return job
+
+    # Deux écritures en autocommit (pas de transaction englobante): sur SQLite,
+    # une transaction différée qui lit puis écrit échoue immédiatement sous
+    # concurrence. Si la seconde écriture échoue, le bail expire et le job est
+    # rejoué, ce qui est sans effet de bord.
+    scanned.processed_text = processed
+    scanned.detected_type = detected_type
+    scanned.save(update_fields=["processed_text", "detected_type", "updatedAt"])
+    job.status = ProcessingJob.DONE
+    job.progress = 100
+    job.error = ""
+    job.locked_until = None
+    job.finishedAt = timezone.now()
+    job.save()
+    return job
+
+
+def run_pending(worker_id: str, limit: int | None = None) -> int:
+    """Traite les jobs disponibles jusqu'à épuisement (ou `limit`); retourne le nombre traité."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim_next(worker_id)
+        if job is None:
+            break
+        run_job(job)
+        done += 1
+    return done
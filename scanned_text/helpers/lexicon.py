@@ -0,0 +1,171 @@
+"""Moteur local de détection des mots difficiles (sans appel LLM).
+
+Un mot est jugé difficile pour un élève quand son rang dans le lexique de
+fréquence embarqué (`data/fr_frequency.txt`) dépasse le seuil de sa classe:
+un élève de CP connaît les ~1 000 formes les plus fréquentes, un élève de
+terminale la quasi-totalité du lexique. Les mots absents du lexique ont le
+rang maximal.
+
+Le lexique a été extrait de wordfreq (liste "small", fr):
+
+    import gzip, msgpack
+    buckets = msgpack.load(gzip.open("wordfreq/data/small_fr.msgpack.gz"))[1:]
+    words = [w for bucket in buckets for w in bucket]  # puis filtre alphabétique, 20 000 premiers
+
+Le fichier reste sous licence CC BY-SA 4.0 (attribution: `data/NOTICE`).
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+from decouple import config
+
+_LEXICON_PATH = Path(__file__).resolve().parent / "data" / "fr_frequency.txt"
+
+# Rang au-delà duquel un mot est considéré difficile, par niveau (1 = CP, 12 = terminale).
+GRADE_THRESHOLDS = {
+    1: 1000,
+    2: 1500,
+    3: 2500,
+    4: 3500,
+    5: 5000,
+    6: 6500,
+    7: 8000,
+    8: 10000,
+    9: 12000,
+    10: 14000,
+    11: 16000,
+    12: 18000,
+}
+_DEFAULT_LEVEL = 6
+
+_PRIMARY_RE = re.compile(r"^(cp|ce1|ce2|cm1|cm2)")
+_COLLEGE_RE = re.compile(r"^([3-6])(e|eme|ieme)?$")
+_NAMED_LEVELS = (
+    ("sixieme", 6),
+    ("cinquieme", 7),
+    ("quatrieme", 8),
+    ("troisieme", 9),
+    ("seconde", 10),
+    ("2nde", 10),
+    ("2de", 10),
+    ("premiere", 11),
+    ("1ere", 11),
+    ("1re", 11),
+    ("terminale", 12),
+    ("tle", 12),
+)
+_PUNCTUATION = ",.;:!?()[]{}\"«»“”…–-_/*"
+_APOSTROPHES = ("'", "’")
+
+
+@lru_cache(maxsize=1)
+def load_lexicon() -> dict:
+    """Mot (minuscule) -> rang de fréquence (1 = le plus fréquent)."""
+    ranks = {}
+    with open(_LEXICON_PATH, encoding="utf-8") as fh:
+        for line in fh:
+            word = line.strip()
+            if word and not word.startswith("#") and word not in ranks:
+                ranks[word] = len(ranks) + 1
+    return ranks
+
+
+def _strip_accents(value: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFD", value) if unicodedata.category(c) != "Mn")
+
+
+def grade_level(classe, age) -> int:
+    """Niveau scolaire 1 (CP) à 12 (terminale) déduit de `classe`, sinon de l'âge."""
+    normalized = _strip_accents(str(classe or "")).lower().replace(" ", "")
+    if normalized:
+        match = _PRIMARY_RE.match(normalized)
+        if match:
+            return ("cp", "ce1", "ce2", "cm1", "cm2").index(match.group(1)) + 1
+        match = _COLLEGE_RE.match(normalized)
+        if match:
+            return 12 - int(match.group(1))
+        for name, level in _NAMED_LEVELS:
+            if normalized.startswith(name):
+                return level
+    try:
+        return min(12, max(1, int(age) - 5))
+    except (TypeError, ValueError):
+        return _DEFAULT_LEVEL
+
+
+def difficulty_threshold(classe, age) -> int:
+    return GRADE_THRESHOLDS[grade_level(classe, age)]
+
+
+def _normalize(token: str) -> str:
+    token = token.strip(_PUNCTUATION)
+    for apostrophe in _APOSTROPHES:
+        if apostrophe in token:
+            token = token.rsplit(apostrophe, 1)[1]
+    return token
+
+
+def _is_candidate(raw_words: list, idx: int, token: str) -> bool:
+    if len(token) < 4 or not token.replace("-", "").isalpha() or token.isupper():
+        return False
+    # Nom propre probable: majuscule en milieu de phrase.
+    if token[0].isupper() and idx > 0 and not raw_words[idx - 1].rstrip("»”\")").endswith((".", "!", "?", ":")):
+        return False
+    return True
+
+
+def score_words(text: str) -> list:
+    """Rang de fréquence de chaque mot de `text.split()` (None si non pertinent).
+
+    Le calcul se fait en un seul passage sur l'ensemble des mots: une
+    normalisation puis une recherche groupée dans le lexique.
+    """
+    raw_words = (text or "").split()
+    tokens = [_normalize(w) for w in raw_words]
+    lexicon = load_lexicon()
+    unknown_rank = len(lexicon) + 1
+    ranks = [lexicon.get(t.lower(), unknown_rank) for t in tokens]
+    return [
+        rank if _is_candidate(raw_words, idx, token) else None
+        for idx, (token, rank) in enumerate(zip(tokens, ranks))
+    ]
+
+
+def keywords(text: str, min_rank: int = 0) -> list:
+    """(index, mot, rang) des mots pertinents de `text.split()` de rang supérieur à `min_rank`."""
+    raw_words = (text or "").split()
+    return [
+        (idx, _normalize(raw_words[idx]), rank)
+        for idx, rank in enumerate(score_words(text))
+        if rank is not None and rank > min_rank
+    ]
+
+
+def difficult_words(text: str, age, classe, limit: int | None = None) -> list:
+    """Liste ordonnée de (index, mot) des mots difficiles pour ce niveau.
+
+    Les index correspondent à `text.split()`, comme les clés attendues par
+    l'endpoint words-explanation. Chaque forme n'est retenue qu'une fois; au-delà
+    de `limit`, les mots les plus rares sont privilégiés.
+    """
+    if limit is None:
+        limit = config("LEXICON_MAX_WORDS", default=8, cast=int)
+    threshold = difficulty_threshold(classe, age)
+    raw_words = (text or "").split()
+
+    seen = set()
+    candidates = []
+    for idx, rank in enumerate(score_words(text)):
+        if rank is None or rank <= threshold:
+            continue
+        token = _normalize(raw_words[idx])
+        if token.lower() in seen:
+            continue
+        seen.add(token.lower())
+        candidates.append((rank, idx, token))
+
+    rarest = sorted(candidates, key=lambda c: (-c[0], c[1]))[:limit]
+    return [(idx, token) for _, idx, token in sorted(rarest, key=lambda c: c[1])]
@@ -0,0 +1,413 @@
+"""Métriques au format texte Prometheus, agrégées entre processus.
+
+Chaque processus (worker gunicorn/uvicorn, worker de jobs) tient ses compteurs
+et histogrammes en mémoire et les écrit, au plus toutes les
+METRICS_FLUSH_INTERVAL secondes, dans son propre fichier JSON sous
+METRICS_DIR. L'endpoint /metrics additionne tous les fichiers du répertoire.
+Les valeurs d'un processus terminé restent comptées (les compteurs ne
+reculent pas): à chaque lecture, les fichiers des processus morts de la
+machine sont repliés dans `archive.json` puis supprimés, et le répertoire ne
+grossit pas avec les redémarrages de workers.
+"""
+
+import atexit
+import bisect
+import glob
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: fichiers des processus terminés conservés
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+_lock = threading.RLock()
+_registry: dict = {}
+_collectors: list = []
+_state = {"file_id": None, "dirty": False, "flusher": None}
+
+
+def enabled() -> bool:
+    return getattr(settings, "METRICS_ENABLED", True)
+
+
+def metrics_dir() -> str:
+    return getattr(settings, "METRICS_DIR", None) or os.path.join(tempfile.gettempdir(), "syntaiz-metrics")
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict = {}
+        _registry[name] = self
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not enabled():
+            return
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        _touch()
+
+    def _set(self, value: float, **labels) -> None:
+        # Réservé aux collecteurs qui recopient un compteur existant (ex. single_flight).
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        if not enabled():
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+        _touch()
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+def timed(histogram: Histogram, **labels):
+    """Décorateur: mesure la durée de la fonction dans `histogram`."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def counted(counter: Counter, **labels):
+    """Décorateur: incrémente `counter` à chaque appel de la fonction."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            counter.inc(**labels)
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def register_collector(func) -> None:
+    """`func()` est appelée avant chaque écriture pour recopier des valeurs externes."""
+    _collectors.append(func)
+
+
+# --- Métriques de l'application -------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "syntaiz_http_request_duration_seconds", "Durée totale des requêtes HTTP.", ("view", "method", "status")
+)
+DB_QUERY_SECONDS = Histogram(
+    "syntaiz_db_query_duration_seconds", "Durée des requêtes SQL.", ("alias",), buckets=FAST_BUCKETS
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "syntaiz_llm_request_duration_seconds", "Durée de chaque appel HTTP au fournisseur LLM.", ("helper",)
+)
+LLM_REQUESTS = Counter(
+    "syntaiz_llm_requests_total", "Appels au fournisseur LLM par issue.", ("helper", "outcome")
+)
+LLM_TOKENS = Counter(
+    "syntaiz_llm_tokens_total", "Tokens LLM consommés (in: prompt, out: complétion).", ("helper", "direction")
+)
+LLM_PARSE_SECONDS = Histogram(
+    "syntaiz_llm_parse_duration_seconds", "Durée du parsing des réponses LLM.", ("helper",), buckets=FAST_BUCKETS
+)
+AI_FALLBACKS = Counter("syntaiz_ai_fallbacks_total", "Résultats de secours servis à la place du LLM.", ("helper",))
+AI_CACHE_REQUESTS = Counter(
+    "syntaiz_ai_cache_requests_total", "Consultations du cache IA (hit_lru, hit_db, miss).", ("kind", "result")
+)
+RENDER_SECONDS = Histogram(
+    "syntaiz_response_render_duration_seconds", "Durée de sérialisation des réponses.", ("format",),
+    buckets=FAST_BUCKETS,
+)
+NEAR_DUPLICATE_LOOKUPS = Counter(
+    "syntaiz_near_duplicate_lookups_total",
+    "Recherches de quasi-doublons à l'ingestion (reused, miss, skipped).",
+    ("result",),
+)
+NOT_MODIFIED_RESPONSES = Counter(
+    "syntaiz_not_modified_responses_total", "Requêtes conditionnelles servies en 304 (If-None-Match).", ("view",)
+)
+AUTH_CACHE_REQUESTS = Counter(
+    "syntaiz_auth_cache_requests_total",
+    "Consultations du cache d'authentification par jeton (hit: requête SQL évitée, miss).",
+    ("result",),
+)
+THROTTLED_REQUESTS = Counter("syntaiz_throttled_requests_total", "Requêtes rejetées par throttling.", ("view",))
+SINGLE_FLIGHT_CALLS = Counter(
+    "syntaiz_single_flight_calls_total", "Appels passés par single_flight, par issue.", ("result",)
+)
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    """execute_wrapper Django: mesure chaque requête SQL (installé par ScannedTextConfig.ready)."""
+    with DB_QUERY_SECONDS.time(alias=context["connection"].alias):
+        return execute(sql, params, many, context)
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """Récepteur de `connection_created`."""
+    if enabled() and db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+def _collect_single_flight():
+    from scanned_text.helpers import single_flight
+
+    for result, value in single_flight.stats().items():
+        SINGLE_FLIGHT_CALLS._set(value, result=result)
+
+
+register_collector(_collect_single_flight)
+
+
+# --- Écriture et agrégation ------------------------------------------------
+
+ARCHIVE_FILE = "archive.json"
+
+
+def _file_path() -> str:
+    if _state["file_id"] is None:
+        # Machine et PID dans le nom: permet de replier les fichiers des processus terminés.
+        _state["file_id"] = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    return os.path.join(metrics_dir(), f"{_state['file_id']}.json")
+
+
+def _write_json(path: str, data: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _snapshot() -> dict:
+    for collector in _collectors:
+        collector()
+    return {
+        name: [[list(key), value] for key, value in metric._values.items()]
+        for name, metric in _registry.items()
+        if metric._values
+    }
+
+
+def flush() -> None:
+    """Écrit l'état du processus courant dans METRICS_DIR (écriture atomique)."""
+    with _lock:
+        data = _snapshot()
+        _state["dirty"] = False
+    if not data:
+        return
+    path = _file_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_json(path, data)
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0))
+        if _state["dirty"]:
+            try:
+                flush()
+            except OSError:
+                pass
+
+
+def _touch() -> None:
+    _state["dirty"] = True
+    if _state["flusher"] is None:
+        with _lock:
+            if _state["flusher"] is None:
+                thread = threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True)
+                _state["flusher"] = thread
+                thread.start()
+
+
+def reset() -> None:
+    """Oublie les valeurs du processus courant (après un fork, ou dans les tests)."""
+    with _lock:
+        for metric in _registry.values():
+            metric._values.clear()
+        _state.update(file_id=None, dirty=False, flusher=None)
+
+
+if hasattr(os, "register_at_fork"):
+    # L'enfant repart de zéro avec son propre fichier (et son propre thread d'écriture).
+    os.register_at_fork(after_in_child=reset)
+
+
+@atexit.register
+def _flush_at_exit():
+    if _state["dirty"]:
+        try:
+            flush()
+        except Exception:
+            pass
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _dead_process_files(directory: str) -> list:
+    """Fichiers `<machine>-<pid>-<id>.json` de cette machine dont le processus est terminé."""
+    host = socket.gethostname()
+    dead = []
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        parts = os.path.basename(path)[: -len(".json")].rsplit("-", 2)
+        if len(parts) == 3 and parts[0] == host and parts[1].isdigit() and not _pid_alive(int(parts[1])):
+            dead.append(path)
+    return dead
+
+
+def _merge(totals: dict, data: dict) -> None:
+    for name, samples in data.items():
+        metric = _registry.get(name)
+        if metric is None:
+            continue
+        values = totals.setdefault(name, {})
+        for key, value in samples:
+            key = tuple(key)
+            if isinstance(metric, Histogram):
+                entry = values.setdefault(key, [[0] * (len(metric.buckets) + 1), 0.0, 0])
+                entry[0] = [a + b for a, b in zip(entry[0], value[0])]
+                entry[1] += value[1]
+                entry[2] += value[2]
+            else:
+                values[key] = values.get(key, 0) + value
+
+
+def prune_dead_processes() -> int:
+    """Replie dans `archive.json` les fichiers des processus terminés, puis les supprime.
+
+    Sous verrou fichier: deux lectures simultanées de /metrics ne replient
+    pas deux fois le même fichier. Retourne le nombre de fichiers repliés.
+    """
+    directory = metrics_dir()
+    if fcntl is None or not os.path.isdir(directory):
+        return 0
+    if not _dead_process_files(directory):
+        return 0
+    with open(os.path.join(directory, ".archive.lock"), "a+") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        archive = os.path.join(directory, ARCHIVE_FILE)
+        totals: dict = {}
+        _merge(totals, _read_json(archive) or {})
+        folded = []
+        for path in _dead_process_files(directory):
+            data = _read_json(path)
+            if data is not None:
+                _merge(totals, data)
+                folded.append(path)
+        if folded:
+            _write_json(archive, {
+                name: [[list(key), value] for key, value in values.items()] for name, values in totals.items()
+            })
+            for path in folded:
+                os.remove(path)
+    return len(folded)
+
+
+def aggregate() -> dict:
+    """Somme des valeurs de tous les fichiers de METRICS_DIR."""
+    try:
+        prune_dead_processes()
+    except OSError:
+        pass
+    totals: dict = {}
+    for path in glob.glob(os.path.join(metrics_dir(), "*.json")):
+        data = _read_json(path)
+        if data is not None:
+            _merge(totals, data)
+    return totals
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+
+def render() -> str:
+    """Exposition texte (format 0.0.4) des métriques agrégées."""
+    flush()
+    totals = aggregate()
+    lines = []
+    for name, metric in _registry.items():
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.type}")
+        for key, value in sorted(totals.get(name, {}).items()):
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                bounds = [_format_value(b) for b in metric.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, value[0]):
+                    cumulative += count
+                    le = 'le="%s"' % bound
+                    lines.append(f"{name}_bucket{_labels(metric.labelnames, key, [le])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(metric.labelnames, key)} {_format_value(value[1])}")
+                lines.append(f"{name}_count{_labels(metric.labelnames, key)} {value[2]}")
+            else:
+                lines.append(f"{name}{_labels(metric.labelnames, key)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,178 @@
+"""Détection des quasi-doublons à l'ingestion (MinHash + LSH).
+
+La même page de manuel est scannée par de nombreux élèves; le bruit d'OCR
+empêche toute comparaison exacte de `original_text`. Chaque texte reçoit une
+signature MinHash (NUM_PERM minimums sur ses bigrammes de mots normalisés),
+stockée dans `ScannedText.minhash`, et découpée en BANDS bandes de ROWS valeurs
+dont les hachages (`TextFingerprint.bucket`) sont indexés. Deux textes qui
+partagent une bande sont candidats; la similarité de Jaccard estimée sur les
+signatures complètes décide (`SCANNED_TEXT_DEDUP_THRESHOLD`).
+
+Avec 16 bandes de 4 lignes, un texte de Jaccard 0,6 avec un texte déjà indexé
+est candidat dans 89 % des cas, 0,7 dans 99 %, 0,3 dans 12 %.
+
+Si un texte déjà traité est assez proche, `process_original_text` réutilise son
+`processed_text` et son `detected_type` au lieu d'appeler le LLM.
+
+NUM_PERM, BANDS, ROWS et les permutations font partie du format stocké: les
+changer impose de recalculer les empreintes existantes.
+"""
+
+import hashlib
+import random
+import re
+import unicodedata
+from array import array
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import Count
+
+from scanned_text.helpers import metrics
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 2
+MAX_CANDIDATES = 20
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+# Mots d'au moins deux lettres ou chiffres: les caractères isolés sont surtout du bruit d'OCR.
+_WORDS = re.compile(r"[^\W_]{2,}")
+
+
+def is_enabled() -> bool:
+    return getattr(settings, "SCANNED_TEXT_DEDUP_ENABLED", True)
+
+
+def _words(text: str) -> list[str]:
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _WORDS.findall(text)
+
+
+def signature(text: str) -> tuple[int, ...] | None:
+    """Signature MinHash du texte, ou None s'il est trop court pour être comparé."""
+    word_count, sig = _signature(text)
+    if word_count < max(SHINGLE_SIZE, getattr(settings, "SCANNED_TEXT_DEDUP_MIN_WORDS", 30)):
+        return None
+    return sig
+
+
+# Calculée une fois pour la recherche puis pour l'enregistrement du même texte.
+@lru_cache(maxsize=256)
+def _signature(text: str) -> tuple[int, tuple[int, ...] | None]:
+    words = _words(text)
+    if len(words) < SHINGLE_SIZE:
+        return len(words), None
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big") for shingle in shingles
+    ]
+    # Valeurs tronquées à 32 bits pour le stockage (collision fortuite: 2**-32).
+    return len(words), tuple(min((a * h + b) % _PRIME for h in hashes) & 0xFFFFFFFF for a, b in _PERMUTATIONS)
+
+
+def buckets(sig) -> list[int]:
+    """Une clé par bande (entier signé 63 bits, pour un BigIntegerField)."""
+    keys = []
+    for band in range(BANDS):
+        raw = array("I", [band, *sig[band * ROWS:(band + 1) * ROWS]]).tobytes()
+        keys.append(int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "big") >> 1)
+    return keys
+
+
+def similarity(sig, other) -> float:
+    """Jaccard estimée: part des minimums égaux."""
+    return sum(a == b for a, b in zip(sig, other)) / NUM_PERM
+
+
+def encode(sig) -> bytes | None:
+    return array("I", sig).tobytes() if sig is not None else None
+
+
+def decode(raw) -> tuple[int, ...] | None:
+    if not raw:
+        return None
+    values = array("I")
+    values.frombytes(bytes(raw))
+    return tuple(values)
+
+
+def fingerprint(scanned) -> None:
+    """Renseigne `scanned.minhash` depuis `original_text` (avant enregistrement)."""
+    if scanned.minhash is None and is_enabled():
+        scanned.minhash = encode(signature(scanned.original_text))
+
+
+def index(texts) -> None:
+    """Indexe les bandes des textes enregistrés (après `save()` ou `bulk_create()`)."""
+    from scanned_text.models import TextFingerprint
+
+    TextFingerprint.objects.bulk_create([
+        TextFingerprint(scanned_text=text, bucket=bucket)
+        for text in texts
+        if text.minhash
+        for bucket in buckets(decode(text.minhash))
+    ])
+
+
+def _candidates_query(sig):
+    from scanned_text.models import TextFingerprint
+
+    return (
+        TextFingerprint.objects.filter(bucket__in=buckets(sig))
+        .values("scanned_text")
+        .annotate(bands=Count("id"))
+        .order_by("-bands")
+        .values_list("scanned_text", flat=True)[:MAX_CANDIDATES]
+    )
+
+
+def _processed(queryset):
+    return queryset.exclude(processed_text__isnull=True).exclude(processed_text="").only(
+        "id", "minhash", "processed_text", "detected_type"
+    )
+
+
+def _best(sig, candidates):
+    threshold = getattr(settings, "SCANNED_TEXT_DEDUP_THRESHOLD", 0.6)
+    best, best_score = None, threshold
+    for candidate in candidates:
+        other = decode(candidate.minhash)
+        score = similarity(sig, other) if other else 0.0
+        if score >= best_score:
+            best, best_score = candidate, score
+    metrics.NEAR_DUPLICATE_LOOKUPS.inc(result="reused" if best is not None else "miss")
+    return best
+
+
+def find(original_text: str):
+    """ScannedText déjà traité quasi identique à `original_text`, ou None."""
+    from scanned_text.models import ScannedText
+
+    if not is_enabled():
+        return None
+    sig = signature(original_text)
+    if sig is None:
+        metrics.NEAR_DUPLICATE_LOOKUPS.inc(result="skipped")
+        return None
+    candidates = _processed(ScannedText.objects.filter(id__in=list(_candidates_query(sig))))
+    return _best(sig, candidates)
+
+
+async def afind(original_text: str):
+    """Version asynchrone de `find` (ORM async de Django)."""
+    from scanned_text.models import ScannedText
+
+    if not is_enabled():
+        return None
+    sig = signature(original_text)
+    if sig is None:
+        metrics.NEAR_DUPLICATE_LOOKUPS.inc(result="skipped")
+        return None
+    ids = [pk async for pk in _candidates_query(sig)]
+    candidates = [text async for text in _processed(ScannedText.objects.filter(id__in=ids))]
+    return _best(sig, candidates)
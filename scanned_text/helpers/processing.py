@@ -0,0 +1,86 @@
+"""Traitement d'un texte OCR brut, partagé par l'API et le worker de jobs."""
+
+import logging
+
+from decouple import config
+
+from scanned_text.helpers import ai_utils, near_duplicates, resilience, type_classifier
+from scanned_text.helpers.ai import process_ocr_text_with_openai
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessingError(Exception):
+    """Le texte n'a pas pu être traité (réponse IA vide ou invalide)."""
+
+
+class ProcessingUnavailable(ProcessingError):
+    """Le fournisseur LLM est indisponible ou délesté: réessayer plus tard (503)."""
+
+
+def reuse_near_duplicate(original_text: str) -> tuple[str, str] | None:
+    """`(processed_text, detected_type)` d'un quasi-doublon déjà traité, ou None."""
+    duplicate = near_duplicates.find(original_text)
+    if duplicate is None:
+        return None
+    logger.debug("Quasi-doublon de %s réutilisé.", duplicate.pk)
+    return duplicate.processed_text, duplicate.detected_type
+
+
+def process_original_text(original_text: str, reuse_duplicates: bool = True) -> tuple[str, str]:
+    """Retourne `(processed_text, detected_type)` pour un texte brut.
+
+    OpenAI en production, traitement simulé sinon. Quand le classifieur local
+    est assez sûr du type, le LLM ne fait que nettoyer le texte.
+
+    Si le fournisseur LLM est indisponible, lève ProcessingUnavailable plutôt
+    que d'enregistrer un texte non traité (le job asynchrone est alors rejoué).
+
+    Un quasi-doublon déjà traité (même page scannée par un autre élève) est
+    réutilisé tel quel, sans appel au LLM, sauf si `reuse_duplicates` est faux.
+    """
+    reused = reuse_near_duplicate(original_text) if reuse_duplicates else None
+    if reused is not None:
+        return reused
+    if config('ENV') == 'production':
+        logger.debug("Utilisation d'OpenAI pour le traitement du texte.")
+
+        predicted_type = type_classifier.predict(original_text)
+        with resilience.track(isolated=True) as outcome:
+            ai_result = process_ocr_text_with_openai.process_ocr_text_with_openai(
+                original_text, detected_type=predicted_type
+            )
+        if outcome.degraded:
+            raise ProcessingUnavailable("Service IA momentanément indisponible, réessayez plus tard.")
+        processed = ai_result.get("processed_text")
+        if not processed:
+            raise ProcessingError("Erreur lors du traitement du texte avec OpenAI.")
+        detected_type = ai_result.get("detected_type") or predicted_type or ai_utils.mock_detect_type(processed)
+    else:
+        processed = ai_utils.mock_process_text(original_text)
+        detected_type = ai_utils.mock_detect_type(processed)
+    return processed, detected_type
+
+
+async def aprocess_original_text(original_text: str) -> tuple[str, str]:
+    """Version asynchrone (AsyncOpenAI) de `process_original_text`."""
+    duplicate = await near_duplicates.afind(original_text)
+    if duplicate is not None:
+        logger.debug("Quasi-doublon de %s réutilisé.", duplicate.pk)
+        return duplicate.processed_text, duplicate.detected_type
+    if config('ENV') == 'production':
+        predicted_type = type_classifier.predict(original_text)
+        with resilience.track(isolated=True) as outcome:
+            ai_result = await process_ocr_text_with_openai.aprocess_ocr_text_with_openai(
+                original_text, detected_type=predicted_type
+            )
+        if outcome.degraded:
+            raise ProcessingUnavailable("Service IA momentanément indisponible, réessayez plus tard.")
+        processed = ai_result.get("processed_text")
+        if not processed:
+            raise ProcessingError("Erreur lors du traitement du texte avec OpenAI.")
+        detected_type = ai_result.get("detected_type") or predicted_type or ai_utils.mock_detect_type(processed)
+    else:
+        processed = ai_utils.mock_process_text(original_text)
+        detected_type = ai_utils.mock_detect_type(processed)
+    return processed, detected_type
@@ -0,0 +1,457 @@
+"""Couche de résilience commune à tous les appels LLM.
+
+- Délai par appel: chaque requête HTTP dispose au plus du temps restant dans
+  le budget de la requête API en cours (`request_budget`, posé par le
+  middleware), sans dépasser OPENAI_TIMEOUT.
+- Nouvelles tentatives avec backoff exponentiel et jitter, uniquement sur les
+  erreurs transitoires (timeout, connexion, 429, 5xx).
+- Disjoncteur par processus: après LLM_BREAKER_FAILURES échecs consécutifs,
+  les appels échouent immédiatement pendant LLM_BREAKER_RESET_SECONDS, puis un
+  seul appel d'essai décide de la refermeture.
+- Délestage par processus (`LoadShedder`): au-delà de LLM_MAX_IN_FLIGHT appels
+  en cours, ou pendant LLM_SHED_SECONDS après que le p95 des durées récentes a
+  dépassé LLM_LATENCY_SLO_SECONDS, les appels ne sont pas tentés: la requête
+  reçoit aussitôt le fallback au lieu d'attendre derrière un fournisseur saturé.
+
+Les helpers interceptent `LLMUnavailable` et renvoient leur fallback; le
+résultat est alors marqué dégradé (`track()`) pour ne pas être mis en cache,
+et la réponse HTTP porte l'en-tête `X-Degraded` (voir middleware).
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from decouple import config
+from django.conf import settings
+
+from scanned_text.helpers import metrics, token_usage
+
+
+class LLMUnavailable(Exception):
+    """Le fournisseur LLM n'a pas pu répondre (erreurs répétées, délai dépassé ou disjoncteur ouvert)."""
+
+
+class CircuitOpenError(LLMUnavailable):
+    """Le disjoncteur est ouvert: l'appel n'a pas été tenté."""
+
+
+class DeadlineExceeded(LLMUnavailable):
+    """Le budget de temps de la requête est épuisé."""
+
+
+class Overloaded(LLMUnavailable):
+    """Délestage: trop d'appels en cours ou latence au-delà du SLO; l'appel n'a pas été tenté."""
+
+
+_deadline: ContextVar[float | None] = ContextVar("llm_deadline", default=None)
+_outcome: ContextVar["Outcome | None"] = ContextVar("llm_outcome", default=None)
+
+_RETRYABLE_STATUS = {408, 409, 429}
+
+
+class Outcome:
+    """Issue des appels LLM d'un bloc `track()`."""
+
+    def __init__(self, parent: "Outcome | None" = None):
+        self.degraded = False
+        self.parent = parent
+
+
+@contextmanager
+def track(isolated: bool = False):
+    """Produit un `Outcome` dont `degraded` passe à True si un fallback a été servi.
+
+    Les blocs s'imbriquent: un fallback marque aussi les blocs englobants
+    (ex. le bloc du middleware pour toute la requête), sauf si le bloc est
+    `isolated` (l'appelant rejette alors le résultat dégradé au lieu de le servir).
+    """
+    outcome = Outcome(None if isolated else _outcome.get())
+    token = _outcome.set(outcome)
+    try:
+        yield outcome
+    finally:
+        _outcome.reset(token)
+
+
+def mark_degraded() -> None:
+    outcome = _outcome.get()
+    while outcome is not None:
+        outcome.degraded = True
+        outcome = outcome.parent
+
+
+@contextmanager
+def request_budget(seconds: float | None = None):
+    """Limite la durée cumulée des appels LLM du bloc (le budget englobant le plus court l'emporte)."""
+    if seconds is None:
+        seconds = getattr(settings, "LLM_REQUEST_BUDGET_SECONDS", 25.0)
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Secondes restantes dans le budget courant (None hors budget)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def is_retryable(exc: BaseException) -> bool:
+    # Déjà importés si l'appel a échoué dans le client OpenAI (voir ai_utils).
+    import httpx
+    import openai
+
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError, httpx.TimeoutException, httpx.TransportError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in _RETRYABLE_STATUS or exc.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            # Demi-ouvert: un seul appel d'essai à la fois.
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def release(self) -> None:
+        """Annule un appel d'essai autorisé mais finalement pas tenté."""
+        with self._lock:
+            self._probing = False
+
+    def retry_after(self) -> float:
+        """Secondes avant le prochain appel d'essai (0 si le disjoncteur n'est pas ouvert)."""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+_breaker: CircuitBreaker | None = None
+_breaker_lock = threading.Lock()
+
+
+def breaker() -> CircuitBreaker:
+    """Disjoncteur partagé par tous les helpers du processus."""
+    global _breaker
+
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    getattr(settings, "LLM_BREAKER_FAILURES", 5),
+                    getattr(settings, "LLM_BREAKER_RESET_SECONDS", 30.0),
+                )
+    return _breaker
+
+
+def reset_breaker() -> None:
+    global _breaker
+    _breaker = None
+
+
+class LoadShedder:
+    """Admission des appels LLM selon la charge observée dans le processus.
+
+    Un appel est refusé quand `max_in_flight` appels sont déjà en cours, ou
+    pendant `shed_seconds` après que le p95 des durées des appels terminés
+    dans les `window_seconds` dernières secondes (au moins MIN_SAMPLES) a
+    dépassé `latency_slo`. La fenêtre est alors vidée: à la reprise, de
+    nouvelles mesures décident. 0 désactive le critère correspondant.
+    """
+
+    MIN_SAMPLES = 20
+    MAX_SAMPLES = 500
+
+    def __init__(self, max_in_flight: int, latency_slo: float, window_seconds: float, shed_seconds: float):
+        self.max_in_flight = max_in_flight
+        self.latency_slo = latency_slo
+        self.window_seconds = window_seconds
+        self.shed_seconds = shed_seconds
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._samples: deque = deque(maxlen=self.MAX_SAMPLES)  # (fin de l'appel, durée)
+        self._shed_until = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def shedding(self) -> bool:
+        return time.monotonic() < self._shed_until
+
+    def retry_after(self) -> float:
+        """Secondes de délestage restantes (0 hors délestage)."""
+        return max(0.0, self._shed_until - time.monotonic())
+
+    def acquire(self) -> bool:
+        """Réserve une place pour un appel; False si l'appel doit être délesté."""
+        with self._lock:
+            if time.monotonic() < self._shed_until:
+                return False
+            if self.max_in_flight > 0 and self._in_flight >= self.max_in_flight:
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self, duration: float) -> None:
+        """Libère la place d'un appel terminé (réussi ou non) et enregistre sa durée."""
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            if self.latency_slo <= 0:
+                return
+            self._samples.append((now, duration))
+            while self._samples[0][0] < now - self.window_seconds:
+                self._samples.popleft()
+            if len(self._samples) >= self.MIN_SAMPLES and self._p95() > self.latency_slo:
+                self._shed_until = now + self.shed_seconds
+                self._samples.clear()
+
+    @contextmanager
+    def running(self):
+        """Entoure un appel admis par `acquire()`, y compris s'il est annulé."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def _p95(self) -> float:
+        durations = sorted(duration for _, duration in self._samples)
+        return durations[max(0, -(-len(durations) * 95 // 100) - 1)]
+
+    def p95(self) -> float | None:
+        """p95 des durées de la fenêtre courante (None sans mesure)."""
+        with self._lock:
+            return self._p95() if self._samples else None
+
+
+_shedder: LoadShedder | None = None
+
+
+def shedder() -> LoadShedder:
+    """Délestage partagé par tous les helpers du processus."""
+    global _shedder
+
+    if _shedder is None:
+        with _breaker_lock:
+            if _shedder is None:
+                _shedder = LoadShedder(
+                    getattr(settings, "LLM_MAX_IN_FLIGHT", 32),
+                    getattr(settings, "LLM_LATENCY_SLO_SECONDS", 15.0),
+                    getattr(settings, "LLM_LATENCY_WINDOW_SECONDS", 60.0),
+                    getattr(settings, "LLM_SHED_SECONDS", 30.0),
+                )
+    return _shedder
+
+
+def reset_shedder() -> None:
+    global _shedder
+    _shedder = None
+
+
+def retry_after() -> int:
+    """Valeur de l'en-tête Retry-After d'une réponse 503: au moins 1 seconde."""
+    return max(1, int(-(-max(breaker().retry_after(), shedder().retry_after()) // 1)))
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_breaker)
+    os.register_at_fork(after_in_child=reset_shedder)
+
+
+def _call_timeout() -> float | None:
+    left = remaining()
+    if left is None:
+        return None
+    return min(left, config("OPENAI_TIMEOUT", default=30.0, cast=float))
+
+
+def _backoff(attempt: int) -> float:
+    """Backoff exponentiel avec jitter complet."""
+    base = getattr(settings, "LLM_RETRY_BASE_DELAY", 0.5)
+    cap = getattr(settings, "LLM_RETRY_MAX_DELAY", 4.0)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _attempts(helper: str = ""):
+    """Itère sur les tentatives autorisées; produit le timeout à utiliser pour chacune."""
+    circuit, load = breaker(), shedder()
+    for attempt in range(max(1, getattr(settings, "LLM_RETRY_ATTEMPTS", 3))):
+        if not circuit.allow():
+            mark_degraded()
+            metrics.LLM_REQUESTS.inc(helper=helper, outcome="circuit_open")
+            raise CircuitOpenError("Fournisseur LLM indisponible (disjoncteur ouvert).")
+        timeout = _call_timeout()
+        if timeout is not None and timeout <= 0:
+            circuit.release()
+            mark_degraded()
+            metrics.LLM_REQUESTS.inc(helper=helper, outcome="deadline")
+            raise DeadlineExceeded("Budget de temps de la requête épuisé.")
+        if not load.acquire():
+            circuit.release()
+            mark_degraded()
+            metrics.LLM_REQUESTS.inc(helper=helper, outcome="shed")
+            raise Overloaded("Fournisseur LLM saturé: appel délesté.")
+        # L'appelant libère la place avec `shedder().running()`.
+        yield attempt, timeout
+
+
+def _on_error(exc: Exception, attempt: int) -> float | None:
+    """Enregistre l'échec; retourne le délai avant la prochaine tentative, ou None pour abandonner."""
+    circuit = breaker()
+    if not is_retryable(exc):
+        # Le fournisseur a répondu (requête invalide, clé refusée...): il est joignable.
+        circuit.record_success()
+        raise exc
+    circuit.record_failure()
+    delay = _backoff(attempt)
+    left = remaining()
+    if attempt + 1 >= getattr(settings, "LLM_RETRY_ATTEMPTS", 3) or (left is not None and delay >= left):
+        return None
+    return delay
+
+
+def _observe(helper: str, start: float, outcome: str) -> None:
+    metrics.LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, helper=helper)
+    metrics.LLM_REQUESTS.inc(helper=helper, outcome=outcome)
+
+
+def _failed(helper: str, last_error: Exception | None) -> LLMUnavailable:
+    mark_degraded()
+    metrics.LLM_REQUESTS.inc(helper=helper, outcome="unavailable")
+    return LLMUnavailable(f"Appel LLM en échec: {last_error}")
+
+
+def create_completion(client, *, helper: str = "", **kwargs):
+    """`client.chat.completions.create(**kwargs)` avec délai, nouvelles tentatives et disjoncteur.
+
+    `helper` étiquette les métriques (durée, issue et tokens de chaque appel).
+    """
+    last_error = None
+    for attempt, timeout in _attempts(helper):
+        call_kwargs = dict(kwargs, timeout=timeout) if timeout is not None else kwargs
+        start = time.perf_counter()
+        try:
+            with shedder().running():
+                response = client.chat.completions.create(**call_kwargs)
+        except Exception as exc:
+            _observe(helper, start, "error")
+            last_error = exc
+            delay = _on_error(exc, attempt)
+            if delay is None:
+                break
+            time.sleep(delay)
+            continue
+        _observe(helper, start, "ok")
+        breaker().record_success()
+        token_usage.record(getattr(response, "usage", None), helper)
+        return response
+    raise _failed(helper, last_error) from last_error
+
+
+def iter_stream(stream, *, helper: str = ""):
+    """Itère sur les fragments d'un flux ouvert par `create_completion(stream=True)`.
+
+    `create_completion` ne couvre que l'appel jusqu'aux en-têtes de réponse.
+    Ici, le budget de temps courant s'applique aussi à la lecture des
+    fragments, et une erreur de lecture transitoire compte comme un échec pour
+    le disjoncteur. Un flux interrompu lève `LLMUnavailable` (résultat dégradé).
+    """
+    try:
+        for chunk in stream:
+            yield chunk
+            left = remaining()
+            if left is not None and left <= 0:
+                metrics.LLM_REQUESTS.inc(helper=helper, outcome="deadline")
+                raise DeadlineExceeded("Budget de temps de la requête épuisé pendant le flux.")
+    except LLMUnavailable:
+        mark_degraded()
+        raise
+    except Exception as exc:
+        if is_retryable(exc):
+            breaker().record_failure()
+        mark_degraded()
+        metrics.LLM_REQUESTS.inc(helper=helper, outcome="stream_error")
+        raise LLMUnavailable(f"Flux LLM interrompu: {exc}") from exc
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+
+async def acreate_completion(client, *, helper: str = "", **kwargs):
+    """Version asynchrone de `create_completion` (client AsyncOpenAI)."""
+    last_error = None
+    for attempt, timeout in _attempts(helper):
+        call_kwargs = dict(kwargs, timeout=timeout) if timeout is not None else kwargs
+        start = time.perf_counter()
+        try:
+            with shedder().running():
+                response = await client.chat.completions.create(**call_kwargs)
+        except Exception as exc:
+            _observe(helper, start, "error")
+            last_error = exc
+            delay = _on_error(exc, attempt)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+            continue
+        _observe(helper, start, "ok")
+        breaker().record_success()
+        token_usage.record(getattr(response, "usage", None), helper)
+        return response
+    raise _failed(helper, last_error) from last_error
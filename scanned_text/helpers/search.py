@@ -0,0 +1,252 @@
+"""Recherche plein texte dans les textes scannés d'un utilisateur.
+
+- SQLite : table virtuelle FTS5 `scanned_text_search` sans contenu (elle
+  n'indexe que les mots, sans recopier les textes). Les textes étant stockés
+  compressés, SQLite ne peut pas les indexer lui-même: des triggers AFTER
+  INSERT/UPDATE/DELETE, en SQL pur, notent chaque changement dans le journal
+  `scanned_text_search_log` (avec les anciennes valeurs, encore compressées,
+  pour les suppressions), et `sync()` les décompresse en Python et met l'index
+  à jour avant chaque recherche. `save()`, `bulk_create()`, `update()`, les
+  suppressions en cascade comme les écritures d'un client sqlite3 externe sont
+  donc toutes couvertes. La colonne `user_id` est indexée elle aussi, ce qui
+  restreint la recherche aux textes de l'utilisateur dans l'index même.
+  Classement par bm25.
+- PostgreSQL : index GIN sur `to_tsvector('french', original_text || processed_text)`,
+  requête `websearch_to_tsquery`, classement par `ts_rank`.
+
+Les migrations de SQLite qui reconstruisent la table ScannedText suppriment
+ses triggers et renumérotent les rowid (tout comme un VACUUM): `install()` est
+rappelé après chaque `migrate` et reconstruit l'index s'il le faut (le journal
+est alors vidé). Voir aussi
+la commande `rebuild_search_index`.
+"""
+
+import re
+
+from django.db import connection as default_connection
+from django.db import transaction
+from django.db.models import Q
+
+from scanned_text.helpers.compression import decompress
+from scanned_text.models import ScannedText
+
+TABLE = ScannedText._meta.db_table
+FTS_TABLE = "scanned_text_search"
+PG_INDEX = "scanned_text_search_idx"
+PG_CONFIG = "french"
+PG_VECTOR = (
+    f"to_tsvector('{PG_CONFIG}'::regconfig, coalesce(original_text, '') || ' ' || coalesce(processed_text, ''))"
+)
+FTS_COLUMNS = "original_text, processed_text, user_id"
+LOG_TABLE = "scanned_text_search_log"
+LOG_DDL = (
+    f"CREATE TABLE IF NOT EXISTS {LOG_TABLE} (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+    f"op TEXT NOT NULL, row_id INTEGER NOT NULL, original_text, processed_text, user_id)"
+)
+# 'index': la ligne est à (ré)indexer; 'delete': retirer de l'index les anciennes valeurs.
+_LOG_INDEX = f"INSERT INTO {LOG_TABLE}(op, row_id) VALUES ('index', new.rowid);"
+_LOG_DELETE = (
+    f"INSERT INTO {LOG_TABLE}(op, row_id, {FTS_COLUMNS}) "
+    f"VALUES ('delete', old.rowid, old.original_text, old.processed_text, old.user_id);"
+)
+FTS_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+            {_LOG_INDEX}
+        END""",
+    f"{FTS_TABLE}_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+            {_LOG_DELETE}
+        END""",
+    f"{FTS_TABLE}_au": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {FTS_COLUMNS} ON {TABLE} BEGIN
+            {_LOG_DELETE}
+            {_LOG_INDEX}
+        END""",
+}
+_FTS_INSERT = f"INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS}) VALUES (%s, %s, %s, %s)"
+_FTS_DELETE = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS}) VALUES ('delete', %s, %s, %s, %s)"
+_BATCH_SIZE = 500
+# bm25: poids des colonnes original_text, processed_text, user_id.
+BM25 = f"bm25({FTS_TABLE}, 1.0, 1.0, 0.0)"
+
+# Migration qui crée l'index actuel (avant elle, ou après son annulation, rien à réparer).
+MIGRATION = "0012_search_change_log"
+
+_TERMS = re.compile(r"\w+")
+
+
+def install(connection=default_connection) -> bool:
+    """Crée l'index de recherche s'il manque. Retourne True s'il a été (re)construit."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON {TABLE} USING gin (({PG_VECTOR}))")
+            return False
+        if connection.vendor != "sqlite":
+            return False
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s, %s) OR (type = 'trigger' AND tbl_name = %s)",
+            [FTS_TABLE, LOG_TABLE, TABLE],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing >= {FTS_TABLE, LOG_TABLE, *FTS_TRIGGERS}:
+            return False
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({FTS_COLUMNS}, "
+            f"content='', tokenize='unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(LOG_DDL)
+        for sql in FTS_TRIGGERS.values():
+            cursor.execute(sql)
+    rebuild(connection)
+    return True
+
+
+def uninstall(connection=default_connection) -> None:
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+        elif connection.vendor == "sqlite":
+            for name in FTS_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {LOG_TABLE}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def rebuild(connection=default_connection) -> None:
+    """Réindexe toute la table (après un VACUUM ou une reconstruction de table sous SQLite)."""
+    if connection.vendor == "sqlite":
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')")
+            cursor.execute(f"DELETE FROM {LOG_TABLE}")
+            last = 0
+            while True:
+                cursor.execute(
+                    f"SELECT rowid, {FTS_COLUMNS} FROM {TABLE} WHERE rowid > %s ORDER BY rowid LIMIT %s",
+                    [last, _BATCH_SIZE],
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                cursor.executemany(_FTS_INSERT, [_plain(row) for row in rows])
+                last = rows[-1][0]
+    elif connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"REINDEX INDEX {PG_INDEX}")
+
+
+def _plain(row) -> list:
+    row_id, original, processed, user_id = row
+    return [row_id, decompress(original), decompress(processed), user_id]
+
+
+def sync(connection=default_connection) -> int:
+    """Applique à l'index FTS5 les changements notés dans le journal. Retourne le nombre de lignes traitées.
+
+    Pour chaque ligne, seule la première entrée du journal compte pour la
+    suppression: une entrée 'delete' porte les valeurs actuellement indexées
+    (une entrée 'index' en premier signifie que la ligne n'est pas encore
+    indexée). La ligne est ensuite indexée avec ses valeurs actuelles, si elle
+    existe encore.
+    """
+    if connection.vendor != "sqlite":
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT 1 FROM {LOG_TABLE} LIMIT 1")
+        if cursor.fetchone() is None:
+            return 0
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        # Écriture d'abord: deux recherches simultanées ne traitent pas deux fois une entrée.
+        cursor.execute(f"DELETE FROM {LOG_TABLE} RETURNING id, op, row_id, {FTS_COLUMNS}")
+        first = {}
+        for _, op, row_id, *values in sorted(cursor.fetchall()):
+            first.setdefault(row_id, (op, values))
+        removed = [_plain([row_id, *values]) for row_id, (op, values) in first.items() if op == "delete"]
+        if removed:
+            cursor.executemany(_FTS_DELETE, removed)
+        row_ids = list(first)
+        for start in range(0, len(row_ids), _BATCH_SIZE):
+            batch = row_ids[start:start + _BATCH_SIZE]
+            cursor.execute(
+                f"SELECT rowid, {FTS_COLUMNS} FROM {TABLE} WHERE rowid IN ({', '.join(['%s'] * len(batch))})",
+                batch,
+            )
+            cursor.executemany(_FTS_INSERT, [_plain(row) for row in cursor.fetchall()])
+    return len(first)
+
+
+def install_after_migrate(sender, using="default", **kwargs):
+    """Récepteur de `post_migrate`: répare l'index si une migration a reconstruit la table."""
+    from django.db import connections
+    from django.db.migrations.recorder import MigrationRecorder
+
+    connection = connections[using]
+    if (ScannedText._meta.app_label, MIGRATION) in MigrationRecorder(connection).applied_migrations():
+        install(connection)
+        sync(connection)
+
+
+def match_expression(query: str, user_id: str) -> str:
+    """Requête FTS5: chaque mot entre guillemets (pas de syntaxe FTS5 côté client), tous requis."""
+    terms = " ".join(f'"{term}"' for term in _TERMS.findall(query))
+    return f'user_id : "{user_id}" AND {{original_text processed_text}} : ({terms})'
+
+
+def has_terms(query: str) -> bool:
+    return bool(_TERMS.search(query))
+
+
+class SearchResults:
+    """Résultats classés d'une recherche, lus tranche par tranche (LIMIT/OFFSET).
+
+    Se découpe comme un QuerySet (`results[20:40]`) et renvoie des ScannedText
+    dans l'ordre du classement, ce qui suffit à SearchPagination.
+    """
+
+    def __init__(self, user, query: str, connection=default_connection):
+        self.user = user
+        self.query = query
+        self.connection = connection
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step is not None:
+            raise TypeError("SearchResults ne se lit que par tranches (results[a:b]).")
+        offset = item.start or 0
+        limit = (item.stop - offset) if item.stop is not None else -1
+        if limit == 0 or not has_terms(self.query):
+            return []
+        ids = self.ids(limit, offset)
+        rows = ScannedText.objects.select_related("user").in_bulk(ids)
+        return [rows[pk] for pk in ids if pk in rows]
+
+    def ids(self, limit: int, offset: int) -> list:
+        pk_field = ScannedText._meta.pk
+        user_id = ScannedText._meta.get_field("user").get_db_prep_value(self.user.pk, self.connection)
+        vendor = self.connection.vendor
+        if vendor == "sqlite":
+            sync(self.connection)
+            sql = (
+                f"SELECT t.id FROM {FTS_TABLE} JOIN {TABLE} t ON t.rowid = {FTS_TABLE}.rowid "
+                f"WHERE {FTS_TABLE} MATCH %s ORDER BY {BM25}, t.createdAt DESC LIMIT %s OFFSET %s"
+            )
+            params = [match_expression(self.query, user_id), limit, offset]
+        elif vendor == "postgresql":
+            sql = (
+                f"SELECT id FROM {TABLE}, websearch_to_tsquery('{PG_CONFIG}'::regconfig, %s) query "
+                f"WHERE user_id = %s AND {PG_VECTOR} @@ query "
+                f'ORDER BY ts_rank({PG_VECTOR}, query) DESC, "createdAt" DESC LIMIT %s OFFSET %s'
+            )
+            params = [self.query, user_id, None if limit < 0 else limit, offset]
+        else:
+            return self._fallback_ids(limit, offset)
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [pk_field.to_python(row[0]) for row in cursor.fetchall()]
+
+    def _fallback_ids(self, limit: int, offset: int) -> list:
+        """Autres moteurs (textes en clair): tous les mots en sous-chaîne (icontains), plus récents d'abord."""
+        queryset = ScannedText.objects.filter(user=self.user).order_by("-createdAt", "-id")
+        for term in _TERMS.findall(self.query):
+            queryset = queryset.filter(Q(original_text__icontains=term) | Q(processed_text__icontains=term))
+        queryset = queryset.values_list("id", flat=True)
+        return list(queryset[offset:] if limit < 0 else queryset[offset:offset + limit])
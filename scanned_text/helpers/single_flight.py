@@ -0,0 +1,255 @@
+"""Coalescence des appels identiques en cours (« single-flight »).
+
+Quand plusieurs requêtes demandent au même moment le même résultat IA (ex. une
+classe entière qui ouvre le même texte partagé), seul le premier appelant
+(« leader ») appelle le LLM; les autres attendent et reçoivent son résultat.
+
+- Entre threads d'un même processus: un `threading.Event` par clé (`do`);
+  entre coroutines d'une même boucle: un `asyncio.Future` par clé (`ado`).
+- Entre processus d'une même machine: un verrou fichier (`fcntl.flock`) par
+  clé, supprimé par le leader quand il a fini (sous le verrou: un appelant qui
+  obtient ensuite le verrou d'un fichier supprimé recommence avec le nouveau
+  fichier). Le processus qui obtient le verrou après attente relit le cache
+  partagé (`recheck`) avant d'appeler le LLM.
+
+`stats()` expose le nombre d'appels effectués et coalescés.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: coalescence intra-processus uniquement
+    fcntl = None
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+_calls: dict = {}
+_calls_lock = threading.Lock()
+_stats = {"leader": 0, "coalesced_local": 0, "coalesced_remote": 0, "timeouts": 0}
+_stats_lock = threading.Lock()
+
+
+def _incr(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def stats() -> dict:
+    """Compteurs du processus courant.
+
+    - leader: appels réellement exécutés.
+    - coalesced_local: appels servis par un leader du même processus.
+    - coalesced_remote: appels servis par le cache après attente du verrou
+      d'un autre processus.
+    - timeouts: attentes abandonnées (l'appel a alors été exécuté).
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def _timeout() -> float:
+    return getattr(settings, "SINGLE_FLIGHT_TIMEOUT", 120.0)
+
+
+def lock_dir() -> str:
+    return getattr(settings, "SINGLE_FLIGHT_LOCK_DIR", None) or os.path.join(
+        tempfile.gettempdir(), "syntaiz-single-flight"
+    )
+
+
+def lock_path(key: str) -> str:
+    """Fichier de verrou de `key`."""
+    return os.path.join(lock_dir(), f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.lock")
+
+
+def _is_current(handle, path: str) -> bool:
+    """Le fichier verrouillé est-il toujours celui de `path` (pas supprimé par le leader précédent) ?"""
+    try:
+        return os.fstat(handle.fileno()).st_ino == os.stat(path).st_ino
+    except FileNotFoundError:
+        return False
+
+
+def _acquire_file_lock(key: str):
+    """Prend le verrou exclusif inter-processus de `key`; retourne (fichier, a attendu).
+
+    Le fichier vaut None si le verrou n'a pas été obtenu avant SINGLE_FLIGHT_TIMEOUT.
+    """
+    os.makedirs(lock_dir(), exist_ok=True)
+    path = lock_path(key)
+    deadline = time.monotonic() + _timeout()
+    waited = False
+    while True:
+        handle = open(path, "a+")
+        while True:
+            try:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                waited = True
+                if time.monotonic() >= deadline:
+                    _incr("timeouts")
+                    handle.close()
+                    return None, waited
+                time.sleep(0.05)
+        if _is_current(handle, path):
+            return handle, waited
+        handle.close()
+
+
+def _release_file_lock(handle) -> None:
+    """Supprime le fichier de verrou (encore détenu) puis libère le verrou."""
+    if handle is not None:
+        try:
+            os.unlink(handle.name)
+        except FileNotFoundError:
+            pass
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        handle.close()
+
+
+@contextmanager
+def _file_lock(key: str):
+    """Verrou exclusif inter-processus; produit True si il a fallu attendre."""
+    handle, waited = _acquire_file_lock(key)
+    try:
+        yield waited
+    finally:
+        _release_file_lock(handle)
+
+
+def _cross_process(recheck) -> bool:
+    return recheck is not None and fcntl is not None and getattr(settings, "SINGLE_FLIGHT_CROSS_PROCESS", True)
+
+
+def _run_leader(key: str, fn, recheck):
+    if not _cross_process(recheck):
+        _incr("leader")
+        return fn()
+    with _file_lock(key) as waited:
+        if waited:
+            value = recheck()
+            if value is not None:
+                _incr("coalesced_remote")
+                return value
+        _incr("leader")
+        return fn()
+
+
+def do(key: str, fn, recheck=None):
+    """Exécute `fn()` une seule fois pour tous les appels concurrents de même `key`.
+
+    `recheck()` relit le résultat depuis un stockage partagé (retourne None si
+    absent); il active la coalescence entre processus.
+    """
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        if call.event.wait(_timeout()):
+            _incr("coalesced_local")
+            if call.error is not None:
+                raise call.error
+            return call.value
+        _incr("timeouts")
+        return fn()
+
+    try:
+        call.value = _run_leader(key, fn, recheck)
+        return call.value
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            _calls.pop(key, None)
+        call.event.set()
+
+
+_acalls: dict = {}
+
+
+async def _arun_leader(key: str, fn, recheck):
+    if not _cross_process(recheck):
+        _incr("leader")
+        return await fn()
+    # L'attente du verrou fichier est bloquante: elle se fait hors de la boucle.
+    handle, waited = await asyncio.to_thread(_acquire_file_lock, key)
+    try:
+        if waited:
+            value = await recheck()
+            if value is not None:
+                _incr("coalesced_remote")
+                return value
+        _incr("leader")
+        return await fn()
+    finally:
+        _release_file_lock(handle)
+
+
+async def ado(key: str, fn, recheck=None):
+    """Version asynchrone de `do`: `fn` et `recheck` retournent des coroutines.
+
+    Les coroutines d'une même boucle d'événements attendent le leader (un
+    `asyncio.Future` par clé); entre processus, même verrou fichier que `do`.
+    """
+    loop = asyncio.get_running_loop()
+    with _calls_lock:
+        future = _acalls.get((loop, key))
+        leader = future is None
+        if leader:
+            future = _acalls[(loop, key)] = loop.create_future()
+
+    if not leader:
+        try:
+            value = await asyncio.wait_for(asyncio.shield(future), _timeout())
+        except TimeoutError:
+            _incr("timeouts")
+            return await fn()
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # Leader annulé (client déconnecté): on calcule soi-même.
+            return await fn()
+        _incr("coalesced_local")
+        return value
+
+    try:
+        value = await _arun_leader(key, fn, recheck)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # évite « Future exception was never retrieved » sans attendant
+        raise
+    else:
+        future.set_result(value)
+        return value
+    finally:
+        with _calls_lock:
+            _acalls.pop((loop, key), None)
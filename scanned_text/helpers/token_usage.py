@@ -0,0 +1,112 @@
+"""Comptabilité des tokens LLM par utilisateur et par jour.
+
+Chaque réponse LLM (voir resilience.create_completion) ajoute son `usage` au
+compteur du contexte courant, ouvert par le middleware pour la durée d'une
+requête (ou par le worker pour un job). En fin de requête, `settle()` ajoute
+le total à la ligne TokenUsage du jour et corrige la charge du throttle par
+coût (scanned_text.throttling.TokenCostThrottle) avec la consommation réelle.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from scanned_text.helpers import metrics
+
+
+class Meter:
+    """Tokens consommés dans un bloc `meter()`.
+
+    Partagé par les threads d'un envoi groupé (contexte copié), d'où le verrou.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.calls += 1
+
+
+_meter: ContextVar[Meter | None] = ContextVar("token_meter", default=None)
+
+
+@contextmanager
+def meter():
+    usage = Meter()
+    token = _meter.set(usage)
+    try:
+        yield usage
+    finally:
+        _meter.reset(token)
+
+
+def _field(usage, name: str) -> int:
+    value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+    return int(value or 0)
+
+
+def record(usage, helper: str = "") -> None:
+    """Ajoute l'`usage` d'une réponse LLM (objet ou dict) au compteur courant et aux métriques."""
+    if usage is None:
+        return
+    prompt_tokens = _field(usage, "prompt_tokens")
+    completion_tokens = _field(usage, "completion_tokens")
+    if not prompt_tokens and not completion_tokens:
+        completion_tokens = _field(usage, "total_tokens")
+    metrics.LLM_TOKENS.inc(prompt_tokens, helper=helper, direction="in")
+    metrics.LLM_TOKENS.inc(completion_tokens, helper=helper, direction="out")
+    current = _meter.get()
+    if current is not None:
+        current.add(prompt_tokens, completion_tokens)
+
+
+def save(user, usage: Meter, day=None) -> None:
+    """Ajoute la consommation à la ligne (utilisateur, jour), créée au besoin."""
+    from scanned_text.models import TokenUsage
+
+    if not usage.calls:
+        return
+    day = day or timezone.localdate()
+    increments = dict(
+        prompt_tokens=F("prompt_tokens") + usage.prompt_tokens,
+        completion_tokens=F("completion_tokens") + usage.completion_tokens,
+        calls=F("calls") + usage.calls,
+    )
+    if TokenUsage.objects.filter(user=user, day=day).update(**increments):
+        return
+    try:
+        TokenUsage.objects.create(
+            user=user,
+            day=day,
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+            calls=usage.calls,
+        )
+    except IntegrityError:
+        # Ligne créée entre-temps par une requête concurrente.
+        TokenUsage.objects.filter(user=user, day=day).update(**increments)
+
+
+def settle(user, usage: Meter, charged: int = 0) -> None:
+    """Enregistre la consommation d'une requête et ajuste le throttle par coût."""
+    from scanned_text.throttling import TokenCostThrottle
+
+    if user is None or not user.is_authenticated:
+        return
+    save(user, usage)
+    if charged or usage.total_tokens:
+        TokenCostThrottle.adjust(user.pk, usage.total_tokens - charged)
@@ -0,0 +1,118 @@
+"""Classifieur local du `detected_type` (naive Bayes sur n-grammes de caractères).
+
+Entraîné par `manage.py train_type_classifier` sur les ScannedText déjà
+étiquetés (donc sur les décisions passées du LLM), il permet de connaître le
+type d'un texte avant tout appel: le traitement OCR n'utilise alors qu'un
+prompt de nettoyage, plus court. Sous le seuil de confiance, `predict()`
+renvoie None et le LLM décide comme avant.
+
+Le modèle est un fichier JSON (`TYPE_CLASSIFIER_PATH`), rechargé quand il
+change sur disque.
+"""
+
+import json
+import math
+import os
+import threading
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+NGRAM_SIZES = (3, 4)
+MAX_CHARS = 1000
+IGNORED_LABELS = {"inconnu", ""}
+
+_lock = threading.Lock()
+_loaded = {"path": None, "mtime": None, "model": None}
+
+
+def model_path() -> str:
+    return getattr(settings, "TYPE_CLASSIFIER_PATH", None) or os.path.join(settings.BASE_DIR, "type_classifier.json")
+
+
+def _ngrams(text: str):
+    text = " ".join((text or "")[:MAX_CHARS].lower().split())
+    padded = f" {text} "
+    for n in NGRAM_SIZES:
+        for i in range(len(padded) - n + 1):
+            yield padded[i : i + n]
+
+
+def train(samples, alpha: float = 1.0, max_features: int = 50000) -> dict:
+    """Entraîne un naive Bayes multinomial sur des couples (texte, étiquette)."""
+    class_docs = Counter()
+    class_counts = defaultdict(Counter)
+    totals = Counter()
+    for text, label in samples:
+        class_docs[label] += 1
+        counts = Counter(_ngrams(text))
+        class_counts[label].update(counts)
+        totals.update(counts)
+
+    labels = sorted(class_docs)
+    vocabulary = [gram for gram, _ in totals.most_common(max_features)]
+    n_docs = sum(class_docs.values())
+    priors = [math.log(class_docs[label] / n_docs) for label in labels]
+    unknown = []
+    features = {gram: [] for gram in vocabulary}
+    for label in labels:
+        counts = class_counts[label]
+        denominator = sum(counts[gram] for gram in vocabulary) + alpha * (len(vocabulary) + 1)
+        unknown.append(math.log(alpha / denominator))
+        for gram in vocabulary:
+            features[gram].append(math.log((counts[gram] + alpha) / denominator))
+    return {"labels": labels, "priors": priors, "unknown": unknown, "features": features}
+
+
+def predict_proba(model: dict, text: str) -> dict:
+    """Probabilité a posteriori de chaque étiquette."""
+    features = model["features"]
+    unknown = model["unknown"]
+    scores = list(model["priors"])
+    for gram in _ngrams(text):
+        weights = features.get(gram, unknown)
+        for i, weight in enumerate(weights):
+            scores[i] += weight
+    best = max(scores)
+    exp = [math.exp(score - best) for score in scores]
+    total = sum(exp)
+    return {label: value / total for label, value in zip(model["labels"], exp)}
+
+
+def save(model: dict, path: str | None = None) -> str:
+    path = path or model_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(model, fh, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return path
+
+
+def load() -> dict | None:
+    """Modèle courant, ou None s'il n'a pas encore été entraîné."""
+    path = model_path()
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    with _lock:
+        if _loaded["path"] != path or _loaded["mtime"] != mtime:
+            with open(path, encoding="utf-8") as fh:
+                _loaded.update(path=path, mtime=mtime, model=json.load(fh))
+        return _loaded["model"]
+
+
+def predict(text: str) -> str | None:
+    """Type du texte si le modèle est assez confiant (TYPE_CLASSIFIER_MIN_CONFIDENCE), sinon None."""
+    if not getattr(settings, "TYPE_CLASSIFIER_ENABLED", True):
+        return None
+    model = load()
+    if model is None or not text:
+        return None
+    label, probability = max(predict_proba(model, text).items(), key=lambda item: item[1])
+    if probability < getattr(settings, "TYPE_CLASSIFIER_MIN_CONFIDENCE", 0.9):
+        return None
+    return label
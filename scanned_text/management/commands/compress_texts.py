@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from scanned_text.helpers import compression
+from scanned_text.models import AIArtifact, ScannedText
+
+COLUMNS = ((ScannedText, ["original_text", "processed_text"]), (AIArtifact, ["payload"]))
+
+
+class Command(BaseCommand):
+    help = (
+        "Réécrit par lots les textes scannés et résultats IA en cache au format de compression courant "
+        "(TEXT_COMPRESSION, dernier dictionnaire entraîné). Relançable sans risque."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Lignes réécrites par transaction.")
+        parser.add_argument("--database", default="default", help="Alias de la base.")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if not compression.stores_compressed(connection):
+            self.stdout.write(f"Rien à faire: les textes ne sont compressés que sous SQLite ({connection.vendor}).")
+            return
+        for model, fields in COLUMNS:
+            before = stored_bytes(connection, model, fields)
+            read, written = compression.recompress(connection, model, fields, options["batch_size"])
+            after = stored_bytes(connection, model, fields)
+            self.stdout.write(
+                f"{model.__name__}: {written}/{read} ligne(s) réécrite(s), {before} -> {after} octets stockés."
+            )
+        self.stdout.write(self.style.SUCCESS("Terminé. Lancez VACUUM puis rebuild_search_index pour rendre la place."))
+
+
+def stored_bytes(connection, model, fields) -> int:
+    """Taille des valeurs stockées (SQLite: octets du texte UTF-8 ou du BLOB)."""
+    quote = connection.ops.quote_name
+    total = " + ".join(
+        f"coalesce(length(CAST({quote(model._meta.get_field(name).column)} AS BLOB)), 0)" for name in fields
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT coalesce(sum({total}), 0) FROM {quote(model._meta.db_table)}")
+        return cursor.fetchone()[0]
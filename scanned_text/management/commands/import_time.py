@@ -0,0 +1,85 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Démarrage d'un worker: chargement de l'application puis de l'URLconf (sinon
+# importée à la première requête).
+BOOT = """
+import importlib
+from django.core.{server}i import get_{server}i_application
+get_{server}i_application()
+from django.conf import settings
+importlib.import_module(settings.ROOT_URLCONF)
+"""
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le démarrage d'un worker dans un nouvel interpréteur (python -X importtime) : durée totale, "
+        "modules et paquets les plus coûteux à importer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--asgi", action="store_true", help="Démarre l'application ASGI au lieu de WSGI.")
+        parser.add_argument("--repeat", type=int, default=3, help="Nombre de démarrages (valeurs médianes).")
+        parser.add_argument("--top", type=int, default=20, help="Nombre de modules et de paquets affichés.")
+        parser.add_argument(
+            "--sort", choices=["cumulative", "self"], default="cumulative",
+            help="Tri des modules: temps cumulé (avec leurs imports) ou propre.",
+        )
+
+    def handle(self, *args, **options):
+        server = "asg" if options["asgi"] else "wsg"
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        runs, walls = [], []
+        for _ in range(max(options["repeat"], 1)):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", BOOT.format(server=server)],
+                env=env, capture_output=True, text=True,
+            )
+            walls.append(time.perf_counter() - start)
+            if result.returncode:
+                raise CommandError(f"Échec du démarrage:\n{result.stderr[-2000:]}")
+            runs.append(parse_importtime(result.stderr))
+
+        modules = {}
+        for name in runs[0]:
+            samples = [run[name] for run in runs if name in run]
+            modules[name] = tuple(statistics.median(values) for values in zip(*samples))
+        total = sum(cumulative for cumulative, _, depth in modules.values() if depth == 0)
+        packages = defaultdict(float)
+        for name, (_, own, _) in modules.items():
+            packages[name.split(".")[0]] += own
+
+        self.stdout.write(
+            f"Démarrage {server.upper()}I ({len(runs)} essai(s), médiane) : {statistics.median(walls) * 1000:.0f} ms, "
+            f"dont {total / 1000:.0f} ms d'imports ({len(modules)} modules)."
+        )
+        self.stdout.write("\nPaquets (temps propre cumulé de leurs modules) :")
+        for name, own in sorted(packages.items(), key=lambda item: -item[1])[:options["top"]]:
+            self.stdout.write(f"{own / 1000:10.1f} ms  {name}")
+        column = 0 if options["sort"] == "cumulative" else 1
+        self.stdout.write("\n  cumulé ms    propre ms  module")
+        for name, values in sorted(modules.items(), key=lambda item: -item[1][column])[:options["top"]]:
+            self.stdout.write(f"{values[0] / 1000:10.1f}  {values[1] / 1000:11.1f}  {name}")
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int, int]]:
+    """Sortie de `-X importtime` -> {module: (cumulé µs, propre µs, profondeur)}."""
+    modules = {}
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules[name] = (int(cumulative), int(own), len(indent) // 2)
+    return modules
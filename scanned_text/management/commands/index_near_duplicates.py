@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from scanned_text.helpers import near_duplicates
+from scanned_text.models import ScannedText
+
+
+class Command(BaseCommand):
+    help = "Calcule et indexe les empreintes MinHash des textes scannés qui n'en ont pas (quasi-doublons)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Textes traités par transaction.")
+
+    def handle(self, *args, **options):
+        indexed = 0
+        while True:
+            batch = list(
+                ScannedText.objects.filter(minhash__isnull=True)
+                .only("id", "original_text", "minhash")
+                .order_by("id")[: options["batch_size"]]
+            )
+            # Les textes trop courts gardent une signature vide (b"") pour ne pas être relus.
+            for text in batch:
+                text.minhash = near_duplicates.encode(near_duplicates.signature(text.original_text)) or b""
+            if not batch:
+                break
+            with transaction.atomic():
+                ScannedText.objects.bulk_update(batch, ["minhash"])
+                near_duplicates.index(batch)
+            indexed += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"{indexed} texte(s) indexé(s)."))
@@ -0,0 +1,60 @@
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection
+
+from scanned_text.helpers import job_queue
+
+
+class Command(BaseCommand):
+    help = "Lance un pool de workers qui traitent les textes scannés en attente (création asynchrone)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Nombre de threads de traitement.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Attente (s) quand la file est vide.")
+        parser.add_argument("--once", action="store_true", help="Vide la file puis s'arrête.")
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        if not options["once"]:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: stop.set())
+
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        counts = [0] * options["workers"]
+
+        def work(index: int):
+            worker_id = f"{prefix}:{index}"
+            try:
+                while not stop.is_set():
+                    close_old_connections()
+                    try:
+                        processed = job_queue.run_pending(worker_id, limit=1)
+                    except DatabaseError as e:
+                        # Base momentanément indisponible/verrouillée: le bail du job
+                        # expirera et il sera repris.
+                        self.stderr.write(f"[{worker_id}] {e}")
+                        stop.wait(options["poll_interval"])
+                        continue
+                    counts[index] += processed
+                    if not processed:
+                        if options["once"]:
+                            break
+                        stop.wait(options["poll_interval"])
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=work, args=(i,), name=f"scanned-jobs-{i}", daemon=True)
+            for i in range(options["workers"])
+        ]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+
+        self.stdout.write(self.style.SUCCESS(f"{sum(counts)} job(s) traité(s)."))
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from scanned_text.helpers import ai_cache
+from scanned_text.models import AIArtifact
+
+
+class Command(BaseCommand):
+    help = "Supprime les résultats IA en cache dont la version de prompt est obsolète."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=None,
+            help="Supprime aussi les entrées plus anciennes que N jours.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = 0
+        for kind, version in ai_cache.prompt_versions().items():
+            count, _ = AIArtifact.objects.filter(kind=kind).exclude(prompt_version=version).delete()
+            deleted += count
+
+        days = options["older_than_days"]
+        if days is not None:
+            cutoff = timezone.now() - timedelta(days=days)
+            count, _ = AIArtifact.objects.filter(createdAt__lt=cutoff).delete()
+            deleted += count
+
+        self.stdout.write(self.style.SUCCESS(f"{deleted} entrée(s) supprimée(s)."))
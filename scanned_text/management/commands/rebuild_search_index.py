@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from scanned_text.helpers import search
+
+
+class Command(BaseCommand):
+    help = "Recrée et réindexe l'index de recherche plein texte des textes scannés (FTS5 ou GIN)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="Alias de la base.")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if not search.install(connection):
+            search.rebuild(connection)
+        self.stdout.write(self.style.SUCCESS(f"Index de recherche reconstruit ({connection.vendor})."))
@@ -0,0 +1,51 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scanned_text.helpers import compression
+from scanned_text.models import CompressionDictionary, ScannedText
+
+
+class Command(BaseCommand):
+    help = (
+        "Entraîne un dictionnaire de compression partagé sur un échantillon des textes scannés. "
+        "Les nouvelles écritures l'utilisent; compress_texts réécrit les lignes existantes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=2000, help="Textes tirés au hasard pour l'entraînement.")
+        parser.add_argument("--size", type=int, default=64 * 1024, help="Taille visée (zlib: 32 Ko au plus).")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        algorithm = compression.codec()
+        if algorithm is None:
+            raise CommandError("La compression est désactivée (TEXT_COMPRESSION=none).")
+        ids = list(ScannedText.objects.values_list("id", flat=True))
+        rng = random.Random(options["seed"])
+        ids = rng.sample(ids, min(len(ids), options["samples"]))
+        samples = []
+        for original, processed in ScannedText.objects.filter(id__in=ids).values_list(
+            "original_text", "processed_text"
+        ):
+            samples.extend(text for text in (original, processed) if text)
+        if len(samples) < 10:
+            raise CommandError("Pas assez de textes pour entraîner un dictionnaire.")
+
+        # Un dixième de l'échantillon mesure le gain, sans avoir servi à l'entraînement.
+        cut = max(1, len(samples) // 10)
+        test, train = samples[:cut], samples[cut:]
+        data = compression.train_dictionary(train, algorithm, options["size"])
+        raw = sum(len(text.encode("utf-8")) for text in test)
+        plain = sum(len(compression._compress(algorithm, text.encode("utf-8"), None)) for text in test)
+        with_dict = sum(len(compression._compress(algorithm, text.encode("utf-8"), data)) for text in test)
+
+        entry = CompressionDictionary.objects.create(
+            algorithm=compression.codec_name(algorithm), data=data, samples=len(train)
+        )
+        compression.reset()
+        self.stdout.write(
+            f"Taux de compression sur {len(test)} texte(s) de test: {raw / plain:.2f}x sans dictionnaire, "
+            f"{raw / with_dict:.2f}x avec."
+        )
+        self.stdout.write(self.style.SUCCESS(f"{entry} enregistré."))
@@ -0,0 +1,80 @@
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scanned_text.helpers import type_classifier
+from scanned_text.models import ScannedText
+
+
+class Command(BaseCommand):
+    help = (
+        "Entraîne le classifieur local de detected_type sur les textes scannés étiquetés "
+        "et affiche sa précision et sa latence sur un jeu de test."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--holdout", type=float, default=0.2, help="Part des textes réservée au test.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--min-per-class", type=int, default=5, help="Ignore les types ayant moins d'exemples."
+        )
+        parser.add_argument("--output", default=None, help="Chemin du modèle (TYPE_CLASSIFIER_PATH par défaut).")
+
+    def handle(self, *args, **options):
+        by_label = defaultdict(list)
+        rows = (
+            ScannedText.objects.exclude(detected_type__in=type_classifier.IGNORED_LABELS)
+            .values_list("original_text", "detected_type")
+            .iterator()
+        )
+        for text, label in rows:
+            if text:
+                by_label[label].append(text)
+
+        by_label = {label: texts for label, texts in by_label.items() if len(texts) >= options["min_per_class"]}
+        if len(by_label) < 2:
+            raise CommandError("Il faut au moins deux types avec assez d'exemples pour entraîner le classifieur.")
+
+        # Découpage stratifié: chaque type garde la même proportion de test.
+        rng = random.Random(options["seed"])
+        train, test = [], []
+        for label, texts in sorted(by_label.items()):
+            rng.shuffle(texts)
+            cut = max(1, int(len(texts) * options["holdout"]))
+            test.extend((text, label) for text in texts[:cut])
+            train.extend((text, label) for text in texts[cut:])
+
+        model = type_classifier.train(train)
+        threshold = getattr(settings, "TYPE_CLASSIFIER_MIN_CONFIDENCE", 0.9)
+        correct = confident = confident_correct = 0
+        latencies = []
+        for text, label in test:
+            start = time.perf_counter()
+            proba = type_classifier.predict_proba(model, text)
+            latencies.append((time.perf_counter() - start) * 1e6)
+            predicted, probability = max(proba.items(), key=lambda item: item[1])
+            correct += predicted == label
+            if probability >= threshold:
+                confident += 1
+                confident_correct += predicted == label
+
+        latencies.sort()
+        counts = ", ".join(f"{label}={len(texts)}" for label, texts in sorted(by_label.items()))
+        self.stdout.write(f"Exemples: {counts} (entraînement {len(train)}, test {len(test)})")
+        self.stdout.write(f"Précision (test): {correct / len(test):.1%}")
+        self.stdout.write(
+            f"Couverture au seuil {threshold}: {confident / len(test):.1%}, "
+            f"précision sur ces textes: {confident_correct / confident if confident else 0:.1%}"
+        )
+        self.stdout.write(
+            f"Latence d'inférence: médiane {statistics.median(latencies):.0f} µs, "
+            f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:.0f} µs"
+        )
+
+        # Le modèle livré est réentraîné sur toutes les données.
+        path = type_classifier.save(type_classifier.train(train + test), options["output"])
+        self.stdout.write(self.style.SUCCESS(f"Modèle enregistré dans {path}."))
@@ -0,0 +1,85 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework import status
+
+from scanned_text.helpers import metrics, resilience, token_usage
+
+
+def _observe_request(request, response, start):
+    # Étiquette = nom de la route (cardinalité bornée), pas le chemin réel.
+    match = getattr(request, "resolver_match", None)
+    view = (match.view_name or match.route) if match is not None else "unmatched"
+    metrics.HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - start, view=view, method=request.method, status=response.status_code
+    )
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Mesure la durée de chaque requête HTTP (jusqu'au premier octet pour le streaming)."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            start = time.perf_counter()
+            response = await get_response(request)
+            _observe_request(request, response, start)
+            return response
+    else:
+        def middleware(request):
+            start = time.perf_counter()
+            response = get_response(request)
+            _observe_request(request, response, start)
+            return response
+    return middleware
+
+
+def _mark_degraded(response, outcome):
+    # Seules les réponses réussies sont construites avec un fallback; une erreur
+    # (ex. 503 du LLM indisponible) n'est pas une réponse dégradée.
+    if outcome.degraded and status.is_success(response.status_code):
+        response["X-Degraded"] = "1"
+    return response
+
+
+@sync_and_async_middleware
+def llm_request_budget_middleware(get_response):
+    """Borne la durée totale des appels LLM d'une requête (LLM_REQUEST_BUDGET_SECONDS).
+
+    Une réponse 2xx construite avec un fallback (LLM indisponible, délesté ou
+    hors budget) porte l'en-tête `X-Degraded: 1`.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with resilience.request_budget(), resilience.track() as outcome:
+                response = await get_response(request)
+            return _mark_degraded(response, outcome)
+    else:
+        def middleware(request):
+            with resilience.request_budget(), resilience.track() as outcome:
+                response = get_response(request)
+            return _mark_degraded(response, outcome)
+    return middleware
+
+
+def _settle(request, usage):
+    # `request.user` est renseigné par l'authentification DRF pendant la vue.
+    token_usage.settle(getattr(request, "user", None), usage, getattr(request, "token_cost_charged", 0))
+
+
+@sync_and_async_middleware
+def token_usage_middleware(get_response):
+    """Comptabilise les tokens LLM consommés par la requête (TokenUsage, TokenCostThrottle)."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with token_usage.meter() as usage:
+                response = await get_response(request)
+            await sync_to_async(_settle)(request, usage)
+            return response
+    else:
+        def middleware(request):
+            with token_usage.meter() as usage:
+                response = get_response(request)
+            _settle(request, usage)
+            return response
+    return middleware
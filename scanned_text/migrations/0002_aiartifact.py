@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanned_text', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIArtifact',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=40)),
+                ('prompt_version', models.PositiveIntegerField()),
+                ('text_hash', models.CharField(db_index=True, max_length=64)),
+                ('payload', models.JSONField()),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:42
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanned_text', '0002_aiartifact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessingJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminé'), ('failed', 'Échec')], default='pending', max_length=20)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, default='', max_length=100)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+                ('updatedAt', models.DateTimeField(auto_now=True)),
+                ('finishedAt', models.DateTimeField(blank=True, null=True)),
+                ('scanned_text', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='processing_jobs', to='scanned_text.scannedtext')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'available_at'], name='scanned_tex_status_cee4b2_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanned_text', '0004_tokenusage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scannedtext',
+            index=models.Index(fields=['user', 'createdAt', 'id'], name='scanned_user_created_idx'),
+        ),
+    ]
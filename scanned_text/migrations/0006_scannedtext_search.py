@@ -0,0 +1,64 @@
+from django.db import migrations
+
+# DDL figé à la date de la migration (l'index courant est décrit dans helpers/search.py).
+TABLE = "scanned_text_scannedtext"
+FTS_TABLE = "scanned_text_search"
+FTS_COLUMNS = "original_text, processed_text, user_id"
+PG_INDEX = "scanned_text_search_idx"
+PG_VECTOR = (
+    "to_tsvector('french'::regconfig, coalesce(original_text, '') || ' ' || coalesce(processed_text, ''))"
+)
+
+SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({FTS_COLUMNS}, "
+    f"content='{TABLE}', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS})
+        VALUES (new.rowid, new.original_text, new.processed_text, new.user_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS})
+        VALUES ('delete', old.rowid, old.original_text, old.processed_text, old.user_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {FTS_COLUMNS} ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS})
+        VALUES ('delete', old.rowid, old.original_text, old.processed_text, old.user_id);
+        INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS})
+        VALUES (new.rowid, new.original_text, new.processed_text, new.user_id);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+POSTGRESQL_INSTALL = [f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON {TABLE} USING gin (({PG_VECTOR}))"]
+POSTGRESQL_UNINSTALL = [f"DROP INDEX IF EXISTS {PG_INDEX}"]
+
+
+def _run(schema_editor, statements):
+    vendor = schema_editor.connection.vendor
+    for sql in statements.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def install_search_index(apps, schema_editor):
+    _run(schema_editor, {"sqlite": SQLITE_INSTALL, "postgresql": POSTGRESQL_INSTALL})
+
+
+def uninstall_search_index(apps, schema_editor):
+    _run(schema_editor, {"sqlite": SQLITE_UNINSTALL, "postgresql": POSTGRESQL_UNINSTALL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanned_text', '0005_scannedtext_user_created_idx'),
+    ]
+
+    operations = [
+        # FTS5 + triggers sous SQLite, index GIN sous PostgreSQL.
+        migrations.RunPython(install_search_index, uninstall_search_index, elidable=False),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanned_text', '0006_scannedtext_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scannedtext',
+            name='minhash',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='TextFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField(db_index=True)),
+                ('scanned_text', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprints', to='scanned_text.scannedtext')),
+            ],
+        ),
+    ]
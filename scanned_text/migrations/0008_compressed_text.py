@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:41
+
+import scanned_text.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanned_text', '0007_textfingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompressionDictionary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('algorithm', models.CharField(max_length=10)),
+                ('data', models.BinaryField()),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='aiartifact',
+            name='payload',
+            field=scanned_text.fields.CompressedJSONField(),
+        ),
+        migrations.AlterField(
+            model_name='scannedtext',
+            name='original_text',
+            field=scanned_text.fields.CompressedTextField(),
+        ),
+        migrations.AlterField(
+            model_name='scannedtext',
+            name='processed_text',
+            field=scanned_text.fields.CompressedTextField(blank=True, null=True),
+        ),
+    ]
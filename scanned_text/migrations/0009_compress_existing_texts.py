@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# Index de recherche de la migration 0006 (il lit les colonnes en clair): supprimé
+# avant la compression, recréé au retour arrière. Le nouvel index est créé par 0012.
+TABLE = "scanned_text_scannedtext"
+FTS_TABLE = "scanned_text_search"
+FTS_COLUMNS = "original_text, processed_text, user_id"
+SQLITE_PLAIN_INDEX = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({FTS_COLUMNS}, "
+    f"content='{TABLE}', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS})
+        VALUES (new.rowid, new.original_text, new.processed_text, new.user_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS})
+        VALUES ('delete', old.rowid, old.original_text, old.processed_text, old.user_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {FTS_COLUMNS} ON {TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {FTS_COLUMNS})
+        VALUES ('delete', old.rowid, old.original_text, old.processed_text, old.user_id);
+        INSERT INTO {FTS_TABLE}(rowid, {FTS_COLUMNS})
+        VALUES (new.rowid, new.original_text, new.processed_text, new.user_id);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_DROP_INDEX = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def convert(apps, schema_editor, plain=False):
+    from scanned_text.helpers import compression
+
+    connection = schema_editor.connection
+    for model_name, fields in (("ScannedText", ["original_text", "processed_text"]), ("AIArtifact", ["payload"])):
+        compression.recompress(connection, apps.get_model("scanned_text", model_name), fields, plain=plain)
+
+
+def compress_texts(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_DROP_INDEX:
+            schema_editor.execute(sql)
+    convert(apps, schema_editor)
+
+
+def decompress_texts(apps, schema_editor):
+    convert(apps, schema_editor, plain=True)
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_PLAIN_INDEX:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    # Conversion par lots, chacun dans sa transaction (voir compression.recompress).
+    atomic = False
+
+    dependencies = [
+        ('scanned_text', '0008_compressed_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(compress_texts, decompress_texts, elidable=False),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_alter_user_classe_alter_user_name'),
+        ('scanned_text', '0009_compress_existing_texts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextCollectionVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='text_collection_version', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanned_text', '0010_textcollectionversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scannedtext',
+            name='detected_type',
+            field=models.CharField(choices=[('exercice', 'Exercice'), ('texte', 'Texte'), ('inconnu', 'Inconnu')], default='inconnu', max_length=20),
+        ),
+    ]
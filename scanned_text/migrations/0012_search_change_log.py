@@ -0,0 +1,59 @@
+from django.db import migrations
+
+# Index FTS5 sans contenu tenu à jour en Python à partir d'un journal rempli par
+# des triggers en SQL pur (voir helpers/search.py). Remplace l'index dont les
+# triggers appelaient une fonction SQL de décompression déclarée par Django.
+TABLE = "scanned_text_scannedtext"
+FTS_TABLE = "scanned_text_search"
+FTS_COLUMNS = "original_text, processed_text, user_id"
+LOG_TABLE = "scanned_text_search_log"
+LOG_INDEX = f"INSERT INTO {LOG_TABLE}(op, row_id) VALUES ('index', new.rowid);"
+LOG_DELETE = (
+    f"INSERT INTO {LOG_TABLE}(op, row_id, {FTS_COLUMNS}) "
+    f"VALUES ('delete', old.rowid, old.original_text, old.processed_text, old.user_id);"
+)
+
+DROP_TRIGGERS = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+]
+SQLITE_INSTALL = DROP_TRIGGERS + [
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({FTS_COLUMNS}, "
+    f"content='', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TABLE IF NOT EXISTS {LOG_TABLE} (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+    f"op TEXT NOT NULL, row_id INTEGER NOT NULL, original_text, processed_text, user_id)",
+    f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {TABLE} BEGIN {LOG_INDEX} END",
+    f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {TABLE} BEGIN {LOG_DELETE} END",
+    f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {FTS_COLUMNS} ON {TABLE} BEGIN {LOG_DELETE} {LOG_INDEX} END",
+    # Toutes les lignes existantes sont à indexer (à la première recherche, ou après migrate).
+    f"INSERT INTO {LOG_TABLE}(op, row_id) SELECT 'index', rowid FROM {TABLE}",
+]
+SQLITE_UNINSTALL = DROP_TRIGGERS + [
+    f"DROP TABLE IF EXISTS {LOG_TABLE}",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def install_search_log(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_INSTALL:
+            schema_editor.execute(sql)
+
+
+def uninstall_search_log(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_UNINSTALL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanned_text', '0011_alter_scannedtext_detected_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_log, uninstall_search_log, elidable=False),
+    ]
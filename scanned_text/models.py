@@ -1,7 +1,9 @@
 from django.db import models
+from django.utils import timezone
 import uuid
 
 from account.models import User
+from scanned_text.fields import CompressedJSONField, CompressedTextField
 
 
 class ScannedText(models.Model):
@@ -12,11 +14,118 @@ class ScannedText(models.Model):
     ]
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='scanned_texts')
-    original_text = models.TextField()
-    processed_text = models.TextField(blank=True, null=True)
+    # Compressés sous SQLite (voir helpers.compression).
+    original_text = CompressedTextField()
+    processed_text = CompressedTextField(blank=True, null=True)
     detected_type = models.CharField(max_length=20, choices=RAW_TYPES, default='inconnu')
+    # Signature MinHash de original_text (helpers.near_duplicates).
+    minhash = models.BinaryField(null=True, blank=True, editable=False)
     createdAt = models.DateTimeField(auto_now_add=True)
     updatedAt = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Liste paginée par utilisateur (KeysetPagination sur createdAt, id).
+            models.Index(fields=['user', 'createdAt', 'id'], name='scanned_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"Texte scanné #{self.id} ({self.detected_type})"
+
+
+class TextCollectionVersion(models.Model):
+    """Version de la liste des textes d'un utilisateur, incrémentée à chaque écriture (voir helpers.conditional)."""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='text_collection_version'
+    )
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Textes de {self.user_id}: v{self.version}"
+
+
+class TextFingerprint(models.Model):
+    """Bande LSH de la signature MinHash d'un texte scanné (voir helpers.near_duplicates)."""
+    scanned_text = models.ForeignKey(ScannedText, on_delete=models.CASCADE, related_name='fingerprints')
+    bucket = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f"Empreinte {self.bucket} ({self.scanned_text_id})"
+
+
+class AIArtifact(models.Model):
+    """Résultat IA mis en cache (voir scanned_text.helpers.ai_cache)."""
+    key = models.CharField(max_length=64, primary_key=True)
+    kind = models.CharField(max_length=40)
+    prompt_version = models.PositiveIntegerField()
+    text_hash = models.CharField(max_length=64, db_index=True)
+    payload = CompressedJSONField()
+    createdAt = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.kind} v{self.prompt_version} ({self.key[:12]})"
+
+
+class CompressionDictionary(models.Model):
+    """Dictionnaire partagé de compression des textes (voir helpers.compression).
+
+    Jamais modifié ni supprimé: les valeurs compressées avec lui y renvoient.
+    """
+    algorithm = models.CharField(max_length=10)
+    data = models.BinaryField()
+    samples = models.PositiveIntegerField(default=0)
+    createdAt = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Dictionnaire {self.algorithm} #{self.pk} ({len(self.data)} octets)"
+
+
+class ProcessingJob(models.Model):
+    """Traitement IA différé d'un ScannedText (file d'attente en base, sans Redis/Celery)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'En attente'),
+        (RUNNING, 'En cours'),
+        (DONE, 'Terminé'),
+        (FAILED, 'Échec'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    scanned_text = models.ForeignKey(ScannedText, on_delete=models.CASCADE, related_name='processing_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    progress = models.PositiveSmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_until = models.DateTimeField(null=True, blank=True)
+    createdAt = models.DateTimeField(auto_now_add=True)
+    updatedAt = models.DateTimeField(auto_now=True)
+    finishedAt = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'available_at'])]
+
+    def __str__(self):
+        return f"Job #{self.id} ({self.status})"
+
+
+class TokenUsage(models.Model):
+    """Tokens LLM consommés par un utilisateur sur une journée (voir helpers.token_usage)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='token_usage')
+    day = models.DateField()
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    calls = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'day'], name='unique_token_usage_per_day')]
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+    def __str__(self):
+        return f"{self.user_id} {self.day}: {self.total_tokens} tokens"
@@ -0,0 +1,175 @@
+import base64
+import json
+import uuid
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_position(created, pk, reverse: bool = False) -> str:
+    """Valeur du paramètre `cursor` pour reprendre la liste après (created, pk)."""
+    raw = json.dumps({"c": created.isoformat(), "i": str(pk), "r": int(reverse)})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+class PageSizePagination(BasePagination):
+    """Réponse `{next, previous, results}`; taille PAGE_SIZE ou `?page_size=` (au plus `max_page_size`)."""
+
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def get_page_size(self, request) -> int:
+        default = getattr(settings, "REST_FRAMEWORK", {}).get("PAGE_SIZE") or 50
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            return default
+        return max(1, min(size, self.max_page_size))
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        description = f"Taille de page (au plus {self.max_page_size})."
+        return [self._query_parameter(self.page_size_query_param, "integer", description)]
+
+    @staticmethod
+    def _query_parameter(name, type_, description):
+        return {"name": name, "required": False, "in": "query", "description": description, "schema": {"type": type_}}
+
+
+class KeysetPagination(PageSizePagination):
+    """Pagination par curseur sur (createdAt, id), du plus récent au plus ancien.
+
+    Chaque page est lue par `WHERE (createdAt, id) < (curseur) ORDER BY
+    createdAt DESC, id DESC LIMIT n` sur l'index (user, createdAt, id): le coût
+    d'une page ne dépend ni de sa position ni de la taille de la table, au
+    contraire d'un OFFSET. L'`id` départage les textes créés au même instant.
+    """
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Curseur invalide."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        if reverse:
+            queryset = queryset.order_by("createdAt", "id")
+        else:
+            queryset = queryset.order_by("-createdAt", "-id")
+        if position is not None:
+            created, pk = position
+            if reverse:
+                queryset = queryset.filter(Q(createdAt__gt=created) | Q(createdAt=created, id__gt=pk))
+            else:
+                queryset = queryset.filter(Q(createdAt__lt=created) | Q(createdAt=created, id__lt=pk))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+        # Un curseur reçu implique une page de l'autre côté.
+        self.has_next = position is not None if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+        self.page = rows
+        return rows
+
+    def encode_cursor(self, row, reverse: bool) -> str:
+        cursor = encode_position(row.createdAt, row.id, reverse)
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            created = parse_datetime(data["c"])
+            pk = uuid.UUID(data["i"])
+            reverse = bool(data.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if created is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (created, pk), reverse
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            self._query_parameter(self.cursor_query_param, "string", "Curseur reçu dans `next` ou `previous`."),
+            *super().get_schema_operation_parameters(view),
+        ]
+
+
+class SearchPagination(PageSizePagination):
+    """Pagination par numéro de page des résultats classés (`?page=2`), sans COUNT.
+
+    L'ordre est celui du classement et non (createdAt, id), d'où un OFFSET au
+    lieu d'un curseur. Une ligne de plus que la page est lue pour savoir s'il
+    existe une page suivante.
+    """
+
+    page_query_param = "page"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        try:
+            self.number = max(1, int(request.query_params.get(self.page_query_param, 1)))
+        except (TypeError, ValueError):
+            raise NotFound("Page invalide.")
+        offset = (self.number - 1) * self.page_size
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        return rows[: self.page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.number + 1)
+
+    def get_previous_link(self):
+        if self.number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.number - 1)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            self._query_parameter(self.page_query_param, "integer", "Numéro de page (à partir de 1)."),
+            *super().get_schema_operation_parameters(view),
+        ]
@@ -0,0 +1,49 @@
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from scanned_text.renderers import fast_json_enabled, orjson
+
+# Au-delà, orjson (3.8) n'est pas plus rapide que json sur de longs textes accentués.
+ORJSON_MAX_BODY = 16 * 1024
+# orjson lit les entiers hors 64 bits comme des flottants (json: entiers exacts).
+_INT64 = 2 ** 63
+
+
+def _has_huge_float(data) -> bool:
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, float) and abs(value) >= _INT64:
+            return True
+    return False
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser de DRF qui décode les petits corps UTF-8 avec orjson.
+
+    Un corps qu'orjson refuse (JSON invalide, mais aussi surrogate isolé que
+    `json` accepte) ou lu avec un très grand nombre est relu par le parser de
+    DRF : mêmes données et même message `JSON parse error - ...` qu'avant.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if not fast_json_enabled() or not self.strict or encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if len(body) <= ORJSON_MAX_BODY:
+            try:
+                data = orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+            else:
+                if not _has_huge_float(data):
+                    return data
+        return super().parse(io.BytesIO(body), media_type, parser_context)
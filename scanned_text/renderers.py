@@ -0,0 +1,93 @@
+import json
+import re
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from scanned_text.helpers import metrics
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+# Dates, heures et chaînes paresseuses passent par l'encodeur de DRF (même sortie);
+# UUID, dict, list, str et entiers sont encodés par orjson à l'identique.
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+    if orjson is not None else 0
+)
+# Comme DRF: U+2028 et U+2029 sont valides en JSON mais pas en JavaScript.
+_LINE_SEPARATORS = re.compile(b"\xe2\x80[\xa8\xa9]")
+_JS_ESCAPES = {b"\xe2\x80\xa8": b"\\u2028", b"\xe2\x80\xa9": b"\\u2029"}
+
+
+def fast_json_enabled() -> bool:
+    """orjson est installé et FAST_JSON_ENABLED est vrai."""
+    return orjson is not None and getattr(settings, "FAST_JSON_ENABLED", True)
+
+
+def format_sse(data, event: str | None = None) -> str:
+    """Formate un message Server-Sent Events (`data` encodé en JSON)."""
+    message = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    if event:
+        message = f"event: {event}\n{message}"
+    return message
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Permet la négociation `Accept: text/event-stream`.
+
+    Les vues SSE renvoient directement un StreamingHttpResponse; ce renderer ne
+    sert qu'aux réponses DRF classiques (erreurs 4xx) sur ces vues, envoyées
+    sous forme d'un événement `error`.
+    """
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return format_sse(data, event="error").encode(self.charset)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer de DRF dont la durée de sérialisation est mesurée (métriques)."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with metrics.RENDER_SECONDS.time(format=self.format):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class FastJSONRenderer(TimedJSONRenderer):
+    """TimedJSONRenderer encodé par orjson, octet pour octet identique à celui de DRF.
+
+    Repli sur l'encodeur de DRF : orjson absent ou FAST_JSON_ENABLED faux,
+    indentation demandée (API navigable, `Accept: application/json; indent=4`),
+    UNICODE_JSON ou COMPACT_JSON désactivés, objet qu'orjson refuse (entier de
+    plus de 64 bits, type inconnu de l'encodeur de DRF).
+
+    Seuls les flottants diffèrent (aucun serializer de l'API n'en expose) :
+    notation exponentielle (`1e16` au lieu de `1e+16`, même valeur), et NaN ou
+    l'infini deviennent `null` au lieu de lever une erreur.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if fast_json_enabled() and self.ensure_ascii is False and self.compact \
+                and self.get_indent(accepted_media_type, renderer_context) is None:
+            with metrics.RENDER_SECONDS.time(format=self.format):
+                ret = self._render_orjson(data)
+            if ret is not None:
+                return ret
+        return super().render(data, accepted_media_type, renderer_context)
+
+    def _render_orjson(self, data) -> bytes | None:
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return None
+        return _LINE_SEPARATORS.sub(lambda match: _JS_ESCAPES[match.group()], ret)
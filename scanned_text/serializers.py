@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 
 from account.serializers import UserSerializer
-from .models import ScannedText
+from .models import ProcessingJob, ScannedText
 
 
 class ScannedTextSerializer(serializers.ModelSerializer):
@@ -47,4 +48,52 @@ class QuizQuestionSerializer(serializers.Serializer):
         help_text="Liste des options de réponse."
     )
     answer = serializers.CharField(help_text="Réponse correcte.")   
-    explanation = serializers.CharField(help_text="Explication de la réponse correcte.")
\ No newline at end of file
+    explanation = serializers.CharField(help_text="Explication de la réponse correcte.")
+
+
+class StudyPackSerializer(serializers.Serializer):
+    """Seules les parties demandées (paramètre `parts`) sont présentes."""
+    words = serializers.DictField(
+        child=serializers.CharField(), required=False,
+        help_text="Mots difficiles: clé=position du mot, valeur=définition adaptée."
+    )
+    explanation = serializers.CharField(required=False, help_text="Explication du texte.")
+    steps = serializers.DictField(
+        child=serializers.CharField(), required=False,
+        help_text="Étapes de résolution (textes de type 'exercice' uniquement)."
+    )
+    quiz = QuizQuestionSerializer(many=True, required=False)
+
+
+class ScannedTextBulkCreateSerializer(serializers.Serializer):
+    items = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        help_text="Pages à créer, chacune au format du POST simple: {\"original_text\": \"...\"}."
+    )
+
+
+class ScannedTextBulkResultSerializer(serializers.Serializer):
+    index = serializers.IntegerField(help_text="Position de l'élément dans la requête.")
+    status = serializers.IntegerField(help_text="Code HTTP équivalent pour cet élément.")
+    data = ScannedTextSerializer(required=False, help_text="Texte créé (succès).")
+    error = serializers.CharField(required=False, help_text="Message d'erreur (échec).")
+
+
+class ProcessingJobSerializer(serializers.ModelSerializer):
+    status_url = serializers.SerializerMethodField(help_text="URL à interroger pour suivre le traitement.")
+
+    class Meta:
+        model = ProcessingJob
+        fields = [
+            'id', 'scanned_text', 'status', 'progress', 'attempts', 'error',
+            'createdAt', 'updatedAt', 'finishedAt', 'status_url'
+        ]
+        read_only_fields = fields
+
+    def get_status_url(self, obj) -> str:
+        return reverse(
+            'baseApi:scanned-texts-processing-status',
+            args=[obj.scanned_text_id],
+            request=self.context.get('request'),
+        )
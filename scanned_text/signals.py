@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from scanned_text.helpers import ai_cache, auth_cache, conditional, near_duplicates
+from scanned_text.models import ScannedText
+
+
+@receiver(pre_save, sender=ScannedText)
+def purge_ai_cache_on_text_change(sender, instance, raw=False, **kwargs):
+    """Invalide les résultats IA en cache quand processed_text change."""
+    if raw or instance._state.adding:
+        return
+    previous = (
+        ScannedText.objects.filter(pk=instance.pk).values_list("processed_text", flat=True).first()
+    )
+    if previous and previous != instance.processed_text:
+        ai_cache.purge_text(previous)
+
+
+@receiver(pre_save, sender=ScannedText)
+def fingerprint_new_text(sender, instance, raw=False, **kwargs):
+    """Calcule la signature MinHash des nouveaux textes (quasi-doublons)."""
+    if not raw and instance._state.adding:
+        near_duplicates.fingerprint(instance)
+
+
+@receiver(post_save, sender=ScannedText)
+def index_new_text(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        near_duplicates.index([instance])
+
+
+@receiver(post_save, sender=ScannedText)
+@receiver(post_delete, sender=ScannedText)
+def bump_text_collection(sender, instance, raw=False, **kwargs):
+    """Change l'ETag de la liste des textes de l'utilisateur (helpers.conditional)."""
+    if not raw:
+        conditional.bump_collection(instance.user_id)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """Un jeton modifié ou supprimé n'est plus servi par le cache d'authentification."""
+    auth_cache.invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Profil modifié, utilisateur désactivé ou supprimé: son jeton est relu en base."""
+    auth_cache.invalidate_user(instance.pk)
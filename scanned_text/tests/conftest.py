@@ -0,0 +1,35 @@
+import itertools
+from unittest.mock import patch
+
+import pytest
+from rest_framework.authtoken.models import Token
+
+from account.models import User
+from scanned_text.helpers import ai_cache
+
+_usernames = itertools.count()
+
+
+@pytest.fixture
+def create_user_with_token(db):
+    """Fabrique d'utilisateurs actifs: `create_user_with_token()` -> (user, clé du jeton)."""
+    def create():
+        user = User.objects.create(
+            username=f"test_{next(_usernames)}",
+            name="Test User",
+            age=12,
+            is_active=True,
+        )
+        token, _ = Token.objects.get_or_create(user=user)
+        return user, token.key
+
+    return create
+
+
+@pytest.fixture
+def openai_configured():
+    """Client OpenAI factice: le cache IA n'est actif (et les artefacts étiquetés) qu'avec un client."""
+    ai_cache.clear()
+    with patch("scanned_text.helpers.ai_utils.get_openai_client", return_value=object()):
+        yield
+    ai_cache.clear()
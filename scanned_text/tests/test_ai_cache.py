@@ -0,0 +1,101 @@
+import pytest
+from types import SimpleNamespace
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from scanned_text.helpers import ai_cache
+from scanned_text.helpers.ai import generate_exercise_steps, get_difficult_words_with_meanings
+from scanned_text.models import AIArtifact, ScannedText
+
+
+def garbage_llm():
+    """Client factice dont les réponses ne sont jamais du JSON; retourne (appels, client)."""
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content="Désolé, je ne peux pas répondre en JSON.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    return calls, SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+# Le cache n'est actif que si un client OpenAI est configuré.
+pytestmark = pytest.mark.usefixtures("openai_configured")
+
+
+@pytest.mark.django_db
+class TestAIArtifactCache:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        self.client = APIClient()
+        user, token = create_user_with_token()
+        self.user = user
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        self.scanned = ScannedText.objects.create(
+            user=user,
+            original_text="Texte original",
+            processed_text="Texte traité pour le cache",
+            detected_type="cours",
+        )
+        self.url = f"/api/v1/scanned-texts/{self.scanned.id}/words-explanation/"
+
+    @patch("scanned_text.helpers.ai.get_difficult_words_with_meanings.get_difficult_words_with_meanings")
+    def test_repeated_requests_hit_cache(self, mock_words):
+        mock_words.return_value = {"1": "Définition"}
+        assert self.client.get(self.url).data["words"] == {"1": "Définition"}
+        assert self.client.get(self.url).data["words"] == {"1": "Définition"}
+        assert mock_words.call_count == 1
+        assert AIArtifact.objects.filter(kind="words-explanation").count() == 1
+
+    @patch("scanned_text.helpers.ai.get_difficult_words_with_meanings.get_difficult_words_with_meanings")
+    def test_db_tier_survives_lru_clear(self, mock_words):
+        mock_words.return_value = {"1": "Définition"}
+        self.client.get(self.url)
+        ai_cache.clear()
+        self.client.get(self.url)
+        assert mock_words.call_count == 1
+
+    @patch("scanned_text.helpers.ai.get_difficult_words_with_meanings.get_difficult_words_with_meanings")
+    def test_processed_text_change_invalidates(self, mock_words):
+        mock_words.return_value = {"1": "Définition"}
+        self.client.get(self.url)
+        self.scanned.processed_text = "Nouveau texte corrigé"
+        self.scanned.save()
+        assert AIArtifact.objects.count() == 0
+        self.client.get(self.url)
+        assert mock_words.call_count == 2
+
+    @patch("scanned_text.helpers.ai.get_difficult_words_with_meanings.PROMPT_VERSION", 99)
+    @patch("scanned_text.helpers.ai.get_difficult_words_with_meanings.get_difficult_words_with_meanings")
+    def test_prompt_version_bump_misses(self, mock_words):
+        mock_words.return_value = {"1": "Définition"}
+        key_v1 = ai_cache.make_key("words-explanation", 1, self.scanned.processed_text, 12, None)
+        AIArtifact.objects.create(
+            key=key_v1, kind="words-explanation", prompt_version=1,
+            text_hash=ai_cache.text_hash(self.scanned.processed_text), payload={"0": "Ancienne"},
+        )
+        assert self.client.get(self.url).data["words"] == {"1": "Définition"}
+        assert mock_words.call_count == 1
+
+    def test_unparseable_completion_is_not_cached(self):
+        calls, llm = garbage_llm()
+        self.scanned.detected_type = "exercice"
+        self.scanned.save()
+        url = f"/api/v1/scanned-texts/{self.scanned.id}/exercise-steps/"
+        with patch.object(generate_exercise_steps, "get_openai_client", return_value=llm):
+            assert self.client.get(url).status_code == 200
+            assert self.client.get(url).status_code == 200
+        assert len(calls) == 2
+        assert not AIArtifact.objects.filter(kind="exercise-steps").exists()
+
+    def test_unparseable_words_completion_is_not_cached(self):
+        calls, llm = garbage_llm()
+        self.scanned.processed_text = "La photosynthèse transforme la lumière grâce à la chlorophylle des feuilles."
+        self.scanned.save()
+        with patch.object(get_difficult_words_with_meanings, "get_openai_client", return_value=llm):
+            first = self.client.get(self.url)
+            assert self.client.get(self.url).status_code == 200
+        assert first.status_code == 200 and first.data["words"]
+        assert len(calls) == 2
+        assert not AIArtifact.objects.filter(kind="words-explanation").exists()
@@ -0,0 +1,49 @@
+from unittest.mock import patch
+
+from scanned_text.helpers import ai_utils
+
+
+class TestSharedOpenAIClient:
+    def setup_method(self):
+        ai_utils.reset_openai_client()
+
+    def teardown_method(self):
+        ai_utils.reset_openai_client()
+
+    def test_client_is_reused_within_process(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        first = ai_utils.get_openai_client()
+        assert first is not None
+        assert ai_utils.get_openai_client() is first
+
+    def test_client_is_rebuilt_after_fork(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        first = ai_utils.get_openai_client()
+        with patch("scanned_text.helpers.ai_utils.os.getpid", return_value=-1):
+            assert ai_utils.get_openai_client() is not first
+
+    def test_no_client_without_api_key(self, monkeypatch):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        with patch("scanned_text.helpers.ai_utils.config", side_effect=lambda key, default=None, cast=None: default):
+            assert ai_utils.get_openai_client() is None
+
+    def test_http_client_uses_configured_pool(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_POOL_MAX_CONNECTIONS", "7")
+        monkeypatch.setenv("OPENAI_TIMEOUT", "12")
+        http_client = ai_utils.build_openai_http_client()
+        assert http_client._transport._pool._max_connections == 7
+        assert http_client.timeout.read == 12.0
+
+
+class TestExtractJson:
+    def test_fenced_and_surrounded_objects(self):
+        assert ai_utils.extract_json('```json\n{"a": 1}\n```') == {"a": 1}
+        assert ai_utils.extract_json('Voici le résultat: {"a": 1}. Bonne lecture') == {"a": 1}
+
+    def test_top_level_array(self):
+        assert ai_utils.extract_json('Étapes: ["lire", "calculer"]') == ["lire", "calculer"]
+        assert ai_utils.extract_json('Note [1]: {"a": 1}') == {"a": 1}
+
+    def test_garbage_returns_none(self):
+        assert ai_utils.extract_json("pas de JSON ici") is None
+        assert ai_utils.extract_json("") is None
@@ -0,0 +1,71 @@
+import pytest
+from rest_framework.test import APIClient
+from unittest.mock import AsyncMock, patch
+
+from scanned_text.models import ScannedText
+
+
+@pytest.mark.django_db
+class TestAsyncScannedTextAPI:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        self.client = APIClient()
+        self.base_url = "/api/v1/async/scanned-texts/"
+        import os
+        os.environ["ENV"] = "testing"
+        user, token = create_user_with_token()
+        self.user = user
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+
+    @patch("scanned_text.helpers.ai_utils.mock_detect_type", return_value="resume")
+    @patch("scanned_text.helpers.ai_utils.mock_process_text", return_value="Texte traité")
+    def test_create_scanned_text(self, mock_process_text, mock_detect_type):
+        response = self.client.post(self.base_url, {"original_text": "Ceci est un résumé"}, format="json")
+        assert response.status_code == 201
+        body = response.json()
+        assert body["processed_text"] == "Texte traité"
+        assert body["user"]["id"] == str(self.user.id)
+        assert ScannedText.objects.filter(id=body["id"]).exists()
+
+    def test_create_requires_authentication(self):
+        self.client.credentials()
+        response = self.client.post(self.base_url, {"original_text": "Texte"}, format="json")
+        assert response.status_code == 401
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token inconnu")
+        response = self.client.post(self.base_url, {"original_text": "Texte"}, format="json")
+        assert response.status_code == 401
+
+    def test_create_empty_text(self):
+        response = self.client.post(self.base_url, {"original_text": "  "}, format="json")
+        assert response.status_code == 400
+        assert "error" in response.json()
+
+    def test_detail_matches_sync_endpoint(self):
+        st = ScannedText.objects.create(user=self.user, original_text="Texte", processed_text="Texte", detected_type="cours")
+        async_resp = self.client.get(f"{self.base_url}{st.id}/")
+        sync_resp = self.client.get(f"/api/v1/scanned-texts/{st.id}/")
+        assert async_resp.status_code == 200
+        assert async_resp.content == sync_resp.content
+
+    @patch(
+        "scanned_text.helpers.ai.get_difficult_words_with_meanings.aget_difficult_words_with_meanings",
+        new_callable=AsyncMock,
+        return_value={"3": "Définition simple"},
+    )
+    def test_words_explanation(self, mock_words):
+        st = ScannedText.objects.create(user=self.user, original_text="Texte", processed_text="Texte traité", detected_type="cours")
+        response = self.client.get(f"{self.base_url}{st.id}/words-explanation/")
+        assert response.status_code == 200
+        assert response.json() == {"words": {"3": "Définition simple"}}
+
+    def test_exercise_steps_requires_exercice(self):
+        st = ScannedText.objects.create(user=self.user, original_text="Texte", processed_text="Texte", detected_type="cours")
+        response = self.client.get(f"{self.base_url}{st.id}/exercise-steps/")
+        assert response.status_code == 400
+
+    def test_not_found(self):
+        import uuid
+        response = self.client.get(f"{self.base_url}{uuid.uuid4()}/text-explanation/")
+        assert response.status_code == 404
@@ -0,0 +1,60 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from scanned_text.helpers import auth_cache
+from scanned_text.models import ScannedText
+
+
+@pytest.mark.django_db
+class TestCachedTokenAuthentication:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        auth_cache.clear()
+        caches["default"].clear()
+        self.client = APIClient()
+        self.user, self.token = create_user_with_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token}")
+        scanned = ScannedText.objects.create(user=self.user, original_text="Texte", processed_text="Texte")
+        self.url = f"/api/v1/scanned-texts/{scanned.id}/"
+
+    def queries(self, url=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url or self.url)
+        assert response.status_code == 200
+        return len(context)
+
+    @pytest.mark.parametrize("alias", ["", "default"])
+    def test_second_request_skips_the_token_query(self, settings, alias):
+        settings.AUTH_TOKEN_CACHE_ALIAS = alias
+        first = self.queries()
+        assert self.queries() == first - 1
+        if alias:
+            assert caches[alias].get(auth_cache.cache_key(self.token)) is not None
+
+    @pytest.mark.parametrize("alias", ["", "default"])
+    def test_user_and_token_changes_invalidate(self, settings, alias):
+        settings.AUTH_TOKEN_CACHE_ALIAS = alias
+        self.queries()
+        self.user.is_active = False
+        self.user.save()
+        assert self.client.get(self.url).status_code == 401
+
+        self.user.is_active = True
+        self.user.save()
+        self.queries()
+        Token.objects.filter(key=self.token).delete()
+        assert self.client.get(self.url).status_code == 401
+
+    def test_disabled(self, settings):
+        settings.AUTH_TOKEN_CACHE_TTL = 0
+        assert self.queries() == self.queries()
+
+    def test_async_views_share_the_cache(self):
+        url = self.url.replace("/api/v1/", "/api/v1/async/")
+        first = self.queries(url)
+        assert self.queries(self.url) == self.queries(self.url)
+        assert self.queries(url) == first - 1
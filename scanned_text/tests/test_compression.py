@@ -0,0 +1,91 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from scanned_text.helpers import compression, search
+from scanned_text.models import AIArtifact, CompressionDictionary, ScannedText
+
+PAGE = (
+    "La photosynthèse est le processus par lequel les plantes vertes utilisent l'énergie lumineuse "
+    "pour transformer le dioxyde de carbone et l'eau en glucose et en oxygène. Elle se déroule dans "
+    "les chloroplastes, grâce à la chlorophylle qui capte la lumière. Le glucose produit sert de "
+    "source d'énergie à la plante et de matière première pour fabriquer d'autres molécules."
+)
+
+
+def stored(pk, column="original_text"):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT typeof({column}) FROM scanned_text_scannedtext WHERE id = %s", [pk.hex])
+        return cursor.fetchone()[0]
+
+
+def test_round_trip_and_short_values(settings):
+    settings.TEXT_COMPRESSION = "zlib"
+    settings.TEXT_COMPRESSION_DICTIONARY = False
+    value = compression.compress(PAGE * 3)
+
+    assert isinstance(value, bytes) and value[0] == compression.ZLIB
+    assert len(value) < len(PAGE * 3) / 2
+    assert compression.decompress(value) == PAGE * 3
+    assert compression.compress("Court.") == "Court."  # en clair sous TEXT_COMPRESSION_MIN_BYTES
+    assert compression.decompress("texte en clair") == "texte en clair"
+
+    settings.TEXT_COMPRESSION = "none"
+    assert compression.compress(PAGE) == PAGE
+
+
+@pytest.mark.django_db
+class TestCompressedFields:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        compression.reset()
+        self.user, _ = create_user_with_token()
+        yield
+        compression.reset()
+
+    def test_texts_and_ai_payloads_are_stored_compressed(self, settings):
+        settings.TEXT_COMPRESSION = "zlib"
+        text = ScannedText.objects.create(user=self.user, original_text=PAGE, processed_text="")
+        AIArtifact.objects.create(key="k", kind="quiz", prompt_version=1, text_hash="h", payload={"q": [PAGE]})
+
+        assert stored(text.pk) == "blob"
+        assert stored(text.pk, "processed_text") == "text"
+        text.refresh_from_db()
+        assert text.original_text == PAGE
+        assert ScannedText.objects.filter(processed_text="").get() == text
+        assert AIArtifact.objects.get(key="k").payload == {"q": [PAGE]}
+
+    def test_search_reads_compressed_texts(self, settings):
+        settings.TEXT_COMPRESSION = "zlib"
+        text = ScannedText.objects.create(user=self.user, original_text=PAGE)
+        assert search.SearchResults(self.user, "chlorophylle")[0:10] == [text]
+
+        text.original_text = PAGE.replace("chlorophylle", "lumière verte") + " Les stomates."
+        text.save()
+        assert search.SearchResults(self.user, "chlorophylle")[0:10] == []
+        assert search.SearchResults(self.user, "stomates")[0:10] == [text]
+
+        text.delete()
+        assert search.SearchResults(self.user, "stomates")[0:10] == []
+
+    def test_compress_existing_rows_with_a_trained_dictionary(self, settings):
+        settings.TEXT_COMPRESSION = "none"
+        texts = [
+            ScannedText.objects.create(user=self.user, original_text=f"{PAGE} Exercice {i}.", processed_text=PAGE)
+            for i in range(20)
+        ]
+        assert stored(texts[0].pk) == "text"
+
+        settings.TEXT_COMPRESSION = "zlib"
+        call_command("train_compression_dictionary", stdout=open("/dev/null", "w"))
+        call_command("compress_texts", batch_size=7, stdout=open("/dev/null", "w"))
+
+        dictionary = CompressionDictionary.objects.get()
+        assert dictionary.algorithm == "zlib"
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT original_text FROM scanned_text_scannedtext WHERE id = %s", [texts[0].pk.hex])
+            value = bytes(cursor.fetchone()[0])
+        assert value[0] == compression.ZLIB | compression.WITH_DICTIONARY
+        compression.reset()  # relecture avec le dictionnaire rechargé depuis la base
+        assert ScannedText.objects.get(pk=texts[0].pk).original_text == f"{PAGE} Exercice 0."
+        assert search.SearchResults(self.user, "exercice")[0:50] != []
@@ -0,0 +1,80 @@
+from unittest.mock import patch
+
+import pytest
+from rest_framework.test import APIClient
+
+from scanned_text.helpers import ai_cache
+from scanned_text.models import ScannedText
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        self.client = APIClient()
+        self.user, token = create_user_with_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        self.scanned = ScannedText.objects.create(
+            user=self.user, original_text="Texte original", processed_text="Texte traité", detected_type="texte"
+        )
+        self.url = f"/api/v1/scanned-texts/{self.scanned.id}/"
+
+    def test_detail_revalidation(self):
+        first = self.client.get(self.url)
+        etag = first["ETag"]
+        assert first.status_code == 200 and first["Cache-Control"] == "private, no-cache"
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"autre", W/{etag}')
+        assert again.status_code == 304
+        assert again.content == b"" and again["ETag"] == etag
+
+        self.scanned.detected_type = "cours"
+        self.scanned.save()
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert changed.status_code == 200 and changed["ETag"] != etag
+
+    def test_json_and_browsable_representations_differ(self):
+        json_etag = self.client.get(self.url)["ETag"]
+        html = self.client.get(self.url, HTTP_ACCEPT="text/html")
+        assert html["ETag"] != json_etag
+
+    def test_list_uses_the_collection_version(self, create_user_with_token):
+        other, _ = create_user_with_token()
+        etag = self.client.get("/api/v1/scanned-texts/")["ETag"]
+        assert self.client.get("/api/v1/scanned-texts/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert self.client.get("/api/v1/scanned-texts/?page_size=1", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+        ScannedText.objects.create(user=other, original_text="Texte d'un autre élève")
+        assert self.client.get("/api/v1/scanned-texts/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        self.client.post("/api/v1/scanned-texts/bulk/", {"items": [{"original_text": "Nouveau"}]}, format="json")
+        assert self.client.get("/api/v1/scanned-texts/", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    @patch("scanned_text.helpers.ai.get_difficult_words_with_meanings.get_difficult_words_with_meanings")
+    def test_artifact_not_modified_skips_the_llm(self, mock_words, openai_configured):
+        mock_words.return_value = {"1": "Définition"}
+        url = f"{self.url}words-explanation/"
+        etag = self.client.get(url)["ETag"]
+
+        ai_cache.clear()  # même sans LRU, le 304 s'appuie sur l'artefact en base
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert mock_words.call_count == 1
+
+        self.user.age = 14
+        self.user.save()
+        assert self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    @patch("scanned_text.helpers.ai.get_difficult_words_with_meanings.get_difficult_words_with_meanings")
+    def test_no_etag_without_ai_cache(self, mock_words, openai_configured, settings):
+        settings.AI_CACHE_ENABLED = False
+        mock_words.return_value = {"1": "Définition"}
+        response = self.client.get(f"{self.url}words-explanation/", HTTP_IF_NONE_MATCH="*")
+        assert response.status_code == 200
+        assert "ETag" not in response
+
+    def test_async_detail(self):
+        url = f"/api/v1/async/scanned-texts/{self.scanned.id}/"
+        etag = self.client.get(url)["ETag"]
+        assert self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert self.client.get(self.url)["ETag"] != etag  # autre représentation (vue DRF)
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pytest
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+from APP import db
+
+
+def test_sqlite_profile_is_the_default(monkeypatch):
+    monkeypatch.delenv("DB_PROFILE", raising=False)
+    monkeypatch.setenv("SQLITE_PATH", "/tmp/syntaiz.sqlite3")
+    default = db.databases(Path("/app"))["default"]
+
+    assert default["ENGINE"] == "django.db.backends.sqlite3"
+    assert default["NAME"] == "/tmp/syntaiz.sqlite3"
+    assert default["CONN_MAX_AGE"] == 60
+    assert default["OPTIONS"] == {"timeout": 5.0, "transaction_mode": "IMMEDIATE"}
+
+
+def test_postgresql_pool_disables_persistent_connections(monkeypatch):
+    monkeypatch.setenv("DB_PROFILE", "postgresql")
+    default = db.databases(Path("/app"))["default"]
+    assert default["ENGINE"] == "django.db.backends.postgresql"
+    assert default["CONN_MAX_AGE"] == 0
+    assert default["CONN_HEALTH_CHECKS"] is True
+    assert default["OPTIONS"]["pool"]["max_size"] == 10
+
+    monkeypatch.setenv("POSTGRES_POOL", "False")
+    default = db.databases(Path("/app"))["default"]
+    assert default["CONN_MAX_AGE"] == 60
+    assert default["OPTIONS"] == {}
+
+
+def test_unknown_profile_is_rejected(monkeypatch):
+    monkeypatch.setenv("DB_PROFILE", "mysql")
+    with pytest.raises(ValueError):
+        db.databases(Path("/app"))
+
+
+@pytest.mark.django_db
+def test_pragmas_are_applied_to_new_connections(tmp_path):
+    settings_dict = {
+        **connections["default"].settings_dict,
+        **db.databases(tmp_path)["default"],
+        "NAME": str(tmp_path / "pragmas.sqlite3"),
+    }
+    connection = DatabaseWrapper(settings_dict, alias="pragmas")
+    try:
+        with connection.cursor() as cursor:
+            values = {
+                name: cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                for name in ("journal_mode", "synchronous", "busy_timeout", "mmap_size")
+            }
+    finally:
+        connection.close()
+    assert values == {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000, "mmap_size": 256 * 2 ** 20}
@@ -0,0 +1,59 @@
+import statistics
+
+import pytest
+
+from benchmarks.fake_openai import FakeOpenAIServer, pedagogic_content
+from scanned_text.helpers import ai_utils, metrics, resilience
+from scanned_text.helpers.ai import (
+    generate_exercise_steps,
+    generate_quiz_from_text,
+    generate_text_explanation,
+    get_difficult_words_with_meanings,
+    process_ocr_text_with_openai,
+)
+
+TEXT = "La photosynthèse transforme l'énergie lumineuse grâce à la chlorophylle."
+
+
+@pytest.fixture
+def fake_llm(monkeypatch, settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    settings.LLM_RETRY_ATTEMPTS = 1
+    metrics.reset()
+    resilience.reset_breaker()
+    with FakeOpenAIServer(content=pedagogic_content, prompt_tokens=None, completion_tokens=None) as server:
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        ai_utils.reset_openai_client()
+        yield server
+        ai_utils.reset_openai_client()
+    metrics.reset()
+
+
+def test_every_helper_parses_the_benchmark_content(fake_llm):
+    # Sans quoi le benchmark de charge mesurerait les fallbacks.
+    ocr = process_ocr_text_with_openai.process_ocr_text_with_openai(TEXT)
+    words = get_difficult_words_with_meanings.get_difficult_words_with_meanings(TEXT, 12, "6e")
+    explanation = generate_text_explanation.generate_text_explanation(TEXT, 12, "6e")
+    steps = generate_exercise_steps.generate_exercise_steps(TEXT, 12, "6e")
+    quiz = generate_quiz_from_text.generate_quiz_from_text(TEXT, 12, "6e")
+
+    assert ocr["detected_type"] == "cours"
+    assert words and all(value.startswith("Définition simple") for value in words.values())
+    assert explanation["explanation"].startswith("La photosynthèse")
+    assert steps["steps"]["0"] == "Lire l'énoncé"
+    assert quiz["questions"][0]["answer"] == "La photosynthèse"
+    assert "syntaiz_ai_fallbacks_total{" not in metrics.render()
+    assert fake_llm.stats()["tokens_in"] > 0
+
+
+def test_error_rate_and_latency_distribution():
+    server = FakeOpenAIServer(latency=0.2, distribution="lognormal", spread=0.5, error_rate=0.25, seed=1)
+    samples = [server.sample_latency() for _ in range(5000)]
+    failures = sum(server.should_fail() for _ in range(4000))
+
+    assert statistics.fmean(samples) == pytest.approx(0.2, rel=0.05)
+    assert statistics.median(samples) < 0.2  # queue à droite
+    assert failures == pytest.approx(1000, rel=0.1)
+    assert server.stats()["errors"] == failures
+    server.stop()
@@ -0,0 +1,26 @@
+import os
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+
+
+def imported_modules(**env):
+    out = StringIO()
+    with patch.dict(os.environ, env):
+        call_command("import_time", repeat=1, top=10000, stdout=out)
+    report = out.getvalue()
+    assert report.startswith("Démarrage WSGI")
+    return {line.split()[-1] for line in report.splitlines() if line[:1] == " "}
+
+
+def test_heavy_modules_are_not_imported_at_boot():
+    modules = imported_modules(API_DOCS_ENABLED="True")
+    assert {"scanned_text.api", "scanned_text.helpers.ai_utils", "drf_spectacular.views"} <= modules
+    assert not {"openai", "httpx", "lorem_text"} & modules
+
+
+def test_docs_can_be_disabled():
+    modules = imported_modules(API_DOCS_ENABLED="False")
+    assert "scanned_text.api" in modules
+    assert not any(name.startswith("drf_spectacular.views") for name in modules)
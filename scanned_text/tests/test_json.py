@@ -0,0 +1,105 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from scanned_text import renderers
+from scanned_text.models import ScannedText
+from scanned_text.parsers import FastJSONParser
+from scanned_text.renderers import FastJSONRenderer
+from scanned_text.serializers import ScannedTextSerializer
+
+pytestmark = pytest.mark.skipif(renderers.orjson is None, reason="orjson non installé")
+
+
+def both(data, accepted_media_type=None, renderer_context=None):
+    fast = FastJSONRenderer().render(data, accepted_media_type, renderer_context)
+    return fast, JSONRenderer().render(data, accepted_media_type, renderer_context)
+
+
+@pytest.mark.django_db
+def test_serialized_texts_are_byte_identical(create_user_with_token):
+    user, _ = create_user_with_token()
+    texts = [
+        ScannedText.objects.create(user=user, original_text=f"Texte n°{i} – « élève »\u2028ligne", processed_text="")
+        for i in range(3)
+    ]
+    data = ScannedTextSerializer(texts, many=True).data
+    fast, reference = both({"next": None, "previous": None, "results": data})
+    assert fast == reference
+    assert b"\\u2028" in fast
+
+
+def test_python_values_use_the_drf_encoder():
+    data = {
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "at": datetime.datetime(2024, 5, 1, 8, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        "naive": datetime.datetime(2024, 5, 1, 8, 30),
+        "day": datetime.date(2024, 5, 1),
+        "time": datetime.time(8, 30),
+        "duration": datetime.timedelta(minutes=3),
+        "message": gettext_lazy("This field is required."),
+        "amount": Decimal("12.50"),
+        "tags": {"a"},
+        3: [1.5, 0.1, True, None],
+    }
+    fast, reference = both(data)
+    assert fast == reference
+    assert b'"2024-05-01T08:30:15.123456Z"' in fast
+
+
+def test_fallbacks_keep_the_standard_output():
+    fast, reference = both({"big": 2 ** 70})
+    assert fast == reference
+    with pytest.raises(TypeError):
+        FastJSONRenderer().render({"obj": object()})
+
+    # Indentation (API navigable, `; indent=`): séparateurs de l'encodeur standard.
+    fast, reference = both({"a": [1, 2]}, "application/json; indent=4")
+    assert fast == reference == b'{\n    "a": [\n        1,\n        2\n    ]\n}'
+
+
+def test_disabled(settings):
+    settings.FAST_JSON_ENABLED = False
+    fast, reference = both({"a": "é"})
+    assert fast == reference
+
+
+def test_parser_matches_the_standard_parser():
+    for body in (
+        '{"original_text": "Élève\\u00e9 \\ud83d\\ude00", "f": [1.5, 1e300]}'.encode(),
+        b'{"n": [123456789012345678901234567890, -9223372036854775809]}',
+        b'"\\ud800"',
+    ):
+        expected = JSONParser().parse(io.BytesIO(body))
+        assert repr(FastJSONParser().parse(io.BytesIO(body))) == repr(expected)
+    assert FastJSONParser().parse(io.BytesIO(b'[1, {"a": null}]')) == [1, {"a": None}]
+
+    for invalid in (b"{", b'{"a": NaN}', b""):
+        with pytest.raises(ParseError) as fast_error:
+            FastJSONParser().parse(io.BytesIO(invalid))
+        with pytest.raises(ParseError) as reference_error:
+            JSONParser().parse(io.BytesIO(invalid))
+        assert str(fast_error.value.detail) == str(reference_error.value.detail)
+
+
+@pytest.mark.django_db
+def test_api_round_trip(create_user_with_token):
+    user, _ = create_user_with_token()
+    client = APIClient()
+    client.force_authenticate(user)
+    body = b'{"items": [{"original_text": "Une page"}'
+    response = client.post("/api/v1/scanned-texts/bulk/", body, content_type="application/json")
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("JSON parse error - ")
+
+    ScannedText.objects.create(user=user, original_text="Une page", processed_text="Une page")
+    response = client.get("/api/v1/scanned-texts/")
+    assert response.content == JSONRenderer().render(response.data)
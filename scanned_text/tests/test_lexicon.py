@@ -0,0 +1,83 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from scanned_text.helpers import lexicon
+from scanned_text.helpers.ai import get_difficult_words_with_meanings as words
+
+
+TEXT = (
+    "La photosynthèse permet aux plantes de fabriquer leur nourriture grâce à la lumière. "
+    "Les feuilles contiennent de la chlorophylle, un pigment vert que Paul observe."
+)
+
+
+def fake_client(content):
+    completions = SimpleNamespace(calls=[])
+
+    def create(**kwargs):
+        completions.calls.append(kwargs)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    completions.create = create
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+class TestGradeLevel:
+    def test_classe_names(self):
+        assert lexicon.grade_level("CP", None) == 1
+        assert lexicon.grade_level("cm2", None) == 5
+        assert lexicon.grade_level("6ème", None) == 6
+        assert lexicon.grade_level("3e", None) == 9
+        assert lexicon.grade_level("Seconde", None) == 10
+        assert lexicon.grade_level("Terminale S", None) == 12
+
+    def test_falls_back_to_age(self):
+        assert lexicon.grade_level(None, 8) == 3
+        assert lexicon.grade_level("inconnue", 40) == 12
+        assert lexicon.grade_level(None, None) == 6
+
+
+class TestDifficultWords:
+    def test_threshold_depends_on_grade(self):
+        young = dict(lexicon.difficult_words(TEXT, 6, "CP"))
+        older = dict(lexicon.difficult_words(TEXT, 17, "Terminale"))
+        assert set(older.values()) <= set(young.values())
+        assert "chlorophylle" in older.values()
+        assert "fabriquer" in young.values() and "fabriquer" not in older.values()
+
+    def test_indices_match_whitespace_split_and_skip_proper_nouns(self):
+        split = TEXT.split()
+        for idx, word in lexicon.difficult_words(TEXT, 6, "CP"):
+            assert word in split[idx]
+        assert "Paul" not in dict(lexicon.difficult_words(TEXT, 6, "CP")).values()
+
+    def test_limit_keeps_rarest_words(self):
+        result = lexicon.difficult_words(TEXT, 6, "CP", limit=2)
+        assert [word for _, word in result] == ["photosynthèse", "chlorophylle"]
+
+
+class TestWordsHelper:
+    def test_works_without_openai(self):
+        with patch.object(words, "get_openai_client", return_value=None):
+            mapping = words.get_difficult_words_with_meanings(TEXT, 10, "CM2")
+        assert mapping
+        assert "photosynthèse" in mapping["1"]
+
+    def test_llm_only_defines_local_candidates(self):
+        client = fake_client(json.dumps({"1": "Fabrication du sucre par la plante.", "99": "hors liste"}))
+        with patch.object(words, "get_openai_client", return_value=client):
+            mapping = words.get_difficult_words_with_meanings(TEXT, 17, "Terminale")
+
+        prompt = client.chat.completions.calls[0]["messages"][1]["content"]
+        assert '"1": photosynthèse' in prompt
+        assert mapping["1"] == "Fabrication du sucre par la plante."
+        assert "99" not in mapping
+        assert set(mapping) == {str(i) for i, _ in lexicon.difficult_words(TEXT, 17, "Terminale")}
+
+    def test_no_llm_call_when_nothing_is_difficult(self):
+        client = fake_client("{}")
+        with patch.object(words, "get_openai_client", return_value=client):
+            assert words.get_difficult_words_with_meanings("Le chat mange.", 10, "CM2") == {}
+        assert client.chat.completions.calls == []
@@ -0,0 +1,127 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from rest_framework.test import APIClient
+
+from scanned_text.helpers import ai_cache, metrics, resilience
+from scanned_text.helpers.ai import generate_quiz_from_text
+from scanned_text.models import ScannedText
+
+TEXT = (
+    "La photosynthèse permet aux plantes de fabriquer leur nourriture grâce à la lumière. "
+    "Les feuilles contiennent de la chlorophylle, un pigment vert. "
+    "Les racines absorbent l'eau et les sels minéraux du sol."
+)
+
+
+class CountingClient:
+    """Client factice qui compte les appels."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content="[]")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture(autouse=True)
+def fresh_shedder(settings):
+    settings.LLM_MAX_IN_FLIGHT = 2
+    settings.LLM_LATENCY_SLO_SECONDS = 1.0
+    resilience.reset_shedder()
+    resilience.reset_breaker()
+    yield
+    resilience.reset_shedder()
+    resilience.reset_breaker()
+
+
+class TestLoadShedder:
+    def test_in_flight_limit(self):
+        shedder = resilience.LoadShedder(2, 0, 60, 30)
+        assert shedder.acquire() and shedder.acquire()
+        assert not shedder.acquire()
+        shedder.release(0.1)
+        assert shedder.in_flight == 1 and shedder.acquire()
+
+    def test_sheds_while_p95_exceeds_slo(self):
+        shedder = resilience.LoadShedder(0, 1.0, 60, 0.05)
+        for duration in [0.1] * 18 + [3.0] * 2:
+            assert shedder.acquire()
+            shedder.release(duration)
+        assert shedder.shedding and not shedder.acquire()
+        # Fenêtre vidée: après LLM_SHED_SECONDS, de nouvelles mesures décident.
+        assert shedder.p95() is None
+        time.sleep(0.06)
+        assert shedder.acquire()
+
+    def test_below_min_samples_does_not_shed(self):
+        shedder = resilience.LoadShedder(0, 1.0, 60, 30)
+        for _ in range(shedder.MIN_SAMPLES - 1):
+            shedder.acquire()
+            shedder.release(5.0)
+        assert not shedder.shedding
+
+
+class TestOverloaded:
+    def test_call_is_not_attempted_and_degrades(self):
+        for _ in range(2):
+            resilience.shedder().acquire()
+        client = CountingClient()
+        with resilience.track() as outer, resilience.track() as inner, pytest.raises(resilience.Overloaded):
+            resilience.create_completion(client, helper="quiz", model="m")
+        assert client.calls == 0
+        assert inner.degraded and outer.degraded
+        assert 'outcome="shed"' in metrics.render()
+
+    def test_slot_is_released_after_each_call(self):
+        client = CountingClient()
+        for _ in range(5):
+            resilience.create_completion(client, model="m")
+        assert client.calls == 5 and resilience.shedder().in_flight == 0
+
+
+def test_fallback_quiz_builds_cloze_questions():
+    questions = generate_quiz_from_text._fallback_quiz(TEXT)["questions"]
+    assert [q["answer"] for q in questions] == ["photosynthèse", "chlorophylle", "absorbent"]
+    for question in questions:
+        assert "_____" in question["question"] and question["answer"] not in question["question"]
+        assert question["answer"] in question["options"] and 3 <= len(question["options"]) <= 4
+    assert generate_quiz_from_text._fallback_quiz(TEXT) == {"questions": questions}
+    assert generate_quiz_from_text._fallback_quiz("Bonjour.") == {}
+
+
+@pytest.mark.django_db
+class TestDegradedResponses:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        ai_cache.clear()
+        self.client = APIClient()
+        user, token = create_user_with_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        scanned = ScannedText.objects.create(user=user, original_text=TEXT, processed_text=TEXT)
+        self.url = f"/api/v1/scanned-texts/{scanned.id}/quiz-from-text/"
+
+    def teardown_method(self):
+        ai_cache.clear()
+
+    def test_shed_quiz_serves_uncached_local_fallback(self):
+        llm = CountingClient()
+        for _ in range(2):
+            resilience.shedder().acquire()
+        with patch("scanned_text.helpers.ai_utils.get_openai_client", return_value=llm), \
+                patch.object(generate_quiz_from_text, "get_openai_client", return_value=llm):
+            resp = self.client.get(self.url)
+            assert resp.status_code == 200
+            assert resp["X-Degraded"] == "1" and "ETag" not in resp
+            assert resp.data[0]["answer"] == "photosynthèse"
+            assert llm.calls == 0
+
+            resilience.reset_shedder()
+            resp = self.client.get(self.url)
+        assert resp.status_code == 200 and "X-Degraded" not in resp
+        assert llm.calls == 1
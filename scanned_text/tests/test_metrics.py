@@ -0,0 +1,169 @@
+import json
+import multiprocessing
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from scanned_text.helpers import metrics, resilience
+from scanned_text.helpers.ai import generate_exercise_steps
+from scanned_text.models import ScannedText
+from scanned_text.throttling import TokenCostThrottle
+
+
+class UsageClient:
+    """Client OpenAI factice dont la réponse consomme 30 tokens en entrée et 12 en sortie."""
+
+    def __init__(self, content='{"0": "Lire"}'):
+        self.content = content
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        message = SimpleNamespace(content=self.content)
+        usage = SimpleNamespace(prompt_tokens=30, completion_tokens=12, total_tokens=42)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    settings.METRICS_TOKEN = ""
+    settings.DEBUG = True
+    metrics.reset()
+    resilience.reset_breaker()
+    cache.clear()
+    yield tmp_path
+    metrics.reset()
+    cache.clear()
+
+
+def sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def _child_work():
+    metrics.LLM_TOKENS.inc(5, helper="quiz", direction="in")
+    metrics.LLM_REQUEST_SECONDS.observe(0.2, helper="quiz")
+    metrics.flush()
+
+
+class TestExposition:
+    def test_histogram_buckets_are_cumulative(self):
+        metrics.LLM_REQUEST_SECONDS.observe(0.03, helper="quiz")
+        metrics.LLM_REQUEST_SECONDS.observe(3.0, helper="quiz")
+        text = metrics.render()
+
+        name = "syntaiz_llm_request_duration_seconds"
+        assert sample(text, f'{name}_bucket{{helper="quiz",le="0.025"}}') == 0
+        assert sample(text, f'{name}_bucket{{helper="quiz",le="0.05"}}') == 1
+        assert sample(text, f'{name}_bucket{{helper="quiz",le="+Inf"}}') == 2
+        assert sample(text, f'{name}_count{{helper="quiz"}}') == 2
+        assert sample(text, f'{name}_sum{{helper="quiz"}}') == pytest.approx(3.03)
+        assert f"# TYPE {name} histogram" in text
+
+    def test_files_of_all_processes_are_summed(self, metrics_dir):
+        metrics.LLM_TOKENS.inc(10, helper="quiz", direction="in")
+        (metrics_dir / "999-other.json").write_text(
+            json.dumps({"syntaiz_llm_tokens_total": [[["quiz", "in"], 7]]})
+        )
+        text = metrics.render()
+        assert sample(text, 'syntaiz_llm_tokens_total{helper="quiz",direction="in"}') == 17
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="fork requis")
+    def test_forked_worker_writes_its_own_file(self, metrics_dir):
+        metrics.LLM_TOKENS.inc(1, helper="quiz", direction="in")
+        metrics.flush()
+        child = multiprocessing.get_context("fork").Process(target=_child_work)
+        child.start()
+        child.join(10)
+
+        assert child.exitcode == 0
+        assert len(list(metrics_dir.glob("*.json"))) == 2
+        text = metrics.render()
+        # Le fils repart de zéro: pas de double comptage des valeurs du parent.
+        assert sample(text, 'syntaiz_llm_tokens_total{helper="quiz",direction="in"}') == 6
+        assert sample(text, 'syntaiz_llm_request_duration_seconds_count{helper="quiz"}') == 1
+
+        # Le fils terminé a été replié dans archive.json: mêmes totaux, pas de fichier orphelin.
+        names = {path.name for path in metrics_dir.glob("*.json")}
+        assert metrics.ARCHIVE_FILE in names and len(names) == 2
+        text = metrics.render()
+        assert sample(text, 'syntaiz_llm_tokens_total{helper="quiz",direction="in"}') == 6
+        assert sample(text, 'syntaiz_llm_request_duration_seconds_count{helper="quiz"}') == 1
+
+
+class TestInstrumentation:
+    def test_llm_call_records_latency_tokens_and_parse_time(self):
+        with patch.object(generate_exercise_steps, "get_openai_client", return_value=UsageClient()):
+            generate_exercise_steps.generate_exercise_steps("Un exercice.", 12, "6e")
+        text = metrics.render()
+
+        assert sample(text, 'syntaiz_llm_requests_total{helper="exercise_steps",outcome="ok"}') == 1
+        assert sample(text, 'syntaiz_llm_tokens_total{helper="exercise_steps",direction="in"}') == 30
+        assert sample(text, 'syntaiz_llm_tokens_total{helper="exercise_steps",direction="out"}') == 12
+        assert sample(text, 'syntaiz_llm_parse_duration_seconds_count{helper="exercise_steps"}') == 1
+
+    def test_unavailable_llm_counts_a_fallback(self, settings):
+        settings.LLM_RETRY_ATTEMPTS = 1
+        client = UsageClient()
+        client.create = lambda **kwargs: (_ for _ in ()).throw(TimeoutError())
+        with patch.object(resilience, "is_retryable", return_value=True), \
+                patch.object(generate_exercise_steps, "get_openai_client", return_value=client):
+            generate_exercise_steps.generate_exercise_steps("Un exercice.", 12, "6e")
+        text = metrics.render()
+
+        assert sample(text, 'syntaiz_llm_requests_total{helper="exercise_steps",outcome="error"}') == 1
+        assert sample(text, 'syntaiz_llm_requests_total{helper="exercise_steps",outcome="unavailable"}') == 1
+        assert sample(text, 'syntaiz_ai_fallbacks_total{helper="exercise_steps"}') == 1
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    def test_api_request_is_measured_end_to_end(self, create_user_with_token):
+        user, token = create_user_with_token()
+        ScannedText.objects.create(user=user, original_text="a", processed_text="b", detected_type="cours")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        assert client.get("/api/v1/scanned-texts/").status_code == 200
+
+        response = APIClient().get("/metrics")
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        text = response.content.decode()
+        assert sample(
+            text, 'syntaiz_http_request_duration_seconds_count{view="baseApi:scanned-texts-list",method="GET",status="200"}'
+        ) == 1
+        assert sample(text, 'syntaiz_response_render_duration_seconds_count{format="json"}') >= 1
+        assert sample(text, 'syntaiz_db_query_duration_seconds_count{alias="default"}') >= 1
+
+    def test_throttled_requests_are_counted(self, create_user_with_token):
+        user, token = create_user_with_token()
+        scanned = ScannedText.objects.create(
+            user=user, original_text="a", processed_text="Un texte.", detected_type="exercice"
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        with patch.dict(TokenCostThrottle.THROTTLE_RATES, {"llm_tokens": "10/day"}):
+            TokenCostThrottle.adjust(user.pk, 10)  # budget du jour épuisé
+            response = client.get(f"/api/v1/scanned-texts/{scanned.pk}/exercise-steps/")
+        assert response.status_code == 429
+
+        text = APIClient().get("/metrics").content.decode()
+        assert sample(text, 'syntaiz_throttled_requests_total{view="exercise_steps"}') == 1
+
+    def test_endpoint_is_closed_without_token_outside_debug(self, settings):
+        settings.DEBUG = False
+        assert APIClient().get("/metrics").status_code == 404
+
+    def test_token_is_required_when_configured(self, settings):
+        settings.DEBUG = False
+        settings.METRICS_TOKEN = "s3cret"
+        assert APIClient().get("/metrics").status_code == 403
+        response = APIClient().get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+        assert response.status_code == 200
@@ -0,0 +1,116 @@
+import random
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from scanned_text.helpers import near_duplicates
+from scanned_text.models import ScannedText, TextFingerprint
+
+PAGE = (
+    "La photosynthèse est le processus par lequel les plantes vertes utilisent l'énergie lumineuse "
+    "pour transformer le dioxyde de carbone et l'eau en glucose et en oxygène. Elle se déroule dans "
+    "les chloroplastes, grâce à la chlorophylle qui capte la lumière. Le glucose produit sert de "
+    "source d'énergie à la plante et de matière première pour fabriquer d'autres molécules, comme "
+    "l'amidon ou la cellulose. L'oxygène est rejeté dans l'atmosphère par les stomates des feuilles."
+)
+OTHER_PAGE = (
+    "La Révolution française commence en 1789 avec la réunion des états généraux à Versailles. "
+    "Les députés du tiers état se proclament Assemblée nationale et jurent de donner une constitution "
+    "au royaume. Le 14 juillet, le peuple de Paris prend la Bastille, symbole de l'arbitraire royal. "
+    "En août, l'Assemblée abolit les privilèges et adopte la Déclaration des droits de l'homme."
+)
+
+
+def ocr_noise(text, rate=0.01, seed=0):
+    """Substitutions, suppressions et insertions de caractères, comme un OCR bruité."""
+    rng = random.Random(seed)
+    out = []
+    for char in text:
+        draw = rng.random()
+        if draw < rate / 3:
+            continue
+        if draw < 2 * rate / 3:
+            out.append(rng.choice("abcdefghijklmnopqrstuvwxyz"))
+        elif draw < rate:
+            out.extend((char, rng.choice("il1.,")))
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def test_signature_tolerates_ocr_noise():
+    page = near_duplicates.signature(PAGE)
+    assert near_duplicates.similarity(page, near_duplicates.signature(ocr_noise(PAGE))) >= 0.6
+    assert near_duplicates.similarity(page, near_duplicates.signature(OTHER_PAGE)) < 0.2
+    assert near_duplicates.signature("Exercice 1 : calculer.") is None
+    assert near_duplicates.decode(near_duplicates.encode(page)) == page
+
+
+@pytest.mark.django_db
+class TestNearDuplicateIngestion:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        self.client = APIClient()
+        self.user, token = create_user_with_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        self.original = ScannedText.objects.create(
+            user=create_user_with_token()[0],
+            original_text=PAGE,
+            processed_text="Texte nettoyé de la page",
+            detected_type="texte",
+        )
+
+    @patch("scanned_text.helpers.ai_utils.mock_process_text", return_value="Nouveau traitement")
+    def test_noisy_rescan_reuses_processing(self, mock_process_text):
+        response = self.client.post("/api/v1/scanned-texts/", {"original_text": ocr_noise(PAGE)}, format="json")
+
+        assert response.status_code == 201
+        assert response.data["processed_text"] == "Texte nettoyé de la page"
+        assert response.data["detected_type"] == "texte"
+        mock_process_text.assert_not_called()
+        # Le nouveau texte est indexé à son tour.
+        assert TextFingerprint.objects.filter(scanned_text_id=response.data["id"]).count() == near_duplicates.BANDS
+
+    @patch("scanned_text.helpers.ai_utils.mock_process_text", return_value="Nouveau traitement")
+    def test_async_endpoint_reuses_processing(self, mock_process_text):
+        response = self.client.post(
+            "/api/v1/async/scanned-texts/", {"original_text": ocr_noise(PAGE, seed=1)}, format="json"
+        )
+
+        assert response.json()["processed_text"] == "Texte nettoyé de la page"
+        mock_process_text.assert_not_called()
+
+    @patch("scanned_text.helpers.ai_utils.mock_process_text", return_value="Nouveau traitement")
+    def test_threshold_and_unrelated_texts(self, mock_process_text, settings):
+        other = self.client.post("/api/v1/scanned-texts/", {"original_text": OTHER_PAGE}, format="json")
+        assert other.data["processed_text"] == "Nouveau traitement"
+
+        settings.SCANNED_TEXT_DEDUP_THRESHOLD = 1.0
+        strict = self.client.post("/api/v1/scanned-texts/", {"original_text": ocr_noise(PAGE)}, format="json")
+        assert strict.data["processed_text"] == "Nouveau traitement"
+
+    @patch("scanned_text.helpers.ai_utils.mock_process_text", return_value="Nouveau traitement")
+    def test_bulk_create_reuses_and_indexes(self, mock_process_text):
+        items = [{"original_text": ocr_noise(PAGE, seed=2)}, {"original_text": OTHER_PAGE}]
+        response = self.client.post("/api/v1/scanned-texts/bulk/", {"items": items}, format="json")
+
+        assert [result["data"]["processed_text"] for result in response.data] == [
+            "Texte nettoyé de la page",
+            "Nouveau traitement",
+        ]
+        created = [result["data"]["id"] for result in response.data]
+        assert TextFingerprint.objects.filter(scanned_text_id__in=created).count() == 2 * near_duplicates.BANDS
+
+    def test_backfill_command(self):
+        ScannedText.objects.filter(pk=self.original.pk).update(minhash=None)
+        TextFingerprint.objects.all().delete()
+        short = ScannedText.objects.create(user=self.user, original_text="Trop court.")
+
+        call_command("index_near_duplicates", stdout=open("/dev/null", "w"))
+
+        assert TextFingerprint.objects.filter(scanned_text=self.original).count() == near_duplicates.BANDS
+        assert near_duplicates.find(ocr_noise(PAGE)) == self.original
+        short.refresh_from_db()
+        assert bytes(short.minhash) == b""
@@ -0,0 +1,84 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from scanned_text.helpers import resilience
+from scanned_text.helpers.ai import process_ocr_text_with_openai as ocr
+from scanned_text.helpers.ai_utils import estimate_tokens
+
+
+def fake_response(payload):
+    message = SimpleNamespace(content=json.dumps(payload))
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, **kwargs):
+        text = kwargs["messages"][1]["content"]
+        self.calls.append(text)
+        detected = "exercice" if "Calcule" in text else "cours"
+        return fake_response({"processed_text": f"propre-{len(self.calls)}", "detected_type": detected})
+
+
+def fake_client():
+    return SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+
+
+class TestSplitIntoChunks:
+    def test_short_text_is_single_chunk(self):
+        assert ocr.split_into_chunks("Un court paragraphe.", 700) == ["Un court paragraphe."]
+
+    def test_chunks_respect_limit_and_keep_all_words(self):
+        text = "\n\n".join("Phrase numéro %d du paragraphe. " % i * 30 for i in range(10))
+        chunks = ocr.split_into_chunks(text, 200)
+        assert len(chunks) > 1
+        assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+        assert " ".join(chunks).split() == text.split()
+
+    def test_oversized_sentence_is_split_on_words(self):
+        text = "mot " * 1000
+        chunks = ocr.split_into_chunks(text, 50)
+        assert all(estimate_tokens(chunk) <= 50 for chunk in chunks)
+        assert sum(len(chunk.split()) for chunk in chunks) == 1000
+
+
+class TestChunkedProcessing:
+    def test_long_document_is_mapped_then_reduced(self, monkeypatch):
+        monkeypatch.setenv("OCR_CHUNK_MAX_TOKENS", "100")
+        client = fake_client()
+        text = "\n\n".join(["Le cours explique la notion. " * 10] * 3 + ["Calcule la somme. " * 10])
+        with patch.object(ocr, "get_openai_client", return_value=client):
+            result = ocr.process_ocr_text_with_openai(text)
+
+        calls = client.chat.completions.calls
+        assert len(calls) == 4
+        assert all("sur 4 d'un document plus long" in call for call in calls)
+        assert result["detected_type"] == "cours"
+        assert result["processed_text"].count("propre-") == 4
+
+    def test_short_document_uses_single_call(self):
+        client = fake_client()
+        with patch.object(ocr, "get_openai_client", return_value=client):
+            result = ocr.process_ocr_text_with_openai("Calcule la somme de 2 et 3.")
+        assert len(client.chat.completions.calls) == 1
+        assert result["detected_type"] == "exercice"
+
+    def test_failed_chunk_keeps_raw_text(self):
+        chunks = ["fragment un", "fragment deux"]
+        results = [{"processed_text": "propre", "detected_type": "exercice"}, {"processed_text": "fragment deux", "detected_type": None}]
+        reduced = ocr._reduce_chunks(chunks, results)
+        assert reduced == {"processed_text": "propre\n\nfragment deux", "detected_type": "exercice"}
+
+    def test_unparseable_single_chunk_keeps_full_text_and_degrades(self):
+        client = fake_client()
+        client.chat.completions.create = lambda **kwargs: SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Désolé, je ne peux pas."))]
+        )
+        text = "Le cours explique la notion de fraction. " * 20
+        with patch.object(ocr, "get_openai_client", return_value=client), resilience.track() as outcome:
+            result = ocr.process_ocr_text_with_openai(text)
+        assert result == {"processed_text": text, "detected_type": None}
+        assert outcome.degraded
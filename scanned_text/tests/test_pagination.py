@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from scanned_text.models import ScannedText
+
+
+def create_texts(user, count, created=None, detected_type="cours"):
+    texts = ScannedText.objects.bulk_create(
+        ScannedText(user=user, original_text=f"Texte {i}", processed_text=f"Texte {i}", detected_type=detected_type)
+        for i in range(count)
+    )
+    if created is not None:
+        # Même instant pour tous: seul l'id départage.
+        ScannedText.objects.filter(id__in=[text.id for text in texts]).update(createdAt=created)
+    return texts
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        self.client = APIClient()
+        self.base_url = "/api/v1/scanned-texts/"
+        self.user, token = create_user_with_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+
+    def test_list_is_scoped_to_the_requesting_user(self, create_user_with_token):
+        other, _ = create_user_with_token()
+        create_texts(self.user, 2)
+        create_texts(other, 3)
+
+        response = self.client.get(self.base_url)
+
+        assert response.status_code == 200
+        assert len(response.data["results"]) == 2
+        assert response.data["next"] is None and response.data["previous"] is None
+
+    def test_filter_by_detected_type(self):
+        create_texts(self.user, 2, detected_type="cours")
+        create_texts(self.user, 1, detected_type="exercice")
+
+        response = self.client.get(self.base_url, {"detected_type": "exercice"})
+
+        assert [text["detected_type"] for text in response.data["results"]] == ["exercice"]
+
+    def test_cursors_walk_every_row_once_across_ties(self):
+        now = timezone.now()
+        create_texts(self.user, 4, created=now)
+        create_texts(self.user, 3, created=now - timedelta(minutes=1))
+        expected = list(
+            ScannedText.objects.filter(user=self.user).order_by("-createdAt", "-id").values_list("id", flat=True)
+        )
+
+        pages, url = [], f"{self.base_url}?page_size=3"
+        while url:
+            response = self.client.get(url)
+            pages.append([text["id"] for text in response.data["results"]])
+            url = response.data["next"]
+
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert [pk for page in pages for pk in page] == [str(pk) for pk in expected]
+
+        # Retour en arrière depuis la dernière page.
+        previous = self.client.get(response.data["previous"]).data
+        assert [text["id"] for text in previous["results"]] == pages[1]
+        assert previous["next"] is not None
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(self.base_url, {"cursor": "pas-un-curseur"})
+        assert response.status_code == 404
+
+    def test_query_count_does_not_depend_on_position(self, django_assert_max_num_queries):
+        create_texts(self.user, 30)
+        first = self.client.get(self.base_url, {"page_size": 10})
+        second = self.client.get(first.data["next"])
+
+        # Authentification + une seule requête de page, user compris (select_related).
+        with django_assert_max_num_queries(3):
+            last = self.client.get(second.data["next"])
+        assert len(last.data["results"]) == 10
+        assert last.data["next"] is None
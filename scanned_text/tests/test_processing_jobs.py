@@ -0,0 +1,75 @@
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from scanned_text.helpers import job_queue
+from scanned_text.models import ProcessingJob, ScannedText
+
+
+@pytest.mark.django_db
+class TestAsyncIngestion:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        self.client = APIClient()
+        self.base_url = "/api/v1/scanned-texts/"
+        import os
+        os.environ["ENV"] = "testing"
+        user, token = create_user_with_token()
+        self.user = user
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+
+    @override_settings(SCANNED_TEXT_ASYNC_INGESTION=True)
+    def test_create_returns_202_with_job(self):
+        response = self.client.post(self.base_url, {"original_text": "Exercice 1"}, format="json")
+        assert response.status_code == 202
+        assert response.data["status"] == "pending"
+        assert response["Location"].endswith(f"/{response.data['scanned_text']}/processing-status/")
+        scanned = ScannedText.objects.get(id=response.data["scanned_text"])
+        assert scanned.processed_text is None
+
+    @patch("scanned_text.helpers.ai_utils.mock_detect_type", return_value="exercice")
+    @patch("scanned_text.helpers.ai_utils.mock_process_text", return_value="Texte traité")
+    def test_prefer_header_and_worker_completes_job(self, mock_process_text, mock_detect_type):
+        response = self.client.post(
+            self.base_url, {"original_text": "Exercice 1"}, format="json", HTTP_PREFER="respond-async"
+        )
+        assert response.status_code == 202
+
+        assert job_queue.run_pending("test-worker") == 1
+
+        status_resp = self.client.get(response.data["status_url"])
+        assert status_resp.data["status"] == "done"
+        assert status_resp.data["progress"] == 100
+        scanned = ScannedText.objects.get(id=response.data["scanned_text"])
+        assert scanned.processed_text == "Texte traité"
+        assert scanned.detected_type == "exercice"
+
+    @override_settings(SCANNED_TEXT_JOB_MAX_ATTEMPTS=2)
+    @patch("scanned_text.helpers.processing.process_original_text", side_effect=RuntimeError("LLM down"))
+    def test_failed_job_is_retried_then_marked_failed(self, mock_process):
+        scanned = ScannedText.objects.create(user=self.user, original_text="Texte")
+        job = job_queue.enqueue(scanned)
+
+        job_queue.run_job(job_queue.claim_next("w"))
+        job.refresh_from_db()
+        assert job.status == ProcessingJob.PENDING
+        assert job.error == "LLM down"
+
+        ProcessingJob.objects.filter(pk=job.pk).update(available_at=timezone.now())
+        job_queue.run_job(job_queue.claim_next("w"))
+        job.refresh_from_db()
+        assert job.status == ProcessingJob.FAILED
+        assert job.attempts == 2
+
+    def test_claim_is_exclusive(self):
+        scanned = ScannedText.objects.create(user=self.user, original_text="Texte")
+        job_queue.enqueue(scanned)
+        assert job_queue.claim_next("w1") is not None
+        assert job_queue.claim_next("w2") is None
+
+    def test_processing_status_without_job(self):
+        scanned = ScannedText.objects.create(user=self.user, original_text="Texte", processed_text="Texte")
+        resp = self.client.get(f"{self.base_url}{scanned.id}/processing-status/")
+        assert resp.status_code == 404
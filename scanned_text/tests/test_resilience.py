@@ -0,0 +1,178 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import openai
+import pytest
+from rest_framework.test import APIClient
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from scanned_text.helpers import ai_cache, ai_utils, processing, resilience
+from scanned_text.helpers.ai import generate_exercise_steps
+
+
+REQUEST = httpx.Request("POST", "http://llm.test/v1/chat/completions")
+
+
+def connection_error():
+    return openai.APIConnectionError(request=REQUEST)
+
+
+def status_error(code):
+    return openai.APIStatusError("erreur", response=httpx.Response(code, request=REQUEST), body=None)
+
+
+class FlakyClient:
+    """Client factice: lève les erreurs fournies puis renvoie une réponse."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = []
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.errors:
+            raise self.errors.pop(0)
+        message = SimpleNamespace(content='{"steps": {"0": "Lire"}}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(settings):
+    settings.LLM_RETRY_BASE_DELAY = 0
+    settings.LLM_RETRY_ATTEMPTS = 3
+    settings.LLM_BREAKER_FAILURES = 3
+    settings.LLM_BREAKER_RESET_SECONDS = 60
+    resilience.reset_breaker()
+    yield
+    resilience.reset_breaker()
+
+
+class TestCircuitBreaker:
+    def test_opens_then_half_opens_with_single_probe(self):
+        breaker = resilience.CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open" and not breaker.allow()
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        assert not breaker.allow()  # un seul appel d'essai
+        breaker.record_success()
+        assert breaker.state == "closed" and breaker.allow()
+
+    def test_failed_probe_reopens(self):
+        breaker = resilience.CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_failure()
+        assert not breaker.allow()
+
+
+class TestCreateCompletion:
+    def test_retries_transient_errors(self):
+        client = FlakyClient(connection_error(), status_error(503))
+        resilience.create_completion(client, model="m")
+        assert len(client.calls) == 3
+        assert resilience.breaker().state == "closed"
+
+    def test_does_not_retry_client_errors(self):
+        client = FlakyClient(status_error(400))
+        with pytest.raises(openai.APIStatusError):
+            resilience.create_completion(client, model="m")
+        assert len(client.calls) == 1
+
+    def test_gives_up_and_marks_degraded(self):
+        client = FlakyClient(*[connection_error()] * 3)
+        with resilience.track() as outcome, pytest.raises(resilience.LLMUnavailable):
+            resilience.create_completion(client, model="m")
+        assert outcome.degraded
+        assert resilience.breaker().state == "open"
+
+        # Disjoncteur ouvert: échec immédiat, sans appel.
+        with pytest.raises(resilience.CircuitOpenError):
+            resilience.create_completion(client, model="m")
+        assert len(client.calls) == 3
+
+    def test_timeout_comes_from_request_budget(self):
+        client = FlakyClient()
+        with resilience.request_budget(5):
+            resilience.create_completion(client, model="m")
+        assert 0 < client.calls[0]["timeout"] <= 5
+
+        resilience.create_completion(client, model="m")
+        assert "timeout" not in client.calls[1]
+
+        with resilience.request_budget(0), pytest.raises(resilience.DeadlineExceeded):
+            resilience.create_completion(client, model="m")
+
+
+class TestFallbacks:
+    def test_helper_falls_back_when_provider_is_down(self):
+        client = FlakyClient(*[connection_error()] * 3)
+        with patch.object(generate_exercise_steps, "get_openai_client", return_value=client):
+            result = generate_exercise_steps.generate_exercise_steps("Calcule 2 + 2.", 10, "CM2")
+        assert result == generate_exercise_steps._fallback_steps("Calcule 2 + 2.")
+
+    @pytest.mark.django_db
+    def test_degraded_result_is_not_cached(self):
+        ai_cache.clear()
+        with patch("scanned_text.helpers.ai_utils.get_openai_client", return_value=object()):
+            def compute():
+                resilience.mark_degraded()
+                return {"steps": {}}
+
+            ai_cache.get_or_compute("exercise-steps", 1, "texte", 10, "CM2", compute)
+            assert ai_cache.lookup("exercise-steps", 1, "texte", 10, "CM2") is None
+
+    @patch("scanned_text.helpers.processing.config", return_value="production")
+    @patch("scanned_text.helpers.processing.type_classifier.predict", return_value=None)
+    @patch("scanned_text.helpers.ai.process_ocr_text_with_openai.process_ocr_text_with_openai")
+    def test_ingestion_fails_instead_of_truncating(self, mock_ocr, _predict, _config):
+        def unavailable(*args, **kwargs):
+            resilience.mark_degraded()
+            return {"processed_text": "tronqué...", "detected_type": None}
+
+        mock_ocr.side_effect = unavailable
+        with pytest.raises(processing.ProcessingUnavailable):
+            processing.process_original_text("texte brut")
+
+    @pytest.mark.django_db
+    @patch("scanned_text.helpers.processing.config", return_value="production")
+    @patch("scanned_text.helpers.processing.type_classifier.predict", return_value=None)
+    @patch("scanned_text.helpers.ai.process_ocr_text_with_openai.process_ocr_text_with_openai")
+    def test_unavailable_provider_is_a_503_with_retry_after(self, mock_ocr, _predict, _config, create_user_with_token):
+        def unavailable(*args, **kwargs):
+            resilience.mark_degraded()
+            return {"processed_text": "texte brut", "detected_type": None}
+
+        mock_ocr.side_effect = unavailable
+        breaker = resilience.CircuitBreaker(1, 30)
+        breaker.record_failure()
+        _, token = create_user_with_token()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        with patch.object(resilience, "breaker", return_value=breaker):
+            resp = client.post("/api/v1/scanned-texts/", {"original_text": "texte brut"}, format="json")
+        assert resp.status_code == 503
+        assert 29 <= int(resp["Retry-After"]) <= 30
+        assert "X-Degraded" not in resp
+
+    def test_slow_provider_is_bounded_by_budget(self, monkeypatch):
+        with FakeOpenAIServer(latency=2.0, content='{"steps": {"0": "Lire"}}') as server:
+            monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+            monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+            ai_utils.reset_openai_client()
+            try:
+                start = time.perf_counter()
+                with resilience.request_budget(0.3):
+                    result = generate_exercise_steps.generate_exercise_steps("Calcule 2 + 2.", 10, "CM2")
+                elapsed = time.perf_counter() - start
+            finally:
+                ai_utils.reset_openai_client()
+        assert result == generate_exercise_steps._fallback_steps("Calcule 2 + 2.")
+        assert elapsed < 1.0
@@ -93,3 +93,54 @@ class TestScannedTextAPI:
         url = f"{self.base_url}{missing_id}/words-explanation/"
         resp = self.client.get(url)
         assert resp.status_code == 404
+
+
+@pytest.mark.django_db
+class TestBulkCreate:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        self.client = APIClient()
+        self.base_url = "/api/v1/scanned-texts/"
+        self.user, token = create_user_with_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+
+    @patch("scanned_text.helpers.ai_utils.mock_detect_type")
+    @patch("scanned_text.helpers.ai_utils.mock_process_text")
+    def test_bulk_create(self, mock_process_text, mock_detect_type):
+        mock_process_text.side_effect = lambda text: f"Traité: {text}"
+        mock_detect_type.return_value = "exercice"
+        data = {"items": [{"original_text": "Page 1"}, {"original_text": "Page 2"}]}
+        response = self.client.post(f"{self.base_url}bulk/", data, format="json")
+        assert response.status_code == 201
+        assert [r["status"] for r in response.data] == [201, 201]
+        assert response.data[1]["data"]["processed_text"] == "Traité: Page 2"
+        assert ScannedText.objects.filter(user=self.user).count() == 2
+
+    @patch("scanned_text.helpers.ai_utils.mock_process_text")
+    def test_bulk_create_reports_per_item_errors(self, mock_process_text):
+        from scanned_text.helpers.processing import ProcessingError
+
+        def process(text):
+            if text == "Boom":
+                raise RuntimeError("Erreur IA interne")
+            if text == "Vide":
+                raise ProcessingError("Erreur lors du traitement du texte avec OpenAI.")
+            return text
+        mock_process_text.side_effect = process
+        data = {"items": [
+            {"original_text": "Page 1"}, {"original_text": " "}, {"original_text": "Boom"}, {"original_text": "Vide"},
+        ]}
+        response = self.client.post(f"{self.base_url}bulk/", data, format="json")
+        assert response.status_code == 207
+        assert [r["status"] for r in response.data] == [201, 400, 500, 500]
+        # Le détail d'une exception inattendue n'est pas renvoyé au client.
+        assert response.data[2]["error"] == "Erreur lors du traitement du texte."
+        assert response.data[3]["error"] == "Erreur lors du traitement du texte avec OpenAI."
+        assert ScannedText.objects.filter(user=self.user).count() == 1
+
+    def test_bulk_create_too_many_items(self):
+        from django.test import override_settings
+        with override_settings(SCANNED_TEXT_BULK_MAX_ITEMS=1):
+            data = {"items": [{"original_text": "A"}, {"original_text": "B"}]}
+            response = self.client.post(f"{self.base_url}bulk/", data, format="json")
+        assert response.status_code == 400
@@ -0,0 +1,107 @@
+import sqlite3
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from scanned_text.helpers import search
+from scanned_text.models import ScannedText
+
+
+@pytest.mark.django_db
+class TestSearch:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        self.client = APIClient()
+        self.url = "/api/v1/scanned-texts/search/"
+        self.user, token = create_user_with_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+
+    def create(self, text, user=None, processed=None):
+        return ScannedText.objects.create(
+            user=user or self.user, original_text=text, processed_text=processed, detected_type="texte"
+        )
+
+    def ids(self, query, **params):
+        response = self.client.get(self.url, {"q": query, **params})
+        assert response.status_code == 200
+        return [text["id"] for text in response.data["results"]]
+
+    def test_results_are_ranked_and_scoped_to_the_user(self, create_user_with_token):
+        other, _ = create_user_with_token()
+        once = self.create("La photosynthèse des plantes.")
+        twice = self.create("Photosynthèse: la photosynthèse a lieu dans la feuille.")
+        self.create("La Révolution française.")
+        self.create("La photosynthèse chez les algues.", user=other)
+
+        assert self.ids("photosynthese") == [str(twice.id), str(once.id)]  # accents ignorés
+
+    def test_index_follows_updates_deletes_and_bulk_create(self):
+        text = self.create("Le cycle de l'eau.")
+        assert self.ids("eau") == [str(text.id)]
+
+        text.processed_text = "Évaporation et condensation."
+        text.save()
+        assert self.ids("condensation") == [str(text.id)]
+
+        ScannedText.objects.filter(pk=text.pk).update(original_text="Les volcans.")
+        assert self.ids("eau") == []
+        assert self.ids("volcans") == [str(text.id)]
+
+        text.delete()
+        assert self.ids("volcans") == []
+
+        ScannedText.objects.bulk_create([ScannedText(user=self.user, original_text="Les fractions.")])
+        assert len(self.ids("fractions")) == 1
+
+    def test_every_word_is_required_and_fts_syntax_is_literal(self):
+        both = self.create("Les angles d'un triangle.")
+        self.create("Les angles droits.")
+
+        assert self.ids('triangle" angles* (') == [str(both.id)]
+        assert self.client.get(self.url, {"q": " ?! "}).status_code == 400
+
+    def test_pagination_by_page_number(self):
+        for _ in range(5):
+            self.create("Le théorème de Pythagore.")
+
+        first = self.client.get(self.url, {"q": "pythagore", "page_size": 2}).data
+        second = self.client.get(first["next"]).data
+        third = self.client.get(second["next"]).data
+
+        assert [len(page["results"]) for page in (first, second, third)] == [2, 2, 1]
+        assert first["previous"] is None and third["next"] is None
+        assert "page=" not in self.client.get(second["previous"]).wsgi_request.get_full_path()
+
+    def test_install_repairs_an_index_dropped_by_a_table_rebuild(self):
+        text = self.create("Les nombres premiers.")
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {search.FTS_TABLE}_ai")
+            cursor.execute(f"INSERT INTO {search.FTS_TABLE}({search.FTS_TABLE}) VALUES ('delete-all')")
+
+        assert search.install() is True
+        assert search.install() is False
+        assert self.ids("premiers") == [str(text.id)]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_external_sqlite_client_can_write_and_is_indexed(create_user_with_token):
+    """Les triggers n'appellent aucune fonction déclarée par Django: un client sqlite3 brut peut écrire."""
+    if connection.vendor != "sqlite":
+        pytest.skip("SQLite uniquement")
+    user, _ = create_user_with_token()
+    text = ScannedText.objects.create(user=user, original_text="Le cycle de l'eau. " * 40)
+    name = connection.settings_dict["NAME"]
+    external = sqlite3.connect(name, uri=name.startswith("file:"))
+    try:
+        external.execute(
+            f"UPDATE {search.TABLE} SET processed_text = ? WHERE id = ?", ["Les volcans actifs.", text.pk.hex]
+        )
+        external.commit()
+    finally:
+        external.close()
+
+    assert search.SearchResults(user, "volcans")[0:10] == [text]
+    assert search.SearchResults(user, "eau")[0:10] == [text]
+    ScannedText.objects.filter(pk=text.pk).delete()
+    assert search.SearchResults(user, "volcans")[0:10] == []
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scanned_text.helpers import single_flight
+
+
+@pytest.fixture(autouse=True)
+def clean_stats(settings, tmp_path):
+    settings.SINGLE_FLIGHT_LOCK_DIR = str(tmp_path)
+    single_flight.reset_stats()
+    yield
+    single_flight.reset_stats()
+
+
+def run_concurrently(n, target):
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestSingleFlight:
+    def test_concurrent_identical_calls_are_coalesced(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"3": "Définition"}
+
+        results = run_concurrently(10, lambda: single_flight.do("words:abc", compute))
+        assert results == [{"3": "Définition"}] * 10
+        assert len(calls) == 1
+        assert single_flight.stats()["leader"] == 1
+        assert single_flight.stats()["coalesced_local"] == 9
+
+    def test_different_keys_are_not_coalesced(self):
+        calls = []
+        single_flight.do("a", lambda: calls.append("a"))
+        single_flight.do("b", lambda: calls.append("b"))
+        assert calls == ["a", "b"]
+
+    def test_leader_error_is_shared(self):
+        def compute():
+            time.sleep(0.1)
+            raise RuntimeError("LLM indisponible")
+
+        results = run_concurrently(3, lambda: single_flight.do("err", compute))
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_recheck_after_waiting_for_other_process(self):
+        # Simule un autre processus qui détient le verrou fichier de la clé.
+        release = threading.Event()
+
+        def other_process():
+            with single_flight._file_lock("shared"):
+                release.wait()
+
+        holder = threading.Thread(target=other_process)
+        holder.start()
+        time.sleep(0.05)
+        threading.Timer(0.1, release.set).start()
+
+        computed = []
+        value = single_flight.do("shared", lambda: computed.append(1), recheck=lambda: "depuis le cache")
+        holder.join()
+        assert value == "depuis le cache"
+        assert computed == []
+        assert single_flight.stats()["coalesced_remote"] == 1
+
+    def test_async_calls_are_coalesced(self):
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return {"3": "Définition"}
+
+        async def main():
+            return await asyncio.gather(*(single_flight.ado("words:async", compute) for _ in range(5)))
+
+        assert asyncio.run(main()) == [{"3": "Définition"}] * 5
+        assert len(calls) == 1
+        assert single_flight.stats()["coalesced_local"] == 4
+
+    def test_different_keys_do_not_wait_for_each_other(self, tmp_path):
+        # Un autre processus détient le verrou de "a": "b" s'exécute sans attendre.
+        release = threading.Event()
+
+        def other_process():
+            with single_flight._file_lock("a"):
+                release.wait()
+
+        holder = threading.Thread(target=other_process)
+        holder.start()
+        time.sleep(0.05)
+        try:
+            start = time.perf_counter()
+            value = single_flight.do("b", lambda: "calculé", recheck=lambda: None)
+            elapsed = time.perf_counter() - start
+        finally:
+            release.set()
+            holder.join()
+        assert value == "calculé" and elapsed < 0.05
+        assert single_flight.stats()["coalesced_remote"] == 0
+
+    def test_lock_file_is_removed_by_the_leader(self, tmp_path):
+        for i in range(20):
+            single_flight.do(f"words:{i}", lambda: None, recheck=lambda: None)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_waiter_relocks_after_the_leader_removed_the_file(self):
+        release = threading.Event()
+
+        def other_process():
+            with single_flight._file_lock("shared"):
+                release.wait()
+
+        holder = threading.Thread(target=other_process)
+        holder.start()
+        time.sleep(0.05)
+        threading.Timer(0.1, release.set).start()
+        handle, waited = single_flight._acquire_file_lock("shared")
+        holder.join()
+        try:
+            assert waited and single_flight._is_current(handle, single_flight.lock_path("shared"))
+        finally:
+            single_flight._release_file_lock(handle)
@@ -0,0 +1,88 @@
+import pytest
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from scanned_text.helpers import resilience
+from scanned_text.models import ScannedText
+
+QUIZ = [{"question": "Sujet ?", "options": ["A", "B", "C"], "answer": "A", "explanation": "Parce que."}]
+
+
+# Le cache n'est actif que si un client OpenAI est configuré.
+pytestmark = pytest.mark.usefixtures("openai_configured")
+
+
+@pytest.mark.django_db
+class TestStudyPack:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        self.client = APIClient()
+        user, token = create_user_with_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        self.scanned = ScannedText.objects.create(
+            user=user,
+            original_text="Exercice",
+            processed_text="Calcule la somme des nombres suivants.",
+            detected_type="exercice",
+        )
+        self.url = f"/api/v1/scanned-texts/{self.scanned.id}/"
+
+    @patch("scanned_text.helpers.ai.generate_study_pack.generate_study_pack")
+    def test_single_call_then_individual_endpoints_reuse(self, mock_pack):
+        mock_pack.return_value = {
+            "words": {"3": "Addition"},
+            "explanation": {"explanation": "Il faut additionner.", "tokens_used": 42},
+            "steps": {"steps": {"0": "Lire l'énoncé"}},
+            "quiz": {"questions": QUIZ},
+        }
+        resp = self.client.get(f"{self.url}study-pack/")
+        assert resp.status_code == 200
+        assert resp.data["words"] == {"3": "Addition"}
+        assert resp.data["explanation"] == "Il faut additionner."
+        assert resp.data["steps"] == {"0": "Lire l'énoncé"}
+        assert resp.data["quiz"][0]["answer"] == "A"
+        assert mock_pack.call_count == 1
+
+        with patch(
+            "scanned_text.helpers.ai.generate_text_explanation.generate_text_explanation"
+        ) as mock_explanation:
+            resp = self.client.get(f"{self.url}text-explanation/")
+        assert resp.data["explanation"] == "Il faut additionner."
+        mock_explanation.assert_not_called()
+
+    @patch("scanned_text.helpers.ai.generate_study_pack.generate_study_pack", return_value={})
+    @patch("scanned_text.helpers.ai.get_difficult_words_with_meanings.get_difficult_words_with_meanings")
+    def test_selected_parts_and_fallback_to_dedicated_helper(self, mock_words, mock_pack):
+        mock_words.return_value = {"1": "Somme"}
+        resp = self.client.get(f"{self.url}study-pack/?parts=words")
+        assert resp.status_code == 200
+        assert resp.data == {"words": {"1": "Somme"}}
+        mock_pack.assert_called_once()
+        assert mock_pack.call_args.args[3] == ["words"]
+
+    @patch("scanned_text.helpers.ai.generate_study_pack.generate_study_pack")
+    @patch("scanned_text.helpers.ai.get_difficult_words_with_meanings.get_difficult_words_with_meanings")
+    def test_unavailable_llm_returns_503_without_per_part_calls(self, mock_words, mock_pack):
+        mock_pack.side_effect = resilience.CircuitOpenError("Disjoncteur ouvert.")
+        resp = self.client.get(f"{self.url}study-pack/?parts=words")
+        assert resp.status_code == 503
+        assert int(resp["Retry-After"]) >= 1
+        mock_words.assert_not_called()
+
+    @patch("scanned_text.helpers.ai.generate_study_pack.generate_study_pack", side_effect=ValueError("JSON"))
+    @patch("scanned_text.helpers.ai.get_difficult_words_with_meanings.get_difficult_words_with_meanings")
+    def test_unusable_pack_falls_back_to_dedicated_helper(self, mock_words, mock_pack):
+        mock_words.return_value = {"1": "Somme"}
+        resp = self.client.get(f"{self.url}study-pack/?parts=words")
+        assert resp.status_code == 200
+        assert resp.data == {"words": {"1": "Somme"}}
+
+    def test_unknown_part(self):
+        resp = self.client.get(f"{self.url}study-pack/?parts=words,poems")
+        assert resp.status_code == 400
+
+    def test_steps_only_for_exercises(self):
+        self.scanned.detected_type = "cours"
+        self.scanned.save()
+        resp = self.client.get(f"{self.url}study-pack/?parts=steps")
+        assert resp.status_code == 400
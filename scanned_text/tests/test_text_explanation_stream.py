@@ -0,0 +1,102 @@
+import json
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from scanned_text.helpers import ai_cache, resilience
+from scanned_text.helpers.ai import generate_text_explanation
+from scanned_text.models import ScannedText
+
+
+def chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+
+
+class BrokenStreamClient:
+    """Client factice: le flux s'ouvre puis se coupe après le premier fragment."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        def stream():
+            yield chunk("La plante ")
+            raise openai.APIConnectionError(request=httpx.Request("POST", "http://llm.test/v1/chat/completions"))
+
+        return stream()
+
+
+def parse_events(response):
+    body = b"".join(response.streaming_content).decode()
+    events = []
+    for block in body.strip().split("\n\n"):
+        event = "message"
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((event, json.loads(line[len("data: "):])))
+    return events
+
+
+@pytest.mark.django_db
+class TestTextExplanationStream:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        ai_cache.clear()
+        self.client = APIClient()
+        user, token = create_user_with_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        self.scanned = ScannedText.objects.create(
+            user=user,
+            original_text="Texte original",
+            processed_text="La photosynthèse transforme la lumière.",
+            detected_type="cours",
+        )
+        self.url = f"/api/v1/scanned-texts/{self.scanned.id}/text-explanation-stream/"
+
+    @patch(
+        "scanned_text.helpers.ai.generate_text_explanation.stream_text_explanation",
+        return_value=iter(["La plante ", "utilise ", "la lumière."]),
+    )
+    def test_streams_deltas_then_done(self, mock_stream):
+        response = self.client.get(self.url, HTTP_ACCEPT="text/event-stream")
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/event-stream")
+        events = parse_events(response)
+        assert [data["delta"] for event, data in events if event == "message"] == [
+            "La plante ", "utilise ", "la lumière."
+        ]
+        assert events[-1] == ("done", {"explanation": "La plante utilise la lumière."})
+
+    def test_fallback_without_openai(self):
+        response = self.client.get(self.url, HTTP_ACCEPT="text/event-stream")
+        events = parse_events(response)
+        assert events[-1][0] == "done"
+        assert "photosynthèse" in events[-1][1]["explanation"]
+
+    def test_missing_processed_text_is_error_event(self):
+        self.scanned.processed_text = None
+        self.scanned.save()
+        response = self.client.get(self.url, HTTP_ACCEPT="text/event-stream")
+        assert response.status_code == 400
+        assert response.content.startswith(b"event: error\n")
+
+    def test_interrupted_stream_is_not_cached_and_trips_the_breaker(self, openai_configured, settings):
+        settings.LLM_BREAKER_FAILURES = 1
+        resilience.reset_breaker()
+        try:
+            with patch.object(generate_text_explanation, "get_openai_client", return_value=BrokenStreamClient()):
+                events = parse_events(self.client.get(self.url, HTTP_ACCEPT="text/event-stream"))
+            assert events[-1] == ("done", {"explanation": "La plante", "degraded": True})
+            assert ai_cache.lookup(
+                "text-explanation", generate_text_explanation.PROMPT_VERSION,
+                self.scanned.processed_text, 12, None,
+            ) is None
+            assert resilience.breaker().state == "open"
+        finally:
+            resilience.reset_breaker()
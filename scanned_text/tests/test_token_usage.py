@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from scanned_text.helpers import resilience, token_usage
+from scanned_text.helpers.ai import generate_text_explanation
+from scanned_text.models import ScannedText, TokenUsage
+from scanned_text.throttling import TokenCostThrottle
+
+
+class UsageClient:
+    """Client OpenAI factice dont chaque réponse consomme `prompt`/`completion` tokens."""
+
+    def __init__(self, prompt=0, completion=0):
+        self.usage = SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion, total_tokens=prompt + completion)
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        message = SimpleNamespace(content="Une explication.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=self.usage)
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    cache.clear()
+    resilience.reset_breaker()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestTokenUsageTable:
+    def test_usage_is_accumulated_per_user_and_day(self, create_user_with_token):
+        user, _ = create_user_with_token()
+        for _ in range(2):
+            with token_usage.meter() as usage:
+                token_usage.record({"prompt_tokens": 100, "completion_tokens": 20})
+                token_usage.record(SimpleNamespace(prompt_tokens=5, completion_tokens=1))
+            token_usage.save(user, usage)
+
+        row = TokenUsage.objects.get(user=user)
+        assert (row.prompt_tokens, row.completion_tokens, row.calls) == (210, 42, 4)
+        assert row.day == timezone.localdate()
+
+    def test_record_outside_meter_is_ignored(self):
+        token_usage.record({"prompt_tokens": 100})
+
+    def test_meter_shared_across_threads_loses_nothing(self):
+        import contextvars
+        from concurrent.futures import ThreadPoolExecutor
+
+        def record_many(_):
+            for _ in range(1000):
+                token_usage.record({"prompt_tokens": 2, "completion_tokens": 1})
+
+        with token_usage.meter() as usage:
+            jobs = [(contextvars.copy_context(), i) for i in range(8)]
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(lambda job: job[0].run(record_many, job[1]), jobs))
+        assert (usage.prompt_tokens, usage.completion_tokens, usage.calls) == (16000, 8000, 8000)
+
+
+@pytest.mark.django_db
+class TestTokenCostThrottle:
+    @pytest.fixture(autouse=True)
+    def setup(self, create_user_with_token):
+        self.client = APIClient()
+        self.user, token = create_user_with_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+        self.scanned = ScannedText.objects.create(
+            user=self.user, original_text="Brut", processed_text="Le soleil brille.", detected_type="texte"
+        )
+        self.url = f"/api/v1/scanned-texts/{self.scanned.id}/text-explanation/"
+
+    def get_explanation(self, client):
+        with patch.object(generate_text_explanation, "get_openai_client", return_value=client):
+            return self.client.get(self.url)
+
+    def test_helper_usage_is_recorded_for_request_user(self):
+        response = self.get_explanation(UsageClient(prompt=300, completion=120))
+        assert response.status_code == 200
+        row = TokenUsage.objects.get(user=self.user)
+        assert (row.prompt_tokens, row.completion_tokens, row.calls) == (300, 120, 1)
+
+    @patch.dict(TokenCostThrottle.THROTTLE_RATES, {"llm_tokens": "3000/hour"})
+    def test_requests_are_charged_by_actual_tokens(self):
+        # Coût attendu 1200, réel 0: la charge est remboursée à chaque fois.
+        for _ in range(5):
+            assert self.get_explanation(UsageClient()).status_code == 200
+
+        assert self.get_explanation(UsageClient(prompt=2000, completion=500)).status_code == 200
+        throttled = self.get_explanation(UsageClient())
+        assert throttled.status_code == 429
+        assert int(throttled["Retry-After"]) > 0
+
+        # Les lectures sans appel LLM ne sont pas concernées.
+        assert self.client.get("/api/v1/scanned-texts/").status_code == 200
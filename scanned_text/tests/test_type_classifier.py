@@ -0,0 +1,90 @@
+import random
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+
+from scanned_text.helpers import processing, type_classifier
+from scanned_text.models import ScannedText
+
+
+EXERCISES = [
+    "Exercice {n} : calcule {a} + {b} puis écris le résultat.",
+    "Complète les phrases avec le verbe au présent. Question {n}.",
+    "Résous le problème : Léa a {a} billes, elle en gagne {b}. Combien en a-t-elle ?",
+    "Souligne le sujet de chaque phrase et entoure le verbe ({n} points).",
+]
+LESSONS = [
+    "Leçon {n} : le verbe est un mot qui indique une action ou un état.",
+    "Chapitre {n}. Les plantes fabriquent leur nourriture grâce à la lumière du soleil.",
+    "Le Moyen Âge commence vers l'an {a} et se termine vers {b}. Les seigneurs vivent dans des châteaux.",
+    "À retenir : un triangle possède trois côtés et trois angles.",
+]
+
+
+def make_samples(count, seed=0):
+    rng = random.Random(seed)
+    samples = []
+    for n in range(count):
+        values = {"n": n, "a": rng.randint(1, 900), "b": rng.randint(1, 900)}
+        samples.append((rng.choice(EXERCISES).format(**values), "exercice"))
+        samples.append((rng.choice(LESSONS).format(**values), "cours"))
+    return samples
+
+
+class TestNaiveBayes:
+    def test_learns_exercise_vs_lesson(self):
+        model = type_classifier.train(make_samples(40))
+        proba = type_classifier.predict_proba(model, "Exercice 3 : calcule 12 + 5.")
+        assert max(proba, key=proba.get) == "exercice"
+        proba = type_classifier.predict_proba(model, "Leçon 2 : le verbe indique une action.")
+        assert max(proba, key=proba.get) == "cours"
+        assert sum(proba.values()) == pytest.approx(1.0)
+
+    def test_predict_uses_saved_model_and_confidence(self, tmp_path, settings):
+        settings.TYPE_CLASSIFIER_PATH = str(tmp_path / "model.json")
+        assert type_classifier.predict("Exercice 1 : calcule 2 + 2.") is None
+
+        type_classifier.save(type_classifier.train(make_samples(40)))
+        assert type_classifier.predict("Exercice 1 : calcule 2 + 2.") == "exercice"
+
+        settings.TYPE_CLASSIFIER_MIN_CONFIDENCE = 1.01
+        assert type_classifier.predict("Exercice 1 : calcule 2 + 2.") is None
+
+
+@pytest.mark.django_db
+class TestTrainCommand:
+    def test_trains_and_reports(self, tmp_path, settings, create_user_with_token):
+        settings.TYPE_CLASSIFIER_PATH = str(tmp_path / "model.json")
+        user, _ = create_user_with_token()
+        ScannedText.objects.bulk_create(
+            [ScannedText(user=user, original_text=text, detected_type=label) for text, label in make_samples(25)]
+            + [ScannedText(user=user, original_text="???", detected_type="inconnu")]
+        )
+
+        out = StringIO()
+        call_command("train_type_classifier", stdout=out)
+
+        report = out.getvalue()
+        assert "cours=25, exercice=25" in report
+        assert "Précision (test)" in report and "µs" in report
+        assert type_classifier.predict("Exercice 4 : calcule 8 + 9.") == "exercice"
+
+
+class TestPipeline:
+    @patch("scanned_text.helpers.processing.config", return_value="production")
+    @patch("scanned_text.helpers.processing.type_classifier.predict", return_value="exercice")
+    @patch("scanned_text.helpers.ai.process_ocr_text_with_openai.process_ocr_text_with_openai")
+    def test_known_type_is_passed_to_llm(self, mock_ocr, _predict, _config):
+        mock_ocr.return_value = {"processed_text": "Texte propre", "detected_type": None}
+        assert processing.process_original_text("brut") == ("Texte propre", "exercice")
+        assert mock_ocr.call_args.kwargs["detected_type"] == "exercice"
+
+    def test_cleanup_only_prompt(self):
+        from scanned_text.helpers.ai import process_ocr_text_with_openai as ocr
+
+        full = ocr._request_kwargs("texte")["messages"][0]["content"]
+        cleanup = ocr._request_kwargs("texte", detected_type="cours")["messages"][0]["content"]
+        assert "detected_type" in full and "detected_type" not in cleanup
+        assert len(cleanup) < len(full)
@@ -0,0 +1,78 @@
+from rest_framework.throttling import SimpleRateThrottle
+
+# Coût attendu (tokens LLM) de chaque action, facturé à l'admission puis
+# remplacé par la consommation réelle en fin de requête (0 si réponse en cache).
+EXPECTED_TOKEN_COSTS = {
+    "create": 1500,
+    "bulk_create": 1500,  # par élément
+    "words_explanation": 1200,
+    "text_explanation": 1200,
+    "text_explanation_stream": 1200,
+    "exercise_steps": 1200,
+    "quiz_from_text": 1500,
+    "study_pack": 3500,
+}
+
+
+def expected_token_cost(request, view) -> int:
+    getter = getattr(view, "expected_token_cost", None)
+    return getter(request) if getter is not None else 0
+
+
+class TokenCostThrottle(SimpleRateThrottle):
+    """Limite les tokens LLM consommés par utilisateur sur une fenêtre glissante.
+
+    Le taux `llm_tokens` (ex. "100000/hour") s'exprime en tokens, pas en
+    requêtes: une lecture sans appel LLM ne coûte rien, une génération de quiz
+    coûte ce qu'elle consomme réellement.
+    """
+
+    scope = "llm_tokens"
+
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": request.user.pk}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        cost = min(expected_token_cost(request, view), self.num_requests)
+        if cost <= 0:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        self.history = [(t, c) for t, c in self.cache.get(self.key, []) if t > self.now - self.duration]
+        self.cost = cost
+        if sum(c for _, c in self.history) + cost > self.num_requests:
+            return self.throttle_failure()
+
+        self.history.insert(0, (self.now, cost))
+        self.cache.set(self.key, self.history, self.duration)
+        # Lu en fin de requête (token_usage.settle) pour corriger la charge.
+        getattr(request, "_request", request).token_cost_charged = cost
+        return True
+
+    def wait(self):
+        # Attend que suffisamment de charges anciennes sortent de la fenêtre.
+        excess = sum(c for _, c in self.history) + self.cost - self.num_requests
+        for timestamp, cost in reversed(self.history):
+            excess -= cost
+            if excess <= 0:
+                return max(0, timestamp + self.duration - self.now)
+        return self.duration
+
+    @classmethod
+    def adjust(cls, user_pk, delta: int) -> None:
+        """Ajoute `delta` tokens (négatif: remboursement) à la fenêtre de l'utilisateur."""
+        throttle = cls()
+        if throttle.rate is None or not delta:
+            return
+        key = throttle.cache_format % {"scope": cls.scope, "ident": user_pk}
+        now = throttle.timer()
+        history = [(t, c) for t, c in throttle.cache.get(key, []) if t > now - throttle.duration]
+        history.insert(0, (now, delta))
+        throttle.cache.set(key, history, throttle.duration)
@@ -0,0 +1,17 @@
+from django.urls import path
+
+from scanned_text import async_api
+
+# Vues asynchrones (ASGI), montées sous /api/v1/async/.
+urlpatterns = [
+    path('scanned-texts/', async_api.scanned_text_create, name='async-scanned-texts-create'),
+    path('scanned-texts/<uuid:pk>/', async_api.scanned_text_detail, name='async-scanned-texts-detail'),
+    path('scanned-texts/<uuid:pk>/words-explanation/', async_api.words_explanation,
+         name='async-scanned-texts-words-explanation'),
+    path('scanned-texts/<uuid:pk>/text-explanation/', async_api.text_explanation,
+         name='async-scanned-texts-text-explanation'),
+    path('scanned-texts/<uuid:pk>/exercise-steps/', async_api.exercise_steps,
+         name='async-scanned-texts-exercise-steps'),
+    path('scanned-texts/<uuid:pk>/quiz-from-text/', async_api.quiz_from_text,
+         name='async-scanned-texts-quiz-from-text'),
+]
@@ -1,3 +1,24 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotFound
+
+from scanned_text.helpers import metrics
+
+
+def metrics_view(request):
+    """Métriques agrégées de tous les processus, au format texte Prometheus.
+
+    Fermé par défaut: 404 sauf si METRICS_TOKEN est défini (le scraper envoie
+    alors `Authorization: Bearer <token>`) ou en DEBUG.
+    """
+    if not metrics.enabled():
+        return HttpResponseNotFound()
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not token and not settings.DEBUG:
+        return HttpResponseNotFound()
+    if token:
+        provided = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(provided, token):
+            return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")